@@ -15,9 +15,20 @@ CHUNKING_CONFIG = {
     'min_chunk_size': 1000,
     
     # Maximum number of (date, ssn) keys per chunk
-    # Prevents SQL statement from becoming too large
+    # (keys are passed as one unnest() array, so this bounds work per chunk, not SQL size)
     'max_keys_per_chunk': 5000,
     
+    # How (date, ssn) groups are packed into chunks:
+    #   'lpt'        - heaviest group first, always into the lightest chunk (balanced wall time)
+    #   'sequential' - fill chunks in (VisitDate, SSN) order up to max_chunk_size
+    'packing_strategy': 'lpt',
+    
+    # Group weight for packing: 'rows', or 'pairs' (conflict work is quadratic per group)
+    'packing_weight': 'rows',
+    
+    # Number of chunks for 'lpt' (None = total rows / target_chunk_size)
+    'num_chunks': None,
+    
     # Date range for processing (relative to NOW())
     'date_range': {
         'lookback_years': 2,
@@ -27,6 +38,13 @@ CHUNKING_CONFIG = {
     # Parallel execution settings (for Step Functions)
     'max_concurrency': 5,
     
+    # Chunk plan table (in the conflict schema) shared by planner and workers
+    'plan_table': 'task02_chunk_plan',
+    
+    # Seconds a 'running' chunk stays claimed before another worker may take it over
+    # (matches the 15-minute Lambda timeout)
+    'claim_lease_seconds': 900,
+    
     # Retry settings per chunk
     'retry': {
         'max_attempts': 2,
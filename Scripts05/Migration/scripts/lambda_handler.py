@@ -291,21 +291,26 @@ def lambda_handler(event: Dict[str, Any], context: Optional[Any]) -> Dict[str, A
         # Action: Process Task 02 Chunk (Phase 2)
         elif action == 'process_task02_chunk':
             chunk_id = event.get('chunk_id')
+            plan_id = event.get('plan_id')
             
-            if chunk_id is None:
-                error_msg = "Missing required parameter: chunk_id"
+            if not plan_id:
+                error_msg = "Missing required parameter: plan_id"
                 logger.error(error_msg)
                 raise Exception(error_msg)
             
-            logger.info(f"Processing Task 02 chunk {chunk_id}")
+            if chunk_id is None:
+                logger.info(f"Processing next available Task 02 chunk of plan {plan_id}")
+            else:
+                logger.info(f"Processing Task 02 chunk {chunk_id} of plan {plan_id}")
             
             connector = PostgresConnector(**POSTGRES_CONFIG)
             task = Task02ProcessChunk(connector)
-            # Keys will be loaded from /tmp/task02_chunks.json automatically
-            result = task.execute(chunk_id=chunk_id)
+            # Keys are claimed from the chunk plan table (FOR UPDATE SKIP LOCKED)
+            result = task.execute(chunk_id=chunk_id, plan_id=plan_id)
+            chunk_id = result.get('chunk_id')
             
             if result['status'] == 'success':
-                logger.info(f"Chunk {chunk_id} completed: {result['rows_updated']} rows in {result['duration_seconds']:.2f}s")
+                logger.info(f"Chunk {chunk_id} completed: {result['rows_updated']} rows in {result.get('duration_seconds', 0):.2f}s")
                 # Return data directly for Step Functions
                 return result
             else:
@@ -11,13 +11,23 @@ This allows you to:
 Usage:
     python scripts/simulate_step_functions.py
     python scripts/simulate_step_functions.py --mock  # Fast test with mock DB
+
+    # Phase 2: chunked Map state, iterations run in a process pool
+    python scripts/simulate_step_functions.py --chunked --concurrency 8
+    python scripts/simulate_step_functions.py --chunked --mock --failure-rate 0.1 \\
+        --retry-interval 0.5 --timeline-file logs/map_timeline.json
 """
 
 import sys
+import os
+import json
 import time
+import random
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
@@ -32,22 +42,141 @@ from config.settings import (
 from src.connectors.postgres_connector import PostgresConnector
 from src.tasks.task_01_copy_to_temp import Task01CopyToTemp
 from src.tasks.task_02_update_conflicts import Task02UpdateConflictVisitMaps
+from src.tasks.task_02_get_chunks import Task02GetChunks
+from src.tasks.task_02_process_chunk import Task02ProcessChunk
+from config.chunking_config import CHUNKING_CONFIG
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+class InjectedFailure(Exception):
+    """Failure injected by the simulator (stands in for a Lambda error)."""
+
+
+def _mock_distribution(num_keys: int, seed: int) -> List[Dict[str, Any]]:
+    """
+    Synthetic (VisitDate, SSN) distribution for mock runs.
+    Group sizes are Pareto-distributed so a few groups are much heavier,
+    like large agencies in production.
+    
+    Args:
+        num_keys: Number of (date, ssn) groups
+        seed: Random seed
+        
+    Returns:
+        List of dicts with visit_date, ssn, row_count
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            'visit_date': f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}",
+            'ssn': f"{rng.randrange(10**9):09d}",
+            'row_count': max(1, int(rng.paretovariate(1.5) * 5)),
+        }
+        for i in range(num_keys)
+    ]
+
+
+def run_map_iteration(chunk_id: int, plan_id: Optional[str], keys: Optional[List[Dict[str, Any]]],
+                      options: Dict[str, Any], map_start: float) -> List[Dict[str, Any]]:
+    """
+    One Map iteration, run in a worker process.
+    Applies the ProcessSingleChunk retry policy (MaxAttempts retries with
+    IntervalSeconds * BackoffRate^n waits) and records every attempt.
+    
+    Args:
+        chunk_id: Chunk to process
+        plan_id: Chunk plan (real database) or None when keys are given (mock)
+        keys: Chunk keys for mock runs
+        options: Map options (use_mock, failure_rate, seed, retries, retry_interval,
+                 backoff_rate, mock_seconds_per_row)
+        map_start: time.time() when the Map state started (timeline origin)
+    
+    Returns:
+        List of attempt records; the last one has status SUCCEEDED or FAILED
+    """
+    if options['use_mock']:
+        from scripts.mock_postgres_connector import MockPostgresConnector
+        connector = MockPostgresConnector(**POSTGRES_CONFIG)
+    else:
+        # Own connector per iteration: real lock contention and connection pressure
+        connector = PostgresConnector(**POSTGRES_CONFIG)
+    
+    task = Task02ProcessChunk(connector)
+    rng = random.Random(options['seed'] * 100003 + chunk_id)
+    attempts = []
+    interval = options['retry_interval']
+    
+    for attempt in range(1, options['retries'] + 2):
+        start = time.time()
+        record = {
+            'chunk_id': chunk_id,
+            'attempt': attempt,
+            'pid': os.getpid(),
+            'start': start - map_start,
+        }
+        
+        try:
+            if rng.random() < options['failure_rate']:
+                raise InjectedFailure(f"Injected failure (chunk {chunk_id}, attempt {attempt})")
+            
+            if keys is not None:
+                if options['use_mock']:
+                    # Mock connector returns instantly - simulate work proportional to rows
+                    time.sleep(sum(k['rows'] for k in keys) * options['mock_seconds_per_row'])
+                result = task.execute(chunk_id=chunk_id, keys=keys)
+            else:
+                result = task.execute(chunk_id=chunk_id, plan_id=plan_id)
+            
+            record.update(status='SUCCEEDED', rows_updated=result.get('rows_updated', 0))
+        except Exception as e:
+            record.update(status='FAILED', error=f"{type(e).__name__}: {e}")
+        
+        record['end'] = time.time() - map_start
+        record['duration'] = record['end'] - record['start']
+        attempts.append(record)
+        
+        if record['status'] == 'SUCCEEDED' or attempt > options['retries']:
+            break
+        
+        time.sleep(interval)
+        interval *= options['backoff_rate']
+    
+    return attempts
+
+
 class StepFunctionsSimulator:
     """Simulates AWS Step Functions execution locally."""
     
-    def __init__(self, use_mock: bool = False):
+    def __init__(self, use_mock: bool = False, chunked: bool = False,
+                 map_options: Optional[Dict[str, Any]] = None):
         """
         Initialize simulator.
         
         Args:
             use_mock: If True, uses mock connector instead of real database
+            chunked: If True, simulates the Phase 2 state machine (chunks + Map)
+            map_options: Map state settings (concurrency, retries, retry_interval,
+                         backoff_rate, failure_rate, seed, mock_keys, mock_seconds_per_row)
         """
         self.use_mock = use_mock
+        self.chunked = chunked
+        retry = CHUNKING_CONFIG['retry']
+        self.map_options = {
+            'concurrency': CHUNKING_CONFIG['max_concurrency'],
+            'retries': retry['max_attempts'],
+            'retry_interval': retry['interval_seconds'],
+            'backoff_rate': retry['backoff_rate'],
+            'failure_rate': 0.0,
+            'seed': 0,
+            'mock_keys': 2000,
+            'mock_seconds_per_row': 0.0005,
+            **(map_options or {}),
+        }
+        self.map_options['use_mock'] = use_mock
+        self.chunks_result: Dict[str, Any] = {}
+        self.timeline: List[Dict[str, Any]] = []
         self.results: List[Dict[str, Any]] = []
         self.start_time = None
         self.end_time = None
@@ -59,10 +188,15 @@ class StepFunctionsSimulator:
         print("AWS STEP FUNCTIONS - LOCAL SIMULATION")
         print("=" * 70)
         print(f"Started: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print(f"Database: {POSTGRES_CONFIG.get('database', 'N/A')}")
+        print(f"Database: {POSTGRES_CONFIG.get('database') or 'N/A'}")
         print(f"Conflict Schema: {CONFLICT_SCHEMA}")
         print(f"Analytics Schema: {ANALYTICS_SCHEMA}")
         print(f"Mock Mode: {self.use_mock}")
+        if self.chunked:
+            opts = self.map_options
+            print(f"Map: MaxConcurrency={opts['concurrency']}, retries={opts['retries']} "
+                  f"(interval {opts['retry_interval']}s x{opts['backoff_rate']}), "
+                  f"failure rate={opts['failure_rate']:.0%}")
         print("=" * 70)
         print()
     
@@ -121,6 +255,11 @@ class StepFunctionsSimulator:
                     details['Rows Updated'] = f"{result['updated_rows']:,}"
                 if 'duration_seconds' in result:
                     details['Task Duration'] = f"{result['duration_seconds']:.2f}s"
+                if 'num_chunks' in result:
+                    details['Chunks'] = result['num_chunks']
+                if 'iterations' in result:
+                    details['Iterations'] = result['iterations']
+                    details['Retries'] = result['retries']
             
             self._print_state_result(state_name, True, duration, details)
             
@@ -153,30 +292,28 @@ class StepFunctionsSimulator:
         self.start_time = time.time()
         self._print_header()
         
+        if self.chunked:
+            states = [
+                ("ValidateConfig", self._state_validate_config),
+                ("ExecuteTask01", self._state_execute_task_01),
+                ("GetTask02Chunks", self._state_get_task02_chunks),
+                ("ProcessTask02Chunks", self._state_process_task02_chunks),
+            ]
+        else:
+            states = [
+                ("ValidateConfig", self._state_validate_config),
+                ("ExecuteTask01", self._state_execute_task_01),
+                ("ExecuteTask02", self._state_execute_task_02),
+            ]
+        
         try:
-            # State 1: Validate Configuration
-            self._execute_state(
-                state_name="ValidateConfig",
-                state_func=self._state_validate_config,
-                state_number=1,
-                total_states=3
-            )
-            
-            # State 2: Execute Task 01
-            self._execute_state(
-                state_name="ExecuteTask01",
-                state_func=self._state_execute_task_01,
-                state_number=2,
-                total_states=3
-            )
-            
-            # State 3: Execute Task 02
-            self._execute_state(
-                state_name="ExecuteTask02",
-                state_func=self._state_execute_task_02,
-                state_number=3,
-                total_states=3
-            )
+            for state_number, (state_name, state_func) in enumerate(states, 1):
+                self._execute_state(
+                    state_name=state_name,
+                    state_func=state_func,
+                    state_number=state_number,
+                    total_states=len(states)
+                )
             
             self.end_time = time.time()
             self._print_summary()
@@ -184,6 +321,7 @@ class StepFunctionsSimulator:
             return {
                 'status': 'SUCCEEDED',
                 'states': self.results,
+                'timeline': self.timeline,
                 'total_duration': self.end_time - self.start_time
             }
         
@@ -194,12 +332,16 @@ class StepFunctionsSimulator:
             return {
                 'status': 'FAILED',
                 'states': self.results,
+                'timeline': self.timeline,
                 'total_duration': self.end_time - self.start_time,
                 'error': str(e)
             }
     
     def _state_validate_config(self) -> Dict[str, Any]:
         """State 1: Validate configuration."""
+        if self.use_mock:
+            # Mock connector never connects - POSTGRES_* settings are not needed
+            return {'message': 'Mock mode: database configuration not required'}
         validate_config()
         return {'message': 'Configuration validated successfully'}
     
@@ -239,6 +381,120 @@ class StepFunctionsSimulator:
         else:
             raise Exception(result.get('error', 'Task 02 failed'))
     
+    def _state_get_task02_chunks(self) -> Dict[str, Any]:
+        """State 3 (chunked): Generate the Task 02 chunk plan."""
+        if self.use_mock:
+            # Mock connector can't answer the distribution query - use a synthetic one
+            from scripts.mock_postgres_connector import MockPostgresConnector
+            task = Task02GetChunks(MockPostgresConnector(**POSTGRES_CONFIG))
+            distribution = _mock_distribution(self.map_options['mock_keys'], self.map_options['seed'])
+            chunks = task._create_balanced_chunks(distribution)
+            self.chunks_result = {
+                'num_chunks': len(chunks),
+                'chunk_ids': [c['chunk_id'] for c in chunks],
+                'plan_id': None,
+                'chunks': {c['chunk_id']: c['keys'] for c in chunks},
+                'packing': task.packing_report,
+            }
+            return {k: v for k, v in self.chunks_result.items() if k != 'chunks'}
+        
+        task = Task02GetChunks(PostgresConnector(**POSTGRES_CONFIG))
+        result = task.run()
+        
+        if result['status'] != 'success':
+            raise Exception(result.get('error', 'GetTask02Chunks failed'))
+        
+        self.chunks_result = result['result']
+        return self.chunks_result
+    
+    def _state_process_task02_chunks(self) -> Dict[str, Any]:
+        """
+        State 4 (chunked): Map state over chunk ids.
+        Iterations run in separate processes, at most MaxConcurrency at a time.
+        As in Step Functions, an iteration that exhausts its retries fails the
+        Map; iterations not yet started are cancelled.
+        """
+        chunk_ids = self.chunks_result.get('chunk_ids', [])
+        if not chunk_ids:
+            return {'iterations': 0, 'retries': 0}
+        
+        plan_id = self.chunks_result.get('plan_id')
+        chunk_keys = self.chunks_result.get('chunks', {})
+        map_start = time.time()
+        failed = []
+        
+        with ProcessPoolExecutor(max_workers=self.map_options['concurrency']) as executor:
+            futures = {
+                executor.submit(run_map_iteration, chunk_id, plan_id, chunk_keys.get(chunk_id),
+                                self.map_options, map_start): chunk_id
+                for chunk_id in chunk_ids
+            }
+            pending = set(futures)
+            
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    attempts = future.result()
+                    self.timeline.extend(attempts)
+                    if attempts[-1]['status'] == 'FAILED':
+                        failed.append(attempts[-1])
+                
+                if failed:
+                    # Iterations already running finish; their attempts stay on the timeline
+                    running = [future for future in pending if not future.cancel()]
+                    for future in running:
+                        self.timeline.extend(future.result())
+                    break
+        
+        self.timeline.sort(key=lambda a: (a['start'], a['chunk_id'], a['attempt']))
+        self._print_timeline(time.time() - map_start)
+        
+        if failed:
+            first = failed[0]
+            raise Exception(f"Map failed: chunk {first['chunk_id']} exhausted retries ({first['error']})")
+        
+        return {
+            'iterations': len(chunk_ids),
+            'retries': sum(1 for a in self.timeline if a['attempt'] > 1),
+            'updated_rows': sum(a.get('rows_updated', 0) for a in self.timeline),
+        }
+    
+    def _print_timeline(self, map_duration: float, width: int = 40):
+        """Print per-iteration attempts as a timeline with duration percentiles."""
+        if not self.timeline:
+            return
+        
+        scale = width / map_duration if map_duration > 0 else 0
+        
+        print(f"\nMap Timeline ({len(self.timeline)} attempts, {map_duration:.2f}s):")
+        print("-" * 70)
+        print(f"{'Chunk':>5} {'Try':>3} {'PID':>7} {'Start':>8} {'Dur':>7}  Timeline")
+        for a in self.timeline:
+            offset = int(a['start'] * scale)
+            length = max(1, int(a['duration'] * scale))
+            bar = (' ' * offset + ('#' if a['status'] == 'SUCCEEDED' else 'x') * length)[:width]
+            print(f"{a['chunk_id']:>5} {a['attempt']:>3} {a['pid']:>7} "
+                  f"{a['start']:>7.2f}s {a['duration']:>6.2f}s  |{bar:<{width}}|")
+        
+        durations = sorted(a['duration'] for a in self.timeline if a['status'] == 'SUCCEEDED')
+        if durations:
+            def pct(p):
+                return durations[min(len(durations) - 1, int(p * len(durations)))]
+            print("-" * 70)
+            print(f"Iteration duration: p50={pct(0.50):.2f}s, p95={pct(0.95):.2f}s, "
+                  f"max={durations[-1]:.2f}s (tail/median {durations[-1] / pct(0.50) if pct(0.50) else 0:.1f}x)")
+    
+    def write_timeline(self, path: str):
+        """Write the Map timeline as JSON for offline analysis."""
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump({
+                'map_options': self.map_options,
+                'packing': self.chunks_result.get('packing'),
+                'timeline': self.timeline,
+            }, f, indent=2, default=str)
+        print(f"\nTimeline written to {path}")
+    
     def _print_summary(self, failed: bool = False):
         """Print execution summary."""
         total_duration = self.end_time - self.start_time
@@ -294,13 +550,47 @@ class StepFunctionsSimulator:
 
 def main():
     """Main entry point for simulation."""
-    # Check for mock flag
-    use_mock = '--mock' in sys.argv
+    parser = argparse.ArgumentParser(description="Simulate the Step Functions pipeline locally")
+    parser.add_argument('--mock', action='store_true', help="Use the mock connector (no database)")
+    parser.add_argument('--chunked', action='store_true',
+                        help="Simulate the Phase 2 state machine (chunk plan + parallel Map)")
+    parser.add_argument('--concurrency', type=int, default=CHUNKING_CONFIG['max_concurrency'],
+                        help="Map MaxConcurrency (worker processes)")
+    parser.add_argument('--retries', type=int, default=CHUNKING_CONFIG['retry']['max_attempts'],
+                        help="Retries per iteration (Retry.MaxAttempts)")
+    parser.add_argument('--retry-interval', type=float, default=CHUNKING_CONFIG['retry']['interval_seconds'],
+                        help="Seconds before the first retry (Retry.IntervalSeconds)")
+    parser.add_argument('--backoff-rate', type=float, default=CHUNKING_CONFIG['retry']['backoff_rate'],
+                        help="Retry.BackoffRate")
+    parser.add_argument('--failure-rate', type=float, default=0.0,
+                        help="Probability that an attempt fails before running (0-1)")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for injected failures and mock data")
+    parser.add_argument('--mock-keys', type=int, default=2000, help="(date, ssn) groups in mock mode")
+    parser.add_argument('--mock-seconds-per-row', type=float, default=0.0005,
+                        help="Simulated work per row in mock mode")
+    parser.add_argument('--timeline-file', help="Write the Map timeline as JSON to this path")
+    args = parser.parse_args()
     
     # Create and run simulator
-    simulator = StepFunctionsSimulator(use_mock=use_mock)
+    simulator = StepFunctionsSimulator(
+        use_mock=args.mock,
+        chunked=args.chunked,
+        map_options={
+            'concurrency': args.concurrency,
+            'retries': args.retries,
+            'retry_interval': args.retry_interval,
+            'backoff_rate': args.backoff_rate,
+            'failure_rate': args.failure_rate,
+            'seed': args.seed,
+            'mock_keys': args.mock_keys,
+            'mock_seconds_per_row': args.mock_seconds_per_row,
+        }
+    )
     result = simulator.run()
     
+    if args.timeline_file and simulator.timeline:
+        simulator.write_timeline(args.timeline_file)
+    
     # Exit with appropriate code
     sys.exit(0 if result['status'] == 'SUCCEEDED' else 1)
 
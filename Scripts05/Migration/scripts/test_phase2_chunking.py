@@ -4,7 +4,6 @@ Run this locally before deploying to AWS.
 """
 
 import sys
-import json
 from pathlib import Path
 
 # Add project root to path
@@ -15,6 +14,7 @@ from config.settings import POSTGRES_CONFIG
 from src.connectors.postgres_connector import PostgresConnector
 from src.tasks.task_02_get_chunks import Task02GetChunks
 from src.tasks.task_02_process_chunk import Task02ProcessChunk
+from src.tasks.chunk_plan import ChunkPlanStore
 
 
 def test_chunk_generation():
@@ -41,29 +41,28 @@ def test_chunk_generation():
         print(f"  Total rows: {chunk_data['total_rows']:,}")
         print(f"  Total (date, ssn) keys: {chunk_data['total_keys']:,}")
         print(f"  Number of chunks: {chunk_data['num_chunks']}")
-        print(f"  Chunks file: {chunk_data['chunks_file']}")
+        print(f"  Plan: {chunk_data['plan_id']} ({chunk_data['plan_table']})")
         print(f"  Duration: {result['duration_seconds']:.2f}s")
         
         print(f"\nChunk IDs: {chunk_data['chunk_ids'][:10]}")
         if len(chunk_data['chunk_ids']) > 10:
             print(f"  ... and {len(chunk_data['chunk_ids']) - 10} more")
         
-        # Load actual chunks from file for inspection
-        chunks_file = chunk_data['chunks_file']
-        with open(chunks_file, 'r') as f:
-            all_chunks = json.load(f)
+        # Load actual chunks from the plan table for inspection
+        all_chunks = ChunkPlanStore(connector).load_plan(chunk_data['plan_id'])
         
-        print(f"\nFirst 5 chunks (from {chunks_file}):")
+        print(f"\nFirst 5 chunks (from {chunk_data['plan_table']}):")
         for chunk in all_chunks[:5]:
+            dates = sorted(k['date'] for k in chunk['keys'])
             print(f"  Chunk {chunk['chunk_id']}: "
                   f"{chunk['estimated_rows']:,} rows, "
                   f"{chunk['num_keys']} keys, "
-                  f"dates {chunk['date_range']['start']} to {chunk['date_range']['end']}")
+                  f"dates {dates[0]} to {dates[-1]}")
         
         if len(all_chunks) > 5:
             print(f"  ... and {len(all_chunks) - 5} more chunks")
         
-        print(f"\n📄 Full chunks stored in: {chunks_file}")
+        print(f"\n📄 Full chunks stored in: {chunk_data['plan_table']} (plan_id = {chunk_data['plan_id']})")
         
         return chunk_data
         
@@ -84,10 +83,9 @@ def test_single_chunk_processing(chunks_result):
     print("TEST 2: Single Chunk Processing")
     print("=" * 80)
     
-    # Load chunks from file
-    chunks_file = chunks_result['chunks_file']
-    with open(chunks_file, 'r') as f:
-        all_chunks = json.load(f)
+    # Load chunks from the plan table
+    connector = PostgresConnector(**POSTGRES_CONFIG)
+    all_chunks = ChunkPlanStore(connector).load_plan(chunks_result['plan_id'])
     
     # Get first chunk with reasonable size
     test_chunk = None
@@ -106,7 +104,6 @@ def test_single_chunk_processing(chunks_result):
             print("Skipping chunk processing test")
             return
     
-    connector = PostgresConnector(**POSTGRES_CONFIG)
     task = Task02ProcessChunk(connector)
     
     try:
@@ -114,8 +111,8 @@ def test_single_chunk_processing(chunks_result):
         print(f"  Estimated rows: {test_chunk['estimated_rows']}")
         print(f"  Number of keys: {test_chunk['num_keys']}")
         
-        # Call execute() with just chunk_id (it will load keys from file)
-        result = task.execute(chunk_id=test_chunk['chunk_id'])
+        # Call execute() with chunk_id and plan_id (it claims keys from the plan table)
+        result = task.execute(chunk_id=test_chunk['chunk_id'], plan_id=chunks_result['plan_id'])
         
         print(f"\n✅ Chunk processing successful!")
         print(f"\nResults:")
@@ -147,10 +144,9 @@ def test_idempotency(chunks_result):
     print("TEST 3: Idempotency Check")
     print("=" * 80)
     
-    # Load chunks from file
-    chunks_file = chunks_result['chunks_file']
-    with open(chunks_file, 'r') as f:
-        all_chunks = json.load(f)
+    # Load chunks from the plan table
+    connector = PostgresConnector(**POSTGRES_CONFIG)
+    all_chunks = ChunkPlanStore(connector).load_plan(chunks_result['plan_id'])
     
     # Find a small chunk
     test_chunk = None
@@ -171,19 +167,18 @@ def test_idempotency(chunks_result):
         print("Skipping idempotency test")
         return
     
-    connector = PostgresConnector(**POSTGRES_CONFIG)
     task = Task02ProcessChunk(connector)
     
     try:
         # First run
         print("\nRun 1:")
-        result1 = task.execute(chunk_id=test_chunk['chunk_id'])
+        result1 = task.execute(chunk_id=test_chunk['chunk_id'], plan_id=chunks_result['plan_id'])
         print(f"  Rows updated: {result1['rows_updated']}")
         print(f"  Duration: {result1['duration_seconds']:.2f}s")
         
         # Second run (should be idempotent)
         print("\nRun 2 (same chunk):")
-        result2 = task.execute(chunk_id=test_chunk['chunk_id'])
+        result2 = task.execute(chunk_id=test_chunk['chunk_id'], plan_id=chunks_result['plan_id'])
         print(f"  Rows updated: {result2['rows_updated']}")
         print(f"  Duration: {result2['duration_seconds']:.2f}s")
         
@@ -244,7 +239,7 @@ def main():
     print("TESTS COMPLETE")
     print("=" * 80)
     print("\nNext steps:")
-    print("  1. Review chunks in temp/task02_chunks.json")
+    print("  1. Review chunks in the task02_chunk_plan table")
     print("  2. Deploy updated Lambda: cd deploy && .\\build_lambda.ps1")
     print("  3. Update Step Functions state machine (see aws/README.md)")
     print("=" * 80)
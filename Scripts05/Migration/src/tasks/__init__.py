@@ -7,6 +7,7 @@ from .task_01_copy_to_temp import Task01CopyToTemp
 from .task_02_update_conflicts import Task02UpdateConflictVisitMaps
 from .task_02_get_chunks import Task02GetChunks
 from .task_02_process_chunk import Task02ProcessChunk
+from .chunk_plan import ChunkPlanStore
 
 __all__ = [
     'BaseTask',
@@ -14,5 +15,6 @@ __all__ = [
     'Task02UpdateConflictVisitMaps',
     'Task02GetChunks',
     'Task02ProcessChunk',
+    'ChunkPlanStore',
 ]
 
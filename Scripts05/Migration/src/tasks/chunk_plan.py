@@ -0,0 +1,254 @@
+"""
+Chunk plan storage for Task 02.
+Keeps the (VisitDate, SSN) chunk plan in a Postgres table so that the chunk
+generator and the chunk workers don't need a shared filesystem.
+
+Each chunk is one row keyed by (plan_id, chunk_id). Workers claim chunks with
+FOR UPDATE SKIP LOCKED, so any number of workers can pull from the same plan,
+and a retried Map iteration can see whether its chunk already completed.
+"""
+
+import json
+import os
+import socket
+import uuid
+from datetime import datetime
+from typing import Dict, Any, List, Optional
+
+from src.connectors.postgres_connector import PostgresConnector
+from src.utils.logger import get_logger
+from config.settings import CONFLICT_SCHEMA
+from config.chunking_config import CHUNKING_CONFIG
+
+logger = get_logger(__name__)
+
+# Chunk states
+STATUS_PENDING = 'pending'
+STATUS_RUNNING = 'running'
+STATUS_COMPLETED = 'completed'
+STATUS_FAILED = 'failed'
+
+
+class ChunkClaimError(Exception):
+    """Raised when a chunk cannot be claimed (held by another worker or missing)."""
+
+
+class ChunkPlanStore:
+    """
+    Reads and writes chunk plans in {CONFLICT_SCHEMA}.<plan_table>.
+    """
+
+    def __init__(self, postgres_connector: PostgresConnector,
+                 schema: str = CONFLICT_SCHEMA,
+                 table: Optional[str] = None,
+                 lease_seconds: Optional[int] = None):
+        """
+        Initialize chunk plan store.
+
+        Args:
+            postgres_connector: Connection to the Postgres database.
+            schema: Schema holding the plan table
+            table: Plan table name (default: CHUNKING_CONFIG['plan_table'])
+            lease_seconds: How long a 'running' claim is honoured before another
+                           worker may take the chunk over (default: CHUNKING_CONFIG)
+        """
+        self.pg = postgres_connector
+        self.schema = schema
+        self.table = table or CHUNKING_CONFIG['plan_table']
+        self.lease_seconds = lease_seconds or CHUNKING_CONFIG['claim_lease_seconds']
+        self.worker_id = os.environ.get('AWS_LAMBDA_LOG_STREAM_NAME') or f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def qualified_table(self) -> str:
+        return f"{self.schema}.{self.table}"
+
+    @staticmethod
+    def new_plan_id() -> str:
+        """Generate a sortable, unique plan identifier."""
+        return f"{datetime.now().strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+
+    def ensure_table(self) -> None:
+        """Create the plan table if it doesn't exist (idempotent)."""
+        self.pg.execute(f"""
+            CREATE TABLE IF NOT EXISTS {self.qualified_table} (
+                plan_id         VARCHAR(64) NOT NULL,
+                chunk_id        INTEGER NOT NULL,
+                keys            JSONB NOT NULL,
+                estimated_rows  BIGINT NOT NULL DEFAULT 0,
+                num_keys        INTEGER NOT NULL DEFAULT 0,
+                status          VARCHAR(16) NOT NULL DEFAULT '{STATUS_PENDING}',
+                attempts        INTEGER NOT NULL DEFAULT 0,
+                claimed_by      VARCHAR(255),
+                claimed_at      TIMESTAMP,
+                completed_at    TIMESTAMP,
+                rows_updated    BIGINT,
+                error           TEXT,
+                created_at      TIMESTAMP NOT NULL DEFAULT NOW(),
+                PRIMARY KEY (plan_id, chunk_id)
+            );
+            CREATE INDEX IF NOT EXISTS {self.table}_status_idx
+                ON {self.qualified_table} (plan_id, status);
+        """)
+
+    def save_plan(self, plan_id: str, chunks: List[Dict[str, Any]]) -> int:
+        """
+        Store all chunks of a plan as 'pending' rows.
+
+        Args:
+            plan_id: Plan identifier
+            chunks: Chunk definitions from Task02GetChunks
+
+        Returns:
+            Number of chunk rows written
+        """
+        from psycopg2.extras import execute_values
+
+        rows = [
+            (plan_id, chunk['chunk_id'], json.dumps(chunk['keys']),
+             chunk['estimated_rows'], chunk['num_keys'])
+            for chunk in chunks
+        ]
+
+        insert_sql = f"""
+            INSERT INTO {self.qualified_table}
+                (plan_id, chunk_id, keys, estimated_rows, num_keys)
+            VALUES %s
+            ON CONFLICT (plan_id, chunk_id) DO NOTHING
+        """
+
+        with self.pg.get_connection() as conn:
+            with conn.cursor() as cursor:
+                execute_values(cursor, insert_sql, rows, template="(%s, %s, %s::jsonb, %s, %s)")
+
+        logger.info(f"Stored plan {plan_id}: {len(rows)} chunks in {self.qualified_table}")
+        return len(rows)
+
+    def claim(self, plan_id: str, chunk_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Claim a chunk for processing.
+
+        Pending and failed chunks are claimable, as are 'running' chunks whose
+        lease expired (the worker holding them died or timed out). Rows locked
+        by a concurrent claim are skipped rather than waited on.
+
+        Args:
+            plan_id: Plan identifier
+            chunk_id: Specific chunk to claim, or None for the next available one
+
+        Returns:
+            {'chunk_id', 'keys', 'attempts'} or None if nothing was claimable
+        """
+        chunk_filter = "AND chunk_id = %(chunk_id)s" if chunk_id is not None else ""
+
+        claim_sql = f"""
+            WITH next_chunk AS (
+                SELECT plan_id, chunk_id
+                FROM {self.qualified_table}
+                WHERE plan_id = %(plan_id)s
+                  {chunk_filter}
+                  AND (status IN ('{STATUS_PENDING}', '{STATUS_FAILED}')
+                       OR (status = '{STATUS_RUNNING}'
+                           AND claimed_at < NOW() - make_interval(secs => %(lease)s)))
+                ORDER BY chunk_id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE {self.qualified_table} AS p
+            SET status = '{STATUS_RUNNING}',
+                attempts = p.attempts + 1,
+                claimed_by = %(worker)s,
+                claimed_at = NOW(),
+                error = NULL
+            FROM next_chunk
+            WHERE p.plan_id = next_chunk.plan_id
+              AND p.chunk_id = next_chunk.chunk_id
+            RETURNING p.chunk_id, p.keys, p.attempts
+        """
+        params = {
+            'plan_id': plan_id,
+            'chunk_id': chunk_id,
+            'lease': self.lease_seconds,
+            'worker': self.worker_id,
+        }
+
+        with self.pg.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(claim_sql, params)
+                row = cursor.fetchone()
+
+        if not row:
+            return None
+
+        keys = row[1] if isinstance(row[1], list) else json.loads(row[1])
+        logger.info(f"Claimed chunk {row[0]} of plan {plan_id} (attempt {row[2]}, worker {self.worker_id})")
+        return {'chunk_id': row[0], 'keys': keys, 'attempts': row[2]}
+
+    def load_plan(self, plan_id: str) -> List[Dict[str, Any]]:
+        """All chunks of a plan, ordered by chunk_id (for inspection and tooling)."""
+        with self.pg.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    SELECT chunk_id, keys, estimated_rows, num_keys, status, attempts
+                    FROM {self.qualified_table}
+                    WHERE plan_id = %s
+                    ORDER BY chunk_id
+                    """,
+                    (plan_id,)
+                )
+                rows = cursor.fetchall()
+
+        return [
+            {
+                'chunk_id': row[0],
+                'keys': row[1] if isinstance(row[1], list) else json.loads(row[1]),
+                'estimated_rows': row[2],
+                'num_keys': row[3],
+                'status': row[4],
+                'attempts': row[5],
+            }
+            for row in rows
+        ]
+
+    def get_status(self, plan_id: str, chunk_id: int) -> Optional[str]:
+        """Current status of a chunk, or None if it isn't in the plan."""
+        with self.pg.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT status FROM {self.qualified_table} WHERE plan_id = %s AND chunk_id = %s",
+                    (plan_id, chunk_id)
+                )
+                row = cursor.fetchone()
+        return row[0] if row else None
+
+    def mark_completed(self, plan_id: str, chunk_id: int, rows_updated: int) -> None:
+        """Mark a claimed chunk as completed."""
+        self.pg.execute(
+            f"""
+            UPDATE {self.qualified_table}
+            SET status = '{STATUS_COMPLETED}', completed_at = NOW(), rows_updated = %(rows)s, error = NULL
+            WHERE plan_id = %(plan_id)s AND chunk_id = %(chunk_id)s
+            """,
+            {'plan_id': plan_id, 'chunk_id': chunk_id, 'rows': rows_updated}
+        )
+
+    def mark_failed(self, plan_id: str, chunk_id: int, error: str) -> None:
+        """Release a claimed chunk as failed so a retry can claim it immediately."""
+        self.pg.execute(
+            f"""
+            UPDATE {self.qualified_table}
+            SET status = '{STATUS_FAILED}', error = %(error)s
+            WHERE plan_id = %(plan_id)s AND chunk_id = %(chunk_id)s
+            """,
+            {'plan_id': plan_id, 'chunk_id': chunk_id, 'error': error[:2000]}
+        )
+
+    def get_progress(self, plan_id: str) -> Dict[str, int]:
+        """Chunk counts per status for a plan."""
+        with self.pg.get_connection() as conn:
+            with conn.cursor() as cursor:
+                cursor.execute(
+                    f"SELECT status, COUNT(*) FROM {self.qualified_table} WHERE plan_id = %s GROUP BY status",
+                    (plan_id,)
+                )
+                return {status: count for status, count in cursor.fetchall()}
@@ -4,12 +4,12 @@ Strategy: Composite (VisitDate, SSN) chunking with dynamic balancing
 """
 
 import time
-import json
-import os
-from typing import Dict, Any, List, Tuple
-from datetime import datetime
+import heapq
+import math
+from typing import Dict, Any, List
 
 from src.tasks.base_task import BaseTask
+from src.tasks.chunk_plan import ChunkPlanStore
 from src.connectors.postgres_connector import PostgresConnector
 from config.settings import CONFLICT_SCHEMA
 from config.chunking_config import CHUNKING_CONFIG
@@ -31,11 +31,13 @@ class Task02GetChunks(BaseTask):
         super().__init__('TASK_02_GET_CHUNKS')
         self.pg = postgres_connector
         self.config = CHUNKING_CONFIG
+        self.plan_store = ChunkPlanStore(postgres_connector)
+        self.packing_report: Dict[str, Any] = {}
     
     def execute(self) -> Dict[str, Any]:
         """
         Query data distribution and create balanced chunks.
-        Store chunks in /tmp and return lightweight metadata.
+        Store chunks in the Postgres plan table and return lightweight metadata.
         
         Returns:
             Dictionary with chunk metadata (not full chunk data)
@@ -63,14 +65,10 @@ class Task02GetChunks(BaseTask):
         self.logger.info("Creating balanced chunks...")
         chunks = self._create_balanced_chunks(distribution)
         
-        # Step 3: Store chunks in /tmp (for Lambda) or local directory
-        chunks_dir = self._get_chunks_directory()
-        chunk_file = os.path.join(chunks_dir, 'task02_chunks.json')
-        
-        with open(chunk_file, 'w') as f:
-            json.dump(chunks, f)
-        
-        self.logger.info(f"Stored {len(chunks)} chunks to {chunk_file}")
+        # Step 3: Store chunks in the plan table (workers claim them by plan_id)
+        plan_id = self.plan_store.new_plan_id()
+        self.plan_store.ensure_table()
+        self.plan_store.save_plan(plan_id, chunks)
         
         end_time = time.time()
         duration = end_time - start_time
@@ -85,12 +83,14 @@ class Task02GetChunks(BaseTask):
             "total_keys": len(distribution),
             "num_chunks": len(chunks),
             "chunk_ids": list(range(len(chunks))),  # Just IDs, not full data
-            "chunks_file": chunk_file,
+            "plan_id": plan_id,
+            "plan_table": self.plan_store.qualified_table,
             "config": {
                 "target_size": self.config['target_chunk_size'],
                 "max_size": self.config['max_chunk_size'],
                 "max_concurrency": self.config['max_concurrency']
             },
+            "packing": self.packing_report,
             "duration_seconds": duration
         }
     
@@ -136,6 +136,164 @@ class Task02GetChunks(BaseTask):
         """
         Create balanced chunks by grouping (VisitDate, SSN) pairs.
         
+        Uses the configured packing strategy ('lpt' or 'sequential') and records
+        the max/mean weight imbalance of both in self.packing_report.
+        
+        Args:
+            distribution: List of (date, ssn, count) tuples
+            
+        Returns:
+            List of chunk definitions
+        """
+        strategy = self.config.get('packing_strategy', 'sequential')
+        weight_by = self.config.get('packing_weight', 'rows')
+        
+        sequential = self._create_sequential_chunks(distribution)
+        before = self._imbalance(sequential, weight_by)
+        
+        if strategy == 'lpt':
+            chunks = self._create_lpt_chunks(distribution, weight_by)
+        elif strategy == 'sequential':
+            chunks = sequential
+        else:
+            raise ValueError(f"Unknown packing_strategy: {strategy}")
+        
+        after = self._imbalance(chunks, weight_by)
+        self.packing_report = {
+            'strategy': strategy,
+            'weight': weight_by,
+            'imbalance_before': round(before, 3),
+            'imbalance_after': round(after, 3),
+        }
+        
+        self.logger.info(f"Chunk imbalance (max/mean {weight_by}): "
+                         f"sequential={before:.2f}, {strategy}={after:.2f} "
+                         f"({len(sequential)} -> {len(chunks)} chunks)")
+        
+        return chunks
+    
+    def _create_lpt_chunks(self, distribution: List[Dict[str, Any]], weight_by: str) -> List[Dict[str, Any]]:
+        """
+        Longest-processing-time-first packing.
+        Sorts (VisitDate, SSN) groups by weight, heaviest first, and adds the next
+        group to the lightest chunk that stays within max_keys_per_chunk and
+        max_chunk_size, opening a new chunk when none fits. As in sequential
+        packing, a group larger than max_chunk_size gets a chunk of its own.
+        
+        Args:
+            distribution: List of (date, ssn, count) tuples
+            weight_by: 'rows' or 'pairs'
+            
+        Returns:
+            List of chunk definitions
+        """
+        num_chunks = self._get_num_chunks(distribution)
+        max_size = self.config['max_chunk_size']
+        max_keys = self.config['max_keys_per_chunk']
+        
+        # Heap of (weight, keys, chunk index); index breaks ties deterministically
+        bins = [(0, 0, i) for i in range(num_chunks)]
+        bin_keys: List[List[Dict[str, Any]]] = [[] for _ in range(num_chunks)]
+        bin_rows = [0] * num_chunks
+        
+        groups = sorted(
+            distribution,
+            key=lambda row: (-self._group_weight(row['row_count'], weight_by),
+                             str(row['visit_date']), row['ssn'])
+        )
+        
+        for row in groups:
+            count = row['row_count']
+            
+            # Pop bins, lightest first, until one has room for this group
+            full = []
+            while bins:
+                weight, num_keys, idx = heapq.heappop(bins)
+                if num_keys < max_keys and (bin_rows[idx] + count <= max_size or not num_keys):
+                    break
+                full.append((weight, num_keys, idx))
+            else:
+                weight, num_keys, idx = 0, 0, len(bin_keys)
+                bin_keys.append([])
+                bin_rows.append(0)
+            
+            bin_keys[idx].append({
+                'date': str(row['visit_date']),  # Convert to string for JSON serialization
+                'ssn': row['ssn'],
+                'rows': count
+            })
+            bin_rows[idx] += count
+            heapq.heappush(bins, (weight + self._group_weight(count, weight_by), num_keys + 1, idx))
+            for entry in full:
+                heapq.heappush(bins, entry)
+        
+        chunks = []
+        for idx in range(len(bin_keys)):
+            if not bin_keys[idx]:
+                continue
+            keys = sorted(bin_keys[idx], key=lambda k: (k['date'], k['ssn']))
+            chunks.append(self._finalize_chunk(len(chunks), keys, bin_rows[idx]))
+        
+        return chunks
+    
+    def _get_num_chunks(self, distribution: List[Dict[str, Any]]) -> int:
+        """
+        Number of chunks for LPT packing.
+        Uses num_chunks from config, or enough chunks to hit target_chunk_size,
+        and never fewer than max_keys_per_chunk allows.
+        
+        Args:
+            distribution: List of (date, ssn, count) tuples
+            
+        Returns:
+            Number of chunks (at least 1, at most one per key)
+        """
+        total_rows = sum(row['row_count'] for row in distribution)
+        min_for_keys = math.ceil(len(distribution) / self.config['max_keys_per_chunk'])
+        
+        num_chunks = self.config.get('num_chunks')
+        if not num_chunks:
+            num_chunks = math.ceil(total_rows / self.config['target_chunk_size'])
+        
+        return max(1, min(len(distribution), max(num_chunks, min_for_keys)))
+    
+    @staticmethod
+    def _group_weight(row_count: int, weight_by: str) -> int:
+        """
+        Estimated cost of one (VisitDate, SSN) group.
+        
+        Args:
+            row_count: Rows in the group
+            weight_by: 'rows', or 'pairs' (conflict work is quadratic per group)
+            
+        Returns:
+            Group weight
+        """
+        if weight_by == 'pairs':
+            return row_count * (row_count - 1) // 2 + row_count
+        return row_count
+    
+    def _imbalance(self, chunks: List[Dict[str, Any]], weight_by: str) -> float:
+        """
+        Max/mean chunk weight (1.0 = perfectly balanced).
+        
+        Args:
+            chunks: List of chunk definitions
+            weight_by: 'rows' or 'pairs'
+            
+        Returns:
+            Imbalance ratio
+        """
+        if not chunks:
+            return 0.0
+        weights = [sum(self._group_weight(k['rows'], weight_by) for k in c['keys']) for c in chunks]
+        mean = sum(weights) / len(weights)
+        return max(weights) / mean if mean else 0.0
+    
+    def _create_sequential_chunks(self, distribution: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Create chunks by filling them greedily in (VisitDate, SSN) order.
+        
         Args:
             distribution: List of (date, ssn, count) tuples
             
@@ -233,23 +391,3 @@ class Task02GetChunks(BaseTask):
             self.logger.info(f"  Chunk {i}: {chunk['estimated_rows']} rows, "
                            f"{chunk['num_keys']} keys, "
                            f"dates {chunk['date_range']['start']} to {chunk['date_range']['end']}")
-    
-    def _get_chunks_directory(self) -> str:
-        """
-        Get directory for storing chunks.
-        Use /tmp in Lambda, otherwise use project temp directory.
-        
-        Returns:
-            Directory path
-        """
-        if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
-            # Running in Lambda - use /tmp
-            chunks_dir = '/tmp'
-        else:
-            # Running locally - use project directory
-            chunks_dir = os.path.join(os.path.dirname(__file__), '..', '..', 'temp')
-            os.makedirs(chunks_dir, exist_ok=True)
-        
-        return chunks_dir
-
-
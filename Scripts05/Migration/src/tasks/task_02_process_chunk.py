@@ -4,12 +4,10 @@ Strategy: Idempotent processing with composite (VisitDate, SSN) filtering
 """
 
 import time
-import json
-import os
-from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 from src.tasks.base_task import BaseTask
+from src.tasks.chunk_plan import ChunkPlanStore, ChunkClaimError, STATUS_COMPLETED
 from src.connectors.postgres_connector import PostgresConnector
 from config.settings import CONFLICT_SCHEMA, ANALYTICS_SCHEMA, PROJECT_ROOT
 
@@ -29,23 +27,96 @@ class Task02ProcessChunk(BaseTask):
         """
         super().__init__('TASK_02_PROCESS_CHUNK')
         self.pg = postgres_connector
+        self.plan_store = ChunkPlanStore(postgres_connector)
     
-    def execute(self, chunk_id: int, keys: List[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def execute(self, chunk_id: Optional[int] = None, keys: List[Dict[str, Any]] = None,
+                plan_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Process a single chunk of conflict updates.
         
         Args:
-            chunk_id: Unique identifier for this chunk
+            chunk_id: Chunk to process. With plan_id and no chunk_id, the next
+                      unclaimed chunk of the plan is processed.
             keys: Optional list of {date, ssn, rows} dictionaries.
-                  If not provided, will load from stored chunks file.
+                  If not provided, the chunk is claimed from the plan table.
+            plan_id: Plan identifier returned by get_task02_chunks
             
         Returns:
             Dictionary with processing results
         """
-        # If keys not provided, load from file
-        if keys is None:
-            keys = self._load_chunk_keys(chunk_id)
+        if keys is not None:
+            return self._process_keys(chunk_id, keys)
         
+        if not plan_id:
+            raise ValueError("plan_id is required when chunk keys are not provided")
+        
+        claimed = self.plan_store.claim(plan_id, chunk_id)
+        
+        if claimed is None:
+            return self._unclaimed_result(plan_id, chunk_id)
+        
+        chunk_id = claimed['chunk_id']
+        try:
+            result = self._process_keys(chunk_id, claimed['keys'])
+        except Exception as e:
+            self.plan_store.mark_failed(plan_id, chunk_id, str(e))
+            raise
+        
+        self.plan_store.mark_completed(plan_id, chunk_id, result['rows_updated'])
+        result['plan_id'] = plan_id
+        result['attempt'] = claimed['attempts']
+        return result
+    
+    def _unclaimed_result(self, plan_id: str, chunk_id: Optional[int]) -> Dict[str, Any]:
+        """
+        Result when no chunk could be claimed.
+        
+        Args:
+            plan_id: Plan identifier
+            chunk_id: Requested chunk (None when claiming the next available one)
+            
+        Returns:
+            Skip result for completed or exhausted plans
+        """
+        if chunk_id is None:
+            self.logger.info(f"Plan {plan_id}: no claimable chunks left")
+            return {
+                "status": "success",
+                "plan_id": plan_id,
+                "chunk_id": None,
+                "rows_updated": 0,
+                "message": "No claimable chunks left in plan"
+            }
+        
+        status = self.plan_store.get_status(plan_id, chunk_id)
+        if status == STATUS_COMPLETED:
+            self.logger.info(f"Chunk {chunk_id}: already completed in plan {plan_id} (idempotent skip)")
+            return {
+                "status": "success",
+                "plan_id": plan_id,
+                "chunk_id": chunk_id,
+                "rows_marked": 0,
+                "rows_updated": 0,
+                "duration_seconds": 0,
+                "message": "Chunk already completed (idempotent skip)"
+            }
+        if status is None:
+            raise ValueError(f"Chunk {chunk_id} not found in plan {plan_id}")
+        
+        # Still running under another worker's lease - fail so Step Functions retries later
+        raise ChunkClaimError(f"Chunk {chunk_id} of plan {plan_id} is {status} and claimed by another worker")
+    
+    def _process_keys(self, chunk_id: int, keys: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Mark and update the rows of one chunk.
+        
+        Args:
+            chunk_id: Chunk identifier (for logging)
+            keys: List of {date, ssn, rows} dictionaries
+            
+        Returns:
+            Dictionary with processing results
+        """
         self.logger.info(f"Processing chunk {chunk_id} with {len(keys)} (date, ssn) keys")
         start_time = time.time()
         
@@ -159,7 +230,8 @@ class Task02ProcessChunk(BaseTask):
         formatted_sql = formatted_sql.replace('{analytics_schema}', ANALYTICS_SCHEMA)
         
         # Inject chunk filter
-        keys_filter = self._build_keys_filter(keys)
+        # Qualify with the target alias - ALLDATA also has VisitDate and SSN
+        keys_filter = self._build_keys_filter(keys, alias='CVM')
         formatted_sql = formatted_sql.replace('{chunk_filter}', keys_filter)
         
         # Execute
@@ -170,67 +242,48 @@ class Task02ProcessChunk(BaseTask):
             self.logger.error(f"Failed to update chunk: {str(e)}", exc_info=True)
             raise
     
-    def _build_keys_filter(self, keys: List[Dict[str, Any]]) -> str:
+    def _build_keys_filter(self, keys: List[Dict[str, Any]], alias: Optional[str] = None) -> str:
         """
         Build SQL WHERE clause for (VisitDate, SSN) filtering.
         
+        The keys are passed as two parallel array literals joined through
+        unnest(), so the statement has one predicate regardless of chunk size
+        (planning cost no longer grows with the number of keys).
+        
         Args:
             keys: List of (date, ssn) dictionaries
+            alias: Table alias to qualify the key columns with
             
         Returns:
             SQL WHERE clause string
         """
-        # Option 1: Use IN clause with tuples (best for small number of keys)
-        if len(keys) <= 100:
-            pairs = ", ".join(
-                f"('{k['date']}'::date, '{k['ssn']}')"
-                for k in keys
-            )
-            return f'("VisitDate", "SSN") IN ({pairs})'
-        
-        # Option 2: Use date range + SSN list (better for large number of keys)
-        dates = sorted(set(k['date'] for k in keys))
-        ssns = sorted(set(k['ssn'] for k in keys))
+        prefix = f'{alias}.' if alias else ''
+        dates = self._pg_array_literal(k['date'] for k in keys)
+        ssns = self._pg_array_literal(k['ssn'] for k in keys)
         
-        date_filter = f'"VisitDate" BETWEEN \'{dates[0]}\'::date AND \'{dates[-1]}\'::date'
-        
-        # Escape single quotes in SSNs
-        ssn_list = "', '".join(ssns)
-        ssn_filter = f'"SSN" IN (\'{ssn_list}\')'
-        
-        return f'({date_filter} AND {ssn_filter})'
+        return (
+            f'({prefix}"VisitDate", {prefix}"SSN") IN ('
+            f"SELECT k.visit_date, k.ssn "
+            f"FROM unnest('{dates}'::date[], '{ssns}'::text[]) AS k(visit_date, ssn))"
+        )
     
-    def _load_chunk_keys(self, chunk_id: int) -> List[Dict[str, Any]]:
+    @staticmethod
+    def _pg_array_literal(values) -> str:
         """
-        Load chunk keys from stored chunks file.
+        Render values as a Postgres array literal, escaped for a single-quoted SQL string.
         
         Args:
-            chunk_id: Chunk identifier
+            values: Iterable of values (None becomes NULL)
             
         Returns:
-            List of keys for this chunk
-        """
-        # Determine chunks file location
-        if os.environ.get('AWS_LAMBDA_FUNCTION_NAME'):
-            chunks_file = '/tmp/task02_chunks.json'
-        else:
-            chunks_file = os.path.join(
-                os.path.dirname(__file__), '..', '..', 'temp', 'task02_chunks.json'
-            )
-        
-        if not os.path.exists(chunks_file):
-            raise FileNotFoundError(
-                f"Chunks file not found: {chunks_file}. "
-                "Run get_task02_chunks first to generate chunks."
-            )
-        
-        with open(chunks_file, 'r') as f:
-            all_chunks = json.load(f)
-        
-        # Find the chunk with this ID
-        for chunk in all_chunks:
-            if chunk['chunk_id'] == chunk_id:
-                return chunk['keys']
-        
-        raise ValueError(f"Chunk {chunk_id} not found in chunks file")
-
+            Array literal such as {"2024-01-01","2024-01-02"}
+        """
+        elements = []
+        for value in values:
+            if value is None:
+                elements.append('NULL')
+            else:
+                text = str(value).replace('\\', '\\\\').replace('"', '\\"')
+                elements.append(f'"{text}"')
+        
+        return ('{' + ','.join(elements) + '}').replace("'", "''")
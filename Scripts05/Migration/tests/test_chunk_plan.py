@@ -0,0 +1,161 @@
+"""
+Unit tests for src/tasks/chunk_plan.py and its use by the Task 02 chunk tasks
+"""
+
+import json
+import pytest
+from unittest.mock import MagicMock, patch
+
+
+SAMPLE_KEYS = [
+    {'date': '2024-01-01', 'ssn': '111', 'rows': 10},
+    {'date': '2024-01-02', 'ssn': '222', 'rows': 5},
+]
+
+
+def _cursor(mock_postgres_connector):
+    """Cursor returned by the mocked connection context managers."""
+    conn = mock_postgres_connector.get_connection.return_value.__enter__.return_value
+    return conn.cursor.return_value.__enter__.return_value
+
+
+def test_chunk_plan_store_uses_config_table(mock_postgres_connector):
+    """Test the plan table defaults to the chunking config."""
+    from src.tasks.chunk_plan import ChunkPlanStore
+    from config.chunking_config import CHUNKING_CONFIG
+
+    store = ChunkPlanStore(mock_postgres_connector, schema='conflict')
+
+    assert store.qualified_table == f"conflict.{CHUNKING_CONFIG['plan_table']}"
+    assert store.lease_seconds == CHUNKING_CONFIG['claim_lease_seconds']
+
+
+def test_chunk_plan_new_plan_ids_are_unique():
+    """Test plan ids don't collide between runs."""
+    from src.tasks.chunk_plan import ChunkPlanStore
+
+    assert ChunkPlanStore.new_plan_id() != ChunkPlanStore.new_plan_id()
+
+
+def test_chunk_plan_save_plan(mock_postgres_connector):
+    """Test save_plan writes one row per chunk with JSON keys."""
+    from src.tasks.chunk_plan import ChunkPlanStore
+
+    chunks = [
+        {'chunk_id': 0, 'keys': SAMPLE_KEYS, 'estimated_rows': 15, 'num_keys': 2},
+        {'chunk_id': 1, 'keys': SAMPLE_KEYS[:1], 'estimated_rows': 10, 'num_keys': 1},
+    ]
+
+    with patch('psycopg2.extras.execute_values') as mock_execute_values:
+        store = ChunkPlanStore(mock_postgres_connector, schema='conflict')
+        written = store.save_plan('plan-1', chunks)
+
+    assert written == 2
+    rows = mock_execute_values.call_args[0][2]
+    assert rows[0] == ('plan-1', 0, json.dumps(SAMPLE_KEYS), 15, 2)
+    assert 'ON CONFLICT (plan_id, chunk_id) DO NOTHING' in mock_execute_values.call_args[0][1]
+
+
+def test_chunk_plan_claim_uses_skip_locked(mock_postgres_connector):
+    """Test claim locks with SKIP LOCKED and returns the chunk keys."""
+    from src.tasks.chunk_plan import ChunkPlanStore
+
+    cursor = _cursor(mock_postgres_connector)
+    cursor.fetchone.return_value = (3, SAMPLE_KEYS, 2)
+
+    store = ChunkPlanStore(mock_postgres_connector, schema='conflict')
+    claimed = store.claim('plan-1', 3)
+
+    assert claimed == {'chunk_id': 3, 'keys': SAMPLE_KEYS, 'attempts': 2}
+    sql, params = cursor.execute.call_args[0]
+    assert 'FOR UPDATE SKIP LOCKED' in sql
+    assert 'chunk_id = %(chunk_id)s' in sql
+    assert params['plan_id'] == 'plan-1'
+    assert params['chunk_id'] == 3
+
+
+def test_chunk_plan_claim_next_without_chunk_id(mock_postgres_connector):
+    """Test claiming the next available chunk doesn't filter on chunk_id."""
+    from src.tasks.chunk_plan import ChunkPlanStore
+
+    cursor = _cursor(mock_postgres_connector)
+    cursor.fetchone.return_value = None
+
+    store = ChunkPlanStore(mock_postgres_connector, schema='conflict')
+
+    assert store.claim('plan-1') is None
+    assert 'chunk_id = %(chunk_id)s' not in cursor.execute.call_args[0][0]
+
+
+def test_process_chunk_claims_and_marks_completed(mock_postgres_connector):
+    """Test a plan chunk is claimed, processed and marked completed."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+
+    task = Task02ProcessChunk(mock_postgres_connector)
+    task.plan_store = MagicMock()
+    task.plan_store.claim.return_value = {'chunk_id': 4, 'keys': SAMPLE_KEYS, 'attempts': 1}
+
+    with patch.object(task, '_mark_chunk_rows', return_value=15), \
+         patch.object(task, '_update_chunk', return_value=15):
+        result = task.execute(chunk_id=4, plan_id='plan-1')
+
+    assert result['rows_updated'] == 15
+    assert result['plan_id'] == 'plan-1'
+    task.plan_store.mark_completed.assert_called_once_with('plan-1', 4, 15)
+    task.plan_store.mark_failed.assert_not_called()
+
+
+def test_process_chunk_marks_failed_and_reraises(mock_postgres_connector):
+    """Test a failing chunk is released as failed for the retry."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+
+    task = Task02ProcessChunk(mock_postgres_connector)
+    task.plan_store = MagicMock()
+    task.plan_store.claim.return_value = {'chunk_id': 4, 'keys': SAMPLE_KEYS, 'attempts': 1}
+
+    with patch.object(task, '_mark_chunk_rows', side_effect=RuntimeError('deadlock')):
+        with pytest.raises(RuntimeError):
+            task.execute(chunk_id=4, plan_id='plan-1')
+
+    task.plan_store.mark_failed.assert_called_once_with('plan-1', 4, 'deadlock')
+    task.plan_store.mark_completed.assert_not_called()
+
+
+def test_process_chunk_skips_completed_chunk(mock_postgres_connector):
+    """Test a retried chunk that already completed is skipped."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+
+    task = Task02ProcessChunk(mock_postgres_connector)
+    task.plan_store = MagicMock()
+    task.plan_store.claim.return_value = None
+    task.plan_store.get_status.return_value = 'completed'
+
+    result = task.execute(chunk_id=4, plan_id='plan-1')
+
+    assert result['status'] == 'success'
+    assert result['rows_updated'] == 0
+    mock_postgres_connector.execute.assert_not_called()
+
+
+def test_process_chunk_running_elsewhere_raises(mock_postgres_connector):
+    """Test a chunk held by another worker raises so Step Functions retries."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+    from src.tasks.chunk_plan import ChunkClaimError
+
+    task = Task02ProcessChunk(mock_postgres_connector)
+    task.plan_store = MagicMock()
+    task.plan_store.claim.return_value = None
+    task.plan_store.get_status.return_value = 'running'
+
+    with pytest.raises(ChunkClaimError):
+        task.execute(chunk_id=4, plan_id='plan-1')
+
+
+def test_process_chunk_requires_plan_id_without_keys(mock_postgres_connector):
+    """Test execute needs a plan_id when keys aren't passed in."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+
+    task = Task02ProcessChunk(mock_postgres_connector)
+
+    with pytest.raises(ValueError):
+        task.execute(chunk_id=4)
@@ -0,0 +1,81 @@
+"""
+Smoke tests for the local Step Functions simulator in mock mode.
+No database and no POSTGRES_* settings required.
+"""
+
+import pytest
+
+from scripts import simulate_step_functions as simulator_module
+from scripts.simulate_step_functions import StepFunctionsSimulator
+
+
+@pytest.fixture(autouse=True)
+def no_postgres_settings(monkeypatch):
+    """Run as if no POSTGRES_* environment variables were set."""
+    monkeypatch.setattr(simulator_module, 'POSTGRES_CONFIG', {
+        'host': None, 'port': 5432, 'database': None, 'user': None, 'password': None,
+    })
+
+
+def _map_options(**overrides):
+    options = {'concurrency': 2, 'retry_interval': 0.0, 'mock_keys': 40, 'mock_seconds_per_row': 0.0}
+    options.update(overrides)
+    return options
+
+
+def test_mock_run_succeeds_without_postgres_settings(capsys):
+    """Test the sequential pipeline runs end to end on the mock connector."""
+    result = StepFunctionsSimulator(use_mock=True).run()
+    
+    assert result['status'] == 'SUCCEEDED'
+    assert [s['state'] for s in result['states']] == ['ValidateConfig', 'ExecuteTask01', 'ExecuteTask02']
+    assert all(s['status'] == 'SUCCEEDED' for s in result['states'])
+    
+    output = capsys.readouterr().out
+    assert '[SUCCESS] PIPELINE EXECUTION COMPLETED SUCCESSFULLY' in output
+    assert 'Database: N/A' in output
+
+
+def test_real_run_still_validates_postgres_settings():
+    """Test a non-mock run fails fast on missing Postgres settings."""
+    result = StepFunctionsSimulator(use_mock=False).run()
+    
+    assert result['status'] == 'FAILED'
+    assert 'POSTGRES_HOST' in result['error']
+    assert [s['state'] for s in result['states']] == ['ValidateConfig']
+
+
+def test_mock_chunked_run_retries_injected_failures(capsys):
+    """Test the Map state runs every chunk, retrying injected failures."""
+    simulator = StepFunctionsSimulator(
+        use_mock=True, chunked=True,
+        map_options=_map_options(failure_rate=0.3, retries=5, seed=7),
+    )
+    
+    result = simulator.run()
+    
+    assert result['status'] == 'SUCCEEDED'
+    map_result = result['states'][-1]['result']
+    num_chunks = simulator.chunks_result['num_chunks']
+    assert map_result['iterations'] == num_chunks > 0
+    
+    # One successful attempt per chunk; every retry is on the timeline
+    succeeded = [a for a in result['timeline'] if a['status'] == 'SUCCEEDED']
+    assert sorted(a['chunk_id'] for a in succeeded) == sorted(simulator.chunks_result['chunk_ids'])
+    assert map_result['retries'] == len(result['timeline']) - num_chunks
+    
+    output = capsys.readouterr().out
+    assert 'Map Timeline' in output
+    assert '4. ProcessTask02Chunks' in output
+
+
+def test_mock_chunked_run_fails_when_retries_exhausted():
+    """Test an iteration that exhausts its retries fails the Map."""
+    result = StepFunctionsSimulator(
+        use_mock=True, chunked=True,
+        map_options=_map_options(failure_rate=1.0, retries=1),
+    ).run()
+    
+    assert result['status'] == 'FAILED'
+    assert 'exhausted retries' in result['error']
+    assert result['states'][-1]['state'] == 'ProcessTask02Chunks'
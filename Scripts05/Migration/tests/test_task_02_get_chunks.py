@@ -0,0 +1,103 @@
+"""
+Unit tests for src/tasks/task_02_get_chunks.py chunk packing
+"""
+
+import pytest
+
+
+def _distribution(row_counts):
+    """(VisitDate, SSN) groups in key order with the given row counts."""
+    return [
+        {'visit_date': f'2024-01-{i % 28 + 1:02d}', 'ssn': f'{i:09d}', 'row_count': count}
+        for i, count in enumerate(row_counts)
+    ]
+
+
+def _task(mock_postgres_connector, **overrides):
+    from src.tasks.task_02_get_chunks import Task02GetChunks
+    from config.chunking_config import CHUNKING_CONFIG
+
+    task = Task02GetChunks(mock_postgres_connector)
+    task.config = {**CHUNKING_CONFIG, **overrides}
+    return task
+
+
+def test_lpt_spreads_heavy_groups(mock_postgres_connector):
+    """Test heavy groups adjacent in key order land in different chunks."""
+    task = _task(mock_postgres_connector, packing_strategy='lpt', num_chunks=3,
+                 max_chunk_size=1000, target_chunk_size=100)
+    distribution = _distribution([900, 900, 900] + [10] * 30)
+
+    chunks = task._create_balanced_chunks(distribution)
+
+    assert len(chunks) == 3
+    assert sorted(c['estimated_rows'] for c in chunks) == [1000, 1000, 1000]
+    assert task.packing_report['imbalance_after'] == 1.0
+    assert task.packing_report['imbalance_before'] > task.packing_report['imbalance_after']
+
+
+def test_lpt_keeps_every_key_once(mock_postgres_connector):
+    """Test packing neither drops nor duplicates keys."""
+    task = _task(mock_postgres_connector, packing_strategy='lpt', num_chunks=4)
+    distribution = _distribution([5, 80, 13, 7, 40, 40, 2, 99, 1, 60])
+
+    chunks = task._create_balanced_chunks(distribution)
+
+    packed = sorted((k['date'], k['ssn']) for c in chunks for k in c['keys'])
+    expected = sorted((d['visit_date'], d['ssn']) for d in distribution)
+    assert packed == expected
+    assert [c['chunk_id'] for c in chunks] == list(range(len(chunks)))
+    assert sum(c['estimated_rows'] for c in chunks) == sum(d['row_count'] for d in distribution)
+
+
+def test_lpt_pair_weight_isolates_quadratic_group(mock_postgres_connector):
+    """Test 'pairs' weighting gives a large group a chunk of its own."""
+    task = _task(mock_postgres_connector, packing_strategy='lpt', packing_weight='pairs', num_chunks=2)
+    distribution = _distribution([100] + [20] * 10)
+
+    chunks = task._create_balanced_chunks(distribution)
+
+    heavy = next(c for c in chunks if any(k['rows'] == 100 for k in c['keys']))
+    assert heavy['num_keys'] == 1
+
+
+def test_lpt_respects_per_chunk_limits(mock_postgres_connector):
+    """Test LPT opens new chunks instead of exceeding max_keys_per_chunk or max_chunk_size."""
+    task = _task(mock_postgres_connector, packing_strategy='lpt', num_chunks=2,
+                 max_keys_per_chunk=5, max_chunk_size=100)
+    distribution = _distribution([60, 60, 60, 150] + [1] * 16)
+
+    chunks = task._create_balanced_chunks(distribution)
+
+    assert all(c['num_keys'] <= 5 for c in chunks)
+    assert all(c['estimated_rows'] <= 100 or c['num_keys'] == 1 for c in chunks)
+    assert sum(c['num_keys'] for c in chunks) == len(distribution)
+    assert [c['chunk_id'] for c in chunks] == list(range(len(chunks)))
+
+
+def test_num_chunks_defaults_from_target_size(mock_postgres_connector):
+    """Test the chunk count follows target_chunk_size and max_keys_per_chunk."""
+    task = _task(mock_postgres_connector, num_chunks=None, target_chunk_size=100, max_keys_per_chunk=5)
+
+    assert task._get_num_chunks(_distribution([50] * 10)) == 5
+    assert task._get_num_chunks(_distribution([1] * 20)) == 4
+    assert task._get_num_chunks(_distribution([1000])) == 1
+
+
+def test_sequential_strategy_unchanged(mock_postgres_connector):
+    """Test the sequential strategy still fills chunks in key order."""
+    task = _task(mock_postgres_connector, packing_strategy='sequential', max_chunk_size=100)
+    distribution = _distribution([60, 60, 30, 10])
+
+    chunks = task._create_balanced_chunks(distribution)
+
+    assert [c['estimated_rows'] for c in chunks] == [60, 100]
+    assert task.packing_report['imbalance_before'] == task.packing_report['imbalance_after']
+
+
+def test_unknown_packing_strategy(mock_postgres_connector):
+    """Test an unknown strategy is rejected."""
+    task = _task(mock_postgres_connector, packing_strategy='random')
+
+    with pytest.raises(ValueError):
+        task._create_balanced_chunks(_distribution([1, 2]))
@@ -0,0 +1,75 @@
+"""
+Unit tests for src/tasks/task_02_process_chunk.py key filtering
+"""
+
+from unittest.mock import patch
+
+
+def test_keys_filter_is_single_unnest_join(mock_postgres_connector):
+    """Test the filter stays one predicate regardless of the number of keys."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+
+    task = Task02ProcessChunk(mock_postgres_connector)
+    keys = [{'date': f'2024-01-{d:02d}', 'ssn': f'{n:09d}', 'rows': 1}
+            for d in range(1, 29) for n in range(50)]
+
+    keys_filter = task._build_keys_filter(keys)
+
+    assert keys_filter.count('unnest(') == 1
+    assert ' OR ' not in keys_filter
+    assert '"2024-01-28"' in keys_filter
+    assert '"000000049"' in keys_filter
+    assert keys_filter.startswith('("VisitDate", "SSN") IN (')
+
+
+def test_keys_filter_keeps_pairs_aligned(mock_postgres_connector):
+    """Test dates and SSNs are passed in matching order (pairs, not a cross product)."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+
+    task = Task02ProcessChunk(mock_postgres_connector)
+    keys = [
+        {'date': '2024-01-02', 'ssn': 'B', 'rows': 1},
+        {'date': '2024-01-01', 'ssn': 'A', 'rows': 1},
+    ]
+
+    keys_filter = task._build_keys_filter(keys)
+
+    assert "'{\"2024-01-02\",\"2024-01-01\"}'::date[]" in keys_filter
+    assert "'{\"B\",\"A\"}'::text[]" in keys_filter
+
+
+def test_keys_filter_qualifies_alias(mock_postgres_connector):
+    """Test key columns are qualified when an alias is given."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+
+    task = Task02ProcessChunk(mock_postgres_connector)
+
+    keys_filter = task._build_keys_filter([{'date': '2024-01-01', 'ssn': '1', 'rows': 1}], alias='CVM')
+
+    assert keys_filter.startswith('(CVM."VisitDate", CVM."SSN") IN (')
+
+
+def test_pg_array_literal_escapes_values():
+    """Test quotes, backslashes and NULLs are escaped in the array literal."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+
+    literal = Task02ProcessChunk._pg_array_literal(["O'Neil", 'a"b', 'c\\d', None])
+
+    assert literal == '{"O\'\'Neil","a\\"b","c\\\\d",NULL}'
+
+
+def test_update_chunk_injects_qualified_filter(mock_postgres_connector, tmp_path):
+    """Test the chunked update SQL gets the CVM-qualified filter."""
+    from src.tasks.task_02_process_chunk import Task02ProcessChunk
+
+    sql_file = tmp_path / 'sql' / 'task_02_update_conflicts_chunked.sql'
+    sql_file.parent.mkdir(parents=True)
+    sql_file.write_text('UPDATE {conflict_schema}.conflictvisitmaps AS CVM SET x = 1 WHERE {chunk_filter};')
+
+    with patch('src.tasks.task_02_process_chunk.PROJECT_ROOT', tmp_path):
+        task = Task02ProcessChunk(mock_postgres_connector)
+        task._update_chunk([{'date': '2024-01-01', 'ssn': '1', 'rows': 1}])
+
+    executed = mock_postgres_connector.execute.call_args[0][0]
+    assert 'WHERE (CVM."VisitDate", CVM."SSN") IN (' in executed
+    assert '{chunk_filter}' not in executed
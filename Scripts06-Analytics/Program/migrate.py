@@ -8,6 +8,7 @@ from cryptography.hazmat.primitives import serialization
 import io
 import concurrent.futures
 import logging
+import uuid
 from dotenv import load_dotenv
 
 # Configure logging
@@ -195,76 +196,175 @@ def build_source_query(source_view, columns, table_config):
     return query
 
 
-def merge_data(pg_cursor, staging_table, target_table, columns, primary_keys, watermark_column, perform_deletes):
+def prepare_staging_table(pg_cursor, staging_table, primary_keys):
+    """Index the staging table on the primary keys and refresh its statistics."""
+    if primary_keys:
+        pk_list = ', '.join([f'"{pk}"' for pk in primary_keys])
+        logging.info("Indexing staging table on primary keys...")
+        pg_cursor.execute(f"CREATE INDEX ON {staging_table} ({pk_list});")
+    
+    # Temp/unlogged tables are never analyzed by autovacuum
+    pg_cursor.execute(f"ANALYZE {staging_table};")
+
+
+def unlogged_staging_name(pg_schema, target_table):
+    """
+    Run-unique name for the unlogged staging table, so concurrent runs for the same
+    table do not share it. The target name is shortened to keep the pid/uuid suffix
+    inside PostgreSQL's 63-character identifier limit.
+    """
+    suffix = f"{os.getpid()}_{uuid.uuid4().hex[:8]}"
+    return f'"{pg_schema}"."staging_{target_table[:63 - len(suffix) - 9]}_{suffix}"'
+
+
+def drop_staging_table(pg_cursor, staging_table):
+    """
+    Drop an unlogged staging table after a failed run. The transaction is rolled back
+    first (it may be aborted); the table only survives that if it was already committed.
+    """
+    conn = pg_cursor.connection
+    try:
+        conn.rollback()
+        pg_cursor.execute(f"DROP TABLE IF EXISTS {staging_table};")
+        conn.commit()
+    except Exception as e:
+        logging.warning(f"Could not drop staging table {staging_table}: {e}")
+
+
+def delete_missing_rows(pg_config, staging_table, target_table, primary_keys, partitions):
+    """
+    Delete target rows that are missing from staging using hash-partitioned anti-joins.
+    Each partition runs on its own connection, so the staging table must be a regular
+    (committed) table rather than a session-local temp table.
     """
-    Perform MERGE operation: UPDATE existing rows, INSERT new rows, optionally DELETE missing rows.
+    pk_join = ' AND '.join([f't."{pk}" = s."{pk}"' for pk in primary_keys])
+    pk_row = ', '.join([f't."{pk}"' for pk in primary_keys])
+    partition_expr = f"abs(hashtext(ROW({pk_row})::text)::bigint) % {partitions}"
+    
+    def delete_partition(partition):
+        conn = get_postgres_connection(pg_config)
+        if not conn:
+            raise RuntimeError(f"Could not connect to PostgreSQL for delete partition {partition}")
+        try:
+            with conn.cursor() as cursor:
+                cursor.execute(f"""
+                    DELETE FROM {target_table} t
+                    WHERE {partition_expr} = {partition}
+                      AND NOT EXISTS (
+                          SELECT 1 FROM {staging_table} s WHERE {pk_join}
+                      );
+                """)
+                deleted = cursor.rowcount
+            conn.commit()
+            return deleted
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+    
+    logging.info(f"Deleting records not in source ({partitions} hash partitions in parallel)...")
+    with concurrent.futures.ThreadPoolExecutor(max_workers=partitions) as executor:
+        return sum(executor.map(delete_partition, range(partitions)))
+
+
+def merge_data(pg_cursor, staging_table, target_table, columns, primary_keys, watermark_column, perform_deletes,
+               pg_config=None, delete_partitions=1):
+    """
+    Perform MERGE operation: upsert staged rows with a single INSERT ... ON CONFLICT,
+    optionally DELETE missing rows.
+    Rows whose non-key columns are unchanged are skipped (no new tuple version is written).
+    With parallel deletes the upsert is committed before the deletes start, so the merge
+    is not atomic: if a delete partition fails, the target keeps the upserted rows and
+    some stale rows. Both steps are idempotent, so rerunning the table completes the sync.
     """
+    if not primary_keys:
+        raise ValueError(f"{target_table} has no primary key; MERGE requires one")
+    
     schema_table = target_table
     column_list = ', '.join([f'"{col}"' for col in columns])
+    pk_list = ', '.join([f'"{pk}"' for pk in primary_keys])
     pk_join = ' AND '.join([f't."{pk}" = s."{pk}"' for pk in primary_keys])
     
-    # 1. UPDATE: Existing rows where source has newer data
-    if watermark_column and watermark_column in columns:
-        update_set = ', '.join([f'"{col}" = s."{col}"' for col in columns if col not in primary_keys])
-        update_query = f"""
-            UPDATE {schema_table} t
-            SET {update_set}
-            FROM {staging_table} s
-            WHERE {pk_join}
-              AND s."{watermark_column}" > t."{watermark_column}";
-        """
-        logging.info("Updating existing records with newer data...")
-        pg_cursor.execute(update_query)
-        updated_count = pg_cursor.rowcount
-        logging.info(f"Updated {updated_count} rows")
+    # Column lists for the UPDATE are built once per table
+    update_columns = [col for col in columns if col not in primary_keys]
+    update_set = ', '.join([f'"{col}" = EXCLUDED."{col}"' for col in update_columns])
+    target_values = ', '.join([f't."{col}"' for col in update_columns])
+    excluded_values = ', '.join([f'EXCLUDED."{col}"' for col in update_columns])
+    distinct_guard = f"ROW({target_values}) IS DISTINCT FROM ROW({excluded_values})"
+    
+    # 1. UPSERT: Insert new rows, update existing rows where source has newer (and different) data
+    if not update_columns:
+        conflict_action = "DO NOTHING"
+    elif watermark_column and watermark_column in columns:
+        conflict_action = f"""DO UPDATE SET {update_set}
+                WHERE EXCLUDED."{watermark_column}" > t."{watermark_column}"
+                  AND {distinct_guard}"""
     else:
-        # No watermark comparison, update all matching rows
-        update_set = ', '.join([f'"{col}" = s."{col}"' for col in columns if col not in primary_keys])
-        update_query = f"""
-            UPDATE {schema_table} t
-            SET {update_set}
+        # No watermark comparison, update all matching rows that changed
+        conflict_action = f"""DO UPDATE SET {update_set}
+                WHERE {distinct_guard}"""
+    
+    # xmax = 0 only for freshly inserted tuples; skipped rows are not returned
+    upsert_query = f"""
+        WITH upserted AS (
+            INSERT INTO {schema_table} AS t ({column_list})
+            SELECT {column_list}
             FROM {staging_table} s
-            WHERE {pk_join};
-        """
-        logging.info("Updating existing records...")
-        pg_cursor.execute(update_query)
-        updated_count = pg_cursor.rowcount
-        logging.info(f"Updated {updated_count} rows")
-    
-    # 2. INSERT: New rows that don't exist in target
-    insert_query = f"""
-        INSERT INTO {schema_table} ({column_list})
-        SELECT {column_list}
-        FROM {staging_table} s
-        WHERE NOT EXISTS (
-            SELECT 1 FROM {schema_table} t WHERE {pk_join}
-        );
+            ON CONFLICT ({pk_list})
+            {conflict_action}
+            RETURNING (xmax = 0) AS inserted
+        )
+        SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted)
+        FROM upserted;
     """
-    logging.info("Inserting new records...")
-    pg_cursor.execute(insert_query)
-    inserted_count = pg_cursor.rowcount
-    logging.info(f"Inserted {inserted_count} rows")
-    
-    # 3. DELETE: Remove rows from target that don't exist in source (only if perform_deletes is True)
+    logging.info("Upserting records...")
+    pg_cursor.execute(upsert_query)
+    inserted_count, updated_count = pg_cursor.fetchone()
+    logging.info(f"Inserted {inserted_count} rows, updated {updated_count} rows")
+    
+    # Staged rows that matched an existing row but were not updated: either
+    # unchanged or rejected by the watermark (not newer than the target row)
+    pg_cursor.execute(f"SELECT COUNT(*) FROM {staging_table};")
+    staged_count = pg_cursor.fetchone()[0]
+    skipped_count = max(staged_count - inserted_count - updated_count, 0)
+    logging.info(f"Skipped {skipped_count} rows (unchanged or older watermark)")
+    
+    # 2. DELETE: Remove rows from target that don't exist in source (only if perform_deletes is True)
     deleted_count = 0
     if perform_deletes:
-        delete_query = f"""
-            DELETE FROM {schema_table} t
-            WHERE NOT EXISTS (
-                SELECT 1 FROM {staging_table} s WHERE {pk_join}
-            );
-        """
-        logging.info("Deleting records not in source...")
-        pg_cursor.execute(delete_query)
-        deleted_count = pg_cursor.rowcount
+        if pg_config and delete_partitions > 1:
+            # Partitions run on separate connections and must see the upserted rows
+            pg_cursor.connection.commit()
+            try:
+                deleted_count = delete_missing_rows(
+                    pg_config, staging_table, schema_table, primary_keys, delete_partitions
+                )
+            except Exception:
+                logging.error(
+                    f"Delete failed after the upsert was committed: {schema_table} has the new rows "
+                    f"but may still hold rows missing from source. Rerun the table to finish the sync."
+                )
+                raise
+        else:
+            delete_query = f"""
+                DELETE FROM {schema_table} t
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM {staging_table} s WHERE {pk_join}
+                );
+            """
+            logging.info("Deleting records not in source...")
+            pg_cursor.execute(delete_query)
+            deleted_count = pg_cursor.rowcount
         logging.info(f"Deleted {deleted_count} rows")
     
-    return updated_count, inserted_count, deleted_count
+    return updated_count, inserted_count, deleted_count, skipped_count
 
 
-def migrate_table_with_merge(sf_cursor, pg_cursor, pg_schema, table_config):
+def migrate_table_with_merge(sf_cursor, pg_cursor, pg_schema, table_config, pg_config=None):
     """
     Migrate a table from Snowflake to PostgreSQL using MERGE logic.
+    pg_config is needed for parallel (hash-partitioned) deletes, which use their own connections.
     """
     source_view = table_config['source_view']
     target_table = table_config['target_table']
@@ -272,6 +372,8 @@ def migrate_table_with_merge(sf_cursor, pg_cursor, pg_schema, table_config):
     source_watermark = table_config.get('source_watermark_column')
     perform_deletes = table_config.get('perform_deletes', False)
     batch_size = table_config.get('batch_size', 10000)
+    # Parallel deletes commit the upsert first (non-atomic merge), so they are opt-in
+    delete_partitions = table_config.get('delete_partitions', 1)
     
     logging.info(f"\n{'='*60}")
     logging.info(f"Starting migration: {source_view} -> {target_table}")
@@ -337,14 +439,52 @@ def migrate_table_with_merge(sf_cursor, pg_cursor, pg_schema, table_config):
     
     column_defs = ', '.join([f'"{col}" {col_types[col]}' for col in columns])
     
-    logging.info("Creating temporary staging table...")
+    # Parallel deletes run on other connections, which cannot see a temp table
+    parallel_deletes = perform_deletes and pg_config is not None and delete_partitions > 1
+    if parallel_deletes:
+        staging_table = unlogged_staging_name(pg_schema, target_table)
+        logging.info(f"Creating unlogged staging table {staging_table} (parallel deletes)...")
+        pg_cursor.execute(f"CREATE UNLOGGED TABLE {staging_table} ({column_defs});")
+    else:
+        logging.info("Creating temporary staging table...")
+        pg_cursor.execute(f"DROP TABLE IF EXISTS {staging_table};")
+        pg_cursor.execute(f"CREATE TEMP TABLE {staging_table} ({column_defs});")
+    
+    try:
+        updated, inserted, deleted, skipped = load_and_merge(
+            sf_cursor, pg_cursor, pg_schema, source_query, staging_table, target_table, total_rows,
+            columns, primary_keys, target_watermark, perform_deletes,
+            pg_config if parallel_deletes else None, delete_partitions
+        )
+    except BaseException:
+        # The unlogged table outlives the session once committed (before parallel deletes)
+        if parallel_deletes:
+            drop_staging_table(pg_cursor, staging_table)
+        raise
+    
+    # Drop staging table
     pg_cursor.execute(f"DROP TABLE IF EXISTS {staging_table};")
-    pg_cursor.execute(f"CREATE TEMP TABLE {staging_table} ({column_defs});")
     
+    logging.info(f"\n{'='*60}")
+    logging.info(f"Migration Summary for {target_table}:")
+    logging.info(f"  Updated: {updated}")
+    logging.info(f"  Skipped (unchanged or older watermark): {skipped}")
+    logging.info(f"  Inserted: {inserted}")
+    logging.info(f"  Deleted: {deleted}")
+    logging.info(f"  Total: {updated + inserted + deleted}")
+    logging.info(f"{'='*60}\n")
+
+
+def load_and_merge(sf_cursor, pg_cursor, pg_schema, source_query, staging_table, target_table, total_rows,
+                   columns, primary_keys, target_watermark, perform_deletes, pg_config, delete_partitions):
+    """Load the source rows into the staging table and merge them into the target."""
     # Fetch and load data in batches
     sf_cursor.execute(source_query)
     batches = sf_cursor.fetch_pandas_batches()
     
+    # Built outside the f-string: backslashes in f-string expressions need Python 3.12
+    copy_columns = ','.join(f'"{c}"' for c in columns)
+    
     rows_loaded = 0
     with tqdm(total=total_rows, unit="rows", desc=f"Loading to staging") as pbar:
         for df in batches:
@@ -355,36 +495,28 @@ def migrate_table_with_merge(sf_cursor, pg_cursor, pg_schema, table_config):
             
             # Use COPY to load into staging table
             pg_cursor.copy_expert(
-                sql=f"COPY {staging_table} ({','.join([f'\"{c}\"' for c in columns])}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')",
+                sql=f"COPY {staging_table} ({copy_columns}) FROM STDIN WITH (FORMAT CSV, NULL '\\N')",
                 file=csv_buffer
             )
             rows_loaded += len(df)
             pbar.update(len(df))
     
     logging.info(f"Loaded {rows_loaded} rows into staging table")
+    prepare_staging_table(pg_cursor, staging_table, primary_keys)
     
     # Perform MERGE operation
     logging.info("Performing MERGE operation...")
-    updated, inserted, deleted = merge_data(
+    return merge_data(
         pg_cursor, 
         staging_table, 
         f'"{pg_schema}"."{target_table}"',
         columns, 
         primary_keys, 
         target_watermark,
-        perform_deletes
+        perform_deletes,
+        pg_config=pg_config,
+        delete_partitions=delete_partitions
     )
-    
-    # Drop staging table
-    pg_cursor.execute(f"DROP TABLE IF EXISTS {staging_table};")
-    
-    logging.info(f"\n{'='*60}")
-    logging.info(f"Migration Summary for {target_table}:")
-    logging.info(f"  Updated: {updated}")
-    logging.info(f"  Inserted: {inserted}")
-    logging.info(f"  Deleted: {deleted}")
-    logging.info(f"  Total: {updated + inserted + deleted}")
-    logging.info(f"{'='*60}\n")
 
 
 def migrate_single_table_wrapper(sf_config, pg_config, table_config):
@@ -404,7 +536,8 @@ def migrate_single_table_wrapper(sf_config, pg_config, table_config):
             sf_cursor, 
             pg_cursor, 
             pg_config.get('schema', 'public'),
-            table_config
+            table_config,
+            pg_config
         )
         pg_conn.commit()
         logging.info(f"Successfully migrated table {table_config['target_table']}.")
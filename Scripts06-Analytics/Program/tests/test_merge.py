@@ -0,0 +1,173 @@
+"""
+Unit tests for the staging/MERGE path of migrate.py (no database needed)
+
+Run from Program/: python -m pytest tests
+"""
+
+import re
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add Program/ to path for `import migrate`
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import migrate
+
+
+TABLE_CONFIG = {
+    'source_view': 'DIMPAYER',
+    'target_table': 'dimpayer',
+    'load_type': 'full',
+    'perform_deletes': True,
+    'delete_partitions': 4,
+}
+
+
+class TestStagingTableName:
+
+    def test_unique_per_run(self):
+        first = migrate.unlogged_staging_name('public', 'dimpayer')
+        second = migrate.unlogged_staging_name('public', 'dimpayer')
+
+        assert first != second
+        assert re.fullmatch(r'"public"\."staging_dimpayer_\d+_[0-9a-f]{8}"', first)
+
+    def test_fits_identifier_limit(self):
+        name = migrate.unlogged_staging_name('public', 'x' * 80)
+        table = name.split('.', 1)[1].strip('"')
+
+        assert len(table) <= 63
+        assert re.search(r'_\d+_[0-9a-f]{8}$', table)
+
+
+class TestStagingCleanup:
+
+    @staticmethod
+    def _run(table_config, load_and_merge):
+        sf_cursor = MagicMock()
+        sf_cursor.fetchone.return_value = (10,)
+        pg_cursor = MagicMock()
+        pg_cursor.fetchall.return_value = [('Payer Id', 'integer', None, None, None)]
+
+        with patch.object(migrate, 'get_target_columns', return_value=['Payer Id']), \
+                patch.object(migrate, 'get_primary_keys', return_value=['Payer Id']), \
+                patch.object(migrate, 'load_and_merge', side_effect=load_and_merge):
+            try:
+                migrate.migrate_table_with_merge(sf_cursor, pg_cursor, 'public', table_config, {'host': 'pg'})
+            except RuntimeError:
+                pass
+
+        statements = [c[0][0] for c in pg_cursor.execute.call_args_list]
+        return pg_cursor, statements
+
+    def test_failed_run_drops_unlogged_table(self):
+        def fail(*args):
+            raise RuntimeError('delete partition 2 failed')
+
+        pg_cursor, statements = self._run(TABLE_CONFIG, fail)
+
+        created = next(s for s in statements if s.startswith('CREATE UNLOGGED TABLE'))
+        staging_table = created.split()[3]
+        assert statements[-1] == f"DROP TABLE IF EXISTS {staging_table};"
+        # The aborted transaction is rolled back first; the DROP is committed
+        pg_cursor.connection.rollback.assert_called_once()
+        pg_cursor.connection.commit.assert_called_once()
+
+    def test_successful_run_drops_staging_in_transaction(self):
+        pg_cursor, statements = self._run(TABLE_CONFIG, lambda *args: (1, 2, 3, 4))
+
+        assert statements[-1].startswith('DROP TABLE IF EXISTS "public"."staging_dimpayer_')
+        pg_cursor.connection.rollback.assert_not_called()
+
+    def test_single_partition_uses_temp_table(self):
+        config = dict(TABLE_CONFIG)
+        del config['delete_partitions']
+
+        _, statements = self._run(config, lambda *args: (0, 0, 0, 0))
+
+        assert any(s.startswith('CREATE TEMP TABLE staging_dimpayer ') for s in statements)
+        assert not any('UNLOGGED' in s for s in statements)
+
+
+class TestMergeData:
+
+    @staticmethod
+    def _cursor(inserted, updated, staged):
+        pg_cursor = MagicMock()
+        pg_cursor.fetchone.side_effect = [(inserted, updated), (staged,)]
+        pg_cursor.rowcount = 2
+        return pg_cursor
+
+    def test_skipped_counts_unchanged_and_older_watermark_rows(self):
+        pg_cursor = self._cursor(3, 2, 10)
+
+        result = migrate.merge_data(
+            pg_cursor, 'stg', '"public"."dimpayer"', ['Payer Id', 'Name', 'Updated'],
+            ['Payer Id'], 'Updated', perform_deletes=False,
+        )
+
+        assert result == (2, 3, 0, 5)
+        upsert = pg_cursor.execute.call_args_list[0][0][0]
+        assert 'WHERE EXCLUDED."Updated" > t."Updated"' in upsert
+        assert 'ROW(t."Name", t."Updated") IS DISTINCT FROM ROW(EXCLUDED."Name", EXCLUDED."Updated")' in upsert
+
+    def test_single_partition_delete_stays_in_merge_transaction(self):
+        pg_cursor = self._cursor(0, 0, 4)
+
+        with patch.object(migrate, 'delete_missing_rows') as partitioned:
+            result = migrate.merge_data(
+                pg_cursor, 'stg', 'dimpayer', ['Payer Id', 'Name'], ['Payer Id'], None,
+                perform_deletes=True, pg_config={'host': 'pg'},
+            )
+
+        assert result == (0, 0, 2, 4)
+        partitioned.assert_not_called()
+        pg_cursor.connection.commit.assert_not_called()
+
+    def test_parallel_delete_commits_upsert_first(self):
+        pg_cursor = self._cursor(0, 0, 4)
+        calls = []
+        pg_cursor.connection.commit.side_effect = lambda: calls.append('commit')
+
+        with patch.object(migrate, 'delete_missing_rows', side_effect=lambda *args: calls.append('delete') or 7):
+            result = migrate.merge_data(
+                pg_cursor, 'stg', 'dimpayer', ['Payer Id', 'Name'], ['Payer Id'], None,
+                perform_deletes=True, pg_config={'host': 'pg'}, delete_partitions=4,
+            )
+
+        assert result == (0, 0, 7, 4)
+        assert calls == ['commit', 'delete']
+
+
+class TestPartitionedDelete:
+
+    @pytest.mark.parametrize('partitions', [2, 4, 7])
+    def test_every_row_in_exactly_one_partition(self, partitions):
+        statements = []
+
+        def connect(pg_config):
+            conn = MagicMock()
+            cursor = conn.cursor.return_value.__enter__.return_value
+            cursor.rowcount = 1
+            cursor.execute.side_effect = lambda sql: statements.append(sql)
+            return conn
+
+        with patch.object(migrate, 'get_postgres_connection', side_effect=connect):
+            deleted = migrate.delete_missing_rows(
+                {}, '"public"."stg"', '"public"."dimpayer"', ['Payer Id', 'Seq'], partitions
+            )
+
+        assert deleted == partitions
+        predicates = [re.search(r'WHERE (.+?) = (\d+)\s', s) for s in statements]
+        expressions = {m.group(1) for m in predicates}
+        # One shared partition expression, and every remainder 0..n-1 exactly once
+        assert len(expressions) == 1
+        assert sorted(int(m.group(2)) for m in predicates) == list(range(partitions))
+        # int4 hash widened before abs() (abs(-2^31) overflows int4), so the
+        # remainder is always in 0..n-1 and no row is missed
+        assert expressions.pop() == (
+            f'abs(hashtext(ROW(t."Payer Id", t."Seq")::text)::bigint) % {partitions}'
+        )
@@ -0,0 +1,387 @@
+"""
+Async Loader Module
+asyncpg-based COPY backend (binary protocol)
+
+The default backend opens one psycopg2 connection per chunk thread and sends
+text CSV. This backend multiplexes many COPY streams over a small number of
+event-loop threads using asyncpg's copy_records_to_table (binary COPY), so a
+small Lambda/container can drive 16-32 concurrent COPY streams.
+
+Chunks run as coroutines on the event loops (submit()). Each chunk hands its
+blocking Snowflake fetch to a thread executor and awaits the COPY on the
+loop, so a fetch thread is free for the next chunk while earlier chunks are
+still streaming: COPY concurrency is bounded by async_copy_streams, not by
+the number of fetch threads.
+
+Binary COPY has strict per-type codecs, so rows are converted to the target
+column types first (convert_records). Values that still do not encode raise
+DataError, and the caller falls back to the text COPY path.
+"""
+
+import asyncio
+import itertools
+import json
+import math
+import threading
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from .utils import format_number, logger
+
+try:
+    import asyncpg
+    UniqueViolationError = asyncpg.exceptions.UniqueViolationError
+    DataError = asyncpg.exceptions.DataError
+except ImportError:
+    # Optional dependency: only needed for tables with load_backend = "asyncpg"
+    asyncpg = None
+
+    class UniqueViolationError(Exception):
+        """Placeholder so callers can always name the exception"""
+
+    class DataError(Exception):
+        """Placeholder so callers can always name the exception"""
+
+
+# ============================================================================
+# Value conversion (Snowflake Python values -> asyncpg binary codecs)
+# ============================================================================
+
+def _to_int(value):
+    if isinstance(value, int):
+        return value
+    if isinstance(value, str):
+        value = value.strip()
+        return int(Decimal(value)) if value else None
+    return int(value)
+
+
+def _to_float(value):
+    if isinstance(value, float):
+        return value
+    if isinstance(value, str) and not value.strip():
+        return None
+    return float(value)
+
+
+def _to_decimal(value):
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    if isinstance(value, str):
+        value = value.strip()
+        return Decimal(value) if value else None
+    return Decimal(value)
+
+
+def _to_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str):
+        return value.strip().lower() in ('t', 'true', 'y', 'yes', '1', 'on')
+    return bool(value)
+
+
+def _to_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _to_timestamp(value):
+    # timestamp without time zone: the text path drops the offset, so do the same
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    elif isinstance(value, date) and not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return value.replace(tzinfo=None) if value.tzinfo else value
+
+
+def _to_timestamptz(value):
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    if isinstance(value, date) and not isinstance(value, datetime):
+        return datetime(value.year, value.month, value.day)
+    return value
+
+
+def _to_time(value):
+    if isinstance(value, datetime):
+        return value.time()
+    if isinstance(value, time):
+        return value
+    return time.fromisoformat(str(value))
+
+
+def _to_text(value):
+    return value if isinstance(value, str) else str(value)
+
+
+def _to_json(value):
+    return value if isinstance(value, str) else json.dumps(value, default=str)
+
+
+def _to_bytes(value):
+    return value if isinstance(value, bytes) else bytes(value)
+
+
+# pg_type.typname -> converter (types not listed are passed through)
+_CONVERTERS: Dict[str, Callable[[Any], Any]] = {
+    'int2': _to_int, 'int4': _to_int, 'int8': _to_int,
+    'float4': _to_float, 'float8': _to_float,
+    'numeric': _to_decimal,
+    'bool': _to_bool,
+    'date': _to_date,
+    'timestamp': _to_timestamp,
+    'timestamptz': _to_timestamptz,
+    'time': _to_time,
+    'text': _to_text, 'varchar': _to_text, 'bpchar': _to_text, 'name': _to_text,
+    'json': _to_json, 'jsonb': _to_json,
+    'bytea': _to_bytes,
+}
+
+
+class AsyncCopyLoader:
+    """Runs binary COPY streams for one database on dedicated event-loop threads"""
+
+    def __init__(self, pg_manager, database: str, streams: int = 8, event_loops: int = 1,
+                 max_in_flight: Optional[int] = None):
+        """
+        Args:
+            streams: COPY connections (concurrent COPY streams)
+            event_loops: Event-loop threads, each with its own pool
+            max_in_flight: Chunks submitted via submit() that may run at once
+                (fetching, converting or copying); default 2 x streams
+        """
+        self.pg_manager = pg_manager
+        self.database = database
+        self.streams = streams
+        self.logger = logger
+
+        self._loops = []
+        self._threads = []
+        self._pools = []
+        self._limits = []
+        self._next_loop = itertools.count()
+        self._column_types: Dict[tuple, Dict[str, str]] = {}
+        self._types_lock = threading.Lock()
+
+        # Spread the stream budget across loops (each loop owns its own pool)
+        event_loops = max(1, min(event_loops, streams))
+        streams_per_loop = max(1, math.ceil(streams / event_loops))
+        in_flight_per_loop = max(1, math.ceil((max_in_flight or 2 * streams) / event_loops))
+
+        try:
+            for i in range(event_loops):
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(
+                    target=self._run_loop, args=(loop,),
+                    name=f"asyncpg-loop-{i}", daemon=True
+                )
+                thread.start()
+                self._loops.append(loop)
+                self._threads.append(thread)
+
+                pool = self._run(loop, self._create_pool(streams_per_loop))
+                self._pools.append(pool)
+                self._limits.append(self._run(loop, self._create_limit(in_flight_per_loop)))
+        except Exception:
+            self.close()
+            raise
+
+        self.logger.info(
+            f"✓ asyncpg loader started for {database} "
+            f"({streams} COPY streams on {event_loops} event loop(s))"
+        )
+
+    @staticmethod
+    def _run_loop(loop: asyncio.AbstractEventLoop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, coro):
+        """Run a coroutine on a loop thread and block the calling thread until done"""
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+    async def _create_pool(self, max_size: int):
+        # Same session settings as PostgresConnectionManager.get_connection
+        return await asyncpg.create_pool(
+            host=self.pg_manager.host,
+            port=self.pg_manager.port,
+            user=self.pg_manager.user,
+            password=self.pg_manager.password,
+            database=self.database,
+            min_size=1,
+            max_size=max_size,
+            server_settings={
+                'synchronous_commit': 'off',
+                'work_mem': '256MB',
+                'maintenance_work_mem': '512MB',
+                'temp_buffers': '128MB',
+                'effective_cache_size': '4GB',
+            }
+        )
+
+    @staticmethod
+    async def _create_limit(size: int) -> asyncio.Semaphore:
+        # Created on the loop thread so it binds to that loop
+        return asyncio.Semaphore(size)
+
+    @staticmethod
+    async def _copy(pool, schema: str, table: str, columns: List[str],
+                    records: Sequence[Sequence[Any]]) -> int:
+        async with pool.acquire() as conn:
+            # COPY outside an explicit transaction commits on success
+            status = await conn.copy_records_to_table(
+                table, records=records, columns=columns, schema_name=schema
+            )
+        # Status string is "COPY <n>"
+        return int(status.split()[-1])
+
+    async def copy_records_async(self, schema: str, table: str, columns: List[str],
+                                 records: Sequence[Sequence[Any]]) -> int:
+        """
+        COPY records from a coroutine running on one of this loader's loops
+
+        Args:
+            schema: Target schema
+            table: Target table
+            columns: Target column names, in record order
+            records: Row tuples with Python values matching the target types
+
+        Returns:
+            Number of rows copied
+
+        Raises:
+            UniqueViolationError: On duplicate keys (COPY is atomic, 0 rows loaded)
+        """
+        pool = self._pools[self._loops.index(asyncio.get_running_loop())]
+        row_count = await self._copy(pool, schema, table, columns, records)
+        self.logger.debug(f"✓ Binary COPYed {format_number(row_count)} rows to {table}")
+        return row_count
+
+    def submit(self, coro_fn: Callable[..., Awaitable[Any]], *args):
+        """
+        Run coro_fn(*args) on the next event loop (callable from any thread)
+
+        At most max_in_flight submitted coroutines run at once; the rest wait
+        on the loop without holding a thread.
+
+        Returns:
+            concurrent.futures.Future with the coroutine's result (cancel()
+            cancels the coroutine)
+        """
+        index = next(self._next_loop) % len(self._loops)
+
+        async def limited():
+            async with self._limits[index]:
+                return await coro_fn(*args)
+
+        return asyncio.run_coroutine_threadsafe(limited(), self._loops[index])
+
+    def column_types(self, schema: str, table: str) -> Dict[str, str]:
+        """Target column name -> pg_type.typname (cached per table)"""
+        key = (schema, table)
+        with self._types_lock:
+            if key in self._column_types:
+                return self._column_types[key]
+
+        async def fetch():
+            async with self._pools[0].acquire() as conn:
+                return await conn.fetch(
+                    """
+                    SELECT a.attname, t.typname
+                    FROM pg_attribute a
+                    JOIN pg_type t ON t.oid = a.atttypid
+                    WHERE a.attrelid = to_regclass($1)
+                      AND a.attnum > 0 AND NOT a.attisdropped
+                    """,
+                    f'"{schema}"."{table}"'
+                )
+
+        types = {row['attname']: row['typname'] for row in self._run(self._loops[0], fetch())}
+        with self._types_lock:
+            self._column_types[key] = types
+        return types
+
+    def convert_records(self, schema: str, table: str, columns: List[str],
+                        records: Sequence[Sequence[Any]]) -> List[tuple]:
+        """
+        Convert row values to the Python types the target columns' binary codecs take
+
+        Decimal/str/float values for numeric and integer columns, ISO strings
+        for dates and times, tz-aware datetimes for timestamp (offset dropped,
+        as the text path does), non-str values for text columns, etc. Call it
+        from a worker thread: it is CPU-bound and must not run on a loop.
+        """
+        types = self.column_types(schema, table)
+        converters = [_CONVERTERS.get(types.get(column)) for column in columns]
+        if not any(converters):
+            return list(records)
+
+        active = [(i, convert) for i, convert in enumerate(converters) if convert]
+        converted = []
+        for record in records:
+            row = list(record)
+            for i, convert in active:
+                value = row[i]
+                if value is not None:
+                    row[i] = convert(value)
+            converted.append(tuple(row))
+        return converted
+
+    def close(self):
+        """Close pools and stop event-loop threads"""
+        for loop, pool in zip(self._loops, self._pools):
+            try:
+                self._run(loop, pool.close())
+            except Exception as e:
+                self.logger.warning(f"Could not close asyncpg pool cleanly: {e}")
+
+        for loop in self._loops:
+            loop.call_soon_threadsafe(loop.stop)
+        for thread in self._threads:
+            thread.join()
+        for loop in self._loops:
+            loop.close()
+
+        self._loops, self._threads, self._pools, self._limits = [], [], [], []
+        self.logger.info(f"✓ asyncpg loader stopped for {self.database}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+
+
+def create_async_loader(pg_manager, database: str, streams: int,
+                        event_loops: int = 1,
+                        max_in_flight: Optional[int] = None) -> Optional[AsyncCopyLoader]:
+    """
+    Create an asyncpg loader, or None when asyncpg is unavailable.
+
+    Falls back to the psycopg2 backend (with a warning) rather than failing
+    the table.
+    """
+    if asyncpg is None:
+        logger.warning(
+            "⚠️ load_backend 'asyncpg' requested but asyncpg is not installed. "
+            "Falling back to psycopg2 COPY."
+        )
+        return None
+
+    try:
+        return AsyncCopyLoader(pg_manager, database, streams, event_loops, max_in_flight)
+    except Exception as e:
+        logger.warning(
+            f"⚠️ Could not start asyncpg loader ({type(e).__name__}: {e}). "
+            f"Falling back to psycopg2 COPY."
+        )
+        return None
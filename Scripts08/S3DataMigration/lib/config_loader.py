@@ -128,6 +128,15 @@ class ConfigLoader:
             'batch_size': self.config.get('batch_size', 10000),
             'max_retry_attempts': self.config.get('max_retry_attempts', 3),
             'lambda_timeout_buffer_seconds': self.config.get('lambda_timeout_buffer_seconds', 120),
+            'encoding_processes': self.config.get('encoding_processes', 0),
+            'load_backend': self.config.get('load_backend', 'psycopg2'),
+            'async_copy_streams': self.config.get('async_copy_streams', 8),
+            'async_event_loops': self.config.get('async_event_loops', 1),
+            'max_concurrent_sources': self.config.get('max_concurrent_sources', 1),
+            'estimate_durations': self.config.get('estimate_durations', False),
+            'estimate_history_days': self.config.get('estimate_history_days', 30),
+            'delete_sync_buckets': self.config.get('delete_sync_buckets', 1024),
+            'delete_sync_max_fraction': self.config.get('delete_sync_max_fraction', 0.1),
         }
     
     def get_config_hash(self) -> str:
@@ -3,6 +3,7 @@ Configuration validator for migration tool.
 Validates config.json structure and values before starting migration.
 """
 
+import os
 from typing import Dict, List, Any
 import logging
 
@@ -34,6 +35,8 @@ class ConfigValidator:
         'target'
     ]
     
+    LOAD_BACKENDS = ['psycopg2', 'asyncpg']
+    
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.errors = []
@@ -78,6 +81,31 @@ class ConfigValidator:
             self.errors.append(f"batch_size must be >= 100, got: {batch_size}")
         elif batch_size > 100000:
             self.warnings.append(f"batch_size is very large ({batch_size}), may cause memory issues")
+        
+        # Validate COPY encoder processes (0 = disabled)
+        processes = self.config.get('encoding_processes', 0)
+        if not isinstance(processes, int) or processes < 0:
+            self.errors.append(f"encoding_processes must be >= 0, got: {processes}")
+        elif processes > (os.cpu_count() or 1):
+            self.warnings.append(
+                f"encoding_processes ({processes}) exceeds CPU count ({os.cpu_count()}), "
+                f"extra processes will only add overhead"
+            )
+        
+        # Validate source concurrency (1 = sources run one after another)
+        max_sources = self.config.get('max_concurrent_sources', 1)
+        if not isinstance(max_sources, int) or max_sources < 1:
+            self.errors.append(f"max_concurrent_sources must be >= 1, got: {max_sources}")
+        elif max_sources > self.config.get('parallel_threads', 1):
+            self.warnings.append(
+                f"max_concurrent_sources ({max_sources}) exceeds parallel_threads, "
+                f"some sources will get a share of 1 thread"
+            )
+        
+        # Validate duration estimate history window
+        history_days = self.config.get('estimate_history_days', 30)
+        if not isinstance(history_days, int) or history_days < 1:
+            self.errors.append(f"estimate_history_days must be >= 1, got: {history_days}")
     
     def _validate_sources(self):
         """Validate sources configuration"""
@@ -107,6 +135,11 @@ class ConfigValidator:
             if key not in source:
                 self.errors.append(f"Source '{source_name}': Missing required key '{key}'")
         
+        # Validate thread weight (share of parallel_threads when sources run concurrently)
+        thread_weight = source.get('thread_weight', 1)
+        if isinstance(thread_weight, bool) or not isinstance(thread_weight, (int, float)) or thread_weight <= 0:
+            self.errors.append(f"Source '{source_name}': thread_weight must be > 0, got: {thread_weight}")
+        
         # Validate tables
         tables = source.get('tables', [])
         if not isinstance(tables, list):
@@ -179,6 +212,54 @@ class ConfigValidator:
                 f"Source '{source_name}', Table '{table_name}': "
                 f"Both source_watermark and target_watermark should be set or both null"
             )
+        
+        # Validate load backend (asyncpg is an optional dependency)
+        load_backend = table.get('load_backend', self.config.get('load_backend', 'psycopg2'))
+        if load_backend not in self.LOAD_BACKENDS:
+            self.errors.append(
+                f"Source '{source_name}', Table '{table_name}': "
+                f"load_backend must be one of {self.LOAD_BACKENDS}, got: {load_backend}"
+            )
+        elif load_backend == 'asyncpg':
+            streams = table.get('async_copy_streams', self.config.get('async_copy_streams', 8))
+            if not isinstance(streams, int) or streams < 1:
+                self.errors.append(
+                    f"Source '{source_name}', Table '{table_name}': "
+                    f"async_copy_streams must be >= 1, got: {streams}"
+                )
+            try:
+                import asyncpg  # noqa: F401
+            except ImportError:
+                self.warnings.append(
+                    f"Source '{source_name}', Table '{table_name}': "
+                    f"load_backend 'asyncpg' requested but asyncpg is not installed "
+                    f"(will fall back to psycopg2)"
+                )
+        
+        # Validate delete sync (needs a key to compare)
+        if table.get('delete_sync', False):
+            if not uniqueness_cols:
+                self.errors.append(
+                    f"Source '{source_name}', Table '{table_name}': "
+                    f"delete_sync requires uniqueness_columns"
+                )
+            if table.get('truncate_onstart', False):
+                self.warnings.append(
+                    f"Source '{source_name}', Table '{table_name}': "
+                    f"delete_sync has no effect with truncate_onstart (the reload already drops deleted rows)"
+                )
+            buckets = table.get('delete_sync_buckets', self.config.get('delete_sync_buckets', 1024))
+            if not isinstance(buckets, int) or buckets < 1:
+                self.errors.append(
+                    f"Source '{source_name}', Table '{table_name}': "
+                    f"delete_sync_buckets must be >= 1, got: {buckets}"
+                )
+            max_fraction = table.get('delete_sync_max_fraction', self.config.get('delete_sync_max_fraction', 0.1))
+            if not isinstance(max_fraction, (int, float)) or not 0 < max_fraction <= 1:
+                self.errors.append(
+                    f"Source '{source_name}', Table '{table_name}': "
+                    f"delete_sync_max_fraction must be > 0 and <= 1, got: {max_fraction}"
+                )
 
 
 def validate_config(config: Dict[str, Any]) -> bool:
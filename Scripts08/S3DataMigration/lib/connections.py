@@ -5,18 +5,19 @@ Manages connections to Snowflake and PostgreSQL databases
 
 import os
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, TYPE_CHECKING
 from contextlib import contextmanager
 
-import snowflake.connector
-from snowflake.connector import SnowflakeConnection
 import psycopg2
 from psycopg2 import pool
 from psycopg2.extras import execute_batch
-from cryptography.hazmat.primitives import serialization
-from cryptography.hazmat.backends import default_backend
 
-from .utils import quote_identifier, logger
+from .utils import quote_identifier, timed_import, logger
+
+# The Snowflake connector and cryptography are imported on first connect:
+# they dominate import time and aren't needed for config/status actions
+if TYPE_CHECKING:
+    from snowflake.connector import SnowflakeConnection
 
 
 class SnowflakeConnectionManager:
@@ -27,7 +28,7 @@ class SnowflakeConnectionManager:
         self.user = config['user']
         self.warehouse = config['warehouse']
         self.rsa_key = config['rsa_key']
-        self.connection: Optional[SnowflakeConnection] = None
+        self.connection: Optional['SnowflakeConnection'] = None
         self.logger = logger
     
     @staticmethod
@@ -36,6 +37,9 @@ class SnowflakeConnectionManager:
         Convert RSA key (from file or string) to private key bytes.
         Handles both file paths and direct key content.
         """
+        from cryptography.hazmat.primitives import serialization
+        from cryptography.hazmat.backends import default_backend
+        
         # Check if it's a file path
         if os.path.isfile(rsa_key_path_or_content):
             with open(rsa_key_path_or_content, 'r') as key_file:
@@ -64,10 +68,11 @@ class SnowflakeConnectionManager:
             encryption_algorithm=serialization.NoEncryption()
         )
     
-    def connect(self) -> SnowflakeConnection:
+    def connect(self) -> 'SnowflakeConnection':
         """Establish connection to Snowflake"""
+        snowflake_connector = timed_import('snowflake.connector')
         try:
-            self.connection = snowflake.connector.connect(
+            self.connection = snowflake_connector.connect(
                 account=self.account,
                 user=self.user,
                 private_key=self.get_private_key(self.rsa_key),
@@ -90,7 +95,7 @@ class SnowflakeConnectionManager:
             self.logger.error(f"Failed to connect to Snowflake: {e}")
             raise
     
-    def get_connection(self) -> SnowflakeConnection:
+    def get_connection(self) -> 'SnowflakeConnection':
         """Get existing or create new connection"""
         if self.connection is None or self.connection.is_closed():
             return self.connect()
@@ -130,7 +135,20 @@ class SnowflakeConnectionManager:
             return {'data': rows, 'columns': columns}
         finally:
             cursor.close()
-    
+
+    def fetch_arrow(self, query: str):
+        """
+        Execute query and return results as a pyarrow Table (None if no rows).
+        Used by the process-pool COPY encoder; requires pyarrow.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query)
+            return cursor.fetch_arrow_all()
+        finally:
+            cursor.close()
+
     def get_row_count(self, database: str, schema: str, table: str, where_clause: str = "1=1") -> int:
         """Get row count for a table"""
         query = f"""
@@ -453,6 +471,22 @@ class ConnectionFactory:
             self.postgres_manager.create_pool()
         return self.postgres_manager
     
+    def is_healthy(self) -> bool:
+        """
+        Check that cached sessions are still usable (reuse across warm Lambda invocations).
+        PostgreSQL connections are opened per use, so only the Snowflake session is probed.
+        """
+        if self.snowflake_manager:
+            connection = self.snowflake_manager.connection
+            if connection is None or connection.is_closed():
+                return False
+            try:
+                self.snowflake_manager.execute_query("SELECT 1")
+            except Exception as e:
+                logger.warning(f"Cached Snowflake session failed health check: {e}")
+                return False
+        return True
+    
     def close_all(self):
         """Close all connections"""
         if self.snowflake_manager:
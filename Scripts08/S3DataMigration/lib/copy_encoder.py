@@ -0,0 +1,184 @@
+"""
+COPY Encoder Module
+Offloads CPU-bound COPY payload encoding to a process pool
+
+The chunk threads spend most of their CPU time building DataFrames, renaming
+columns and writing CSV - all of which hold the GIL. When enabled, fetched
+Arrow data is written into shared memory and encoded by worker processes,
+leaving the threads with network I/O only (Snowflake fetch, PostgreSQL COPY).
+"""
+
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+from .utils import format_number, logger
+
+try:
+    import pyarrow as pa
+except ImportError:
+    # pyarrow ships with snowflake-connector-python[pandas]; without it we
+    # fall back to pickling plain rows to the workers
+    pa = None
+
+
+def _build_payload(df, column_mapping: Dict[str, str], target_columns: List[str]) -> Tuple[bytes, List[str]]:
+    """
+    Apply column mapping/filtering and render the COPY CSV payload.
+    Mirrors MigrationWorker._filter_columns_for_target + _copy_to_postgres.
+    """
+    import pandas as pd
+
+    if column_mapping:
+        df = df.rename(columns=column_mapping)
+
+    matching_columns = [col for col in df.columns if col in target_columns]
+    df = df[matching_columns]
+
+    if not matching_columns:
+        return b'', []
+
+    df = df.replace({pd.NaT: None})
+
+    buffer = io.StringIO()
+    df.to_csv(buffer, index=False, header=False, sep='\t', na_rep='\\N')
+    return buffer.getvalue().encode('utf-8'), matching_columns
+
+
+def _encode_shared_arrow(shm_name: str, size: int, column_mapping: Dict[str, str],
+                         target_columns: List[str]) -> Tuple[bytes, List[str], int]:
+    """Worker entry point: decode an Arrow IPC stream from shared memory and encode it"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # The parent owns (and unlinks) the segment; copy out so no
+        # Arrow/pandas view outlives it
+        data = bytes(shm.buf[:size])
+    finally:
+        shm.close()
+
+    table = pa.ipc.open_stream(pa.py_buffer(data)).read_all()
+    # integer_object_nulls keeps nullable INTs as ints (not 1.0) in the CSV
+    df = table.to_pandas(integer_object_nulls=True, date_as_object=True)
+
+    payload, columns = _build_payload(df, column_mapping, target_columns)
+    return payload, columns, table.num_rows
+
+
+def _encode_rows(rows: list, columns: List[str], column_mapping: Dict[str, str],
+                 target_columns: List[str]) -> Tuple[bytes, List[str], int]:
+    """Worker entry point for plain row tuples (no pyarrow available)"""
+    import pandas as pd
+
+    # object dtype keeps Python values as-is: an INT column with NULLs would
+    # otherwise become float64 and render as "1.0" (cf. integer_object_nulls)
+    df = pd.DataFrame(rows, columns=columns, dtype=object)
+    payload, matching_columns = _build_payload(df, column_mapping, target_columns)
+    return payload, matching_columns, len(rows)
+
+
+class CopyEncoderPool:
+    """Process pool producing COPY payloads from fetched Snowflake data"""
+
+    def __init__(self, processes: int):
+        self.processes = processes
+        self.logger = logger
+        # spawn: forking a process that holds live Snowflake/PostgreSQL
+        # sockets and running threads is not safe
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn')
+        )
+        self.logger.info(f"✓ COPY encoder pool started ({processes} processes)")
+
+    @staticmethod
+    def arrow_available() -> bool:
+        """Whether Arrow shared-memory hand-off is possible"""
+        return pa is not None
+
+    def encode_arrow(self, table, column_mapping: Dict[str, str],
+                     target_columns: List[str]) -> Tuple[bytes, List[str], int]:
+        """
+        Encode a pyarrow Table in a worker process via shared memory
+
+        Returns:
+            Tuple of (COPY payload bytes, target column list, row count)
+        """
+        # Size the IPC stream first so the table is copied exactly once
+        mock_sink = pa.MockOutputStream()
+        with pa.ipc.new_stream(mock_sink, table.schema) as writer:
+            writer.write_table(table)
+        size = mock_sink.size()
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+        try:
+            shm_buffer = pa.py_buffer(shm.buf)
+            sink = pa.FixedSizeBufferWriter(shm_buffer)
+            with pa.ipc.new_stream(sink, table.schema) as writer:
+                writer.write_table(table)
+            sink.close()
+            # Drop every export of shm.buf, otherwise close() raises BufferError
+            del writer, sink, shm_buffer
+
+            future = self._executor.submit(
+                _encode_shared_arrow, shm.name, size, column_mapping, target_columns
+            )
+            # Blocking here releases the GIL for the other chunk threads
+            payload, columns, row_count = future.result()
+        finally:
+            shm.close()
+            shm.unlink()
+
+        self.logger.debug(
+            f"Encoded {format_number(row_count)} rows in worker process "
+            f"({format_number(len(payload))} bytes)"
+        )
+        return payload, columns, row_count
+
+    def encode_rows(self, rows: list, columns: List[str], column_mapping: Dict[str, str],
+                    target_columns: List[str]) -> Tuple[bytes, List[str], int]:
+        """Encode plain row tuples in a worker process (pickled hand-off)"""
+        future = self._executor.submit(_encode_rows, rows, columns, column_mapping, target_columns)
+        return future.result()
+
+    def shutdown(self):
+        """Stop worker processes"""
+        self._executor.shutdown(wait=True)
+        self.logger.info("✓ COPY encoder pool stopped")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.shutdown()
+        return False
+
+
+def create_encoder_pool(processes: Optional[int]) -> Optional[CopyEncoderPool]:
+    """
+    Create an encoder pool, or None when disabled/unsupported.
+
+    Process pools need POSIX shared memory (/dev/shm), which is not available
+    in every runtime (notably AWS Lambda). In that case we log and fall back to
+    in-thread encoding rather than failing the table.
+    """
+    if not processes or processes < 1:
+        return None
+
+    pool = None
+    try:
+        pool = CopyEncoderPool(processes)
+        # Probe shared memory up front so we fail here, not mid-chunk
+        probe = shared_memory.SharedMemory(create=True, size=1)
+        probe.close()
+        probe.unlink()
+        return pool
+    except Exception as e:
+        logger.warning(
+            f"⚠️ Could not start COPY encoder pool ({type(e).__name__}: {e}). "
+            f"Falling back to in-thread encoding."
+        )
+        if pool:
+            pool.shutdown()
+        return None
@@ -0,0 +1,286 @@
+"""
+Delete Sync Module
+Propagates Snowflake deletions to PostgreSQL without a truncate-and-reload
+
+Both sides hash every primary key into a fixed number of buckets and report,
+per bucket, the row count and the sum of a second key hash. Only buckets whose
+(count, checksum) differ are compared key by key, and PostgreSQL rows whose key
+no longer exists in Snowflake are deleted in batches. The cost is proportional
+to the number of changed buckets, not the table size.
+
+Keys are hashed as MD5 of a canonical text form computed in SQL on both sides,
+so the per-column text rendering must match (see _key_expressions). A rendering
+mismatch makes every key look deleted, so sync refuses to delete when no bucket
+matches or when the deletions exceed max_delete_fraction of the target.
+"""
+
+import math
+from typing import Any, Dict, List, Set, Tuple
+
+from .connections import PostgresConnectionManager, SnowflakeConnectionManager
+from .utils import chunk_list, format_number, logger, quote_identifier
+
+# Separator between key columns in the canonical key text (ASCII unit separator)
+KEY_SEPARATOR_CODE = 31
+NULL_KEY_TEXT = '\\N'
+
+# Buckets compared per key-fetch query
+BUCKETS_PER_FETCH = 64
+
+
+class DeleteSynchronizer:
+    """Finds and deletes PostgreSQL rows whose keys no longer exist in Snowflake"""
+
+    def __init__(self, sf_manager: SnowflakeConnectionManager, pg_manager: PostgresConnectionManager,
+                 source_config: Dict[str, Any], table_config: Dict[str, Any],
+                 buckets: int = 1024, batch_size: int = 5000, max_delete_fraction: float = 0.1):
+        self.sf_manager = sf_manager
+        self.pg_manager = pg_manager
+        self.logger = logger
+
+        self.source_db = source_config['source_sf_database']
+        self.source_schema = source_config['source_sf_schema']
+        self.target_db = source_config['target_pg_database']
+        self.target_schema = source_config['target_pg_schema']
+
+        self.source_table = table_config['source']
+        self.target_table = table_config['target']
+        self.source_filter = table_config.get('source_filter')
+
+        self.buckets = buckets
+        self.batch_size = batch_size
+        self.max_delete_fraction = max_delete_fraction
+
+        # Source key columns and their target names (after column_mapping)
+        column_mapping = table_config.get('column_mapping') or {}
+        self.source_keys = table_config.get('uniqueness_columns') or []
+        self.target_keys = [column_mapping.get(col, col) for col in self.source_keys]
+
+        # PostgreSQL data types of the target key columns (loaded in sync)
+        self._key_types: Dict[str, str] = {}
+
+    def sync(self) -> int:
+        """
+        Run delete detection and delete stale target rows.
+
+        Returns:
+            Number of rows deleted from PostgreSQL
+        """
+        if not self.source_keys:
+            self.logger.warning(f"[{self.source_table}] delete_sync needs uniqueness_columns, skipping")
+            return 0
+
+        sf_key, pg_key = self._key_expressions()
+
+        sf_buckets = self._fetch_sf_buckets(sf_key)
+        pg_buckets = self._fetch_pg_buckets(pg_key)
+
+        source_rows = sum(count for count, _ in sf_buckets.values())
+        target_rows = sum(count for count, _ in pg_buckets.values())
+
+        # An empty source almost always means a bad filter or grant, not a real
+        # mass delete - never wipe the target on that signal alone
+        if source_rows == 0 and target_rows > 0:
+            self.logger.warning(
+                f"[{self.source_table}] ⚠️ delete_sync skipped: source returned 0 rows but "
+                f"target has {format_number(target_rows)}"
+            )
+            return 0
+
+        # Only buckets holding target rows can contain deletions
+        changed = sorted(
+            bucket for bucket, stats in pg_buckets.items()
+            if sf_buckets.get(bucket) != stats
+        )
+
+        self.logger.info(
+            f"[{self.source_table}] delete_sync: {len(changed)}/{self.buckets} buckets differ "
+            f"(source {format_number(source_rows)} rows, target {format_number(target_rows)} rows)"
+        )
+
+        if not changed:
+            return 0
+
+        # Matching buckets prove both sides render keys the same way; if none
+        # match, a type/format difference would make every target key look stale
+        if len(changed) == len(pg_buckets):
+            self.logger.warning(
+                f"[{self.source_table}] ⚠️ delete_sync skipped: no bucket matches between source "
+                f"and target (key text rendering differs?)"
+            )
+            return 0
+
+        # Collect every stale key before deleting anything so the limit check
+        # sees the whole delete
+        max_deletes = math.ceil(target_rows * self.max_delete_fraction)
+        stale: List[tuple] = []
+        for bucket_group in chunk_list(changed, BUCKETS_PER_FETCH):
+            source_keys = self._fetch_sf_keys(sf_key, bucket_group)
+            target_keys = self._fetch_pg_keys(pg_key, bucket_group)
+
+            stale.extend(values for key_text, values in target_keys if key_text not in source_keys)
+            if len(stale) > max_deletes:
+                self.logger.warning(
+                    f"[{self.source_table}] ⚠️ delete_sync skipped: more than {format_number(max_deletes)} "
+                    f"stale rows ({self.max_delete_fraction:.0%} of target, delete_sync_max_fraction)"
+                )
+                return 0
+
+        deleted = self._delete_keys(stale) if stale else 0
+
+        if deleted:
+            self.logger.info(
+                f"✓ [{self.source_table}] delete_sync removed {format_number(deleted)} rows "
+                f"from {self.target_schema}.{self.target_table}"
+            )
+        return deleted
+
+    def _get_target_key_types(self) -> Dict[str, str]:
+        conn = self.pg_manager.get_connection(self.target_db)
+        cursor = conn.cursor()
+        try:
+            cursor.execute("""
+                SELECT column_name, data_type
+                FROM information_schema.columns
+                WHERE table_schema = %s AND table_name = %s
+            """, (self.target_schema, self.target_table))
+            return {name: data_type for name, data_type in cursor.fetchall()}
+        finally:
+            cursor.close()
+            self.pg_manager.return_connection(conn)
+
+    def _key_expressions(self) -> Tuple[str, str]:
+        """
+        Canonical key text for Snowflake and PostgreSQL.
+        The rendering follows the target column type, so e.g. a timestamp key
+        becomes 'YYYY-MM-DD HH24:MI:SS.ffffff' on both sides.
+        """
+        types = self._key_types = self._get_target_key_types()
+        sf_parts, pg_parts = [], []
+
+        for source_col, target_col in zip(self.source_keys, self.target_keys):
+            sf_col = quote_identifier(source_col)
+            pg_col = quote_identifier(target_col)
+            data_type = types.get(target_col, 'text')
+
+            if data_type.startswith('timestamp'):
+                sf_expr = f"TO_VARCHAR({sf_col}, 'YYYY-MM-DD HH24:MI:SS.FF6')"
+                pg_expr = f"to_char({pg_col}, 'YYYY-MM-DD HH24:MI:SS.US')"
+            elif data_type == 'date':
+                sf_expr = f"TO_VARCHAR({sf_col}, 'YYYY-MM-DD')"
+                pg_expr = f"to_char({pg_col}, 'YYYY-MM-DD')"
+            elif data_type == 'uuid':
+                sf_expr = f"LOWER(TO_VARCHAR({sf_col}))"
+                pg_expr = f"{pg_col}::text"
+            else:
+                sf_expr = f"TO_VARCHAR({sf_col})"
+                pg_expr = f"{pg_col}::text"
+
+            sf_parts.append(f"COALESCE({sf_expr}, '{NULL_KEY_TEXT}')")
+            pg_parts.append(f"COALESCE({pg_expr}, '{NULL_KEY_TEXT}')")
+
+        sf_key = f" || CHR({KEY_SEPARATOR_CODE}) || ".join(sf_parts)
+        pg_key = f" || chr({KEY_SEPARATOR_CODE}) || ".join(pg_parts)
+        return sf_key, pg_key
+
+    def _sf_source(self) -> str:
+        where = f"WHERE {self.source_filter}" if self.source_filter else ""
+        return f"{self.source_db}.{self.source_schema}.{self.source_table} {where}"
+
+    def _fetch_sf_buckets(self, sf_key: str) -> Dict[int, Tuple[int, int]]:
+        # Bucket = first 8 hex digits of the MD5, checksum = next 15 (fits a bigint)
+        query = f"""
+            SELECT MOD(TO_NUMBER(SUBSTR(h, 1, 8), 'XXXXXXXX'), {self.buckets}) AS bucket,
+                   COUNT(*),
+                   SUM(TO_NUMBER(SUBSTR(h, 9, 15), 'XXXXXXXXXXXXXXX'))
+            FROM (SELECT MD5({sf_key}) AS h FROM {self._sf_source()})
+            GROUP BY bucket
+        """
+        return {int(bucket): (int(count), int(checksum))
+                for bucket, count, checksum in self.sf_manager.execute_query(query)}
+
+    def _fetch_pg_buckets(self, pg_key: str) -> Dict[int, Tuple[int, int]]:
+        query = f"""
+            SELECT ('x' || lpad(substr(h, 1, 8), 16, '0'))::bit(64)::bigint % {self.buckets} AS bucket,
+                   COUNT(*),
+                   SUM(('x' || lpad(substr(h, 9, 15), 16, '0'))::bit(64)::bigint)
+            FROM (SELECT md5({pg_key}) AS h FROM {self.target_schema}.{self.target_table}) k
+            GROUP BY bucket
+        """
+        conn = self.pg_manager.get_connection(self.target_db)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query)
+            return {int(bucket): (int(count), int(checksum))
+                    for bucket, count, checksum in cursor.fetchall()}
+        finally:
+            cursor.close()
+            self.pg_manager.return_connection(conn)
+
+    def _fetch_sf_keys(self, sf_key: str, buckets: List[int]) -> Set[str]:
+        bucket_list = ", ".join(str(b) for b in buckets)
+        query = f"""
+            SELECT k
+            FROM (SELECT {sf_key} AS k FROM {self._sf_source()})
+            WHERE MOD(TO_NUMBER(SUBSTR(MD5(k), 1, 8), 'XXXXXXXX'), {self.buckets}) IN ({bucket_list})
+        """
+        return {row[0] for row in self.sf_manager.execute_query(query)}
+
+    def _fetch_pg_keys(self, pg_key: str, buckets: List[int]) -> List[Tuple[str, tuple]]:
+        key_columns = ", ".join(quote_identifier(col) for col in self.target_keys)
+        query = f"""
+            SELECT k, {key_columns}
+            FROM (
+                SELECT {pg_key} AS k, {key_columns}
+                FROM {self.target_schema}.{self.target_table}
+            ) t
+            WHERE ('x' || lpad(substr(md5(k), 1, 8), 16, '0'))::bit(64)::bigint % {self.buckets}
+                  = ANY(%s)
+        """
+        conn = self.pg_manager.get_connection(self.target_db)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, (buckets,))
+            return [(row[0], tuple(row[1:])) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            self.pg_manager.return_connection(conn)
+
+    def _delete_keys(self, keys: List[tuple]) -> int:
+        """Delete rows by key in batches, committing each batch"""
+        from psycopg2.extras import execute_values
+
+        key_columns = ", ".join(quote_identifier(col) for col in self.target_keys)
+        delete_sql = f"""
+            DELETE FROM {self.target_schema}.{self.target_table} t
+            USING (VALUES %s) AS d ({key_columns})
+            WHERE {' AND '.join(f't.{quote_identifier(c)} = d.{quote_identifier(c)}' for c in self.target_keys)}
+        """
+
+        # VALUES would type quoted literals as text (uuid = text has no operator),
+        # so cast each placeholder to the key column's type
+        placeholders = []
+        for col in self.target_keys:
+            data_type = self._key_types.get(col)
+            if data_type and data_type not in ('USER-DEFINED', 'ARRAY'):
+                placeholders.append(f"%s::{data_type}")
+            else:
+                placeholders.append("%s")
+        template = f"({', '.join(placeholders)})"
+
+        deleted = 0
+        conn = self.pg_manager.get_connection(self.target_db)
+        cursor = conn.cursor()
+        try:
+            for batch in chunk_list(keys, self.batch_size):
+                execute_values(cursor, delete_sql, batch, template=template, page_size=len(batch))
+                deleted += cursor.rowcount
+                conn.commit()
+            return deleted
+        except Exception as e:
+            conn.rollback()
+            self.logger.error(f"[{self.source_table}] delete_sync failed after {format_number(deleted)} rows: {e}")
+            raise
+        finally:
+            cursor.close()
+            self.pg_manager.return_connection(conn)
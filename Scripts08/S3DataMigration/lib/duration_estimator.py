@@ -0,0 +1,233 @@
+"""
+Duration Estimator Module
+Predicts chunk and table durations from past migration_chunk_status rows
+
+StatusTracker records started_at/completed_at for every chunk. For each table
+and chunking strategy we fit chunk duration as a fixed overhead plus a
+per-row cost (least squares over completed chunks), and keep the typical
+rows/chunks of a run so a table can be estimated before it is chunked.
+"""
+
+import statistics
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from .utils import format_duration, format_number, logger
+
+
+@dataclass
+class ThroughputModel:
+    """Chunk duration model: seconds = overhead_seconds + rows * seconds_per_row"""
+    samples: int
+    overhead_seconds: float
+    seconds_per_row: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return 1 / self.seconds_per_row if self.seconds_per_row > 0 else float('inf')
+
+    def predict(self, rows: int) -> float:
+        return self.overhead_seconds + max(rows, 0) * self.seconds_per_row
+
+
+@dataclass
+class TableHistory:
+    """Typical shape of a table's past runs"""
+    runs: int
+    rows_per_run: int
+    chunks_per_run: int
+
+
+def fit_throughput(samples: int, sum_rows: float, sum_secs: float,
+                   sum_rows_secs: float, sum_rows_sq: float) -> Optional[ThroughputModel]:
+    """
+    Least-squares fit of chunk seconds against chunk rows from aggregate sums.
+    Falls back to a plain rows/s ratio when the fit is degenerate (all chunks the
+    same size, or a negative overhead/slope from noisy history).
+    """
+    if samples < 1 or sum_secs <= 0:
+        return None
+
+    variance = samples * sum_rows_sq - sum_rows ** 2
+    if samples >= 2 and variance > 0:
+        slope = (samples * sum_rows_secs - sum_rows * sum_secs) / variance
+        intercept = (sum_secs - slope * sum_rows) / samples
+        if slope > 0 and intercept >= 0:
+            return ThroughputModel(samples, intercept, slope)
+
+    if sum_rows > 0:
+        return ThroughputModel(samples, 0.0, sum_secs / sum_rows)
+    # Only empty chunks: pure overhead
+    return ThroughputModel(samples, sum_secs / samples, 0.0)
+
+
+class DurationEstimator:
+    """Fits rows/s per table and strategy from completed chunk history"""
+
+    def __init__(self, pg_manager, target_database: str, history_days: int = 30,
+                 min_samples: int = 3):
+        self.pg_manager = pg_manager
+        self.target_database = target_database
+        self.history_days = history_days
+        self.min_samples = min_samples
+        self.logger = logger
+
+        # {(database, schema, table, strategy or None): ThroughputModel}
+        self.models: Dict[Tuple[str, str, str, Optional[str]], ThroughputModel] = {}
+        # {(database, schema, table): TableHistory}
+        self.tables: Dict[Tuple[str, str, str], TableHistory] = {}
+
+    def load(self) -> int:
+        """
+        Load chunk history from migration_status.migration_chunk_status.
+
+        Returns:
+            Number of tables with usable history
+        """
+        chunk_query = """
+            SELECT source_database, source_schema, source_table,
+                   COALESCE(chunk_range->>'strategy', '') AS strategy,
+                   COUNT(*),
+                   SUM(rows_copied::float8),
+                   SUM(secs),
+                   SUM(rows_copied::float8 * secs),
+                   SUM(rows_copied::float8 * rows_copied)
+            FROM (
+                SELECT source_database, source_schema, source_table, chunk_range, rows_copied,
+                       EXTRACT(EPOCH FROM (completed_at - started_at))::float8 AS secs
+                FROM migration_status.migration_chunk_status
+                WHERE status = 'completed'
+                  AND started_at IS NOT NULL
+                  AND completed_at > started_at
+                  AND completed_at > CURRENT_TIMESTAMP - make_interval(days => %s)
+            ) c
+            GROUP BY 1, 2, 3, 4
+        """
+        run_query = """
+            SELECT source_database, source_schema, source_table,
+                   SUM(rows_copied), COUNT(*)
+            FROM migration_status.migration_chunk_status
+            WHERE status = 'completed'
+              AND completed_at > CURRENT_TIMESTAMP - make_interval(days => %s)
+            GROUP BY source_database, source_schema, source_table, run_id
+        """
+
+        conn = self.pg_manager.get_connection(self.target_database)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(chunk_query, (self.history_days,))
+            chunk_rows = cursor.fetchall()
+            cursor.execute(run_query, (self.history_days,))
+            run_rows = cursor.fetchall()
+        finally:
+            cursor.close()
+            self.pg_manager.return_connection(conn)
+
+        # Per-strategy sums, plus a per-table aggregate across strategies
+        table_sums: Dict[Tuple[str, str, str], List[float]] = {}
+        for database, schema, table, strategy, *sums in chunk_rows:
+            sums = [float(s or 0) for s in sums]
+            model = fit_throughput(*sums)
+            if strategy and model and model.samples >= self.min_samples:
+                self.models[(database, schema, table, strategy)] = model
+
+            totals = table_sums.setdefault((database, schema, table), [0.0] * 5)
+            for i, value in enumerate(sums):
+                totals[i] += value
+
+        for (database, schema, table), sums in table_sums.items():
+            model = fit_throughput(*sums)
+            if model:
+                self.models[(database, schema, table, None)] = model
+
+        per_table_runs: Dict[Tuple[str, str, str], List[Tuple[int, int]]] = {}
+        for database, schema, table, rows, chunks in run_rows:
+            per_table_runs.setdefault((database, schema, table), []).append((int(rows or 0), int(chunks)))
+
+        for key, runs in per_table_runs.items():
+            self.tables[key] = TableHistory(
+                runs=len(runs),
+                rows_per_run=int(statistics.median(r for r, _ in runs)),
+                chunks_per_run=max(1, int(statistics.median(c for _, c in runs)))
+            )
+
+        self.logger.info(
+            f"✓ Duration estimator loaded: {len(self.tables)} tables with history "
+            f"(last {self.history_days} days)"
+        )
+        return len(self.tables)
+
+    def get_model(self, database: str, schema: str, table: str,
+                  strategy: Optional[str] = None) -> Optional[ThroughputModel]:
+        """Model for the table+strategy, falling back to the table across strategies"""
+        if strategy:
+            model = self.models.get((database, schema, table, strategy))
+            if model:
+                return model
+        return self.models.get((database, schema, table, None))
+
+    def estimate_chunk(self, database: str, schema: str, table: str, rows: int,
+                       strategy: Optional[str] = None) -> Optional[float]:
+        """Predicted seconds for one chunk, or None without history"""
+        model = self.get_model(database, schema, table, strategy)
+        return model.predict(rows) if model else None
+
+    def estimate_table(self, database: str, schema: str, table: str, parallel_threads: int,
+                       chunk_rows: Optional[List[int]] = None,
+                       strategy: Optional[str] = None) -> Optional[float]:
+        """
+        Predicted wall-clock seconds for a table, or None without history.
+
+        Args:
+            database, schema, table: Snowflake source identifiers
+            parallel_threads: Chunk threads the table will run with
+            chunk_rows: Estimated rows per chunk once chunked; defaults to the
+                typical run from history (median rows split over median chunks)
+            strategy: Chunking strategy, if known
+        """
+        model = self.get_model(database, schema, table, strategy)
+        if model is None:
+            return None
+
+        if chunk_rows is None:
+            history = self.tables.get((database, schema, table))
+            if history is None:
+                return None
+            chunk_rows = [history.rows_per_run // history.chunks_per_run] * history.chunks_per_run
+
+        if not chunk_rows:
+            return 0.0
+
+        chunk_seconds = [model.predict(rows) for rows in chunk_rows]
+        # Makespan of a greedy thread pool is bounded below by both the longest
+        # chunk and the evenly spread total
+        return max(max(chunk_seconds), sum(chunk_seconds) / max(1, parallel_threads))
+
+    def order_longest_first(self, source: Dict[str, Any], tables: List[Dict[str, Any]],
+                            parallel_threads: int) -> List[Dict[str, Any]]:
+        """Sort tables by predicted duration, longest first (no history sorts last)"""
+        def sort_key(table):
+            seconds = self.estimate_table(
+                source['source_sf_database'], source['source_sf_schema'], table['source'],
+                table.get('parallel_threads', parallel_threads)
+            )
+            return -(seconds if seconds is not None else -1)
+
+        return sorted(tables, key=sort_key)
+
+    def describe(self, database: str, schema: str, table: str) -> str:
+        """One-line summary of the history behind an estimate (for logs/plans)"""
+        model = self.get_model(database, schema, table)
+        history = self.tables.get((database, schema, table))
+        if model is None or history is None:
+            return "no history"
+        rate = (
+            f"{format_number(int(model.rows_per_second))} rows/s per chunk"
+            if model.seconds_per_row > 0 else "size-independent"
+        )
+        return (
+            f"{rate} "
+            f"(+{format_duration(model.overhead_seconds)} overhead), "
+            f"~{format_number(history.rows_per_run)} rows in {history.chunks_per_run} chunks "
+            f"over {history.runs} run(s)"
+        )
@@ -197,8 +197,23 @@ class IndexManager:
         if errors:
             raise Exception(f"Some indexes/constraints failed to restore: {'; '.join(errors[:3])}")
     
-    def analyze_table(self, schema: str, table: str):
-        """Run ANALYZE on table to update statistics after bulk load"""
+    def analyze_table(self, schema: str, table: str, force: bool = False):
+        """
+        Run ANALYZE (and VACUUM if needed) on table after bulk load.
+        
+        Skipped when pg_stat_user_tables shows too few changes since the last
+        analyze to matter (see MaintenancePlanner thresholds), unless force=True.
+        """
+        if not force:
+            from .maintenance import MaintenancePlanner
+            
+            try:
+                if MaintenancePlanner(self.pg_manager, self.database).run_table(schema, table) is not None:
+                    return
+                self.logger.warning(f"{schema}.{table} not found in pg_stat_user_tables, analyzing anyway")
+            except Exception as e:
+                self.logger.warning(f"Could not plan maintenance for {schema}.{table}, analyzing anyway: {e}")
+        
         conn = self.pg_manager.get_connection(self.database)
         cursor = conn.cursor()
         try:
@@ -214,4 +229,3 @@ class IndexManager:
         finally:
             cursor.close()
             self.pg_manager.return_connection(conn)
-
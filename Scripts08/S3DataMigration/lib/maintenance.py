@@ -0,0 +1,210 @@
+"""
+Maintenance Module
+Selective VACUUM/ANALYZE driven by pg_stat_user_tables modification counters
+
+A table is only vacuumed/analyzed when its counters cross the configured
+thresholds (same shape as autovacuum: base count + fraction of live rows),
+so a small incremental load doesn't pay for a full-table ANALYZE.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional
+
+from .connections import PostgresConnectionManager
+from .utils import format_duration, format_number, logger
+
+DEFAULT_THRESHOLDS = {
+    'analyze_min_changes': 1000,
+    'analyze_change_fraction': 0.05,
+    'vacuum_min_dead_tuples': 10000,
+    'vacuum_dead_fraction': 0.10,
+}
+
+
+class MaintenancePlanner:
+    """Plans and runs VACUUM/ANALYZE for tables that need it"""
+
+    def __init__(self, pg_manager: PostgresConnectionManager, database: str,
+                 thresholds: Optional[Dict[str, float]] = None, max_workers: int = 4):
+        self.pg_manager = pg_manager
+        self.database = database
+        self.thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+        self.max_workers = max_workers
+        self.logger = logger
+
+    def get_table_stats(self, schema: str, tables: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """Read modification counters from pg_stat_user_tables"""
+        query = """
+            SELECT relname, n_live_tup, n_dead_tup, n_mod_since_analyze,
+                   COALESCE(last_analyze, last_autoanalyze) IS NOT NULL AS analyzed
+            FROM pg_stat_user_tables
+            WHERE schemaname = %s
+        """
+        params: list = [schema]
+        if tables is not None:
+            query += " AND relname = ANY(%s)"
+            params.append(tables)
+
+        conn = self.pg_manager.get_connection(self.database)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            return [self._stats_row(row) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            self.pg_manager.return_connection(conn)
+
+    def get_relation_stats(self, schema: str, table: str) -> Optional[Dict[str, Any]]:
+        """
+        Modification counters for one table, resolved the way the load SQL names it
+
+        The name goes through regclass, so it matches the relation that
+        COPY/ANALYZE {schema}.{table} address: unquoted names fold to lower
+        case, quoted ones ('"DimPayer"') keep theirs. The returned 'table' is
+        the name as given. None when no such table exists.
+        """
+        query = """
+            SELECT relname, n_live_tup, n_dead_tup, n_mod_since_analyze,
+                   COALESCE(last_analyze, last_autoanalyze) IS NOT NULL AS analyzed
+            FROM pg_stat_user_tables
+            WHERE relid = to_regclass(%s)
+        """
+        conn = self.pg_manager.get_connection(self.database)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, [f'{schema}.{table}'])
+            row = cursor.fetchone()
+        finally:
+            cursor.close()
+            self.pg_manager.return_connection(conn)
+
+        if row is None:
+            return None
+        return {**self._stats_row(row), 'table': table}
+
+    @staticmethod
+    def _stats_row(row) -> Dict[str, Any]:
+        return {
+            'table': row[0],
+            'n_live_tup': row[1] or 0,
+            'n_dead_tup': row[2] or 0,
+            'n_mod_since_analyze': row[3] or 0,
+            'analyzed': bool(row[4]),
+        }
+
+    def plan(self, table_stats: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Decide per table whether to VACUUM and/or ANALYZE
+
+        Returns:
+            {table: {'vacuum': bool, 'analyze': bool, 'reason': str}}
+        """
+        t = self.thresholds
+        decisions = {}
+
+        for stats in table_stats:
+            live, dead, mods = stats['n_live_tup'], stats['n_dead_tup'], stats['n_mod_since_analyze']
+            vacuum_threshold = t['vacuum_min_dead_tuples'] + t['vacuum_dead_fraction'] * live
+            analyze_threshold = t['analyze_min_changes'] + t['analyze_change_fraction'] * live
+
+            reasons = []
+            vacuum = dead > vacuum_threshold
+            if vacuum:
+                reasons.append(f"{format_number(dead)} dead tuples")
+
+            analyze = mods > analyze_threshold
+            if analyze:
+                reasons.append(f"{format_number(mods)} changes since last analyze")
+            elif not stats['analyzed'] and live > 0:
+                analyze = True
+                reasons.append("never analyzed")
+
+            if not reasons:
+                reasons.append(
+                    f"below thresholds ({format_number(mods)} changes, "
+                    f"{format_number(dead)} dead, {format_number(live)} live)"
+                )
+
+            decisions[stats['table']] = {'vacuum': vacuum, 'analyze': analyze, 'reason': ', '.join(reasons)}
+
+        return decisions
+
+    def _maintain(self, schema: str, table: str, vacuum: bool, analyze: bool):
+        if vacuum:
+            sql = f'VACUUM (ANALYZE) {schema}.{table}' if analyze else f'VACUUM {schema}.{table}'
+        else:
+            sql = f'ANALYZE {schema}.{table}'
+
+        conn = self.pg_manager.get_connection(self.database)
+        # VACUUM cannot run inside a transaction block
+        conn.autocommit = True
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql)
+        finally:
+            cursor.close()
+            self.pg_manager.return_connection(conn)
+
+    def run(self, schema: str, tables: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Plan and run maintenance, tables in parallel on separate connections
+
+        Args:
+            schema: Target schema
+            tables: Tables to consider (default: every table in the schema)
+
+        Returns:
+            {table: 'vacuumed' / 'analyzed' / 'skipped: <reason>' / 'failed: <error>'}
+        """
+        return self._run_plan(schema, self.plan(self.get_table_stats(schema, tables)))
+
+    def run_table(self, schema: str, table: str) -> Optional[str]:
+        """
+        Plan and run maintenance for one table (see get_relation_stats for naming)
+
+        Returns:
+            Outcome as in run(), or None when the table was not found
+        """
+        stats = self.get_relation_stats(schema, table)
+        if stats is None:
+            return None
+        return self._run_plan(schema, self.plan([stats]))[table]
+
+    def _run_plan(self, schema: str, decisions: Dict[str, Dict[str, Any]]) -> Dict[str, str]:
+        outcome = {}
+        selected = []
+
+        for table, decision in decisions.items():
+            if decision['vacuum'] or decision['analyze']:
+                selected.append(table)
+            else:
+                outcome[table] = f"skipped: {decision['reason']}"
+                self.logger.info(f"⏭️  Skipping maintenance on {schema}.{table}: {decision['reason']}")
+
+        if not selected:
+            return outcome
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(selected)))) as executor:
+            futures = {
+                executor.submit(
+                    self._maintain, schema, table,
+                    decisions[table]['vacuum'], decisions[table]['analyze']
+                ): table
+                for table in selected
+            }
+            for future in as_completed(futures):
+                table = futures[future]
+                decision = decisions[table]
+                try:
+                    future.result()
+                    outcome[table] = 'vacuumed' if decision['vacuum'] else 'analyzed'
+                    self.logger.info(f"✓ {outcome[table].capitalize()} {schema}.{table} ({decision['reason']})")
+                except Exception as e:
+                    # Maintenance failure shouldn't stop migration
+                    outcome[table] = f"failed: {e}"
+                    self.logger.error(f"Failed to maintain {schema}.{table}: {e}")
+
+        self.logger.debug(f"Maintenance of {len(selected)} table(s) took {format_duration(time.time() - start)}")
+        return outcome
@@ -3,8 +3,10 @@ Migration Worker Module
 Handles the actual data migration for individual chunks
 """
 
+import asyncio
 import logging
 import io
+import threading
 from typing import Dict, Any, Optional, List
 from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
 
@@ -13,6 +15,8 @@ import psycopg2
 
 from .connections import SnowflakeConnectionManager, PostgresConnectionManager
 from .status_tracker import StatusTracker
+from .async_loader import UniqueViolationError as AsyncUniqueViolationError
+from .async_loader import DataError as AsyncDataError
 from .utils import quote_identifier, get_column_list_sql, format_number, Timer, logger
 
 
@@ -27,7 +31,9 @@ class MigrationWorker:
         source_config: Dict[str, Any],
         table_config: Dict[str, Any],
         max_retries: int = 3,
-        is_initial_full_load: bool = False  # NEW: Pre-determined by orchestrator
+        is_initial_full_load: bool = False,  # NEW: Pre-determined by orchestrator
+        encoder_pool=None,  # Optional CopyEncoderPool for process-based COPY encoding
+        async_loader=None  # Optional AsyncCopyLoader (load_backend = "asyncpg")
     ):
         self.sf_manager = sf_manager
         self.pg_manager = pg_manager
@@ -41,6 +47,12 @@ class MigrationWorker:
         # This is set by orchestrator BEFORE any threads start to avoid race conditions
         self._is_initial_full_load = is_initial_full_load
         
+        # Shared across chunk threads; None = encode in-thread (default)
+        self.encoder_pool = encoder_pool
+        
+        # Shared across chunk threads; None = psycopg2 COPY (default)
+        self.async_loader = async_loader
+        
         # Extract configuration
         self.source_db = source_config['source_sf_database']
         self.source_schema = source_config['source_sf_schema']
@@ -83,6 +95,13 @@ class MigrationWorker:
         
         # Track if we've logged column exclusions (avoid repeated logging)
         self._logged_column_exclusions = False
+        
+        # UPSERT statements per column set, built once per table
+        self._upsert_sql_cache = {}
+        
+        # UPSERT outcome totals across chunk threads (reported by orchestrator)
+        self.upsert_stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
+        self._upsert_stats_lock = threading.Lock()
     
     def _get_target_columns(self) -> List[str]:
         """Get target table columns (cached)"""
@@ -424,6 +443,10 @@ class MigrationWorker:
         
         self.logger.debug(f"Fetching data: {fetch_query[:200]}...")
         
+        # Process-pool encoding only applies to COPY; UPSERT needs the rows in-process
+        if self.encoder_pool and self._resolve_load_mode(chunk_metadata)[0]:
+            return self._process_chunk_encoded(fetch_query, chunk_metadata)
+        
         with Timer(f"Fetch from Snowflake: {self.source_table}", self.logger):
             result = self.sf_manager.fetch_dataframe(fetch_query)
         
@@ -457,6 +480,252 @@ class MigrationWorker:
             # Fallback to rows_count for backward compatibility (UPSERT mode)
             return rows_count
     
+    def _process_chunk_encoded(self, fetch_query: str, chunk_metadata: Dict[str, Any]) -> int:
+        """
+        COPY path with encoding offloaded to the process pool
+        
+        The thread only fetches (network I/O), hands the Arrow data to a worker
+        process through shared memory and streams the returned payload to COPY.
+        """
+        column_mapping = self._get_column_mapping()
+        target_columns = self._get_target_columns()
+        
+        if self.encoder_pool.arrow_available():
+            with Timer(f"Fetch from Snowflake (Arrow): {self.source_table}", self.logger):
+                arrow_table = self.sf_manager.fetch_arrow(fetch_query)
+            
+            if arrow_table is None or arrow_table.num_rows == 0:
+                self.logger.info(
+                    f"[{self.source_table}] Chunk has no new data, skipping load"
+                )
+                return 0
+            
+            self.logger.info(f"Fetched {format_number(arrow_table.num_rows)} rows from Snowflake")
+            payload, columns, row_count = self.encoder_pool.encode_arrow(
+                arrow_table, column_mapping, target_columns
+            )
+            
+            def get_dataframe():
+                df = arrow_table.to_pandas(integer_object_nulls=True, date_as_object=True)
+                return self._filter_columns_for_target(df).replace({pd.NaT: None})
+        else:
+            with Timer(f"Fetch from Snowflake: {self.source_table}", self.logger):
+                result = self.sf_manager.fetch_dataframe(fetch_query)
+            
+            rows = result['data']
+            if not rows:
+                self.logger.info(
+                    f"[{self.source_table}] Chunk has no new data, skipping load"
+                )
+                return 0
+            
+            self.logger.info(f"Fetched {format_number(len(rows))} rows from Snowflake")
+            payload, columns, row_count = self.encoder_pool.encode_rows(
+                rows, result['columns'], column_mapping, target_columns
+            )
+            
+            def get_dataframe():
+                df = pd.DataFrame(rows, columns=result['columns'])
+                return self._filter_columns_for_target(df).replace({pd.NaT: None})
+        
+        if not columns:
+            self.logger.warning(f"No matching columns found between source and target")
+            return 0
+        
+        if not hasattr(self, '_logged_copy_mode'):
+            self._logged_copy_mode = True
+            self.logger.info(
+                f"[{self.source_table}] Using COPY mode "
+                f"({self._resolve_load_mode(chunk_metadata)[1]}, process-pool encoding)"
+            )
+        
+        with Timer(f"Load to PostgreSQL: {self.target_table}", self.logger):
+            try:
+                self._copy_buffer_to_postgres(io.BytesIO(payload), columns, row_count)
+                return row_count
+            except psycopg2.errors.UniqueViolation as e:
+                return self._handle_copy_duplicate(e, chunk_metadata, row_count, get_dataframe)
+    
+    def _prepare_async_copy(self, fetch_query: str, chunk_metadata: Dict[str, Any]):
+        """
+        Fetch a chunk and shape it for binary COPY (runs on a worker thread)
+        
+        Rows from Snowflake skip the DataFrame/CSV round trip: only column
+        mapping, target-column filtering and conversion to the target column
+        types are applied.
+        
+        Returns:
+            (columns, records, row_count, get_dataframe), or None when there
+            is nothing to load
+        """
+        with Timer(f"Fetch from Snowflake: {self.source_table}", self.logger):
+            result = self.sf_manager.fetch_dataframe(fetch_query)
+        
+        rows = result['data']
+        if not rows:
+            self.logger.info(
+                f"[{self.source_table}] Chunk has no new data, skipping load"
+            )
+            return None
+        
+        self.logger.info(f"Fetched {format_number(len(rows))} rows from Snowflake")
+        
+        # Map source column positions onto target columns
+        column_mapping = self._get_column_mapping()
+        target_columns = self._get_target_columns()
+        mapped_columns = [column_mapping.get(col, col) for col in result['columns']]
+        positions = [i for i, col in enumerate(mapped_columns) if col in target_columns]
+        columns = [mapped_columns[i] for i in positions]
+        
+        if not columns:
+            self.logger.warning(f"No matching columns found between source and target")
+            return None
+        
+        if len(positions) == len(mapped_columns):
+            records = rows
+        else:
+            records = [tuple(row[i] for i in positions) for row in rows]
+        
+        if not hasattr(self, '_logged_copy_mode'):
+            self._logged_copy_mode = True
+            self.logger.info(
+                f"[{self.source_table}] Using COPY mode "
+                f"({self._resolve_load_mode(chunk_metadata)[1]}, asyncpg binary backend)"
+            )
+        
+        def get_dataframe():
+            df = pd.DataFrame(rows, columns=result['columns'])
+            return self._filter_columns_for_target(df).replace({pd.NaT: None})
+        
+        try:
+            records = self.async_loader.convert_records(
+                self.target_schema, self.target_table, columns, records
+            )
+        except (TypeError, ValueError, ArithmeticError) as e:
+            # Left as-is: binary COPY raises DataError and the text path takes over
+            self.logger.debug(f"[{self.source_table}] Value conversion for binary COPY failed: {e}")
+        
+        return columns, records, len(rows), get_dataframe
+    
+    def _copy_text_fallback(self, error: Exception, chunk_metadata: Dict[str, Any],
+                            row_count: int, get_dataframe) -> int:
+        """Load a chunk the binary codecs rejected through the psycopg2 text COPY path"""
+        chunk_id = chunk_metadata.get('chunk_id', 'unknown')
+        self.logger.warning(
+            f"⚠️ [{self.source_table}] Binary COPY rejected a value in chunk {chunk_id} "
+            f"({str(error)[:200]}), loading it with text COPY"
+        )
+        try:
+            self._copy_to_postgres(get_dataframe())
+            return row_count
+        except psycopg2.errors.UniqueViolation as e:
+            return self._handle_copy_duplicate(e, chunk_metadata, row_count, get_dataframe)
+    
+    async def process_chunk_async(self, run_id: str, chunk_id: int, chunk_filter: str,
+                                  chunk_metadata: Dict[str, Any], executor,
+                                  run_blocking=None) -> int:
+        """
+        Process a chunk as a coroutine on an AsyncCopyLoader event loop
+        
+        Blocking work (status updates, watermark lookup, Snowflake fetch,
+        value conversion, UPSERT chunks and fallback) runs on the given
+        thread executor;
+        the binary COPY is awaited on the loop, so the fetch thread is free
+        for the next chunk while this one streams. Retries follow
+        _process_chunk_with_retry (3 attempts, exponential wait); OOM-like
+        errors fall back to sub-batching.
+        
+        Args:
+            executor: Thread executor for the blocking steps
+            run_blocking: Optional wrapper(func, *args) for each blocking step
+                (e.g. the orchestrator's shared chunk budget)
+        
+        Returns:
+            Number of rows processed
+        """
+        loop = asyncio.get_running_loop()
+        
+        def blocking(func, *args, **kwargs):
+            call = lambda: func(*args, **kwargs)
+            if run_blocking:
+                return loop.run_in_executor(executor, run_blocking, call)
+            return loop.run_in_executor(executor, call)
+        
+        await blocking(
+            self.status_tracker.update_chunk_status,
+            run_id, self.source_db, self.source_schema, self.source_table,
+            chunk_id, 'in_progress'
+        )
+        
+        chunk_metadata = chunk_metadata or {}
+        chunk_metadata['chunk_id'] = chunk_id
+        
+        try:
+            rows_processed = await self._load_chunk_async(chunk_filter, chunk_metadata, blocking)
+            
+            await blocking(
+                self.status_tracker.update_chunk_status,
+                run_id, self.source_db, self.source_schema, self.source_table,
+                chunk_id, 'completed', rows_copied=rows_processed
+            )
+            return rows_processed
+        
+        except Exception as e:
+            error_msg = str(e)[:500]
+            await blocking(
+                self.status_tracker.update_chunk_status,
+                run_id, self.source_db, self.source_schema, self.source_table,
+                chunk_id, 'failed', error_message=error_msg
+            )
+            raise
+    
+    async def _load_chunk_async(self, chunk_filter: str, chunk_metadata: Dict[str, Any],
+                                blocking) -> int:
+        """Fetch + binary COPY for one chunk with retries (see process_chunk_async)"""
+        # UPSERT chunks need psycopg2 and the DataFrame: same path as process_chunk
+        if not self._resolve_load_mode(chunk_metadata)[0]:
+            return await blocking(self._process_chunk_with_oom_protection, chunk_filter, chunk_metadata)
+        
+        max_attempts = 3
+        for attempt in range(1, max_attempts + 1):
+            try:
+                fetch_query = await blocking(self._build_fetch_query, chunk_filter, chunk_metadata)
+                prepared = await blocking(self._prepare_async_copy, fetch_query, chunk_metadata)
+                if prepared is None:
+                    return 0
+                columns, records, row_count, get_dataframe = prepared
+                
+                try:
+                    return await self.async_loader.copy_records_async(
+                        self.target_schema, self.target_table, columns, records
+                    )
+                except AsyncUniqueViolationError as e:
+                    return await blocking(
+                        self._handle_copy_duplicate, e, chunk_metadata, row_count, get_dataframe
+                    )
+                except AsyncDataError as e:
+                    return await blocking(
+                        self._copy_text_fallback, e, chunk_metadata, row_count, get_dataframe
+                    )
+            
+            except Exception as e:
+                error_str = str(e).lower()
+                if isinstance(e, MemoryError) or any(
+                    oom_indicator in error_str for oom_indicator in
+                    ['out of memory', 'memory', 'cannot allocate', 'memoryerror']
+                ):
+                    self.logger.warning(
+                        f"⚠️ [{self.source_table}] OOM-like error in chunk "
+                        f"{chunk_metadata.get('chunk_id', 'unknown')}: {str(e)[:100]}"
+                    )
+                    return await blocking(
+                        self._process_chunk_with_sub_batches, chunk_filter, chunk_metadata
+                    )
+                if attempt == max_attempts:
+                    raise
+                # Same schedule as the tenacity retry on _process_chunk_with_retry
+                await asyncio.sleep(min(max(2 ** attempt, 4), 60))
+    
     def _build_fetch_query(self, chunk_filter: str, chunk_metadata: Dict[str, Any]) -> str:
         """Build SELECT query for Snowflake"""
         strategy = chunk_metadata.get('strategy', '')
@@ -742,28 +1011,9 @@ class MigrationWorker:
         # Replace NaT (Not-a-Time) with None for PostgreSQL compatibility
         df_filtered = df_filtered.replace({pd.NaT: None})
         
-        # SMART DECISION LOGIC:
-        # Priority order:
-        # 1. If chunk metadata has pre-determined mode (from smart mode analysis), use it
-        # 2. If truncate_onstart, always COPY
-        # 3. If no uniqueness_columns, always COPY
-        # 4. Otherwise, fallback to old initial_full_load logic
-        
         chunk_metadata = chunk_metadata or {}
         
-        # Check if chunk has pre-determined smart mode decision
-        use_copy = chunk_metadata.get('use_copy_mode')
-        
-        if use_copy is None:
-            # Fallback to legacy logic if chunk doesn't have smart mode set
-            use_copy = (
-                self.truncate_onstart or 
-                not self.uniqueness_columns or
-                self._is_initial_full_load  # Use the pre-determined value
-            )
-            decision_reason = "legacy logic"
-        else:
-            decision_reason = "smart chunk analysis"
+        use_copy, decision_reason = self._resolve_load_mode(chunk_metadata)
         
         # Log the decision (only once per table)
         if use_copy:
@@ -778,52 +1028,9 @@ class MigrationWorker:
                 self._copy_to_postgres(df_filtered)
                 return len(df_filtered)  # All rows successfully inserted
             except psycopg2.errors.UniqueViolation as e:
-                # Duplicate key detected in COPY mode
-                chunk_id = chunk_metadata.get('chunk_id', 'unknown')
-                insert_only_mode = self.table_config.get('insert_only_mode', False)
-                
-                if insert_only_mode:
-                    # INSERT-ONLY MODE: Skip duplicates, log and continue
-                    # CRITICAL: COPY is atomic - when it fails, ZERO rows are inserted!
-                    self.logger.warning(
-                        f"⚠️ [{self.source_table}] Duplicate key detected in COPY mode "
-                        f"(chunk {chunk_id}) - INSERT_ONLY_MODE enabled, entire chunk skipped"
-                    )
-                    self.logger.warning(
-                        f"📊 [{self.source_table}] Chunk {chunk_id}: 0 rows inserted "
-                        f"(COPY is atomic, rejected all {len(df_filtered)} rows due to duplicates)"
-                    )
-                    self.logger.debug(f"Duplicate key error: {str(e)[:200]}")
-                    # Return 0 to accurately track that no rows were inserted
-                    return 0
-                else:
-                    # NORMAL MODE: Fallback to UPSERT for smart mode mis-prediction
-                    self.logger.warning(
-                        f"⚠️ [{self.source_table}] Duplicate key detected in COPY mode "
-                        f"(chunk {chunk_id}), auto-falling back to UPSERT mode"
-                    )
-                    self.logger.debug(f"Duplicate key error: {str(e)[:200]}")
-                    
-                    # Check if we have uniqueness_columns configured for UPSERT
-                    if not self.uniqueness_columns:
-                        self.logger.error(
-                            f"❌ [{self.source_table}] Cannot fallback to UPSERT: "
-                            f"no uniqueness_columns configured"
-                        )
-                        raise  # Re-raise, can't recover without uniqueness columns
-                    
-                    # AUTO-RETRY with UPSERT
-                    self.logger.info(
-                        f"🔄 [{self.source_table}] Retrying chunk {chunk_id} with UPSERT mode"
-                    )
-                    self._upsert_to_postgres(df_filtered)
-                    
-                    # Log successful recovery
-                    self.logger.info(
-                        f"✅ [{self.source_table}] Chunk {chunk_id} completed successfully "
-                        f"via UPSERT fallback"
-                    )
-                    return len(df_filtered)  # UPSERT processed all rows (insert or update)
+                return self._handle_copy_duplicate(
+                    e, chunk_metadata, len(df_filtered), lambda: df_filtered
+                )
         else:
             if not hasattr(self, '_logged_upsert_mode'):
                 self._logged_upsert_mode = True
@@ -834,13 +1041,94 @@ class MigrationWorker:
             self._upsert_to_postgres(df_filtered)
             return len(df_filtered)  # UPSERT processed all rows
     
-    def _filter_columns_for_target(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _resolve_load_mode(self, chunk_metadata: Dict[str, Any]):
         """
-        Filter DataFrame columns to only those that exist in target PostgreSQL table.
-        Applies column mapping if configured to handle name differences between source and target.
-        Also auto-infers mapping from watermark columns if they differ.
-        Uses cached column list for performance.
+        Decide between COPY and UPSERT for a chunk
+        
+        Returns:
+            Tuple of (use_copy, decision_reason)
+        """
+        # SMART DECISION LOGIC:
+        # Priority order:
+        # 1. If chunk metadata has pre-determined mode (from smart mode analysis), use it
+        # 2. If truncate_onstart, always COPY
+        # 3. If no uniqueness_columns, always COPY
+        # 4. Otherwise, fallback to old initial_full_load logic
+        use_copy = chunk_metadata.get('use_copy_mode')
+        
+        if use_copy is None:
+            # Fallback to legacy logic if chunk doesn't have smart mode set
+            use_copy = (
+                self.truncate_onstart or 
+                not self.uniqueness_columns or
+                self._is_initial_full_load  # Use the pre-determined value
+            )
+            return use_copy, "legacy logic"
+        return use_copy, "smart chunk analysis"
+    
+    def _handle_copy_duplicate(self, error: Exception, chunk_metadata: Dict[str, Any],
+                               row_count: int, get_dataframe) -> int:
         """
+        TIER 2: Handle a UniqueViolation raised by COPY
+        
+        Args:
+            error: The UniqueViolation raised by COPY
+            chunk_metadata: Metadata about the chunk
+            row_count: Number of rows in the rejected COPY
+            get_dataframe: Callable returning the filtered DataFrame for UPSERT
+        
+        Returns:
+            Number of rows actually inserted/updated
+        """
+        # Duplicate key detected in COPY mode
+        chunk_id = chunk_metadata.get('chunk_id', 'unknown')
+        insert_only_mode = self.table_config.get('insert_only_mode', False)
+        
+        if insert_only_mode:
+            # INSERT-ONLY MODE: Skip duplicates, log and continue
+            # CRITICAL: COPY is atomic - when it fails, ZERO rows are inserted!
+            self.logger.warning(
+                f"⚠️ [{self.source_table}] Duplicate key detected in COPY mode "
+                f"(chunk {chunk_id}) - INSERT_ONLY_MODE enabled, entire chunk skipped"
+            )
+            self.logger.warning(
+                f"📊 [{self.source_table}] Chunk {chunk_id}: 0 rows inserted "
+                f"(COPY is atomic, rejected all {row_count} rows due to duplicates)"
+            )
+            self.logger.debug(f"Duplicate key error: {str(error)[:200]}")
+            # Return 0 to accurately track that no rows were inserted
+            return 0
+        
+        # NORMAL MODE: Fallback to UPSERT for smart mode mis-prediction
+        self.logger.warning(
+            f"⚠️ [{self.source_table}] Duplicate key detected in COPY mode "
+            f"(chunk {chunk_id}), auto-falling back to UPSERT mode"
+        )
+        self.logger.debug(f"Duplicate key error: {str(error)[:200]}")
+        
+        # Check if we have uniqueness_columns configured for UPSERT
+        if not self.uniqueness_columns:
+            self.logger.error(
+                f"❌ [{self.source_table}] Cannot fallback to UPSERT: "
+                f"no uniqueness_columns configured"
+            )
+            raise error  # Re-raise, can't recover without uniqueness columns
+        
+        # AUTO-RETRY with UPSERT
+        self.logger.info(
+            f"🔄 [{self.source_table}] Retrying chunk {chunk_id} with UPSERT mode"
+        )
+        self._upsert_to_postgres(get_dataframe())
+        
+        # Log successful recovery
+        self.logger.info(
+            f"✅ [{self.source_table}] Chunk {chunk_id} completed successfully "
+            f"via UPSERT fallback"
+        )
+        return row_count  # UPSERT processed all rows (insert or update)
+    
+    def _get_column_mapping(self) -> Dict[str, str]:
+        """Explicit column_mapping plus the auto-inferred watermark mapping"""
         # Build column mapping
         column_mapping = self.table_config.get('column_mapping', {}).copy() or {}
         
@@ -857,6 +1145,17 @@ class MigrationWorker:
                     f"{source_watermark} -> {target_watermark}"
                 )
         
+        return column_mapping
+    
+    def _filter_columns_for_target(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Filter DataFrame columns to only those that exist in target PostgreSQL table.
+        Applies column mapping if configured to handle name differences between source and target.
+        Also auto-infers mapping from watermark columns if they differ.
+        Uses cached column list for performance.
+        """
+        column_mapping = self._get_column_mapping()
+        
         # Apply column mapping (explicit + auto-inferred)
         if column_mapping:
             df = df.rename(columns=column_mapping)
@@ -887,17 +1186,21 @@ class MigrationWorker:
         Use PostgreSQL COPY for fast bulk insert
         This is the fastest method but doesn't handle conflicts
         """
+        # Prepare CSV buffer
+        buffer = io.StringIO()
+        df.to_csv(buffer, index=False, header=False, sep='\t', na_rep='\\N')
+        buffer.seek(0)
+        
+        self._copy_buffer_to_postgres(buffer, df.columns.tolist(), len(df))
+    
+    def _copy_buffer_to_postgres(self, buffer, column_names: List[str], row_count: int):
+        """COPY a pre-encoded tab-separated CSV buffer into the target table"""
         conn = self.pg_manager.get_connection(self.target_db)
         cursor = conn.cursor()
         
         try:
-            # Prepare CSV buffer
-            buffer = io.StringIO()
-            df.to_csv(buffer, index=False, header=False, sep='\t', na_rep='\\N')
-            buffer.seek(0)
-            
             # Get column list
-            columns = get_column_list_sql(df.columns.tolist(), quote=True)
+            columns = get_column_list_sql(column_names, quote=True)
             
             # COPY data
             copy_sql = f"""
@@ -908,7 +1211,7 @@ class MigrationWorker:
             cursor.copy_expert(copy_sql, buffer)
             conn.commit()
             
-            self.logger.debug(f"✓ COPYed {format_number(len(df))} rows to {self.target_table}")
+            self.logger.debug(f"✓ COPYed {format_number(row_count)} rows to {self.target_table}")
             
         except Exception as e:
             conn.rollback()
@@ -918,67 +1221,151 @@ class MigrationWorker:
             cursor.close()
             self.pg_manager.return_connection(conn)
     
-    def _upsert_to_postgres(self, df: pd.DataFrame):
+    def _build_upsert_sql(self, all_columns: List[str]) -> str:
+        """
+        Build the INSERT ... ON CONFLICT statement for a column set (cached per table)
+        
+        Conflicting rows are only updated when at least one non-key column
+        IS DISTINCT FROM the incoming value, so unchanged rows don't write a new
+        tuple version (dead tuples / vacuum debt on reloads without watermarks).
+        """
+        cache_key = tuple(all_columns)
+        if cache_key in self._upsert_sql_cache:
+            return self._upsert_sql_cache[cache_key]
+        
+        # Build column lists
+        columns_sql = get_column_list_sql(all_columns, quote=True)
+        
+        # Build conflict columns
+        conflict_columns_sql = get_column_list_sql(self.uniqueness_columns, quote=True)
+        
+        # Build update SET clause (all columns except conflict columns)
+        uniqueness_lower = [c.lower() for c in self.uniqueness_columns]
+        update_columns = [col for col in all_columns if col.lower() not in uniqueness_lower]
+        
+        target = f"{self.target_schema}.{self.target_table}"
+        
+        if not update_columns:
+            # If all columns are in uniqueness_columns, just skip on conflict
+            update_clause = "NOTHING"
+        else:
+            update_set = ", ".join([
+                f'{quote_identifier(col)} = EXCLUDED.{quote_identifier(col)}'
+                for col in update_columns
+            ])
+            
+            # Skip no-op updates: row comparison treats NULLs as comparable values
+            current_values = ", ".join(f"{target}.{quote_identifier(col)}" for col in update_columns)
+            incoming_values = ", ".join(f"EXCLUDED.{quote_identifier(col)}" for col in update_columns)
+            distinct_guard = f"ROW({current_values}) IS DISTINCT FROM ROW({incoming_values})"
+            
+            # Add watermark condition if applicable
+            if self.target_watermark and self.target_watermark in all_columns:
+                update_clause = f"""
+                    UPDATE SET {update_set}
+                    WHERE ({target}.{quote_identifier(self.target_watermark)} < EXCLUDED.{quote_identifier(self.target_watermark)}
+                           OR {target}.{quote_identifier(self.target_watermark)} IS NULL)
+                      AND {distinct_guard}
+                """
+            else:
+                update_clause = f"UPDATE SET {update_set} WHERE {distinct_guard}"
+        
+        # xmax = 0 only for freshly inserted tuples; skipped rows return nothing
+        upsert_sql = f"""
+            INSERT INTO {target} ({columns_sql})
+            VALUES %s
+            ON CONFLICT ({conflict_columns_sql})
+            DO {update_clause}
+            RETURNING (xmax = 0) AS inserted
+        """
+        
+        self._upsert_sql_cache[cache_key] = upsert_sql
+        return upsert_sql
+    
+    def _dedupe_upsert_rows(self, df: pd.DataFrame, key_columns: List[str]) -> pd.DataFrame:
+        """
+        One row per key, folded like sequential UPSERTs of the chunk's rows
+        
+        Without a watermark every later row overwrites, so the last one wins.
+        With one, a later row only replaces the kept row when the kept
+        watermark is NULL or older (the UPSERT's WHERE clause), so e.g. a later
+        duplicate with an older watermark does not displace an earlier one.
+        """
+        duplicated = df.duplicated(subset=key_columns, keep=False)
+        if not duplicated.any():
+            return df
+        
+        if not (self.target_watermark and self.target_watermark in df.columns):
+            return df.drop_duplicates(subset=key_columns, keep='last')
+        
+        # key -> (position, watermark) of the row kept so far
+        kept: Dict[tuple, tuple] = {}
+        candidates = df[key_columns + [self.target_watermark]].itertuples(index=False, name=None)
+        for position, (is_duplicate, values) in enumerate(zip(duplicated, candidates)):
+            if not is_duplicate:
+                continue
+            key, watermark = values[:-1], values[-1]
+            current = kept.get(key)
+            if current is None or pd.isna(current[1]) or (
+                not pd.isna(watermark) and current[1] < watermark
+            ):
+                kept[key] = (position, watermark)
+        
+        keep = ~duplicated.to_numpy()
+        keep[[position for position, _ in kept.values()]] = True
+        return df[keep]
+    
+    def _upsert_to_postgres(self, df: pd.DataFrame) -> Dict[str, int]:
         """
         Use INSERT ... ON CONFLICT for incremental upserts
         Handles duplicate keys and watermark-based updates
+        
+        Returns:
+            Dict with inserted / updated / skipped (unchanged, older watermark
+            or folded duplicate) row counts
         """
+        stats = {'inserted': 0, 'updated': 0, 'skipped': 0}
         if df.empty:
-            return
+            return stats
+        
+        # A multi-row INSERT cannot touch the same key twice; keep the row the
+        # previous row-by-row statements would have left behind
+        key_columns = [col for col in df.columns
+                       if col.lower() in [c.lower() for c in self.uniqueness_columns]]
+        if key_columns and len(key_columns) == len(self.uniqueness_columns):
+            deduped = self._dedupe_upsert_rows(df, key_columns)
+            stats['skipped'] += len(df) - len(deduped)
+            df = deduped
         
         conn = self.pg_manager.get_connection(self.target_db)
         cursor = conn.cursor()
         
         try:
-            # Build column lists
-            all_columns = df.columns.tolist()
-            columns_sql = get_column_list_sql(all_columns, quote=True)
-            
-            # Build conflict columns
-            conflict_columns_sql = get_column_list_sql(self.uniqueness_columns, quote=True)
-            
-            # Build update SET clause (all columns except conflict columns)
-            update_columns = [col for col in all_columns 
-                            if col.lower() not in [c.lower() for c in self.uniqueness_columns]]
-            
-            if not update_columns:
-                # If all columns are in uniqueness_columns, just skip on conflict
-                update_clause = "NOTHING"
-            else:
-                update_set = ", ".join([
-                    f'{quote_identifier(col)} = EXCLUDED.{quote_identifier(col)}'
-                    for col in update_columns
-                ])
-                
-                # Add watermark condition if applicable
-                if self.target_watermark and self.target_watermark in all_columns:
-                    update_clause = f"""
-                        UPDATE SET {update_set}
-                        WHERE {self.target_schema}.{self.target_table}.{quote_identifier(self.target_watermark)} < EXCLUDED.{quote_identifier(self.target_watermark)}
-                           OR {self.target_schema}.{self.target_table}.{quote_identifier(self.target_watermark)} IS NULL
-                    """
-                else:
-                    update_clause = f"UPDATE SET {update_set}"
-            
-            # Build INSERT statement
-            placeholders = ", ".join(["%s"] * len(all_columns))
-            
-            upsert_sql = f"""
-                INSERT INTO {self.target_schema}.{self.target_table} ({columns_sql})
-                VALUES ({placeholders})
-                ON CONFLICT ({conflict_columns_sql})
-                DO {update_clause}
-            """
+            upsert_sql = self._build_upsert_sql(df.columns.tolist())
             
             # Execute batch upsert
             data = [tuple(row) for row in df.itertuples(index=False, name=None)]
             
-            from psycopg2.extras import execute_batch
-            execute_batch(cursor, upsert_sql, data, page_size=1000)
+            from psycopg2.extras import execute_values
+            results = execute_values(cursor, upsert_sql, data, page_size=1000, fetch=True)
             
             conn.commit()
             
-            self.logger.debug(f"✓ Upserted {format_number(len(df))} rows to {self.target_table}")
+            stats['inserted'] = sum(1 for (inserted,) in results if inserted)
+            stats['updated'] = len(results) - stats['inserted']
+            stats['skipped'] += len(data) - len(results)
+            
+            with self._upsert_stats_lock:
+                for key, value in stats.items():
+                    self.upsert_stats[key] += value
+            
+            self.logger.debug(
+                f"✓ Upserted {format_number(len(df))} rows to {self.target_table} "
+                f"({format_number(stats['inserted'])} inserted, "
+                f"{format_number(stats['updated'])} updated, "
+                f"{format_number(stats['skipped'])} skipped (unchanged or older watermark))"
+            )
+            return stats
             
         except Exception as e:
             conn.rollback()
@@ -82,8 +82,9 @@ class StatusTracker:
                          completed_tables: Optional[int] = None,
                          failed_tables: Optional[int] = None,
                          total_rows_copied: Optional[int] = None,
-                         error_message: Optional[str] = None):
-        """Update migration run status"""
+                         error_message: Optional[str] = None,
+                         metadata: Optional[Dict] = None):
+        """Update migration run status (metadata is merged into the existing JSONB)"""
         updates = ["status = %s"]
         params = [status]
         
@@ -106,6 +107,10 @@ class StatusTracker:
             updates.append("error_message = %s")
             params.append(error_message)
         
+        if metadata is not None:
+            updates.append("metadata = COALESCE(metadata, '{}'::jsonb) || %s::jsonb")
+            params.append(json.dumps(metadata, cls=DecimalEncoder))
+        
         params.append(str(run_id))
         
         query = f"""
@@ -458,6 +463,44 @@ class StatusTracker:
             cursor.close()
             self.pg_manager.return_connection(conn)
     
+    def get_run_summary(self, run_id: Optional[uuid.UUID] = None) -> Optional[Dict]:
+        """Get a migration run record (latest run if run_id is None)"""
+        query = """
+            SELECT run_id, status, started_at, completed_at, total_sources, total_tables,
+                   completed_tables, failed_tables, total_rows_copied, error_message, metadata
+            FROM migration_status.migration_runs
+        """
+        params = ()
+        if run_id:
+            query += " WHERE run_id = %s"
+            params = (str(run_id),)
+        query += " ORDER BY started_at DESC LIMIT 1"
+        
+        conn = self.pg_manager.get_connection(self.target_database)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(query, params)
+            row = cursor.fetchone()
+            if not row:
+                return None
+            
+            return {
+                'run_id': str(row[0]),
+                'status': row[1],
+                'started_at': row[2],
+                'completed_at': row[3],
+                'total_sources': row[4],
+                'total_tables': row[5],
+                'completed_tables': row[6],
+                'failed_tables': row[7],
+                'total_rows_copied': row[8],
+                'error_message': row[9],
+                'metadata': row[10]
+            }
+        finally:
+            cursor.close()
+            self.pg_manager.return_connection(conn)
+    
     def get_table_progress(self, run_id: uuid.UUID) -> List[Dict]:
         """Get progress summary for all tables in a run"""
         query = """
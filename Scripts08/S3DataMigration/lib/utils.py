@@ -3,6 +3,7 @@ Utilities Module
 Logging setup, helper functions, and common utilities
 """
 
+import importlib
 import logging
 import sys
 import os
@@ -101,6 +102,38 @@ def get_logger(name: str = "migration") -> logging.Logger:
     return logger
 
 
+# Seconds spent importing each lazily loaded module (import-time report)
+_import_times: Dict[str, float] = {}
+
+
+def timed_import(module_name: str):
+    """
+    Import a module and record how long it took.
+    
+    Heavy dependencies (pandas, Snowflake connector, ...) are imported lazily so
+    light actions (config validation, status, dry-run) don't pay for them. Each
+    module is timed once, in load order, so the report shows its incremental cost.
+    
+    Args:
+        module_name: Dotted module name
+    
+    Returns:
+        The imported module
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    
+    start = time.perf_counter()
+    module = importlib.import_module(module_name)
+    _import_times[module_name] = time.perf_counter() - start
+    return module
+
+
+def get_import_report() -> Dict[str, float]:
+    """Get import times (seconds, rounded) recorded by timed_import"""
+    return {name: round(seconds, 3) for name, seconds in _import_times.items()}
+
+
 def format_number(num: int) -> str:
     """Format number with thousand separators"""
     return f"{num:,}"
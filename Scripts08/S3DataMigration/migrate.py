@@ -9,9 +9,10 @@ import os
 import argparse
 import time
 import uuid
+import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 # Add lib to path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -29,7 +30,6 @@ from lib.connections import ConnectionFactory
 from lib.chunking import ChunkingStrategyFactory
 from lib.status_tracker import StatusTracker
 from lib.index_manager import IndexManager
-from lib.migration_worker import MigrationWorker
 from lib.utils import setup_logging, Timer, format_number, format_duration, logger
 
 
@@ -62,10 +62,18 @@ class MigrationOrchestrator:
                 raise ValueError("Configuration validation failed. Please fix errors and try again.")
             self.logger.info("✓ Configuration validation passed")
             
-            # Initialize connection factory
+            # Initialize connection factory (dry-run only reads config, no connections)
             self.conn_factory = ConnectionFactory(self.config)
-            self.sf_manager = self.conn_factory.get_snowflake_manager()
-            self.pg_manager = self.conn_factory.get_postgres_manager()
+            if args is not None and getattr(args, 'dry_run', False):
+                self.sf_manager = None
+                self.pg_manager = None
+            elif args is not None and getattr(args, 'estimate', False):
+                # Estimates only read status history from PostgreSQL
+                self.sf_manager = None
+                self.pg_manager = self.conn_factory.get_postgres_manager()
+            else:
+                self.sf_manager = self.conn_factory.get_snowflake_manager()
+                self.pg_manager = self.conn_factory.get_postgres_manager()
         # Lambda mode: Use pre-initialized objects
         else:
             self.config_path = None
@@ -85,6 +93,15 @@ class MigrationOrchestrator:
                     'batch_size': config.get('batch_size', 10000),
                     'max_retry_attempts': config.get('max_retry_attempts', 3),
                     'lambda_timeout_buffer_seconds': config.get('lambda_timeout_buffer_seconds', 120),
+                    'encoding_processes': config.get('encoding_processes', 0),
+                    'load_backend': config.get('load_backend', 'psycopg2'),
+                    'async_copy_streams': config.get('async_copy_streams', 8),
+                    'async_event_loops': config.get('async_event_loops', 1),
+                    'max_concurrent_sources': config.get('max_concurrent_sources', 1),
+                    'estimate_durations': config.get('estimate_durations', False),
+                    'estimate_history_days': config.get('estimate_history_days', 30),
+                    'delete_sync_buckets': config.get('delete_sync_buckets', 1024),
+                    'delete_sync_max_fraction': config.get('delete_sync_max_fraction', 0.1),
                 }
             self.conn_factory = None
             self.sf_manager = sf_manager
@@ -99,6 +116,14 @@ class MigrationOrchestrator:
         # Track statistics (for Lambda response)
         self.table_stats = {}  # {table_name: {status, rows, error}}
         self.total_rows_migrated = 0
+        
+        # Multi-source concurrency: shared chunk budget + currently running sources
+        self._connection_budget: Optional[threading.BoundedSemaphore] = None
+        self._active_sources = {}  # {source_name: thread_weight}
+        self._lock = threading.Lock()
+        
+        # History-based duration estimates (loaded on first use)
+        self.duration_estimator = None
     
     def run(self):
         """Execute the migration"""
@@ -171,48 +196,19 @@ class MigrationOrchestrator:
             self.logger.info(f"Migration Run ID: {self.run_id}")
             self.logger.info("=" * 80)
             
-            # Process each source
-            completed_tables = 0
-            failed_tables = 0
-            total_rows = 0
+            # Process sources (concurrently if max_concurrent_sources > 1)
+            source_results = self.run_sources(sources)
             
-            for source in sources:
-                source_name = source.get('source_name', 'unnamed')
-                self.logger.info(f"\nProcessing source: {source_name}")
-                self.logger.info("-" * 80)
-                
-                tables = self.config_loader.get_enabled_tables(source)
-                
-                for table in tables:
-                    # Check Lambda timeout before processing each table
-                    if self._check_lambda_timeout():
-                        self.logger.warning("Approaching Lambda timeout, gracefully stopping...")
-                        self.timed_out = True
-                        break
-                    
-                    try:
-                        rows = self._process_table(source, table)
-                        total_rows += rows
-                        completed_tables += 1
-                        self.table_stats[table['source']] = {
-                            'status': 'completed',
-                            'rows': rows
-                        }
-                    except Exception as e:
-                        self.logger.error(f"Failed to process table {table['source']}: {e}")
-                        failed_tables += 1
-                        self.table_stats[table['source']] = {
-                            'status': 'failed',
-                            'error': str(e)
-                        }
-                
-                # Break outer loop if timed out
-                if self.timed_out:
-                    break
+            completed_tables = sum(1 for s in self.table_stats.values() if s['status'] == 'completed')
+            failed_tables = sum(1 for s in self.table_stats.values() if s['status'] == 'failed')
+            total_rows = self.total_rows_migrated
+            source_errors = [name for name, r in source_results.items() if r.get('error')]
             
             # Update final status
-            self.total_rows_migrated = total_rows
-            final_status = 'completed' if failed_tables == 0 and not self.timed_out else 'partial'
+            final_status = (
+                'completed' if failed_tables == 0 and not source_errors and not self.timed_out
+                else 'partial'
+            )
             self.status_tracker.update_run_status(
                 self.run_id,
                 status=final_status,
@@ -638,6 +634,7 @@ class MigrationOrchestrator:
                 
                 if should_truncate:
                     self.logger.info(f"[{source_table}] 🗑️  Executing TRUNCATE TABLE...")
+                    from lib.migration_worker import MigrationWorker
                     worker = MigrationWorker(
                         self.sf_manager, self.pg_manager, self.status_tracker,
                         source, table, self.global_config['max_retry_attempts']
@@ -764,14 +761,37 @@ class MigrationOrchestrator:
                         f"[{source_table}] Using table-specific thread count: {parallel_threads}"
                     )
                 
+                # Concurrent sources: cap at this source's weighted share of the budget
+                thread_share = self._source_thread_share(source)
+                if thread_share is not None and thread_share < parallel_threads:
+                    self.logger.info(
+                        f"[{source_table}] Capping threads at source share: "
+                        f"{parallel_threads} → {thread_share}"
+                    )
+                    parallel_threads = thread_share
+                
                 self.logger.info(
                     f"[{source_table}] Processing {len(chunks)} chunks with "
                     f"{parallel_threads} threads..."
                 )
                 
+                if self.duration_estimator:
+                    estimate = self.duration_estimator.estimate_table(
+                        source['source_sf_database'], source['source_sf_schema'], source_table,
+                        parallel_threads,
+                        chunk_rows=[chunk.estimated_rows or 0 for chunk in chunks],
+                        strategy=chunks[0].metadata.get('strategy')
+                    )
+                    if estimate is not None:
+                        self.logger.info(f"[{source_table}] Estimated duration: ~{format_duration(estimate)}")
+                
                 # Process chunks in parallel
                 total_rows = self._process_chunks_parallel(source, table, chunks, parallel_threads)
                 
+                # Optional: propagate Snowflake deletes (truncate reloads already do)
+                if table.get('delete_sync', False) and not table.get('truncate_onstart', False):
+                    self._sync_deletes(source, table)
+                
                 # Mark table as completed
                 self.status_tracker.update_table_status(
                     self.run_id,
@@ -821,6 +841,11 @@ class MigrationOrchestrator:
             chunks: List of chunks to process
             parallel_threads: Number of parallel threads (overrides global config if provided)
         """
+        # Lazy imports: pandas/tenacity are only needed once chunks are processed
+        from lib.migration_worker import MigrationWorker
+        from lib.copy_encoder import create_encoder_pool
+        from lib.async_loader import create_async_loader
+        
         total_rows = 0
         completed = 0
         failed = 0
@@ -836,75 +861,136 @@ class MigrationOrchestrator:
         # This must happen ONCE to avoid race conditions between threads
         is_initial_full_load = self._check_is_initial_full_load(source, table)
         
+        # Optional process pool for COPY encoding (escapes the GIL on multi-core hosts)
+        # Check for per-table override first, then global (0 = in-thread encoding)
+        encoding_processes = table.get(
+            'encoding_processes', self.global_config.get('encoding_processes', 0)
+        )
+        encoder_pool = create_encoder_pool(encoding_processes)
+        
+        # Optional asyncpg COPY backend, selected per table (default: psycopg2)
+        async_loader = None
+        if table.get('load_backend', self.global_config.get('load_backend', 'psycopg2')) == 'asyncpg':
+            async_streams = table.get('async_copy_streams', self.global_config.get('async_copy_streams', 8))
+            async_loader = create_async_loader(
+                self.pg_manager,
+                source['target_pg_database'],
+                async_streams,
+                table.get('async_event_loops', self.global_config.get('async_event_loops', 1)),
+                # Enough chunks in flight to keep every stream busy while the
+                # fetch threads work ahead
+                max_in_flight=async_streams + parallel_threads
+            )
+        
         worker = MigrationWorker(
             self.sf_manager, self.pg_manager, self.status_tracker,
             source, table, self.global_config['max_retry_attempts'],
-            is_initial_full_load=is_initial_full_load  # Pass the decision to worker
+            is_initial_full_load=is_initial_full_load,  # Pass the decision to worker
+            encoder_pool=encoder_pool,
+            async_loader=async_loader
         )
         
-        with ThreadPoolExecutor(max_workers=parallel_threads) as executor:
-            # Submit all chunks
-            future_to_chunk = {
-                executor.submit(
-                    worker.process_chunk,
-                    str(self.run_id),
-                    chunk.chunk_id,
-                    chunk.filter_sql,
-                    chunk.metadata  # Pass chunk metadata for chunk-scoped watermark
-                ): chunk
-                for chunk in chunks
-            }
-            
-            # Process completed chunks with TIER 4 resilience
-            for future in as_completed(future_to_chunk):
-                chunk = future_to_chunk[future]
-                try:
-                    rows = future.result()
-                    total_rows += rows
-                    completed += 1
-                    
-                    if completed % 10 == 0 or completed == len(chunks):
-                        self.logger.info(
-                            f"  Progress: {completed}/{len(chunks)} chunks "
-                            f"({format_number(total_rows)} rows)"
-                        )
-                except Exception as e:
-                    failed += 1
-                    error_type = type(e).__name__
-                    error_msg = str(e)
-                    
-                    # TIER 4: Classify error severity
-                    is_systemic = self._is_systemic_error(error_type, error_msg)
-                    
-                    if is_systemic:
-                        # FAIL FAST: Systemic errors indicate broken config/schema
-                        self.logger.error(
-                            f"\n{'='*80}\n"
-                            f"❌ FATAL: Systemic error detected in table '{source_table}'\n"
-                            f"{'='*80}\n"
-                            f"Error Type: {error_type}\n"
-                            f"Chunk: {chunk.chunk_id}\n"
-                            f"Error: {error_msg[:500]}\n"
-                            f"\n"
-                            f"This error indicates a configuration or schema problem that\n"
-                            f"affects the entire table. Aborting table migration.\n"
-                            f"{'='*80}"
-                        )
-                        raise  # Stop processing this table immediately
-                    else:
-                        # LOG AND SKIP: Isolated error, continue with other chunks
-                        failed_chunks.append({
-                            'chunk_id': chunk.chunk_id,
-                            'error_type': error_type,
-                            'error': error_msg[:500],
-                            'filter': chunk.filter_sql[:200] if hasattr(chunk, 'filter_sql') else 'N/A'
-                        })
+        try:
+            with ThreadPoolExecutor(max_workers=parallel_threads) as executor:
+                # Submit all chunks
+                if async_loader:
+                    # Chunks run as coroutines on the loader's event loops and
+                    # only borrow executor threads for blocking work, so up to
+                    # async_copy_streams COPYs overlap with parallel_threads fetches
+                    future_to_chunk = {
+                        async_loader.submit(
+                            worker.process_chunk_async,
+                            str(self.run_id),
+                            chunk.chunk_id,
+                            chunk.filter_sql,
+                            chunk.metadata,
+                            executor,
+                            self._run_in_budget
+                        ): chunk
+                        for chunk in chunks
+                    }
+                else:
+                    future_to_chunk = {
+                        executor.submit(
+                            self._run_in_budget,
+                            worker.process_chunk,
+                            str(self.run_id),
+                            chunk.chunk_id,
+                            chunk.filter_sql,
+                            chunk.metadata  # Pass chunk metadata for chunk-scoped watermark
+                        ): chunk
+                        for chunk in chunks
+                    }
+                
+                # Process completed chunks with TIER 4 resilience
+                for future in as_completed(future_to_chunk):
+                    chunk = future_to_chunk[future]
+                    try:
+                        rows = future.result()
+                        total_rows += rows
+                        completed += 1
                         
-                        self.logger.warning(
-                            f"⚠️ Chunk {chunk.chunk_id} failed ({error_type}), "
-                            f"continuing with remaining chunks..."
-                        )
-                        self.logger.debug(f"Failed chunk error: {error_msg[:200]}")
+                        if completed % 10 == 0 or completed == len(chunks):
+                            self.logger.info(
+                                f"  Progress: {completed}/{len(chunks)} chunks "
+                                f"({format_number(total_rows)} rows)"
+                            )
+                    except Exception as e:
+                        failed += 1
+                        error_type = type(e).__name__
+                        error_msg = str(e)
+                        
+                        # TIER 4: Classify error severity
+                        is_systemic = self._is_systemic_error(error_type, error_msg)
+                        
+                        if is_systemic:
+                            # FAIL FAST: Systemic errors indicate broken config/schema
+                            self.logger.error(
+                                f"\n{'='*80}\n"
+                                f"❌ FATAL: Systemic error detected in table '{source_table}'\n"
+                                f"{'='*80}\n"
+                                f"Error Type: {error_type}\n"
+                                f"Chunk: {chunk.chunk_id}\n"
+                                f"Error: {error_msg[:500]}\n"
+                                f"\n"
+                                f"This error indicates a configuration or schema problem that\n"
+                                f"affects the entire table. Aborting table migration.\n"
+                                f"{'='*80}"
+                            )
+                            # Don't start queued chunks (async chunks would otherwise
+                            # keep running against a closed executor/loader)
+                            for pending in future_to_chunk:
+                                pending.cancel()
+                            raise  # Stop processing this table immediately
+                        else:
+                            # LOG AND SKIP: Isolated error, continue with other chunks
+                            failed_chunks.append({
+                                'chunk_id': chunk.chunk_id,
+                                'error_type': error_type,
+                                'error': error_msg[:500],
+                                'filter': chunk.filter_sql[:200] if hasattr(chunk, 'filter_sql') else 'N/A'
+                            })
+                            
+                            self.logger.warning(
+                                f"⚠️ Chunk {chunk.chunk_id} failed ({error_type}), "
+                                f"continuing with remaining chunks..."
+                            )
+                            self.logger.debug(f"Failed chunk error: {error_msg[:200]}")
+        finally:
+            if encoder_pool:
+                encoder_pool.shutdown()
+            if async_loader:
+                async_loader.close()
+        
+        # Report UPSERT outcomes (unchanged rows are skipped, not rewritten)
+        upsert_stats = worker.upsert_stats
+        if any(upsert_stats.values()):
+            self.logger.info(
+                f"[{source_table}] UPSERT summary: "
+                f"{format_number(upsert_stats['inserted'])} inserted, "
+                f"{format_number(upsert_stats['updated'])} updated, "
+                f"{format_number(upsert_stats['skipped'])} skipped (unchanged or older watermark)"
+            )
         
         # Calculate success metrics
         total_chunks = len(chunks)
@@ -972,6 +1058,28 @@ class MigrationOrchestrator:
         
         return total_rows
     
+    def _sync_deletes(self, source: Dict[str, Any], table: Dict[str, Any]) -> int:
+        """
+        Delete target rows whose keys no longer exist in Snowflake.
+        A failure is logged but does not fail the table (the load itself succeeded).
+        """
+        from lib.delete_sync import DeleteSynchronizer
+        
+        source_table = table['source']
+        synchronizer = DeleteSynchronizer(
+            self.sf_manager, self.pg_manager, source, table,
+            buckets=table.get('delete_sync_buckets', self.global_config.get('delete_sync_buckets', 1024)),
+            batch_size=table.get('delete_sync_batch_size', 5000),
+            max_delete_fraction=table.get('delete_sync_max_fraction',
+                                          self.global_config.get('delete_sync_max_fraction', 0.1))
+        )
+        try:
+            with Timer(f"Delete sync: {source_table}", self.logger):
+                return synchronizer.sync()
+        except Exception as e:
+            self.logger.error(f"[{source_table}] ⚠️ Delete sync failed, deletions not propagated: {e}")
+            return 0
+    
     def _is_systemic_error(self, error_type: str, error_msg: str) -> bool:
         """
         Determine if an error is systemic (affects entire table) or isolated
@@ -1119,15 +1227,80 @@ class MigrationOrchestrator:
         else:
             self.logger.info(f"\n✓ Ready to migrate! Run without --dry-run to start migration.")
     
-    def run_single_source(self, source: Dict[str, Any]):
+    def run_sources(self, sources: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run several sources, concurrently when max_concurrent_sources > 1.
+        
+        Concurrent sources share one chunk budget (parallel_threads). Each table's
+        thread pool gets its source's weighted share (source 'thread_weight',
+        default 1) of the budget among the sources running at that moment.
+        
+        Args:
+            sources: Source configuration dictionaries
+        
+        Returns:
+            {source_name: result of run_single_source, or {'error': ...} if it raised}
+        """
+        max_concurrent = min(self.global_config.get('max_concurrent_sources', 1), len(sources))
+        
+        if self.global_config.get('estimate_durations', False):
+            self._get_duration_estimator()
+        
+        def run_one(source):
+            try:
+                return self.run_single_source(source)
+            except Exception as e:
+                self.logger.error(f"Source {source.get('source_name', 'unnamed')} failed: {e}", exc_info=True)
+                return {'started': True, 'timed_out': False, 'rows': 0, 'table_stats': {}, 'error': str(e)}
+        
+        if max_concurrent <= 1:
+            return {source.get('source_name', 'unnamed'): run_one(source) for source in sources}
+        
+        self.logger.info(
+            f"Running {len(sources)} sources concurrently (max {max_concurrent}) "
+            f"with a shared budget of {self.global_config['parallel_threads']} chunk threads"
+        )
+        self._connection_budget = threading.BoundedSemaphore(self.global_config['parallel_threads'])
+        
+        # Start the longest sources first so they don't finish last on their own
+        run_order = sources
+        if self.duration_estimator:
+            run_order = sorted(sources, key=lambda source: -self._estimate_source(source))
+        
+        # Register the first wave up front so the first tables don't claim the whole budget
+        with self._lock:
+            for source in run_order[:max_concurrent]:
+                self._active_sources[source.get('source_name', 'unnamed')] = source.get('thread_weight', 1)
+        
+        results = {}
+        try:
+            with ThreadPoolExecutor(max_workers=max_concurrent, thread_name_prefix='source') as executor:
+                future_to_source = {executor.submit(run_one, source): source for source in run_order}
+                for future in as_completed(future_to_source):
+                    source = future_to_source[future]
+                    results[source.get('source_name', 'unnamed')] = future.result()
+        finally:
+            self._connection_budget = None
+        
+        # Keep config order in the report
+        return {
+            source.get('source_name', 'unnamed'): results[source.get('source_name', 'unnamed')]
+            for source in sources
+        }
+    
+    def run_single_source(self, source: Dict[str, Any]) -> Dict[str, Any]:
         """
         Run migration for a single source (for Lambda execution).
         
         Args:
             source: Source configuration dictionary
+        
+        Returns:
+            {'started': bool, 'timed_out': bool, 'rows': int, 'table_stats': {...}}
+            (also merged into self.table_stats / self.total_rows_migrated)
         """
-        self.total_rows_migrated = 0
         source_name = source.get('source_name', 'unnamed')
+        result = {'started': False, 'timed_out': False, 'rows': 0, 'table_stats': {}}
         
         self.logger.info(f"Processing source: {source_name}")
         self.logger.info("-" * 80)
@@ -1141,31 +1314,192 @@ class MigrationOrchestrator:
         
         if not tables:
             self.logger.warning(f"No enabled tables in source: {source_name}")
-            return
+            return result
+        
+        if self.duration_estimator:
+            tables = self.duration_estimator.order_longest_first(
+                source, tables, self.global_config['parallel_threads']
+            )
+            self.logger.info(f"Table order (longest first): {', '.join(t['source'] for t in tables)}")
         
-        for table in tables:
-            # Check Lambda timeout before processing each table
-            if self._check_lambda_timeout():
-                self.logger.warning("Approaching Lambda timeout, gracefully stopping...")
-                self.timed_out = True
-                break
+        with self._lock:
+            self._active_sources[source_name] = source.get('thread_weight', 1)
+        
+        try:
+            for table in tables:
+                # Check Lambda timeout before processing each table
+                if self._check_lambda_timeout():
+                    self.logger.warning("Approaching Lambda timeout, gracefully stopping...")
+                    self.timed_out = True
+                    result['timed_out'] = True
+                    break
+                
+                # Leave tables that won't fit for the next invocation but keep
+                # going with shorter ones (the first table always starts so a
+                # long table still makes progress)
+                if result['started'] and not self._table_fits_remaining_time(source, table):
+                    self.timed_out = True
+                    result['timed_out'] = True
+                    continue
+                
+                result['started'] = True
+                table_name = table['source']
+                try:
+                    self.logger.info(f"\n[{table_name}] Starting migration...")
+                    rows = self._process_table(source, table)
+                    result['rows'] += rows
+                    result['table_stats'][table_name] = {
+                        'status': 'completed',
+                        'rows': rows
+                    }
+                    self.logger.info(f"✓ [{table_name}] Completed: {format_number(rows)} rows migrated")
+                except Exception as e:
+                    self.logger.error(f"✗ [{table_name}] Failed: {e}", exc_info=True)
+                    result['table_stats'][table_name] = {
+                        'status': 'failed',
+                        'error': str(e)
+                    }
+        finally:
+            with self._lock:
+                self._active_sources.pop(source_name, None)
+                self.table_stats.update(result['table_stats'])
+                self.total_rows_migrated += result['rows']
+        
+        return result
+    
+    def _source_thread_share(self, source: Dict[str, Any]) -> Optional[int]:
+        """
+        Weighted share of parallel_threads for a source among the running sources.
+        None when sources run one at a time (no cap).
+        """
+        if self._connection_budget is None:
+            return None
+        
+        with self._lock:
+            weights = dict(self._active_sources)
+        
+        weight = weights.get(source.get('source_name', 'unnamed'), source.get('thread_weight', 1))
+        total_weight = sum(weights.values()) or weight
+        return max(1, int(self.global_config['parallel_threads'] * weight / total_weight))
+    
+    def _get_duration_estimator(self):
+        """Load the duration estimator from status history (None if unavailable)"""
+        if self.duration_estimator is None and self.status_tracker is not None:
+            from lib.duration_estimator import DurationEstimator
             
-            table_name = table['source']
+            estimator = DurationEstimator(
+                self.status_tracker.pg_manager,
+                self.status_tracker.target_database,
+                self.global_config.get('estimate_history_days', 30)
+            )
             try:
-                self.logger.info(f"\n[{table_name}] Starting migration...")
-                rows = self._process_table(source, table)
-                self.total_rows_migrated += rows
-                self.table_stats[table_name] = {
-                    'status': 'completed',
-                    'rows': rows
-                }
-                self.logger.info(f"✓ [{table_name}] Completed: {format_number(rows)} rows migrated")
+                estimator.load()
+                self.duration_estimator = estimator
             except Exception as e:
-                self.logger.error(f"✗ [{table_name}] Failed: {e}", exc_info=True)
-                self.table_stats[table_name] = {
-                    'status': 'failed',
-                    'error': str(e)
-                }
+                self.logger.warning(f"⚠️ Could not load duration history, running without estimates: {e}")
+        return self.duration_estimator
+    
+    def _estimate_table(self, source: Dict[str, Any], table: Dict[str, Any]) -> Optional[float]:
+        """Predicted seconds for a table from history (None without history)"""
+        return self.duration_estimator.estimate_table(
+            source['source_sf_database'], source['source_sf_schema'], table['source'],
+            table.get('parallel_threads', self.global_config['parallel_threads'])
+        )
+    
+    def _estimate_source(self, source: Dict[str, Any]) -> float:
+        """Predicted seconds for a source's tables, run one after another"""
+        tables = [t for t in source.get('tables', []) if t.get('enabled', True)]
+        return sum(self._estimate_table(source, table) or 0 for table in tables)
+    
+    def _table_fits_remaining_time(self, source: Dict[str, Any], table: Dict[str, Any]) -> bool:
+        """Admission check: does the predicted table duration fit before the Lambda buffer?"""
+        if not self.lambda_context or not self.duration_estimator:
+            return True
+        
+        estimate = self._estimate_table(source, table)
+        if estimate is None:
+            return True
+        
+        try:
+            remaining = self.lambda_context.get_remaining_time_in_millis() / 1000
+        except Exception:
+            return True
+        available = remaining - self.global_config.get('lambda_timeout_buffer_seconds', 120)
+        
+        if estimate > available:
+            self.logger.warning(
+                f"[{table['source']}] Deferring to next invocation: estimated "
+                f"{format_duration(estimate)}, {format_duration(max(available, 0))} left before timeout buffer"
+            )
+            return False
+        return True
+    
+    def estimate_plan(self):
+        """
+        Print the expected runtime of the enabled sources/tables from past runs
+        (no data is migrated; only PostgreSQL status history is read)
+        """
+        sources = self.config_loader.get_enabled_sources()
+        if not sources:
+            self.logger.warning("No enabled sources found in configuration")
+            return
+        
+        self.status_tracker = StatusTracker(self.pg_manager, sources[0]['target_pg_database'])
+        if not self._get_duration_estimator():
+            return
+        
+        self.logger.info("=" * 80)
+        self.logger.info("MIGRATION PLAN - Estimated durations from chunk history")
+        self.logger.info("=" * 80)
+        
+        source_totals = []
+        for source in sources:
+            tables = self.duration_estimator.order_longest_first(
+                source, self.config_loader.get_enabled_tables(source),
+                self.global_config['parallel_threads']
+            )
+            self.logger.info(f"\n  Source: {source.get('source_name', 'unnamed')}")
+            
+            source_total = 0.0
+            unknown = 0
+            for table in tables:
+                estimate = self._estimate_table(source, table)
+                if estimate is None:
+                    unknown += 1
+                    label = "unknown"
+                else:
+                    source_total += estimate
+                    label = f"~{format_duration(estimate)}"
+                history = self.duration_estimator.describe(
+                    source['source_sf_database'], source['source_sf_schema'], table['source']
+                )
+                self.logger.info(f"    • {table['source']:<40} {label:>10}  ({history})")
+            
+            suffix = f" (+{unknown} tables without history)" if unknown else ""
+            self.logger.info(f"    Source total: ~{format_duration(source_total)}{suffix}")
+            source_totals.append(source_total)
+        
+        # Sources share one thread budget when run concurrently, so the
+        # concurrent figure is the longest source, not a speedup guarantee
+        max_concurrent = self.global_config.get('max_concurrent_sources', 1)
+        sequential = sum(source_totals)
+        self.logger.info(f"\n{'=' * 80}")
+        if max_concurrent > 1 and len(source_totals) > 1:
+            self.logger.info(
+                f"Expected runtime: ~{format_duration(max(source_totals))} to "
+                f"~{format_duration(sequential)} ({max_concurrent} concurrent sources)"
+            )
+        else:
+            self.logger.info(f"Expected runtime: ~{format_duration(sequential)}")
+        self.logger.info(f"{'=' * 80}")
+    
+    def _run_in_budget(self, func, *args):
+        """Run a chunk under the shared chunk budget (only set for concurrent sources)"""
+        budget = self._connection_budget
+        if budget is None:
+            return func(*args)
+        with budget:
+            return func(*args)
     
     def _check_lambda_timeout(self) -> bool:
         """
@@ -1215,6 +1549,11 @@ def main():
         action='store_true',
         help='Validate configuration and show what would be migrated without actually migrating'
     )
+    parser.add_argument(
+        '--estimate',
+        action='store_true',
+        help='Print the expected runtime per table from past runs without migrating'
+    )
     parser.add_argument(
         '--no-resume',
         action='store_true',
@@ -1246,6 +1585,8 @@ def main():
     
     if args.dry_run:
         orchestrator.dry_run()
+    elif args.estimate:
+        orchestrator.estimate_plan()
     else:
         orchestrator.run()
 
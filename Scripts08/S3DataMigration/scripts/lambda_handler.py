@@ -24,15 +24,24 @@ import os
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+_init_started = time.perf_counter()
+
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from scripts.migration_orchestrator import run_migration
+# Keep module-level imports light: pandas, the Snowflake connector and the
+# migration modules are loaded lazily by the actions that need them
+from scripts.migration_orchestrator import run_migration, get_connection_factory
 from lib.utils import get_logger
 
 logger = get_logger(__name__)
 
+# Cold-start tracking: module init time, and whether this container has
+# already served an invocation
+_INIT_SECONDS = time.perf_counter() - _init_started
+_cold_start = True
+
 
 def lambda_handler(event: Dict[str, Any], context: Optional[Any]) -> Dict[str, Any]:
     """
@@ -41,13 +50,13 @@ def lambda_handler(event: Dict[str, Any], context: Optional[Any]) -> Dict[str, A
     Args:
         event: Lambda event containing migration parameters
             {
-                "action": "migrate" | "validate_config" | "test_connections",
+                "action": "migrate" | "validate_config" | "test_connections" | "dry_run" | "status",
                 "source_name": "analytics",              # Single source
                 OR
                 "source_name": "analytics,aggregator",   # Multiple (comma-separated)
                 "no_resume": false,          # Optional
                 "resume_max_age": 24,        # Optional (hours)
-                "resume_run_id": "uuid"      # Optional (specific run to resume)
+                "resume_run_id": "uuid"      # Optional (specific run to resume, or run to report for status)
             }
         context: Lambda context (for timeout detection)
     
@@ -63,6 +72,10 @@ def lambda_handler(event: Dict[str, Any], context: Optional[Any]) -> Dict[str, A
         # Direct Lambda invocation
         input_data = event
     
+    global _cold_start
+    cold_start = _cold_start
+    _cold_start = False
+    
     action = event.get('action', 'migrate')
     source_name = input_data.get('source_name')
     
@@ -105,6 +118,59 @@ def lambda_handler(event: Dict[str, Any], context: Optional[Any]) -> Dict[str, A
                 }
             }
         
+        # Action: Dry Run (config only, no connections)
+        elif action == 'dry_run':
+            from lib.config_loader import ConfigLoader
+            
+            config_loader = ConfigLoader('config.json')
+            config_loader.load()
+            
+            sources = {
+                s['source_name']: [t['source'] for t in config_loader.get_enabled_tables(s)]
+                for s in config_loader.get_enabled_sources()
+            }
+            total_tables = sum(len(tables) for tables in sources.values())
+            logger.info(f"Dry run: {total_tables} tables would be migrated from {len(sources)} sources")
+            
+            return {
+                'statusCode': 200,
+                'body': {
+                    'status': 'success',
+                    'message': f'{total_tables} tables would be migrated',
+                    'action': action,
+                    'sources': sources
+                }
+            }
+        
+        # Action: Run Status (PostgreSQL only)
+        elif action == 'status':
+            from lib.config_loader import ConfigLoader
+            from lib.status_tracker import StatusTracker
+            
+            config_loader = ConfigLoader('config.json')
+            config = config_loader.load()
+            status_db = config_loader.get_global_config().get('status_tracking_database', 'conflict_management')
+            
+            pg_manager = get_connection_factory(config).get_postgres_manager()
+            status_tracker = StatusTracker(pg_manager, status_db)
+            
+            run = status_tracker.get_run_summary(input_data.get('resume_run_id'))
+            if not run:
+                return {
+                    'statusCode': 404,
+                    'body': {
+                        'status': 'error',
+                        'message': 'No migration run found',
+                        'action': action
+                    }
+                }
+            
+            run['tables'] = status_tracker.get_table_progress(run['run_id'])
+            return {
+                'statusCode': 200,
+                'body': json.loads(json.dumps({'status': 'success', 'action': action, 'run': run}, default=str))
+            }
+        
         # Action: Test Connections
         elif action == 'test_connections':
             logger.info("Testing database connections...")
@@ -112,13 +178,12 @@ def lambda_handler(event: Dict[str, Any], context: Optional[Any]) -> Dict[str, A
             try:
                 # Load config and initialize connections
                 from lib.config_loader import ConfigLoader
-                from lib.connections import ConnectionFactory
                 
                 config_loader = ConfigLoader('config.json')
                 config = config_loader.load()  # Get the dict, not the loader
                 
-                # Initialize connection factory with config dict
-                conn_factory = ConnectionFactory(config)
+                # Initialize connection factory with config dict (cached across warm invocations)
+                conn_factory = get_connection_factory(config)
                 sf_manager = conn_factory.get_snowflake_manager()
                 pg_manager = conn_factory.get_postgres_manager()
                 
@@ -208,7 +273,9 @@ def lambda_handler(event: Dict[str, Any], context: Optional[Any]) -> Dict[str, A
                 no_resume=no_resume,
                 resume_max_age=resume_max_age,  # Use the one extracted at the top
                 resume_run_id=resume_run_id,
-                lambda_context=context
+                lambda_context=context,
+                cold_start=cold_start,
+                init_seconds=_INIT_SECONDS if cold_start else None
             )
             
             # Prepare response based on status
@@ -237,7 +304,7 @@ def lambda_handler(event: Dict[str, Any], context: Optional[Any]) -> Dict[str, A
                 'body': {
                     'status': 'error',
                     'error': error_msg,
-                    'message': 'Valid actions: validate_config, test_connections, migrate'
+                    'message': 'Valid actions: validate_config, test_connections, dry_run, status, migrate'
                 }
             }
     
@@ -262,7 +329,7 @@ def main():
     # Parse command line arguments
     if len(sys.argv) < 2:
         print("Usage: python scripts/lambda_handler.py <action> [source_name] [--no-resume]")
-        print("Actions: validate_config, test_connections, migrate")
+        print("Actions: validate_config, test_connections, dry_run, status, migrate")
         print("Example: python scripts/lambda_handler.py migrate analytics")
         print("         python scripts/lambda_handler.py migrate analytics,aggregator")
         print("         python scripts/lambda_handler.py migrate analytics --no-resume")
@@ -4,18 +4,74 @@ Makes migrate.py logic callable programmatically with timeout detection.
 """
 
 import time
+import hashlib
+import json
 from typing import Dict, Any, Optional, List
-from lib.utils import get_logger
+from lib.utils import get_logger, timed_import, get_import_report
 
 logger = get_logger(__name__)
 
+# Heavy modules needed only by the migrate action, loaded (and timed) in this
+# order on the first migrate invocation of a container
+MIGRATION_MODULES = [
+    'snowflake.connector',
+    'pandas',
+    'tenacity',
+    'lib.migration_worker',
+    'migrate',
+]
+
+# ConnectionFactory cached across warm Lambda invocations
+_connection_factory = None
+_connection_factory_key = None
+
+
+def get_connection_factory(config: Dict[str, Any]):
+    """
+    Return a cached ConnectionFactory if its sessions are still healthy and the
+    connection settings are unchanged, otherwise build a new one.
+    
+    Args:
+        config: Full configuration dict
+    
+    Returns:
+        ConnectionFactory instance
+    """
+    global _connection_factory, _connection_factory_key
+    from lib.connections import ConnectionFactory
+    
+    factory_key = hashlib.md5(
+        json.dumps(
+            {'snowflake': config.get('snowflake'), 'postgres': config.get('postgres')},
+            sort_keys=True, default=str
+        ).encode()
+    ).hexdigest()
+    
+    if _connection_factory is not None:
+        if _connection_factory_key == factory_key and _connection_factory.is_healthy():
+            logger.info("♻️  Reusing warm connection factory (Snowflake session still valid)")
+            return _connection_factory
+        
+        logger.info("Cached connection factory is stale, reconnecting...")
+        try:
+            _connection_factory.close_all()
+        except Exception as e:
+            logger.warning(f"Could not close stale connections: {e}")
+        _connection_factory = None
+    
+    _connection_factory = ConnectionFactory(config)
+    _connection_factory_key = factory_key
+    return _connection_factory
+
 
 def run_migration(
     source_name: str,
     no_resume: bool = False,
     resume_max_age: int = 168,
     resume_run_id: Optional[str] = None,
-    lambda_context: Optional[Any] = None
+    lambda_context: Optional[Any] = None,
+    cold_start: bool = False,
+    init_seconds: Optional[float] = None
 ) -> Dict[str, Any]:
     """
     Run migration programmatically for Lambda or local execution.
@@ -29,6 +85,8 @@ def run_migration(
         resume_max_age: Maximum age (hours) for resumable runs
         resume_run_id: Specific run ID to resume (optional)
         lambda_context: AWS Lambda context for timeout detection (optional)
+        cold_start: True on the first invocation of a Lambda container
+        init_seconds: Handler module initialization time (cold starts only)
     
     Returns:
         Dictionary with migration results:
@@ -58,15 +116,19 @@ def run_migration(
             "remaining_time_seconds": 50,  # Lambda only
             "needs_retry": false,
             "progress_percent": 50,
+            "startup": {"cold_start": true, "startup_seconds": 2.1, ...},
             "error": "error message"  # Only if failed
         }
     """
+    start_time = time.time()
+    
     from lib.config_loader import ConfigLoader
-    from lib.connections import ConnectionFactory
     from lib.status_tracker import StatusTracker
-    from migrate import MigrationOrchestrator
     
-    start_time = time.time()
+    # Load heavy dependencies here (not at module import) and time each one
+    for module_name in MIGRATION_MODULES:
+        timed_import(module_name)
+    from migrate import MigrationOrchestrator
     
     # Parse source_name(s) - support comma-separated string or list
     if isinstance(source_name, list):
@@ -133,11 +195,26 @@ def run_migration(
                 'progress_percent': 100
             }
         
-        # Initialize managers
-        conn_factory = ConnectionFactory(config)  # Pass config dict, not loader
+        # Initialize managers (cached factory is reused on warm invocations)
+        conn_factory = get_connection_factory(config)  # Pass config dict, not loader
         sf_manager = conn_factory.get_snowflake_manager()
         pg_manager = conn_factory.get_postgres_manager()
         
+        # Startup cost of this invocation: imports + connections
+        startup = {
+            'cold_start': cold_start,
+            'startup_seconds': round(time.time() - start_time, 3),
+        }
+        if cold_start:
+            startup['init_seconds'] = round(init_seconds or 0, 3)
+            startup['cold_start_seconds'] = round(startup['init_seconds'] + startup['startup_seconds'], 3)
+            startup['import_seconds'] = get_import_report()
+            logger.info(f"Cold start: {startup['cold_start_seconds']:.2f}s")
+            for module_name, seconds in startup['import_seconds'].items():
+                logger.info(f"   import {module_name}: {seconds:.3f}s")
+        else:
+            logger.info(f"Warm start: {startup['startup_seconds']:.2f}s")
+        
         # Initialize status tracker
         global_config = config_loader.get_global_config()
         status_db = global_config.get('status_tracking_database', 'conflict_management')
@@ -172,8 +249,6 @@ def run_migration(
         config_hash = config_loader.get_config_hash()
         
         # Calculate execution hash (same logic as in status_tracker.find_resumable_run)
-        import hashlib
-        import json
         context = {
             'config_hash': config_hash,
             'source_names': sorted(source_names)
@@ -259,7 +334,7 @@ def run_migration(
                 source_names=source_names,
                 total_sources=len(sources_to_migrate),
                 total_tables=total_tables,
-                metadata={'lambda': True}
+                metadata={'lambda': True, 'startup': startup}
             )
             logger.info(f"✅ NEW RUN CREATED")
             logger.info(f"   Run ID: {orchestrator.run_id}")
@@ -313,6 +388,7 @@ def run_migration(
         source_results = {}
         total_rows_all_sources = 0
         timed_out = False
+        sources_to_run = []
         
         for source in sources_to_migrate:
             source_name_item = source['source_name']
@@ -355,65 +431,65 @@ def run_migration(
                     }
                     continue  # Skip to next source
             
-            # Check timeout before starting each source
-            if lambda_context and orchestrator._check_lambda_timeout():
-                logger.warning(f"Lambda timeout approaching, stopping before source: {source_name_item}")
-                timed_out = True
-                # Mark remaining sources as not started
+            sources_to_run.append(source)
+        
+        # Remaining sources run concurrently when max_concurrent_sources > 1,
+        # sharing one parallel_threads budget
+        orchestrator.table_stats = {}
+        orchestrator.total_rows_migrated = 0
+        run_results = orchestrator.run_sources(sources_to_run) if sources_to_run else {}
+        
+        for source_name_item, run_result in run_results.items():
+            if run_result.get('error'):
                 source_results[source_name_item] = {
-                    'status': 'not_started',
+                    'status': 'failed',
                     'tables_completed': 0,
                     'tables_failed': 0,
                     'rows_migrated': 0,
-                    'message': 'Not started due to Lambda timeout'
+                    'error': run_result['error']
                 }
                 continue
             
-            logger.info(f"Starting migration for source: {source_name_item}")
-            orchestrator.table_stats = {}  # Reset for each source
-            orchestrator.total_rows_migrated = 0
-            
-            try:
-                orchestrator.run_single_source(source)
-                
-                # Get statistics for this source
-                tables_completed = sum(1 for s in orchestrator.table_stats.values() if s['status'] == 'completed')
-                tables_failed = sum(1 for s in orchestrator.table_stats.values() if s['status'] == 'failed')
-                rows_migrated = orchestrator.total_rows_migrated
-                total_rows_all_sources += rows_migrated
-                
-                # Determine source status
-                if orchestrator.timed_out:
-                    source_status = 'partial'
-                    timed_out = True
-                elif tables_failed > 0:
-                    source_status = 'failed'
-                elif tables_completed > 0:
-                    source_status = 'completed'
-                else:
-                    source_status = 'partial'
-                
-                source_results[source_name_item] = {
-                    'status': source_status,
-                    'tables_completed': tables_completed,
-                    'tables_failed': tables_failed,
-                    'rows_migrated': rows_migrated
-                }
-                
-                if orchestrator.timed_out:
-                    source_results[source_name_item]['message'] = 'Paused due to Lambda timeout'
-                    logger.warning(f"Source {source_name_item} paused due to timeout")
-                    break  # Stop processing more sources
-                
-            except Exception as e:
-                logger.error(f"Source {source_name_item} failed: {e}", exc_info=True)
+            if run_result['timed_out'] and not run_result['started']:
+                # Timeout hit before the source's first table
+                timed_out = True
                 source_results[source_name_item] = {
-                    'status': 'failed',
+                    'status': 'not_started',
                     'tables_completed': 0,
                     'tables_failed': 0,
                     'rows_migrated': 0,
-                    'error': str(e)
+                    'message': 'Not started due to Lambda timeout'
                 }
+                continue
+            
+            # Get statistics for this source
+            table_stats = run_result['table_stats']
+            tables_completed = sum(1 for s in table_stats.values() if s['status'] == 'completed')
+            tables_failed = sum(1 for s in table_stats.values() if s['status'] == 'failed')
+            rows_migrated = run_result['rows']
+            total_rows_all_sources += rows_migrated
+            
+            # Determine source status
+            if run_result['timed_out']:
+                source_status = 'partial'
+                timed_out = True
+            elif tables_failed > 0:
+                source_status = 'failed'
+            elif tables_completed > 0:
+                source_status = 'completed'
+            else:
+                source_status = 'partial'
+            
+            source_results[source_name_item] = {
+                'status': source_status,
+                'tables_completed': tables_completed,
+                'tables_failed': tables_failed,
+                'rows_migrated': rows_migrated
+            }
+            
+            if run_result['timed_out']:
+                source_results[source_name_item]['message'] = 'Paused due to Lambda timeout'
+                logger.warning(f"Source {source_name_item} paused due to timeout")
         
         # Calculate overall statistics
         duration = time.time() - start_time
@@ -454,7 +530,8 @@ def run_migration(
             'total_rows_migrated': total_rows_all_sources,
             'duration_seconds': round(duration, 2),
             'progress_percent': round(progress, 1),
-            'needs_retry': needs_retry
+            'needs_retry': needs_retry,
+            'startup': startup
         }
         
         if remaining_time:
@@ -485,7 +562,8 @@ def run_migration(
                     status=overall_status,
                     completed_tables=total_completed,
                     failed_tables=total_failed,
-                    total_rows_copied=total_rows_all_sources
+                    total_rows_copied=total_rows_all_sources,
+                    metadata={'last_startup': startup}
                 )
                 logger.info(f"✓ Updated run status in database: {overall_status}")
             except Exception as e:
@@ -0,0 +1,53 @@
+"""
+Shared fixtures for the S3DataMigration unit tests (no database needed)
+
+The scripts next to this directory (test_s3_connection.py, ...) are manual
+connectivity checks; run the unit tests with: python -m pytest tests/unit
+"""
+
+import sys
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+# Add project root to path for imports (lib.*, migrate)
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+
+@pytest.fixture
+def source_config():
+    """Minimal source block as produced by ConfigLoader"""
+    return {
+        'source_name': 'analytics',
+        'source_sf_database': 'ANALYTICS',
+        'source_sf_schema': 'BI',
+        'target_pg_database': 'conflict',
+        'target_pg_schema': 'analytics',
+    }
+
+
+@pytest.fixture
+def make_worker(source_config):
+    """Build a MigrationWorker on mocked connections; target columns are id, name"""
+    from lib.migration_worker import MigrationWorker
+
+    def factory(async_loader=None, **table_overrides):
+        table_config = {
+            'source': 'DIMPAYER',
+            'target': 'dimpayer',
+            'uniqueness_columns': ['id'],
+            **table_overrides,
+        }
+        worker = MigrationWorker(
+            MagicMock(), MagicMock(), MagicMock(), source_config, table_config,
+            async_loader=async_loader,
+        )
+        worker._target_columns_cache = ['id', 'name']
+        worker.sf_manager.fetch_dataframe.return_value = {
+            'data': [(1, 'a'), (2, 'b')],
+            'columns': ['id', 'name'],
+        }
+        return worker
+
+    return factory
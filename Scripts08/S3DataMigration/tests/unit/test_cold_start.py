@@ -0,0 +1,112 @@
+"""
+Unit tests for the Lambda cold-start changes: lazy imports, the cached
+connection factory and status updates
+"""
+
+import subprocess
+import sys
+import uuid
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from lib import utils
+from lib.status_tracker import StatusTracker
+from scripts import migration_orchestrator
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+
+RUN_ID = uuid.UUID('00000000-0000-0000-0000-000000000001')
+
+
+def test_light_actions_skip_heavy_imports():
+    # Fresh interpreter: other tests may already have imported pandas
+    code = (
+        "import sys, migrate, lib.connections, lib.status_tracker, lib.config_validator\n"
+        "from scripts import migration_orchestrator\n"
+        "heavy = ('pandas', 'snowflake.connector', 'cryptography', 'tenacity', 'lib.migration_worker')\n"
+        "print(','.join(m for m in heavy if m in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, '-c', code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+
+    assert result.stdout.strip() == ''
+
+
+def test_timed_import_records_first_load_only():
+    with patch.dict(utils._import_times, clear=True), patch.dict(sys.modules):
+        sys.modules.pop('colorsys', None)
+
+        module = utils.timed_import('colorsys')
+        # Already loaded: returned from sys.modules, not timed again
+        assert utils.timed_import('colorsys') is module
+        assert utils.timed_import('lib.utils') is utils
+        assert list(utils.get_import_report()) == ['colorsys']
+
+
+class TestConnectionFactoryCache:
+
+    @pytest.fixture(autouse=True)
+    def empty_cache(self, monkeypatch):
+        monkeypatch.setattr(migration_orchestrator, '_connection_factory', None)
+        monkeypatch.setattr(migration_orchestrator, '_connection_factory_key', None)
+
+    @staticmethod
+    def _config(host='pg1'):
+        return {'snowflake': {'account': 'acct'}, 'postgres': {'host': host}}
+
+    def test_reuses_healthy_factory(self):
+        with patch('lib.connections.ConnectionFactory') as factory_cls:
+            first = migration_orchestrator.get_connection_factory(self._config())
+            first.is_healthy.return_value = True
+            second = migration_orchestrator.get_connection_factory(self._config())
+
+        assert second is first
+        factory_cls.assert_called_once()
+
+    def test_rebuilds_when_unhealthy_or_settings_change(self):
+        with patch('lib.connections.ConnectionFactory', side_effect=lambda config: MagicMock()):
+            first = migration_orchestrator.get_connection_factory(self._config())
+            first.is_healthy.return_value = False
+            second = migration_orchestrator.get_connection_factory(self._config())
+            second.is_healthy.return_value = True
+            third = migration_orchestrator.get_connection_factory(self._config(host='pg2'))
+
+        assert len({id(first), id(second), id(third)}) == 3
+        first.close_all.assert_called_once()
+        second.close_all.assert_called_once()
+
+
+class TestStatusUpdates:
+
+    @staticmethod
+    def _tracker():
+        pg_manager = MagicMock()
+        cursor = pg_manager.get_connection.return_value.cursor.return_value
+        return StatusTracker(pg_manager, 'conflict'), cursor
+
+    def test_update_table_status(self):
+        tracker, cursor = self._tracker()
+
+        tracker.update_table_status(
+            RUN_ID, 'ANALYTICS', 'BI', 'DIMPAYER', 'completed',
+            completed_chunks=4, total_rows_copied=1000
+        )
+
+        query, params = cursor.execute.call_args.args
+        assert query.count('%s') == len(params)
+        assert 'completed_at = CURRENT_TIMESTAMP' in query
+        assert 'metadata' not in query
+        assert params == ['completed', 4, 1000, str(RUN_ID), 'ANALYTICS', 'BI', 'DIMPAYER']
+
+    def test_update_run_status_merges_metadata(self):
+        tracker, cursor = self._tracker()
+
+        tracker.update_run_status(RUN_ID, 'completed', metadata={'startup': {'cold_start': True}})
+
+        query, params = cursor.execute.call_args.args
+        assert query.count('%s') == len(params)
+        assert "metadata = COALESCE(metadata, '{}'::jsonb) || %s::jsonb" in query
+        assert params[1] == '{"startup": {"cold_start": true}}'
@@ -0,0 +1,84 @@
+"""
+Unit tests for lib/copy_encoder.py COPY payloads
+
+Payloads are read back the way PostgreSQL parses them:
+FORMAT CSV, DELIMITER E'\\t', NULL '\\N'.
+"""
+
+import csv
+import io
+from datetime import datetime
+from decimal import Decimal
+
+import pandas as pd
+
+from lib.copy_encoder import CopyEncoderPool, _build_payload, create_encoder_pool
+
+
+def _parse(payload: bytes):
+    return list(csv.reader(io.StringIO(payload.decode('utf-8')), delimiter='\t'))
+
+
+def _rows():
+    return [
+        (1, Decimal('12.50'), 1.25, datetime(2024, 3, 1, 12, 30, 15), 'tab\there', 'x'),
+        (None, None, None, None, 'line\nbreak "quoted"', 'y'),
+    ]
+
+
+COLUMNS = ['Payer Id', 'Amount', 'Rate', 'Updated', 'Note', 'Dropped']
+
+
+class TestBuildPayload:
+
+    def test_values_round_trip_through_copy_csv(self):
+        df = pd.DataFrame(_rows(), columns=COLUMNS, dtype=object)
+
+        payload, columns = _build_payload(
+            df, {'Payer Id': 'payer_id'}, ['payer_id', 'Amount', 'Rate', 'Updated', 'Note']
+        )
+
+        assert columns == ['payer_id', 'Amount', 'Rate', 'Updated', 'Note']
+        first, second = _parse(payload)
+        assert first == ['1', '12.50', '1.25', '2024-03-01 12:30:15', 'tab\there']
+        # NULLs are the bare \N marker; tabs, newlines and quotes survive quoting
+        assert second == ['\\N', '\\N', '\\N', '\\N', 'line\nbreak "quoted"']
+
+    def test_no_matching_columns(self):
+        df = pd.DataFrame(_rows(), columns=COLUMNS)
+
+        assert _build_payload(df, {}, ['other']) == (b'', [])
+
+
+class TestEncodeRows:
+
+    def test_nullable_integer_stays_integer(self):
+        from lib.copy_encoder import _encode_rows
+
+        payload, _, _ = _encode_rows(_rows(), COLUMNS, {}, ['Payer Id'])
+
+        assert _parse(payload) == [['1'], ['\\N']]
+
+
+class TestEncoderPool:
+
+    def test_disabled_pool(self):
+        assert create_encoder_pool(0) is None
+        assert create_encoder_pool(None) is None
+
+    def test_worker_process_matches_in_thread_payload(self):
+        target = ['Payer Id', 'Note']
+        expected, _ = _build_payload(pd.DataFrame(_rows(), columns=COLUMNS, dtype=object), {}, target)
+
+        with CopyEncoderPool(1) as pool:
+            payload, columns, row_count = pool.encode_rows(_rows(), COLUMNS, {}, target)
+            if pool.arrow_available():
+                import pyarrow as pa
+                table = pa.Table.from_pandas(pd.DataFrame(_rows(), columns=COLUMNS, dtype=object), preserve_index=False)
+                arrow_payload, _, arrow_rows = pool.encode_arrow(table, {}, target)
+                assert _parse(arrow_payload) == _parse(expected)
+                assert arrow_rows == 2
+
+        assert payload == expected
+        assert columns == target
+        assert row_count == 2
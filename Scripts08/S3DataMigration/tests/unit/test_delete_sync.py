@@ -0,0 +1,134 @@
+"""
+Unit tests for lib/delete_sync.py (bucketed delete detection and its guards)
+"""
+
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from lib.delete_sync import DeleteSynchronizer
+
+
+@pytest.fixture
+def make_sync(source_config):
+    def factory(**table_overrides):
+        table = {'source': 'DIMPAYER', 'target': 'dimpayer', 'uniqueness_columns': ['ID']}
+        table.update(table_overrides)
+        return DeleteSynchronizer(MagicMock(), MagicMock(), source_config, table, buckets=8)
+    return factory
+
+
+def _run(sync, sf_buckets, pg_buckets, sf_keys=(), pg_keys=()):
+    """Run sync() over canned bucket stats and keys; returns (deleted, keys passed to delete)"""
+    with patch.object(sync, '_key_expressions', return_value=('SF_KEY', 'PG_KEY')), \
+            patch.object(sync, '_fetch_sf_buckets', return_value=sf_buckets), \
+            patch.object(sync, '_fetch_pg_buckets', return_value=pg_buckets), \
+            patch.object(sync, '_fetch_sf_keys', return_value=set(sf_keys)), \
+            patch.object(sync, '_fetch_pg_keys', return_value=list(pg_keys)), \
+            patch.object(sync, '_delete_keys', side_effect=len) as delete_keys:
+        deleted = sync.sync()
+    keys = delete_keys.call_args.args[0] if delete_keys.called else None
+    return deleted, keys
+
+
+class TestSync:
+
+    def test_deletes_keys_missing_from_source_in_changed_buckets(self, make_sync):
+        deleted, keys = _run(
+            make_sync(), {0: (10, 111), 1: (2, 22)}, {0: (10, 111), 1: (3, 35)},
+            sf_keys={'a', 'b'}, pg_keys=[('a', (1,)), ('b', (2,)), ('c', (3,))],
+        )
+
+        assert deleted == 1
+        assert keys == [(3,)]
+
+    def test_only_changed_buckets_are_fetched(self, make_sync):
+        sync = make_sync()
+        pg_buckets = {0: (10, 111), 1: (3, 35), 5: (1, 9)}
+
+        with patch.object(sync, '_key_expressions', return_value=('SF_KEY', 'PG_KEY')), \
+                patch.object(sync, '_fetch_sf_buckets', return_value={0: (10, 111), 1: (2, 22)}), \
+                patch.object(sync, '_fetch_pg_buckets', return_value=pg_buckets), \
+                patch.object(sync, '_fetch_sf_keys', return_value=set()) as sf_keys, \
+                patch.object(sync, '_fetch_pg_keys', return_value=[]) as pg_keys:
+            assert sync.sync() == 0
+
+        sf_keys.assert_called_once_with('SF_KEY', [1, 5])
+        pg_keys.assert_called_once_with('PG_KEY', [1, 5])
+
+    def test_nothing_changed(self, make_sync):
+        buckets = {0: (10, 111), 1: (2, 22)}
+
+        assert _run(make_sync(), buckets, dict(buckets)) == (0, None)
+
+    def test_empty_source_never_wipes_target(self, make_sync):
+        assert _run(make_sync(), {}, {0: (10, 111)}, pg_keys=[('a', (1,))]) == (0, None)
+
+    def test_no_matching_bucket_is_treated_as_rendering_mismatch(self, make_sync):
+        deleted, keys = _run(
+            make_sync(), {0: (10, 100), 1: (2, 20)}, {0: (10, 101), 1: (2, 21)},
+            pg_keys=[('a', (1,))],
+        )
+
+        assert (deleted, keys) == (0, None)
+
+    def test_deletes_over_max_fraction_are_refused(self, make_sync):
+        sync = make_sync()
+        sync.max_delete_fraction = 0.1
+        # 20 target rows: at most 2 deletes allowed, 3 are stale
+        pg_keys = [(f'k{i}', (i,)) for i in range(3)]
+
+        deleted, keys = _run(sync, {0: (17, 1), 1: (1, 1)}, {0: (17, 1), 1: (3, 3)}, pg_keys=pg_keys)
+
+        assert (deleted, keys) == (0, None)
+
+        sync.max_delete_fraction = 0.15
+        assert _run(sync, {0: (17, 1), 1: (1, 1)}, {0: (17, 1), 1: (3, 3)}, pg_keys=pg_keys)[0] == 3
+
+    def test_no_uniqueness_columns(self, make_sync):
+        sync = make_sync(uniqueness_columns=[])
+
+        assert sync.sync() == 0
+        sync.sf_manager.execute_query.assert_not_called()
+
+
+class TestKeyRendering:
+
+    def test_expressions_follow_target_types(self, make_sync):
+        sync = make_sync(
+            uniqueness_columns=['ID', 'UPDATED', 'DAY', 'GUID'],
+            column_mapping={'GUID': 'guid'},
+        )
+        types = {'ID': 'bigint', 'UPDATED': 'timestamp without time zone', 'DAY': 'date', 'guid': 'uuid'}
+
+        with patch.object(sync, '_get_target_key_types', return_value=types):
+            sf_key, pg_key = sync._key_expressions()
+
+        assert sf_key == (
+            "COALESCE(TO_VARCHAR(\"ID\"), '\\N') || CHR(31) || "
+            "COALESCE(TO_VARCHAR(\"UPDATED\", 'YYYY-MM-DD HH24:MI:SS.FF6'), '\\N') || CHR(31) || "
+            "COALESCE(TO_VARCHAR(\"DAY\", 'YYYY-MM-DD'), '\\N') || CHR(31) || "
+            "COALESCE(LOWER(TO_VARCHAR(\"GUID\")), '\\N')"
+        )
+        assert pg_key == (
+            "COALESCE(\"ID\"::text, '\\N') || chr(31) || "
+            "COALESCE(to_char(\"UPDATED\", 'YYYY-MM-DD HH24:MI:SS.US'), '\\N') || chr(31) || "
+            "COALESCE(to_char(\"DAY\", 'YYYY-MM-DD'), '\\N') || chr(31) || "
+            "COALESCE(\"guid\"::text, '\\N')"
+        )
+
+    def test_delete_casts_values_to_key_types(self, make_sync):
+        sync = make_sync(uniqueness_columns=['GUID', 'TAGS'])
+        sync.batch_size = 2
+        sync._key_types = {'GUID': 'uuid', 'TAGS': 'ARRAY'}
+        cursor = sync.pg_manager.get_connection.return_value.cursor.return_value
+        cursor.rowcount = 2
+        keys = [('u1', 't1'), ('u2', 't2'), ('u3', 't3')]
+
+        with patch('psycopg2.extras.execute_values') as execute_values:
+            assert sync._delete_keys(keys) == 4
+
+        batches = [c.args[2] for c in execute_values.call_args_list]
+        assert batches == [keys[:2], keys[2:]]
+        assert execute_values.call_args.kwargs['template'] == '(%s::uuid, %s)'
+        assert sync.pg_manager.get_connection.return_value.commit.call_count == 2
@@ -0,0 +1,100 @@
+"""
+Unit tests for lib/duration_estimator.py (chunk history -> duration estimates)
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from lib.duration_estimator import DurationEstimator, fit_throughput
+
+
+def _sums(points):
+    """Aggregate sums for fit_throughput from (rows, seconds) points"""
+    return (
+        len(points),
+        sum(r for r, _ in points),
+        sum(s for _, s in points),
+        sum(r * s for r, s in points),
+        sum(r * r for r, _ in points),
+    )
+
+
+class TestFitThroughput:
+
+    def test_recovers_overhead_and_rate(self):
+        # 2s overhead + 1ms per row
+        model = fit_throughput(*_sums([(1000, 3.0), (5000, 7.0), (10000, 12.0)]))
+
+        assert model.overhead_seconds == pytest.approx(2.0)
+        assert model.seconds_per_row == pytest.approx(0.001)
+        assert model.predict(20000) == pytest.approx(22.0)
+
+    def test_same_sized_chunks_fall_back_to_ratio(self):
+        model = fit_throughput(*_sums([(1000, 2.0), (1000, 4.0)]))
+
+        assert model.overhead_seconds == 0.0
+        assert model.seconds_per_row == pytest.approx(0.003)
+
+    def test_negative_overhead_falls_back_to_ratio(self):
+        # Bigger chunks disproportionately slower: the line crosses below zero
+        model = fit_throughput(*_sums([(1000, 1.0), (2000, 10.0)]))
+
+        assert model.overhead_seconds == 0.0
+        assert model.seconds_per_row == pytest.approx(11.0 / 3000)
+
+    def test_no_usable_history(self):
+        assert fit_throughput(0, 0, 0, 0, 0) is None
+        assert fit_throughput(2, 100, 0, 0, 5000) is None
+        assert fit_throughput(*_sums([(0, 1.0), (0, 3.0)])).overhead_seconds == pytest.approx(2.0)
+
+
+class TestDurationEstimator:
+
+    @staticmethod
+    def _estimator(chunk_rows, run_rows, **kwargs):
+        pg_manager = MagicMock()
+        cursor = pg_manager.get_connection.return_value.cursor.return_value
+        cursor.fetchall.side_effect = [chunk_rows, run_rows]
+        estimator = DurationEstimator(pg_manager, 'conflict', **kwargs)
+        estimator.load()
+        return estimator
+
+    def test_load_fits_per_strategy_and_table_models(self):
+        points = [(1000, 3.0), (5000, 7.0), (10000, 12.0)]
+        estimator = self._estimator(
+            [('DB', 'BI', 'BIG', 'numeric_range', *_sums(points)),
+             ('DB', 'BI', 'BIG', 'date_range', *_sums(points[:1]))],
+            [('DB', 'BI', 'BIG', 16000, 3), ('DB', 'BI', 'BIG', 20000, 4)],
+        )
+
+        assert estimator.get_model('DB', 'BI', 'BIG', 'numeric_range').samples == 3
+        # Too few samples for its own model: the table-wide fit is used
+        assert estimator.get_model('DB', 'BI', 'BIG', 'date_range').samples == 4
+        history = estimator.tables[('DB', 'BI', 'BIG')]
+        assert (history.runs, history.rows_per_run, history.chunks_per_run) == (2, 18000, 3)
+
+    def test_estimate_table_is_bounded_by_longest_chunk_and_spread_total(self):
+        points = [(1000, 3.0), (5000, 7.0), (10000, 12.0)]
+        estimator = self._estimator([('DB', 'BI', 'T', 'numeric_range', *_sums(points))], [])
+
+        # 4 x 12s over 2 threads = 24s; one 52s chunk dominates on 8 threads
+        assert estimator.estimate_table('DB', 'BI', 'T', 2, chunk_rows=[10000] * 4) == pytest.approx(24.0)
+        assert estimator.estimate_table('DB', 'BI', 'T', 8, chunk_rows=[50000, 1000]) == pytest.approx(52.0)
+        assert estimator.estimate_table('DB', 'BI', 'T', 2, chunk_rows=[]) == 0.0
+        # Not chunked yet and no run history
+        assert estimator.estimate_table('DB', 'BI', 'T', 2) is None
+        assert estimator.estimate_table('DB', 'BI', 'OTHER', 2, chunk_rows=[1]) is None
+
+    def test_order_longest_first(self):
+        estimator = self._estimator(
+            [('DB', 'BI', 'SMALL', 'numeric_range', 3, 3000, 3, 3000, 3000000),
+             ('DB', 'BI', 'LARGE', 'numeric_range', 3, 3000, 30, 30000, 3000000)],
+            [('DB', 'BI', 'SMALL', 3000, 3), ('DB', 'BI', 'LARGE', 3000, 3)],
+        )
+        source = {'source_sf_database': 'DB', 'source_sf_schema': 'BI'}
+        tables = [{'source': 'NEW'}, {'source': 'SMALL'}, {'source': 'LARGE'}]
+
+        ordered = estimator.order_longest_first(source, tables, parallel_threads=1)
+
+        assert [t['source'] for t in ordered] == ['LARGE', 'SMALL', 'NEW']
@@ -0,0 +1,61 @@
+"""
+Unit tests for IndexManager.analyze_table (selective ANALYZE after a load)
+"""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from lib.index_manager import IndexManager
+
+
+def _pg_manager(stats_row):
+    """pg_manager whose connections return stats_row from the stats lookup"""
+    pg_manager = MagicMock()
+    conn = pg_manager.get_connection.return_value
+    cursor = conn.cursor.return_value
+    cursor.fetchone.return_value = stats_row
+    return pg_manager, cursor
+
+
+def _statements(cursor):
+    return [' '.join(c.args[0].split()) for c in cursor.execute.call_args_list]
+
+
+class TestAnalyzeTable:
+
+    @pytest.mark.parametrize('table', ['dimpayer', '"DimPayer"'])
+    def test_looks_up_table_by_regclass(self, table):
+        # 10 changes on 1000 live rows, analyzed before: below thresholds
+        pg_manager, cursor = _pg_manager(('dimpayer', 1000, 0, 10, True))
+
+        IndexManager(pg_manager, 'conflict').analyze_table('analytics', table)
+
+        lookup, params = cursor.execute.call_args_list[0].args
+        assert 'WHERE relid = to_regclass(%s)' in lookup
+        assert params == [f'analytics.{table}']
+        assert not any(sql.startswith('ANALYZE') for sql in _statements(cursor))
+
+    def test_analyzes_table_over_threshold_by_given_name(self):
+        pg_manager, cursor = _pg_manager(('DimPayer', 1000, 0, 5000, True))
+
+        IndexManager(pg_manager, 'conflict').analyze_table('analytics', '"DimPayer"')
+
+        assert _statements(cursor)[-1] == 'ANALYZE analytics."DimPayer"'
+
+    def test_table_not_in_stats_is_analyzed_anyway(self):
+        pg_manager, cursor = _pg_manager(None)
+        manager = IndexManager(pg_manager, 'conflict')
+        manager.logger = MagicMock()
+
+        manager.analyze_table('analytics', 'dimpayer')
+
+        assert _statements(cursor)[-1] == 'ANALYZE analytics.dimpayer'
+        assert 'not found in pg_stat_user_tables' in manager.logger.warning.call_args.args[0]
+
+    def test_force_skips_lookup(self):
+        pg_manager, cursor = _pg_manager(None)
+
+        IndexManager(pg_manager, 'conflict').analyze_table('analytics', 'dimpayer', force=True)
+
+        assert _statements(cursor) == ['ANALYZE analytics.dimpayer']
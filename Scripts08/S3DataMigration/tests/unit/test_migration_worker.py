@@ -0,0 +1,161 @@
+"""
+Unit tests for lib/migration_worker.py load-mode routing (COPY vs UPSERT)
+"""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+
+async def _blocking(func, *args, **kwargs):
+    """Stand-in for process_chunk_async's executor hop: run the step inline"""
+    return func(*args, **kwargs)
+
+
+def _async_loader():
+    loader = MagicMock()
+    loader.copy_records_async = AsyncMock(return_value=2)
+    loader.convert_records.side_effect = lambda schema, table, columns, records: list(records)
+    return loader
+
+
+class TestResolveLoadMode:
+
+    def test_chunk_decision_wins(self, make_worker):
+        worker = make_worker()
+
+        assert worker._resolve_load_mode({'use_copy_mode': True}) == (True, 'smart chunk analysis')
+        assert worker._resolve_load_mode({'use_copy_mode': False}) == (False, 'smart chunk analysis')
+
+    def test_legacy_logic(self, make_worker):
+        assert make_worker()._resolve_load_mode({}) == (False, 'legacy logic')
+        assert make_worker(uniqueness_columns=[])._resolve_load_mode({})[0]
+        assert make_worker(truncate_onstart=True)._resolve_load_mode({})[0]
+
+
+class TestSyncRouting:
+
+    @pytest.mark.parametrize('use_copy', [True, False])
+    def test_chunk_follows_load_mode(self, make_worker, use_copy):
+        worker = make_worker()
+
+        with patch.object(worker, '_copy_to_postgres') as copy, \
+                patch.object(worker, '_upsert_to_postgres') as upsert:
+            rows = worker._process_chunk_with_retry('1=1', {'use_copy_mode': use_copy})
+
+        assert rows == 2
+        assert copy.called is use_copy
+        assert upsert.called is not use_copy
+
+
+class TestAsyncRouting:
+
+    def test_upsert_chunk_is_upserted_not_copied(self, make_worker):
+        loader = _async_loader()
+        worker = make_worker(async_loader=loader, insert_only_mode=True)
+
+        with patch.object(worker, '_upsert_to_postgres') as upsert:
+            rows = asyncio.run(worker._load_chunk_async('1=1', {'use_copy_mode': False}, _blocking))
+
+        assert rows == 2
+        upsert.assert_called_once()
+        assert list(upsert.call_args[0][0]['id']) == [1, 2]
+        loader.copy_records_async.assert_not_awaited()
+
+    def test_copy_chunk_uses_binary_copy(self, make_worker):
+        loader = _async_loader()
+        worker = make_worker(async_loader=loader)
+
+        with patch.object(worker, '_upsert_to_postgres') as upsert:
+            rows = asyncio.run(worker._load_chunk_async('1=1', {'use_copy_mode': True}, _blocking))
+
+        assert rows == 2
+        loader.copy_records_async.assert_awaited_once_with(
+            'analytics', 'dimpayer', ['id', 'name'], [(1, 'a'), (2, 'b')]
+        )
+        upsert.assert_not_called()
+
+    def test_data_error_falls_back_to_text_copy(self, make_worker):
+        from lib.async_loader import DataError
+
+        loader = _async_loader()
+        loader.copy_records_async.side_effect = DataError('invalid input for query argument')
+        worker = make_worker(async_loader=loader)
+
+        with patch.object(worker, '_copy_to_postgres') as copy:
+            rows = asyncio.run(worker._load_chunk_async('1=1', {'use_copy_mode': True}, _blocking))
+
+        assert rows == 2
+        copy.assert_called_once()
+
+
+class TestConvertRecords:
+    """Values are shaped for asyncpg's binary codecs before COPY."""
+
+    def test_converts_to_target_types(self):
+        from datetime import date, datetime, timezone
+        from decimal import Decimal
+        from lib.async_loader import AsyncCopyLoader
+
+        loader = AsyncCopyLoader.__new__(AsyncCopyLoader)
+        loader.column_types = lambda schema, table: {
+            'id': 'int8', 'amount': 'numeric', 'rate': 'float8', 'seen': 'timestamp',
+            'seen_tz': 'timestamptz', 'day': 'date', 'note': 'text', 'active': 'bool',
+        }
+        columns = ['id', 'amount', 'rate', 'seen', 'seen_tz', 'day', 'note', 'active']
+        aware = datetime(2024, 3, 1, 12, 30, tzinfo=timezone.utc)
+        records = [
+            (Decimal('7'), '12.50', Decimal('1.5'), aware, '2024-03-01T12:30:00+00:00',
+             '2024-03-01', 'tab\there\nnewline', 'true'),
+            (None,) * 8,
+        ]
+
+        converted = loader.convert_records('analytics', 'fact', columns, records)
+
+        assert converted[0] == (
+            7, Decimal('12.50'), 1.5, datetime(2024, 3, 1, 12, 30), aware,
+            date(2024, 3, 1), 'tab\there\nnewline', True,
+        )
+        assert type(converted[0][0]) is int and type(converted[0][2]) is float
+        assert converted[1] == (None,) * 8
+
+
+class TestUpsertDedupe:
+    """Duplicate keys in a chunk collapse to the row sequential UPSERTs would keep."""
+
+    @staticmethod
+    def _frame(rows):
+        import pandas as pd
+        return pd.DataFrame(rows, columns=['id', 'name', 'updated'])
+
+    def test_without_watermark_last_row_wins(self, make_worker):
+        worker = make_worker()
+        df = self._frame([(1, 'a', 1), (1, 'b', 0), (2, 'c', 0)])
+
+        deduped = worker._dedupe_upsert_rows(df, ['id'])
+
+        assert deduped['name'].tolist() == ['b', 'c']
+
+    def test_older_later_duplicate_does_not_win(self, make_worker):
+        worker = make_worker(source_watermark='UPDATED', target_watermark='updated')
+        df = self._frame([
+            (1, 'newest', 5), (1, 'older', 3), (1, 'tie', 5),
+            (2, 'null-first', None), (2, 'dated', 4),
+            (3, 'only', 1),
+        ])
+
+        deduped = worker._dedupe_upsert_rows(df, ['id'])
+
+        # Equal watermark is not "newer", and a NULL kept watermark is always replaced
+        assert deduped['name'].tolist() == ['newest', 'dated', 'only']
+
+    def test_upsert_counts_folded_rows_as_skipped(self, make_worker):
+        worker = make_worker(source_watermark='UPDATED', target_watermark='updated')
+        df = self._frame([(1, 'newest', 5), (1, 'older', 3)])
+
+        with patch('psycopg2.extras.execute_values', return_value=[(True,)]) as execute_values:
+            stats = worker._upsert_to_postgres(df)
+
+        assert execute_values.call_args[0][2] == [(1, 'newest', 5)]
+        assert stats == {'inserted': 1, 'updated': 0, 'skipped': 1}
@@ -0,0 +1,145 @@
+"""
+Unit tests for running sources concurrently under a shared thread budget
+(MigrationOrchestrator.run_sources and max_concurrent_sources validation)
+"""
+
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from lib.config_validator import ConfigValidator
+from migrate import MigrationOrchestrator
+
+
+def _source(name, *tables, **overrides):
+    source = {
+        'source_name': name,
+        'enabled': True,
+        'source_sf_database': 'ANALYTICS',
+        'source_sf_schema': name.upper(),
+        'target_pg_database': 'conflict',
+        'target_pg_schema': 'analytics',
+        'tables': [{'enabled': True, 'source': table, 'target': table.lower()} for table in tables],
+    }
+    source.update(overrides)
+    return source
+
+
+def _orchestrator(**config):
+    return MigrationOrchestrator(
+        config={'parallel_threads': 8, **config},
+        sf_manager=MagicMock(), pg_manager=MagicMock(), status_tracker=MagicMock()
+    )
+
+
+class TestRunSources:
+
+    def test_sequential_by_default(self):
+        orchestrator = _orchestrator()
+        shares = []
+
+        def process_table(source, table):
+            shares.append(orchestrator._source_thread_share(source))
+            return 10
+
+        with patch.object(orchestrator, '_process_table', side_effect=process_table):
+            results = orchestrator.run_sources([_source('a', 'T1', 'T2'), _source('b', 'T3')])
+
+        assert list(results) == ['a', 'b']
+        assert results['a']['rows'] == 20
+        assert orchestrator.total_rows_migrated == 30
+        # No shared budget: every table keeps its own parallel_threads
+        assert shares == [None, None, None]
+
+    def test_concurrent_sources_split_budget_by_weight(self):
+        orchestrator = _orchestrator(max_concurrent_sources=2)
+        both_running = threading.Barrier(2, timeout=5)
+        shares = {}
+
+        def process_table(source, table):
+            shares[source['source_name']] = orchestrator._source_thread_share(source)
+            # Neither source finishes (and frees its share) before both have read theirs
+            both_running.wait()
+            return 1
+
+        sources = [_source('light', 'T1'), _source('heavy', 'T2', thread_weight=3)]
+        with patch.object(orchestrator, '_process_table', side_effect=process_table):
+            results = orchestrator.run_sources(sources)
+
+        assert shares == {'light': 2, 'heavy': 6}
+        assert list(results) == ['light', 'heavy']
+        # Budget and registrations are cleared once the sources finish
+        assert orchestrator._connection_budget is None
+        assert orchestrator._active_sources == {}
+
+    def test_failing_source_does_not_stop_others(self):
+        orchestrator = _orchestrator(max_concurrent_sources=2)
+        run_single_source = orchestrator.run_single_source
+
+        def run(source):
+            if source['source_name'] == 'broken':
+                raise RuntimeError('no grant')
+            return run_single_source(source)
+
+        with patch.object(orchestrator, 'run_single_source', side_effect=run), \
+                patch.object(orchestrator, '_process_table', return_value=5):
+            results = orchestrator.run_sources([_source('broken', 'T1'), _source('ok', 'T2')])
+
+        assert results['broken']['error'] == 'no grant'
+        assert results['ok']['table_stats'] == {'T2': {'status': 'completed', 'rows': 5}}
+
+    def test_budget_caps_concurrent_chunks(self):
+        orchestrator = _orchestrator(parallel_threads=2)
+        orchestrator._connection_budget = threading.BoundedSemaphore(2)
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def chunk():
+            with lock:
+                running.append(1)
+                peak.append(len(running))
+            time.sleep(0.02)
+            with lock:
+                running.pop()
+
+        threads = [threading.Thread(target=orchestrator._run_in_budget, args=(chunk,)) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(peak) == 6
+        assert max(peak) <= 2
+
+
+class TestValidation:
+
+    @staticmethod
+    def _validate(max_sources=1, **source_overrides):
+        validator = ConfigValidator({
+            'parallel_threads': 4, 'batch_size': 1000, 'max_concurrent_sources': max_sources,
+            'sources': [_source('a', 'T1', **source_overrides)],
+        })
+        validator._validate_global_config()
+        validator._validate_sources()
+        return validator
+
+    @pytest.mark.parametrize('max_sources', [0, -1, 1.5, '2'])
+    def test_invalid_max_concurrent_sources(self, max_sources):
+        assert any('max_concurrent_sources' in e for e in self._validate(max_sources).errors)
+
+    def test_more_sources_than_threads_warns(self):
+        validator = self._validate(8)
+
+        assert not validator.errors
+        assert any('max_concurrent_sources' in w for w in validator.warnings)
+
+    @pytest.mark.parametrize('weight', [0, -2, True, 'high'])
+    def test_invalid_thread_weight(self, weight):
+        assert any('thread_weight' in e for e in self._validate(thread_weight=weight).errors)
+
+    def test_fractional_thread_weight_is_valid(self):
+        assert not any('thread_weight' in e for e in self._validate(thread_weight=0.5).errors)
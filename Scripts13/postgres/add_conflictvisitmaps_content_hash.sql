@@ -0,0 +1,22 @@
+-- ============================================================================
+-- conflictvisitmaps."ContentHash" (Task 02 change detection)
+-- ============================================================================
+-- Purpose:
+--   Stores the Snowflake HASH() of the compared columns (7 rule flags +
+--   business columns) last seen for each conflict pair. Task 02 compares it
+--   with the hash returned by Step 3 and only fetches/compares full columns
+--   for rows whose hash differs.
+--
+--   The column is maintained by Task 02 only (INSERT, UPDATE, and a
+--   hash-only refresh for rows compared as unchanged). Existing rows start
+--   NULL and are filled on the first run that sees them; no backfill needed.
+--   Setting it back to NULL forces a full compare for that row.
+--
+-- Execution: Run once per schema in DBeaver (metadata-only, no table rewrite)
+--
+-- Variables (set these before running):
+--   :conflict_schema   - Conflict data schema (e.g., 'conflict_dev')
+-- ============================================================================
+
+ALTER TABLE :conflict_schema.conflictvisitmaps
+    ADD COLUMN IF NOT EXISTS "ContentHash" BIGINT;
@@ -0,0 +1,29 @@
+-- ============================================================================
+-- task03_slice_progress (Task 03 chunked execution)
+-- ============================================================================
+-- Purpose:
+--   Records which VisitDate / "ID" slices of each chunked Task 03 step have
+--   committed. A slice's row is written in the same transaction as its
+--   UPDATE, so a rerun after a timeout or SIGTERM skips the slices that
+--   finished (within task03_parameters.chunk_resume_hours). Task 03 deletes
+--   all rows after a run in which every step succeeded, and scripts/main.py
+--   deletes them before any action that rewrites Task 03's input tables
+--   (task02_00, task02_01), so slices never resume over changed data.
+--
+--   Without this table Task 03 still commits per slice but does not resume.
+--   Truncating it is always safe: the steps only update rows that would
+--   change, so re-running a slice is harmless.
+--
+-- Execution: Run once per schema in DBeaver
+--
+-- Variables (set these before running):
+--   :conflict_schema   - Conflict data schema (e.g., 'conflict_dev')
+-- ============================================================================
+
+CREATE TABLE IF NOT EXISTS :conflict_schema.task03_slice_progress (
+    step_name     TEXT        NOT NULL,
+    slice_key     TEXT        NOT NULL,
+    rows_affected BIGINT,
+    completed_at  TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (step_name, slice_key)
+);
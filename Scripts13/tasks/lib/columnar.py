@@ -0,0 +1,265 @@
+"""
+Columnar change detection for Task 02 conflict batches
+
+Snowflake Step 3 results are consumed as Arrow record batches
+(``cursor.fetch_arrow_batches()``) instead of one ``dict(zip())`` per row.
+Each batch is joined to the existing conflictvisitmaps rows on
+(VisitID, ConVisitID) and the change-detection rules from
+``ConflictProcessor._has_changes`` are evaluated as whole-column comparisons.
+Only the matched-and-changed rows and the new rows are materialized back into
+Python dicts for writing.
+
+pyarrow/pandas ship with ``snowflake-connector-python[pandas]``; when they are
+missing ``ARROW_AVAILABLE`` is False and the processor keeps the row path.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .utils import get_logger, visit_partition
+
+try:
+    import numpy as np
+    import pandas as pd
+    import pyarrow as pa
+    ARROW_AVAILABLE = True
+except ImportError:  # pragma: no cover - exercised only without the pandas extra
+    np = pd = pa = None
+    ARROW_AVAILABLE = False
+
+logger = get_logger(__name__)
+
+# Internal join columns (normalized string keys, '' for a missing ConVisitID)
+_KEY_VISIT = '_key_visit_id'
+_KEY_CON_VISIT = '_key_con_visit_id'
+_EXISTING_POS = '_existing_pos'
+
+
+def rebatch(tables: Iterable[Any], batch_size: int) -> Iterator[Any]:
+    """
+    Re-slice Arrow tables of arbitrary size into tables of ``batch_size`` rows.
+
+    Snowflake result chunks vary in size (and may use different integer widths
+    for the same NUMBER column), so pending chunks are concatenated with
+    permissive type promotion before slicing. The final table may be smaller.
+    """
+    pending: List[Any] = []
+    pending_rows = 0
+
+    for table in tables:
+        if table.num_rows == 0:
+            continue
+        pending.append(table)
+        pending_rows += table.num_rows
+
+        while pending_rows >= batch_size:
+            combined = pa.concat_tables(pending, promote_options='permissive')
+            yield combined.slice(0, batch_size)
+            rest = combined.slice(batch_size)
+            pending = [rest] if rest.num_rows else []
+            pending_rows = rest.num_rows
+
+    if pending_rows:
+        yield pa.concat_tables(pending, promote_options='permissive')
+
+
+def conflict_keys(table: Any) -> List[Tuple[str, Optional[str]]]:
+    """(VisitID, ConVisitID) tuples in the same form the row path builds."""
+    visit_ids = table.column('VisitID').to_pylist()
+    con_visit_ids = table.column('ConVisitID').to_pylist()
+    return [
+        (str(visit_id), str(con_visit_id) if con_visit_id else None)
+        for visit_id, con_visit_id in zip(visit_ids, con_visit_ids)
+    ]
+
+
+def partition_table(table: Any, partitions: int) -> List[Any]:
+    """Split an Arrow table into ``partitions`` tables by VisitID hash (see utils.visit_partition)."""
+    ids = np.fromiter(
+        (visit_partition(visit_id, partitions) for visit_id in table.column('VisitID').to_pylist()),
+        dtype=np.int64, count=table.num_rows,
+    )
+    return [table.filter(pa.array(ids == partition)) for partition in range(partitions)]
+
+
+def _key_frame(frame: Any) -> Any:
+    """Normalized join keys: str(VisitID), str(ConVisitID) or '' when missing."""
+    visit_ids = frame['VisitID'].astype(object)
+    con_visit_ids = frame['ConVisitID'].astype(object)
+    con_missing = con_visit_ids.isna() | (con_visit_ids == '')
+    return pd.DataFrame({
+        _KEY_VISIT: visit_ids.map(str).to_numpy(),
+        _KEY_CON_VISIT: con_visit_ids.map(str).where(~con_missing, '').to_numpy(),
+    })
+
+
+def _values_differ(new_values: Any, old_values: Any) -> Any:
+    """
+    Row-wise ``new != old`` where two NULLs compare equal.
+
+    Arrow hands back typed columns (datetime64, float64 with NaN for NULL
+    integers) while psycopg2 rows are Python objects, so both sides are
+    coerced to the same representation before comparing.
+    """
+    new_values = new_values.reset_index(drop=True)
+    old_values = old_values.reset_index(drop=True)
+
+    try:
+        if (pd.api.types.is_datetime64_any_dtype(new_values)
+                or pd.api.types.is_datetime64_any_dtype(old_values)):
+            new_values = pd.to_datetime(new_values, errors='coerce')
+            old_values = pd.to_datetime(old_values, errors='coerce')
+        elif (pd.api.types.is_numeric_dtype(new_values)
+                or pd.api.types.is_numeric_dtype(old_values)):
+            new_values = pd.to_numeric(new_values, errors='coerce')
+            old_values = pd.to_numeric(old_values, errors='coerce')
+        differ = (new_values != old_values).to_numpy(dtype=bool)
+    except (TypeError, ValueError):
+        # Mixed tz-aware/naive or otherwise incomparable types: fall back to
+        # the row path's Python equality
+        differ = new_values.astype(object).to_numpy() != old_values.astype(object).to_numpy()
+        differ = np.asarray(differ, dtype=bool)
+
+    both_null = new_values.isna().to_numpy() & old_values.isna().to_numpy()
+    return differ & ~both_null
+
+
+def detect_changes(
+    new_frame: Any,
+    existing_frame: Any,
+    flag_columns: Sequence[str],
+    business_columns: Sequence[str],
+    skip_unchanged_records: bool = True,
+) -> Dict[str, Any]:
+    """
+    Join a batch to existing rows and find the rows that need an UPDATE.
+
+    Same rules as ``ConflictProcessor._has_changes``: a conditional flag counts
+    only when the existing value is 'N' and the new value differs; a business
+    column counts when present in the batch and the values differ (NULL ==
+    NULL). Rows with a flag change are attributed to flags first.
+
+    Args:
+        new_frame: Snowflake batch (pandas) with VisitID, ConVisitID and the compared columns
+        existing_frame: Existing conflictvisitmaps rows (pandas), same column names
+        flag_columns: Conditional flag columns
+        business_columns: Business columns
+        skip_unchanged_records: If False, every matched row is treated as changed
+
+    Returns:
+        Dict with per-new-row arrays 'matched', 'changed' and 'existing_index'
+        (row position in existing_frame, -1 when unmatched), plus the counts
+        'changed_by_flag' and 'changed_by_business_data'
+    """
+    num_rows = len(new_frame)
+    result = {
+        'matched': np.zeros(num_rows, dtype=bool),
+        'changed': np.zeros(num_rows, dtype=bool),
+        'existing_index': np.full(num_rows, -1, dtype=np.int64),
+        'changed_by_flag': 0,
+        'changed_by_business_data': 0,
+    }
+    if num_rows == 0 or existing_frame is None or len(existing_frame) == 0:
+        return result
+
+    # Left join batch -> existing on the normalized key (last existing row wins,
+    # like the dict the row path builds)
+    new_keys = _key_frame(new_frame)
+    existing_keys = _key_frame(existing_frame)
+    existing_keys[_EXISTING_POS] = np.arange(len(existing_frame), dtype=np.int64)
+    existing_keys = existing_keys.drop_duplicates([_KEY_VISIT, _KEY_CON_VISIT], keep='last')
+
+    joined = new_keys.merge(existing_keys, how='left', on=[_KEY_VISIT, _KEY_CON_VISIT], sort=False)
+    existing_pos = joined[_EXISTING_POS].fillna(-1).to_numpy(dtype=np.int64)
+    matched = existing_pos >= 0
+    result['matched'] = matched
+    result['existing_index'] = existing_pos
+
+    if not matched.any():
+        return result
+
+    if not skip_unchanged_records:
+        result['changed'] = matched.copy()
+        return result
+
+    new_pos = np.flatnonzero(matched)
+    old_pos = existing_pos[matched]
+
+    flag_changed = np.zeros(len(new_pos), dtype=bool)
+    for col in flag_columns:
+        if col not in existing_frame.columns:
+            continue
+        old_values = existing_frame[col].iloc[old_pos]
+        if col in new_frame.columns:
+            new_values = new_frame[col].iloc[new_pos]
+        else:
+            new_values = pd.Series([None] * len(new_pos), dtype=object)
+        old_is_n = (old_values == 'N').to_numpy(dtype=bool)
+        flag_changed |= old_is_n & _values_differ(new_values, old_values)
+
+    business_changed = np.zeros(len(new_pos), dtype=bool)
+    for col in business_columns:
+        if col not in new_frame.columns or col not in existing_frame.columns:
+            continue
+        business_changed |= _values_differ(
+            new_frame[col].iloc[new_pos], existing_frame[col].iloc[old_pos]
+        )
+
+    changed = np.zeros(num_rows, dtype=bool)
+    changed[new_pos] = flag_changed | business_changed
+    result['changed'] = changed
+    result['changed_by_flag'] = int(flag_changed.sum())
+    result['changed_by_business_data'] = int((~flag_changed & business_changed).sum())
+    return result
+
+
+def to_frame(table: Any, columns: Sequence[str]) -> Any:
+    """Project an Arrow table onto the columns that exist in it, as pandas."""
+    present = [col for col in columns if col in table.column_names]
+    return table.select(present).to_pandas()
+
+
+def take_rows(table: Any, mask: Any) -> List[Dict[str, Any]]:
+    """Materialize only the rows selected by a boolean mask as Python dicts."""
+    indices = np.flatnonzero(mask)
+    if len(indices) == 0:
+        return []
+    return table.take(pa.array(indices)).to_pylist()
+
+
+def as_mask(values: Sequence[bool]) -> Any:
+    """Boolean numpy mask from a list of flags."""
+    return np.asarray(values, dtype=bool)
+
+
+def filter_rows(table: Any, mask: Sequence[bool]) -> Any:
+    """Rows of an Arrow table selected by a boolean mask (still Arrow)."""
+    return table.filter(pa.array(as_mask(mask)))
+
+
+def scatter(mask: Sequence[bool], values: Any) -> Any:
+    """Spread per-selected-row flags back to full-length positions (False elsewhere)."""
+    mask = as_mask(mask)
+    result = np.zeros(len(mask), dtype=bool)
+    result[np.flatnonzero(mask)] = values
+    return result
+
+
+def to_csv(table: Any) -> bytes:
+    """
+    CSV (with header) for ``COPY ... WITH (FORMAT csv, HEADER true)``.
+
+    Strings are always quoted and NULLs written unquoted-empty, so COPY reads
+    '' and NULL back as they were.
+    """
+    import pyarrow.csv as pa_csv
+
+    sink = pa.BufferOutputStream()
+    pa_csv.write_csv(table, sink)
+    return sink.getvalue().to_pybytes()
+
+
+def columns_to_frame(columns: Dict[str, List[Any]]) -> Optional[Any]:
+    """pandas frame from a column name -> values dict, or None when it has no rows."""
+    if not columns or not next(iter(columns.values())):
+        return None
+    return pd.DataFrame(columns)
@@ -3,13 +3,108 @@ Conflict Processor for Task 02
 Handles streaming conflict detection results and batch updates to Postgres
 """
 
+import copy
 from typing import Dict, List, Any, Tuple, Optional
-from .utils import get_logger, format_duration, estimate_memory_mb
+from .utils import (
+    get_logger, format_duration, estimate_memory_mb, format_copy_value, visit_partition,
+    format_copy_binary_uuid_pairs,
+)
 from .connections import SnowflakeConnectionManager, PostgresConnectionManager
-from .query_builder import QueryBuilder
+from .query_builder import (
+    QueryBuilder, BUSINESS_COLUMNS, CONDITIONAL_FLAG_COLUMNS, CONTENT_HASH_COLUMN,
+    SERVER_DIFF_TABLE, STAGED_UPDATE_TABLE,
+)
+from . import columnar
 
 logger = get_logger(__name__)
 
+# Columns compared by change detection (fetched from Postgres and projected
+# out of each Arrow batch)
+COMPARED_COLUMNS = ['VisitID', 'ConVisitID'] + CONDITIONAL_FLAG_COLUMNS + BUSINESS_COLUMNS
+
+# Existing-record lookup: session prepared statement, and the key table used
+# instead when a batch has more than existing_lookup_copy_threshold VisitIDs
+EXISTING_LOOKUP_STATEMENT = 'cvm_fetch_existing'
+CONTENT_HASH_LOOKUP_STATEMENT = 'cvm_fetch_hashes'
+EXISTING_LOOKUP_KEYS_TABLE = '_tmp_lookup_visit_ids'
+
+# Step 3 seen (VisitID, ConVisitID) pairs, streamed in per batch for Step 4
+SEEN_CONFLICTS_TABLE = '_tmp_seen_conflicts'
+
+# Poll interval for async Snowflake setup statements (see _run_setup_graph)
+ASYNC_POLL_SECONDS = 0.5
+
+# Where a batch is diffed against conflictvisitmaps: 'client' fetches existing
+# rows and compares in Python; 'server' COPYs the batch and diffs in Postgres
+DIFF_MODES = ('client', 'server')
+
+# Counters a pipeline writer accumulates on its own and folds back into the
+# run statistics (see _run_writer_pipeline)
+WRITER_STATS = [
+    'rows_processed', 'rows_updated', 'rows_inserted', 'rows_skipped_no_changes',
+    'matched_in_postgres', 'new_conflicts', 'changes_by_flag',
+    'changes_by_business_data', 'insert_batches', 'errors',
+    'rows_skipped_by_hash', 'content_hashes_synced',
+]
+
+
+def load_reference_data(
+    pg_manager: PostgresConnectionManager,
+    query_builder: QueryBuilder,
+    db_names: Dict[str, str]
+) -> Dict[str, Any]:
+    """
+    Fetch all reference data from Postgres in parallel
+    
+    Args:
+        pg_manager: Postgres connection manager
+        query_builder: QueryBuilder for the pg_fetch_*.sql files
+        db_names: Dict with pg_database, pg_schema keys
+    
+    Returns:
+        Dict with keys: excluded_agencies, excluded_ssns, settings, mph
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    logger.info("Fetching reference data from Postgres...")
+    
+    def fetch(sql_file):
+        query = query_builder.build_reference_query(sql_file, db_names)
+        return pg_manager.execute_query(query, database=db_names['pg_database'])
+    
+    # Each execute_query runs on a connection of its own
+    sql_files = [
+        'pg_fetch_excluded_agencies.sql', 'pg_fetch_excluded_ssns.sql',
+        'pg_fetch_settings.sql', 'pg_fetch_mph.sql',
+    ]
+    with ThreadPoolExecutor(max_workers=len(sql_files)) as executor:
+        agencies, ssns, settings_rows, mph_rows = executor.map(fetch, sql_files)
+    
+    # Excluded agencies
+    excluded_agencies = [row[0] for row in agencies if row[0]]
+    logger.info(f"  ✓ Excluded agencies: {len(excluded_agencies)}")
+    
+    # Excluded SSNs
+    excluded_ssns = [row[0] for row in ssns if row[0]]
+    logger.info(f"  ✓ Excluded SSNs: {len(excluded_ssns)}")
+    
+    # Settings
+    settings = dict(zip(['ExtraDistancePer'], settings_rows[0])) if settings_rows else {}
+    logger.info(f"  ✓ Settings loaded")
+    
+    # MPH lookup
+    mph = [{'From': row[0], 'To': row[1], 'AverageMilesPerHour': row[2]} for row in mph_rows]
+    logger.info(f"  ✓ MPH lookup: {len(mph)} ranges")
+    if not mph:
+        logger.warning("  ⚠ No MPH data retrieved from database!")
+    
+    return {
+        'excluded_agencies': excluded_agencies,
+        'excluded_ssns': excluded_ssns,
+        'settings': settings,
+        'mph': mph
+    }
+
 
 class ConflictProcessor:
     """Processes conflict detection results with streaming and batch updates"""
@@ -24,7 +119,13 @@ class ConflictProcessor:
         skip_unchanged_records: bool = True,
         enable_asymmetric_join: bool = True,
         enable_stale_cleanup: bool = True,
-        enable_insert: bool = True
+        enable_insert: bool = True,
+        enable_arrow_batches: bool = True,
+        existing_lookup_copy_threshold: int = 10000,
+        pg_writer_workers: int = 1,
+        pipeline_queue_depth: int = 2,
+        enable_content_hash: bool = False,
+        diff_mode: str = 'client'
     ):
         self.sf_manager = sf_manager
         self.pg_manager = pg_manager
@@ -35,6 +136,14 @@ class ConflictProcessor:
         self.enable_asymmetric_join = enable_asymmetric_join
         self.enable_stale_cleanup = enable_stale_cleanup
         self.enable_insert = enable_insert
+        self.enable_arrow_batches = enable_arrow_batches and columnar.ARROW_AVAILABLE
+        self.existing_lookup_copy_threshold = existing_lookup_copy_threshold
+        self.pg_writer_workers = pg_writer_workers
+        self.pipeline_queue_depth = pipeline_queue_depth
+        self.enable_content_hash = enable_content_hash
+        if diff_mode not in DIFF_MODES:
+            raise ValueError(f"Unknown diff_mode {diff_mode!r} (expected one of {DIFF_MODES})")
+        self.diff_mode = diff_mode
         self.logger = logger
         
         # Persistent Postgres connection for batch processing
@@ -44,6 +153,19 @@ class ConflictProcessor:
         self._insert_sql: Optional[str] = None
         self._insert_sf_columns: Optional[List[str]] = None
         
+        # Set-based UPDATE (built on the first changed batch, staging table
+        # created once per persistent connection)
+        self._staged_update: Optional[Dict[str, Any]] = None
+        self._staged_update_table_created = False
+        
+        # Server-side diff (built on the first batch, staging table created
+        # once per persistent connection)
+        self._server_diff: Optional[Dict[str, Any]] = None
+        self._server_diff_table_created = False
+        
+        # Existing-record lookup prepared statements (per persistent connection)
+        self._existing_lookup_prepared = set()
+        
         # Statistics
         self.stats = {
             'rows_fetched': 0,
@@ -63,6 +185,13 @@ class ConflictProcessor:
             # INSERT stats
             'insert_enabled': enable_insert,
             'insert_batches': 0,
+            # Columnar batch stats
+            'arrow_batches': False,
+            'diff_mode': diff_mode,
+            # Content hash stats
+            'content_hash_enabled': enable_content_hash,
+            'rows_skipped_by_hash': 0,
+            'content_hashes_synced': 0,
             # Asymmetric join stats
             'asymmetric_join_enabled': enable_asymmetric_join,
             'stale_cleanup_enabled': enable_stale_cleanup,
@@ -74,7 +203,8 @@ class ConflictProcessor:
             'delta_keys_count': 0,  # backward compat alias
             'modified_visit_ids_count': 0,  # backward compat alias
             'records_marked_for_update': 0,
-            'stale_conflicts_resolved': 0
+            'stale_conflicts_resolved': 0,
+            'seen_conflict_keys': 0
         }
     
     def fetch_reference_data(self) -> Dict[str, Any]:
@@ -84,40 +214,7 @@ class ConflictProcessor:
         Returns:
             Dict with keys: excluded_agencies, excluded_ssns, settings, mph
         """
-        logger.info("Fetching reference data from Postgres...")
-        
-        # Fetch excluded agencies
-        query = self.query_builder.build_reference_query('pg_fetch_excluded_agencies.sql', self.db_names)
-        agencies = self.pg_manager.execute_query(query, database=self.db_names['pg_database'])
-        excluded_agencies = [row[0] for row in agencies if row[0]]
-        logger.info(f"  ✓ Excluded agencies: {len(excluded_agencies)}")
-        
-        # Fetch excluded SSNs
-        query = self.query_builder.build_reference_query('pg_fetch_excluded_ssns.sql', self.db_names)
-        ssns = self.pg_manager.execute_query(query, database=self.db_names['pg_database'])
-        excluded_ssns = [row[0] for row in ssns if row[0]]
-        logger.info(f"  ✓ Excluded SSNs: {len(excluded_ssns)}")
-        
-        # Fetch settings
-        query = self.query_builder.build_reference_query('pg_fetch_settings.sql', self.db_names)
-        settings_rows = self.pg_manager.execute_query(query, database=self.db_names['pg_database'])
-        settings = dict(zip(['ExtraDistancePer'], settings_rows[0])) if settings_rows else {}
-        logger.info(f"  ✓ Settings loaded")
-        
-        # Fetch MPH lookup
-        query = self.query_builder.build_reference_query('pg_fetch_mph.sql', self.db_names)
-        mph_rows = self.pg_manager.execute_query(query, database=self.db_names['pg_database'])
-        mph = [{'From': row[0], 'To': row[1], 'AverageMilesPerHour': row[2]} for row in mph_rows]
-        logger.info(f"  ✓ MPH lookup: {len(mph)} ranges")
-        if not mph:
-            logger.warning("  ⚠ No MPH data retrieved from database!")
-        
-        return {
-            'excluded_agencies': excluded_agencies,
-            'excluded_ssns': excluded_ssns,
-            'settings': settings,
-            'mph': mph
-        }
+        return load_reference_data(self.pg_manager, self.query_builder, self.db_names)
     
     def stream_and_process_conflicts_v3(
         self,
@@ -129,6 +226,7 @@ class ConflictProcessor:
         with pair-precise seen-based anti-join for accurate stale conflict detection.
         
         V3 Execution Flow:
+        0. Create and load excluded_ssns temp table
         1. Execute step1 (delta_keys temp table) - always created for stale cleanup scoping
         2. Execute step2 (base_visits temp table with materialization)
         2d. Stream actual (visit_date, ssn) pairs from delta_keys to Postgres _tmp_delta_pairs
@@ -137,6 +235,10 @@ class ConflictProcessor:
            - During streaming, collect all seen (VisitID, ConVisitID) pairs
         4. Resolve stale conflicts via pair-precise seen-based anti-join
         
+        Steps 0-3 are submitted asynchronously in dependency order (see
+        _build_setup_graph): step1 runs alongside step2a, and step2d streams
+        into Postgres while step2b and step3 execute in Snowflake.
+        
         PERFORMANCE: Step 2d streams actual (visit_date, ssn) pairs from delta_keys 
         directly into Postgres via chunked COPY. This gives precise stale scoping --
         only records matching an exact (visit_date, ssn) pair from delta_keys are
@@ -158,186 +260,83 @@ class ConflictProcessor:
         # Build INSERT template once (reused for every batch)
         if self.enable_insert:
             self._insert_sql, self._insert_sf_columns = \
-                self.query_builder.build_insert_template(self.db_names)
+                self.query_builder.build_insert_template(
+                    self.db_names, include_content_hash=self.enable_content_hash
+                )
         
-        batch = []
         batch_number = 0
         delta_pairs_loaded = False  # Whether (visit_date, ssn) pairs were loaded into Postgres
         
         try:
             # Open a connection to Snowflake
             with self.sf_manager.streaming_cursor() as cursor:
-                # STEP 0: Create and populate excluded_ssns temp table
-                if queries.get('step0_create'):
-                    logger.info("STEP 0: Creating excluded_ssns temp table...")
-                    cursor.execute(queries['step0_create'])
-                    insert_stmts = queries.get('step0_inserts', [])
-                    if insert_stmts:
-                        for stmt in insert_stmts:
-                            cursor.execute(stmt)
-                        logger.info(f"  ✓ Loaded {len(insert_stmts)} batch(es) of excluded SSNs")
-                    else:
-                        logger.info("  ✓ No excluded SSNs to load (table created empty)")
-                
-                # STEP 1: Create delta_keys temp table (always created now)
-                if queries.get('step1'):
-                    logger.info("STEP 1: Creating delta_keys temp table...")
-                    cursor.execute(queries['step1'])
-                    logger.info("  ✓ delta_keys temp table created")
-                else:
-                    logger.info("STEP 1: SKIPPED (no step1 query)")
-                
-                # STEP 2: Create base_visits temp table
-                # Part A: Delta rows only (~70K, fast with partition pruning)
-                import time as _time
-                step2a_start = _time.time()
-                logger.info("STEP 2 (Part A): Creating base_visits with delta rows only...")
-                cursor.execute(queries['step2'])
-                step2a_duration = _time.time() - step2a_start
-                logger.info(f"  ✓ base_visits created with delta rows ({step2a_duration:.1f}s)")
-                
-                # Part B (asymmetric only): INSERT related non-delta rows via delta_keys JOIN
-                if queries.get('step2_asym_insert'):
-                    step2b_start = _time.time()
-                    logger.info("STEP 2 (Part B): Inserting related non-delta visits via delta_keys JOIN...")
-                    cursor.execute(queries['step2_asym_insert'])
-                    step2b_duration = _time.time() - step2b_start
-                    logger.info(f"  ✓ Related non-delta rows inserted ({step2b_duration:.1f}s)")
-                    logger.info(f"  Total Step 2: {step2a_duration + step2b_duration:.1f}s")
-                
-                # STEP 2d: Stream actual (visit_date, ssn) pairs from delta_keys into Postgres
-                # These pairs define the EXACT scope Snowflake scanned for conflict detection.
-                # Using actual pairs avoids the cross-product problem of separate SSN/date lists.
-                # Streamed in chunks of 100K via COPY for low memory usage.
-                if self.enable_stale_cleanup and queries.get('step2d'):
-                    import io
-                    step2d_start = _time.time()
-                    logger.info("STEP 2d: Streaming (visit_date, ssn) pairs from delta_keys to Postgres...")
-                    
-                    # Create _tmp_delta_pairs in Postgres
-                    if self.pg_connection is None:
-                        self.pg_connection = self.pg_manager.get_connection(
-                            database=self.db_names['pg_database']
-                        )
-                    pg_cursor = self.pg_connection.cursor()
-                    pg_cursor.execute("DROP TABLE IF EXISTS _tmp_delta_pairs")
-                    pg_cursor.execute("""
-                        CREATE TEMP TABLE _tmp_delta_pairs (
-                            visit_date DATE,
-                            ssn VARCHAR(20)
-                        )
-                    """)
-                    
-                    # Stream from Snowflake cursor and COPY in chunks
-                    COPY_CHUNK_SIZE = 100000
-                    cursor.execute(queries['step2d'])
-                    buffer = io.StringIO()
-                    pair_count = 0
-                    chunk_count = 0
-                    distinct_ssns = set()
-                    distinct_dates = set()
-                    
-                    for row in cursor:
-                        visit_date = row[0]
-                        ssn = str(row[1]).strip() if row[1] else None
-                        if visit_date and ssn:
-                            buffer.write(f"{visit_date}\t{ssn}\n")
-                            pair_count += 1
-                            distinct_ssns.add(ssn)
-                            distinct_dates.add(visit_date)
-                            
-                            if pair_count % COPY_CHUNK_SIZE == 0:
-                                buffer.seek(0)
-                                pg_cursor.copy_from(buffer, '_tmp_delta_pairs', columns=('visit_date', 'ssn'))
-                                chunk_count += 1
-                                buffer = io.StringIO()
-                                if pair_count % 1000000 == 0:
-                                    logger.info(f"    Streamed {pair_count:,} pairs...")
-                    
-                    # Flush remaining rows
-                    if buffer.tell() > 0:
-                        buffer.seek(0)
-                        pg_cursor.copy_from(buffer, '_tmp_delta_pairs', columns=('visit_date', 'ssn'))
-                        chunk_count += 1
-                    
-                    copy_duration = _time.time() - step2d_start
-                    logger.info(f"  ✓ Loaded {pair_count:,} pairs into _tmp_delta_pairs ({chunk_count} chunks, {copy_duration:.1f}s)")
-                    logger.info(f"    Distinct SSNs: {len(distinct_ssns):,}, Distinct dates: {len(distinct_dates):,}")
-                    
-                    # Index for Phase 1 JOIN performance
-                    idx_start = _time.time()
-                    pg_cursor.execute("CREATE INDEX ON _tmp_delta_pairs (ssn, visit_date)")
-                    pg_cursor.execute("ANALYZE _tmp_delta_pairs")
-                    idx_duration = _time.time() - idx_start
-                    logger.info(f"  ✓ Indexed and analyzed _tmp_delta_pairs ({idx_duration:.1f}s)")
-                    
-                    pg_cursor.close()
-                    delta_pairs_loaded = True
-                    
-                    step2d_duration = _time.time() - step2d_start
-                    self.stats['delta_ssns_count'] = len(distinct_ssns)
-                    self.stats['delta_keys_count'] = pair_count
-                    self.stats['delta_dates_count'] = len(distinct_dates)
-                    self.stats['delta_pairs_count'] = pair_count
-                    logger.info(f"  Total step 2d: {step2d_duration:.1f}s")
-                    logger.info("  (No upfront marking -- will use seen-based resolve after streaming)")
-                else:
+                # STEPS 0-3: submitted asynchronously as a dependency graph --
+                # each statement starts as soon as the temp tables it reads
+                # exist, and the Postgres-side nodes (temp table setup, the
+                # Step 2d pair stream) run on a helper thread meanwhile
+                nodes = self._build_setup_graph(queries, cursor.connection)
+                query_ids = self._run_setup_graph(cursor, nodes, timeout_callback)
+                if query_ids is None:
+                    logger.warning("Shutdown requested during setup, skipping Step 3")
+                    self.stats['unique_visits'] = len(self.stats['unique_visits'])
+                    return self.stats
+                delta_pairs_loaded = any(node['name'] == 'step2d' for node in nodes)
+                if not delta_pairs_loaded:
                     logger.info("STEP 2d: SKIPPED (stale cleanup disabled)")
                 
-                # STEP 3: Execute final conflict detection query and stream results
-                logger.info("STEP 3: Executing final conflict detection query...")
-                cursor.execute(queries['step3'])
-                logger.info("  ✓ Query started, streaming results...")
+                # STEP 3: Stream the final conflict detection results
+                logger.info("STEP 3: Fetching final conflict detection results...")
+                cursor.get_results_from_sfqid(query_ids['step3'])
+                logger.info("  ✓ Query finished, streaming results...")
                 
                 # Get column names
                 column_names = [desc[0] for desc in cursor.description]
                 logger.info(f"  Result columns: {len(column_names)}")
                 
-                # Track all (VisitID, ConVisitID) pairs from Snowflake for seen-based stale resolve
-                seen_conflict_keys = set()
+                # Stream all (VisitID, ConVisitID) pairs from Snowflake into
+                # Postgres as they are read, for the seen-based stale resolve
+                # (table created by the pg_prepare node)
+                track_seen = self.enable_stale_cleanup and delta_pairs_loaded
                 
-                # Stream and process results
-                for row in cursor:
-                    # Check timeout
-                    if timeout_callback and timeout_callback():
-                        logger.warning("Timeout detected, stopping processing")
-                        break
-                    
-                    self.stats['rows_fetched'] += 1
-                    
-                    # Convert row to dict
-                    conflict_row = dict(zip(column_names, row))
-                    
-                    # Track unique visits
-                    self.stats['unique_visits'].add(conflict_row['VisitID'])
-                    
-                    # Track seen conflict keys for stale resolve
-                    if self.enable_stale_cleanup:
-                        visit_id = str(conflict_row.get('VisitID'))
-                        con_visit_id = str(conflict_row.get('ConVisitID')) if conflict_row.get('ConVisitID') else None
-                        seen_conflict_keys.add((visit_id, con_visit_id))
-                    
-                    batch.append(conflict_row)
-                    
-                    # Process batch when full
-                    if len(batch) >= self.batch_size:
-                        batch_number += 1
-                        self._process_batch(batch, batch_number)
-                        batch = []
+                # With several writers each reader batch is split across them,
+                # so read writers x batch_size rows to keep ~batch_size per write
+                read_size = self.batch_size * max(self.pg_writer_workers, 1)
                 
-                # Process remaining records
-                if batch:
-                    batch_number += 1
-                    self._process_batch(batch, batch_number)
+                # Columnar path: Arrow record batches re-sliced to read_size,
+                # change detection done with whole-column comparisons
+                if self.enable_arrow_batches:
+                    logger.info("  Result format: Arrow record batches (vectorized change detection)")
+                    self.stats['arrow_batches'] = True
+                    batches = self._read_arrow_batches(
+                        cursor, read_size, timeout_callback, track_seen
+                    )
+                    process = self._process_arrow_batch
+                else:
+                    # Row path (pyarrow unavailable or disabled)
+                    batches = self._read_row_batches(
+                        cursor, column_names, read_size, timeout_callback, track_seen
+                    )
+                    process = self._process_batch
+                
+                if self.diff_mode == 'server':
+                    logger.info("  Diff mode: server (batches COPYed to Postgres, diffed with set operations)")
+                    process = self._process_batch_server_side
+                
+                if self.pg_writer_workers > 1:
+                    batch_number = self._run_writer_pipeline(batches, process)
+                else:
+                    for batch in batches:
+                        batch_number += 1
+                        process(batch, batch_number)
             
             logger.info(f"✓ Streaming complete: {self.stats['rows_fetched']} conflicts fetched from Snowflake")
-            if self.enable_stale_cleanup:
-                logger.info(f"  Seen conflict keys collected: {len(seen_conflict_keys):,}")
+            if self.enable_stale_cleanup and delta_pairs_loaded:
+                logger.info(f"  Seen conflict keys streamed: {self.stats['seen_conflict_keys']:,}")
             
             # STEP 4: Resolve stale conflicts (seen-based anti-join approach)
-            # _tmp_delta_pairs was already loaded in Step 2d and persists in the PG session
+            # _tmp_delta_pairs (Step 2d) and _tmp_seen_conflicts (Step 3) persist in the PG session
             if self.enable_stale_cleanup and delta_pairs_loaded:
-                self._resolve_stale_conflicts_seen_based(seen_conflict_keys)
+                self._resolve_stale_conflicts_seen_based()
             
             # Finalize stats
             self.stats['batches_processed'] = batch_number
@@ -358,6 +357,561 @@ class ConflictProcessor:
                 except Exception as e:
                     logger.warning(f"Error closing Postgres connection: {e}")
     
+    def _build_setup_graph(self, queries: Dict[str, Any], sf_connection) -> List[Dict[str, Any]]:
+        """
+        Dependency graph for the statements that run before Step 3 streams
+        
+        Only true data dependencies are edges:
+          - step0 inserts need the excluded_ssns_temp table
+          - step1 (delta_keys) and step2a (base_visits delta rows) both read
+            excluded_ssns_temp but not each other, so they run concurrently
+          - step2b (asymmetric) joins delta_keys into base_visits
+          - step2d streams delta_keys to Postgres while step2b/step3 run
+          - step3 self-joins the finished base_visits
+        
+        Args:
+            queries: Dict from QueryBuilder.build_conflict_detection_query_v3
+            sf_connection: Snowflake connection (Step 2d reads on its own cursor)
+        
+        Returns:
+            List of node dicts with name, deps, and either sql (submitted with
+            execute_async) or run (called on the helper thread)
+        """
+        nodes = []
+        
+        def add(name, deps, sql=None, run=None):
+            known = {node['name'] for node in nodes}
+            nodes.append({'name': name, 'deps': [d for d in deps if d in known], 'sql': sql, 'run': run})
+        
+        # STEP 0: excluded_ssns temp table, loaded with batched INSERTs
+        ssn_nodes = []
+        if queries.get('step0_create'):
+            add('step0_create', [], sql=queries['step0_create'])
+            ssn_nodes.append('step0_create')
+            for i, stmt in enumerate(queries.get('step0_inserts', []), start=1):
+                add(f'step0_insert_{i}', ['step0_create'], sql=stmt)
+                ssn_nodes.append(f'step0_insert_{i}')
+        
+        # STEP 1: delta_keys temp table
+        if queries.get('step1'):
+            add('step1', ssn_nodes, sql=queries['step1'])
+        
+        # STEP 2: base_visits -- Part A delta rows, Part B (asymmetric only)
+        # related non-delta rows via delta_keys JOIN
+        add('step2a', ssn_nodes, sql=queries['step2'])
+        base_visits = ['step2a']
+        if queries.get('step2_asym_insert'):
+            add('step2b', ['step1', 'step2a'], sql=queries['step2_asym_insert'])
+            base_visits.append('step2b')
+        
+        # STEP 2d: Postgres temp tables, then the (visit_date, ssn) pair stream
+        if self.enable_stale_cleanup and queries.get('step2d') and queries.get('step1'):
+            add('pg_prepare', [], run=self._create_stale_scope_tables)
+            add('step2d', ['step1', 'pg_prepare'],
+                run=lambda: self._load_delta_pairs(sf_connection, queries['step2d']))
+        
+        # STEP 3: final conflict detection query
+        add('step3', base_visits, sql=queries['step3'])
+        return nodes
+    
+    def _run_setup_graph(
+        self,
+        cursor,
+        nodes: List[Dict[str, Any]],
+        timeout_callback: Optional[callable] = None
+    ) -> Optional[Dict[str, str]]:
+        """
+        Run a setup graph: SQL nodes with execute_async/get_query_status,
+        Python nodes one at a time on a helper thread
+        
+        A node starts as soon as all its dependencies have finished. On an
+        error or shutdown request the still-running Snowflake queries are
+        cancelled. Per-node timings are logged and kept in stats['setup_graph'].
+        
+        Args:
+            cursor: Snowflake cursor used to submit the queries
+            nodes: Nodes from _build_setup_graph (dependencies listed first)
+            timeout_callback: Optional function to check for shutdown
+        
+        Returns:
+            Query ID per SQL node, or None if shutdown was requested
+        """
+        import time as _time
+        from concurrent.futures import ThreadPoolExecutor
+        
+        sf_connection = cursor.connection
+        graph_start = _time.time()
+        pending = list(nodes)
+        running: Dict[str, Any] = {}
+        finished = set()
+        timings = {node['name']: {} for node in nodes}
+        query_ids = {}
+        helper = ThreadPoolExecutor(max_workers=1)
+        
+        logger.info(f"Setup graph: {len(nodes)} nodes, Snowflake statements submitted asynchronously")
+        try:
+            while pending or running:
+                if timeout_callback and timeout_callback():
+                    self._cancel_queries(cursor, running)
+                    return None
+                
+                progressed = False
+                for node in [n for n in pending if all(d in finished for d in n['deps'])]:
+                    pending.remove(node)
+                    timings[node['name']]['start'] = _time.time() - graph_start
+                    if node['sql'] is not None:
+                        cursor.execute_async(node['sql'])
+                        query_ids[node['name']] = cursor.sfqid
+                        running[node['name']] = cursor.sfqid
+                    else:
+                        running[node['name']] = helper.submit(node['run'])
+                    logger.info(f"  → {node['name']} started")
+                    progressed = True
+                
+                for name, handle in list(running.items()):
+                    if isinstance(handle, str):
+                        status = sf_connection.get_query_status_throw_if_error(handle)
+                        if sf_connection.is_still_running(status):
+                            continue
+                    else:
+                        if not handle.done():
+                            continue
+                        handle.result()
+                    
+                    del running[name]
+                    finished.add(name)
+                    timings[name]['end'] = _time.time() - graph_start
+                    logger.info(f"  ✓ {name} finished ({timings[name]['end'] - timings[name]['start']:.1f}s)")
+                    progressed = True
+                
+                if pending and not running and not progressed:
+                    raise RuntimeError(f"Setup graph cannot make progress: {[n['name'] for n in pending]}")
+                if not progressed:
+                    _time.sleep(ASYNC_POLL_SECONDS)
+        except Exception:
+            self._cancel_queries(cursor, running)
+            raise
+        finally:
+            helper.shutdown(wait=True)
+        
+        wall = _time.time() - graph_start
+        report = []
+        logger.info(f"Setup graph complete ({wall:.1f}s wall):")
+        for node in nodes:
+            timing = timings[node['name']]
+            seconds = timing['end'] - timing['start']
+            report.append({
+                'node': node['name'],
+                'deps': node['deps'],
+                'start_seconds': round(timing['start'], 2),
+                'end_seconds': round(timing['end'], 2),
+                'seconds': round(seconds, 2),
+            })
+            logger.info(
+                f"    {node['name']:<16} after {', '.join(node['deps']) or '-':<28} "
+                f"{timing['start']:7.1f}s → {timing['end']:7.1f}s ({seconds:.1f}s)"
+            )
+        self.stats['setup_graph'] = {'wall_seconds': round(wall, 2), 'nodes': report}
+        return query_ids
+    
+    def _cancel_queries(self, cursor, running: Dict[str, Any]):
+        """Best-effort cancel of the still-running async Snowflake queries."""
+        for name, handle in running.items():
+            if not isinstance(handle, str):
+                continue
+            try:
+                cursor.execute(f"SELECT SYSTEM$CANCEL_QUERY('{handle}')")
+                logger.warning(f"  ⚠ Cancelled {name} ({handle})")
+            except Exception as e:
+                logger.warning(f"  ⚠ Could not cancel {name} ({handle}): {e}")
+    
+    def _create_stale_scope_tables(self):
+        """
+        Create the Postgres temp tables for the seen-based stale resolve
+        
+        _tmp_delta_pairs (filled by Step 2d) and _tmp_seen_conflicts (filled
+        during Step 3) live on the persistent connection that Step 4 uses.
+        """
+        if self.pg_connection is None:
+            self.pg_connection = self.pg_manager.get_connection(
+                database=self.db_names['pg_database']
+            )
+        
+        cursor = self.pg_connection.cursor()
+        try:
+            cursor.execute("DROP TABLE IF EXISTS _tmp_delta_pairs")
+            cursor.execute("""
+                CREATE TEMP TABLE _tmp_delta_pairs (
+                    visit_date DATE,
+                    ssn VARCHAR(20)
+                )
+            """)
+            self.pg_connection.commit()
+        finally:
+            cursor.close()
+        self._create_seen_conflicts_table()
+    
+    def _load_delta_pairs(self, sf_connection, query: str):
+        """
+        STEP 2d: Stream actual (visit_date, ssn) pairs from delta_keys into Postgres
+        
+        These pairs define the EXACT scope Snowflake scanned for conflict
+        detection. Using actual pairs avoids the cross-product problem of
+        separate SSN/date lists. Streamed in chunks of 100K via COPY for low
+        memory usage, on a cursor of its own so Steps 2b/3 keep running.
+        """
+        import io
+        import time as _time
+        
+        step2d_start = _time.time()
+        logger.info("STEP 2d: Streaming (visit_date, ssn) pairs from delta_keys to Postgres...")
+        
+        sf_cursor = sf_connection.cursor()
+        pg_cursor = self.pg_connection.cursor()
+        try:
+            # Stream from Snowflake cursor and COPY in chunks
+            COPY_CHUNK_SIZE = 100000
+            sf_cursor.execute(query)
+            buffer = io.StringIO()
+            pair_count = 0
+            chunk_count = 0
+            distinct_ssns = set()
+            distinct_dates = set()
+            
+            for row in sf_cursor:
+                visit_date = row[0]
+                ssn = str(row[1]).strip() if row[1] else None
+                if visit_date and ssn:
+                    buffer.write(f"{visit_date}\t{ssn}\n")
+                    pair_count += 1
+                    distinct_ssns.add(ssn)
+                    distinct_dates.add(visit_date)
+                    
+                    if pair_count % COPY_CHUNK_SIZE == 0:
+                        buffer.seek(0)
+                        pg_cursor.copy_from(buffer, '_tmp_delta_pairs', columns=('visit_date', 'ssn'))
+                        chunk_count += 1
+                        buffer = io.StringIO()
+                        if pair_count % 1000000 == 0:
+                            logger.info(f"    Streamed {pair_count:,} pairs...")
+            
+            # Flush remaining rows
+            if buffer.tell() > 0:
+                buffer.seek(0)
+                pg_cursor.copy_from(buffer, '_tmp_delta_pairs', columns=('visit_date', 'ssn'))
+                chunk_count += 1
+            
+            copy_duration = _time.time() - step2d_start
+            logger.info(f"  ✓ Loaded {pair_count:,} pairs into _tmp_delta_pairs ({chunk_count} chunks, {copy_duration:.1f}s)")
+            logger.info(f"    Distinct SSNs: {len(distinct_ssns):,}, Distinct dates: {len(distinct_dates):,}")
+            
+            # Index for Phase 1 JOIN performance
+            idx_start = _time.time()
+            pg_cursor.execute("CREATE INDEX ON _tmp_delta_pairs (ssn, visit_date)")
+            pg_cursor.execute("ANALYZE _tmp_delta_pairs")
+            idx_duration = _time.time() - idx_start
+            logger.info(f"  ✓ Indexed and analyzed _tmp_delta_pairs ({idx_duration:.1f}s)")
+        finally:
+            pg_cursor.close()
+            sf_cursor.close()
+        
+        # Commit so a later batch rollback cannot drop _tmp_delta_pairs
+        self.pg_connection.commit()
+        
+        self.stats['delta_ssns_count'] = len(distinct_ssns)
+        self.stats['delta_keys_count'] = pair_count
+        self.stats['delta_dates_count'] = len(distinct_dates)
+        self.stats['delta_pairs_count'] = pair_count
+        logger.info(f"  Total step 2d: {_time.time() - step2d_start:.1f}s")
+        logger.info("  (No upfront marking -- will use seen-based resolve after streaming)")
+    
+    def _read_arrow_batches(
+        self,
+        cursor,
+        read_size: int,
+        timeout_callback: Optional[callable],
+        track_seen: bool
+    ):
+        """
+        Yield Step 3 results as Arrow tables of read_size rows
+        
+        Tracks rows_fetched and unique visits, and (track_seen) COPYs each
+        batch's conflict keys to Postgres, as batches are read; stops early
+        when timeout_callback returns True.
+        """
+        for table in columnar.rebatch(cursor.fetch_arrow_batches(), read_size):
+            if timeout_callback and timeout_callback():
+                logger.warning("Timeout detected, stopping processing")
+                return
+            
+            self.stats['rows_fetched'] += table.num_rows
+            self.stats['unique_visits'].update(table.column('VisitID').to_pylist())
+            if track_seen:
+                self._copy_seen_keys(columnar.conflict_keys(table))
+            
+            yield table
+    
+    def _read_row_batches(
+        self,
+        cursor,
+        column_names: List[str],
+        read_size: int,
+        timeout_callback: Optional[callable],
+        track_seen: bool
+    ):
+        """
+        Yield Step 3 results as lists of up to read_size row dicts
+        
+        Tracks rows_fetched and unique visits, and (track_seen) COPYs each
+        batch's conflict keys to Postgres, as rows are read; stops early when
+        timeout_callback returns True.
+        """
+        batch = []
+        seen_keys = []
+        for row in cursor:
+            # Check timeout
+            if timeout_callback and timeout_callback():
+                logger.warning("Timeout detected, stopping processing")
+                break
+            
+            self.stats['rows_fetched'] += 1
+            
+            # Convert row to dict
+            conflict_row = dict(zip(column_names, row))
+            
+            # Track unique visits
+            self.stats['unique_visits'].add(conflict_row['VisitID'])
+            
+            # Track seen conflict keys for stale resolve
+            if track_seen:
+                seen_keys.append((conflict_row.get('VisitID'), conflict_row.get('ConVisitID')))
+            
+            batch.append(conflict_row)
+            
+            # Hand off batch when full
+            if len(batch) >= read_size:
+                if seen_keys:
+                    self._copy_seen_keys(seen_keys)
+                    seen_keys = []
+                yield batch
+                batch = []
+        
+        # Remaining records
+        if seen_keys:
+            self._copy_seen_keys(seen_keys)
+        if batch:
+            yield batch
+    
+    def _create_seen_conflicts_table(self):
+        """
+        Create the session temp table Step 3 streams seen conflict keys into
+        
+        Temp tables are never WAL-logged, and the table lives only as long as
+        the persistent connection that Step 4 resolves on. The index is built
+        in Step 4, after the load.
+        """
+        if self.pg_connection is None:
+            self.pg_connection = self.pg_manager.get_connection(
+                database=self.db_names['pg_database']
+            )
+        
+        cursor = self.pg_connection.cursor()
+        try:
+            cursor.execute(f"DROP TABLE IF EXISTS {SEEN_CONFLICTS_TABLE}")
+            cursor.execute(f"""
+                CREATE TEMP TABLE {SEEN_CONFLICTS_TABLE} (
+                    visit_id UUID,
+                    con_visit_id UUID
+                )
+            """)
+            self.pg_connection.commit()
+        finally:
+            cursor.close()
+        self.stats['seen_conflict_keys'] = 0
+    
+    def _copy_seen_keys(self, keys: List[Tuple[Any, Any]]):
+        """
+        Append one batch of seen (VisitID, ConVisitID) pairs via binary COPY
+        
+        Keys go to Postgres as 16-byte UUIDs as soon as a batch is read, so
+        the process holds at most one batch of keys regardless of the window.
+        
+        Args:
+            keys: (VisitID, ConVisitID) pairs; ConVisitID may be None
+        """
+        import io
+        
+        cursor = self.pg_connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {SEEN_CONFLICTS_TABLE} (visit_id, con_visit_id) FROM STDIN WITH (FORMAT binary)",
+                io.BytesIO(format_copy_binary_uuid_pairs(keys)),
+            )
+            self.pg_connection.commit()
+        finally:
+            cursor.close()
+        self.stats['seen_conflict_keys'] += len(keys)
+    
+    def _partition_batch(self, batch, partitions: int) -> list:
+        """Split a reader batch (Arrow table or row list) by VisitID hash partition"""
+        if self.enable_arrow_batches:
+            return columnar.partition_table(batch, partitions)
+        
+        parts = [[] for _ in range(partitions)]
+        for row in batch:
+            parts[visit_partition(row['VisitID'], partitions)].append(row)
+        return parts
+    
+    def _partition_writer(self) -> 'ConflictProcessor':
+        """
+        Copy of this processor for one pipeline writer
+        
+        Shares configuration and the INSERT template, but gets its own
+        Postgres connection, per-connection statement state and counters.
+        """
+        writer = copy.copy(self)
+        writer.pg_connection = None
+        writer._staged_update_table_created = False
+        writer._existing_lookup_prepared = set()
+        writer._server_diff_table_created = False
+        writer.stats = {key: 0 for key in WRITER_STATS}
+        writer.stats['unique_visits'] = set()
+        writer.stats['batches_processed'] = 0  # run total is the reader's batch count
+        return writer
+    
+    def _run_writer_pipeline(self, batches, process) -> int:
+        """
+        Overlap Snowflake reads with Postgres writes
+        
+        The calling thread drains ``batches`` (the Snowflake cursor) and
+        splits each batch by VisitID hash into one bounded queue per writer.
+        Each writer thread owns a Postgres connection and one partition, so
+        no two writers touch the same conflictvisitmaps rows. A full queue
+        blocks the reader (backpressure); an empty one idles the writer.
+        Throughput is bounded by the slower side instead of the sum of both.
+        
+        Args:
+            batches: Iterator of reader batches (Arrow tables or row lists)
+            process: Batch handler (_process_arrow_batch or _process_batch);
+                each writer calls the same method on its own copy
+        
+        Returns:
+            Number of reader batches
+        """
+        import queue
+        import threading
+        import time as _time
+        
+        workers = self.pg_writer_workers
+        queues = [queue.Queue(maxsize=self.pipeline_queue_depth) for _ in range(workers)]
+        writers = [self._partition_writer() for _ in range(workers)]
+        busy = [0.0] * workers
+        idle = [0.0] * workers
+        failures: List[BaseException] = []
+        failed = threading.Event()
+        done = object()
+        
+        def write(partition: int):
+            writer = writers[partition]
+            handler = getattr(writer, process.__name__)
+            try:
+                while True:
+                    wait_start = _time.time()
+                    try:
+                        item = queues[partition].get(timeout=1)
+                    except queue.Empty:
+                        idle[partition] += _time.time() - wait_start
+                        if failed.is_set():
+                            return  # another writer failed; stop waiting for work
+                        continue
+                    idle[partition] += _time.time() - wait_start
+                    if item is done:
+                        return
+                    
+                    work_start = _time.time()
+                    batch_number, part = item
+                    handler(part, f"{batch_number}.{partition}")
+                    busy[partition] += _time.time() - work_start
+            except BaseException as e:
+                failures.append(e)
+                failed.set()
+            finally:
+                if writer.pg_connection:
+                    try:
+                        writer.pg_connection.close()
+                    except Exception as e:
+                        logger.warning(f"Error closing writer {partition} connection: {e}")
+        
+        def put(partition: int, item) -> float:
+            """Enqueue for a writer; returns seconds blocked on a full queue"""
+            wait_start = _time.time()
+            while not failed.is_set():
+                try:
+                    queues[partition].put(item, timeout=1)
+                    break
+                except queue.Full:
+                    continue
+            return _time.time() - wait_start
+        
+        logger.info(f"  Pipeline: 1 reader -> {workers} Postgres writers "
+                    f"(VisitID hash partitions, queue depth {self.pipeline_queue_depth})")
+        threads = [
+            threading.Thread(target=write, args=(partition,), name=f"cvm-writer-{partition}", daemon=True)
+            for partition in range(workers)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        batch_number = 0
+        read_seconds = 0.0
+        blocked_seconds = 0.0
+        pipeline_start = _time.time()
+        try:
+            iterator = iter(batches)
+            while not failed.is_set():
+                read_start = _time.time()
+                batch = next(iterator, done)
+                read_seconds += _time.time() - read_start
+                if batch is done:
+                    break
+                
+                batch_number += 1
+                for partition, part in enumerate(self._partition_batch(batch, workers)):
+                    if len(part):
+                        blocked_seconds += put(partition, (batch_number, part))
+        finally:
+            for partition in range(workers):
+                put(partition, done)
+            for thread in threads:
+                thread.join()
+            
+            # Fold writer counters into the run statistics
+            for writer in writers:
+                for key in WRITER_STATS:
+                    self.stats[key] += writer.stats[key]
+                self.stats['unique_visits'].update(writer.stats['unique_visits'])
+            
+            wall_seconds = _time.time() - pipeline_start
+            self.stats['pipeline'] = {
+                'writers': workers,
+                'queue_depth': self.pipeline_queue_depth,
+                'wall_seconds': round(wall_seconds, 1),
+                'reader_fetch_seconds': round(read_seconds, 1),
+                'reader_blocked_seconds': round(blocked_seconds, 1),
+                'writer_busy_seconds': [round(seconds, 1) for seconds in busy],
+                'writer_idle_seconds': [round(seconds, 1) for seconds in idle],
+                'bound_by': 'postgres' if blocked_seconds > sum(idle) / workers else 'snowflake',
+            }
+            logger.info(f"  Pipeline: {batch_number} reader batches in {format_duration(wall_seconds)}")
+            logger.info(f"    Reader: fetch {read_seconds:.1f}s, blocked on full queues {blocked_seconds:.1f}s")
+            for partition in range(workers):
+                logger.info(f"    Writer {partition}: busy {busy[partition]:.1f}s, idle {idle[partition]:.1f}s")
+            logger.info(f"    Throughput bound by: {self.stats['pipeline']['bound_by']}")
+        
+        if failures:
+            raise failures[0]
+        return batch_number
+    
     def _process_batch(self, batch: List[Dict[str, Any]], batch_number: int):
         """
         Process a single batch of conflicts
@@ -373,23 +927,31 @@ class ConflictProcessor:
             for row in batch:
                 self.stats['unique_visits'].add(row['VisitID'])
             
+            keys = [
+                (str(row.get('VisitID')), str(row.get('ConVisitID')) if row.get('ConVisitID') else None)
+                for row in batch
+            ]
+            
+            if self._use_hash_prefilter:
+                # Hashes first; full columns only for rows whose hash differs
+                matched, needs_compare = self._hash_prefilter(
+                    keys, [row.get(CONTENT_HASH_COLUMN) for row in batch]
+                )
+                compare_rows = [row for row, compare in zip(batch, needs_compare) if compare]
+            else:
+                compare_rows = batch
+            
             # Fetch existing CONFLICTVISITMAPS records for these visits
-            visit_ids = [row['VisitID'] for row in batch]
+            visit_ids = [row['VisitID'] for row in compare_rows]
             existing_records = self._fetch_existing_records(visit_ids)
+            existing_index = self._index_existing_records(existing_records)
             
-            # Count how many conflicts matched existing records
-            matched_count = 0
-            new_count = 0
+            if not self._use_hash_prefilter:
+                matched = [key in existing_index for key in keys]
             
-            for conflict_row in batch:
-                visit_id = str(conflict_row.get('VisitID'))
-                con_visit_id = str(conflict_row.get('ConVisitID')) if conflict_row.get('ConVisitID') else None
-                key = (visit_id, con_visit_id)
-                
-                if key in existing_records:
-                    matched_count += 1
-                else:
-                    new_count += 1
+            # Count how many conflicts matched existing records
+            matched_count = sum(matched)
+            new_count = len(batch) - matched_count
             
             self.stats['matched_in_postgres'] += matched_count
             self.stats['new_conflicts'] += new_count
@@ -397,52 +959,27 @@ class ConflictProcessor:
             logger.info(f"  Matched: {matched_count}, New: {new_count}")
             
             # --- UPDATES: Match and prepare updates (with change detection) ---
-            updates = self._prepare_updates(batch, existing_records)
+            updates = self._prepare_updates(compare_rows, existing_records, existing_index)
             
-            if updates:
-                # Log change detection impact if enabled
-                if self.skip_unchanged_records:
-                    records_skipped = matched_count - len(updates)
-                    logger.info(f"  Change detection: {len(updates)} dirty, {records_skipped} clean")
-                else:
-                    logger.info(f"  Change detection: DISABLED (processing all {len(updates)} matched)")
-                
-                # Get or create persistent connection
-                if self.pg_connection is None:
-                    self.pg_connection = self.pg_manager.get_connection(
-                        database=self.db_names['pg_database']
-                    )
-                
-                # Execute batch update using persistent connection
-                rows_updated = self._execute_updates_with_commit(updates)
-                
-                self.stats['rows_updated'] += rows_updated
-                logger.info(f"  ✓ Batch {batch_number}: {rows_updated} rows updated (COMMITTED)")
-            else:
-                logger.info(f"  ✓ Batch {batch_number}: No updates needed")
+            if self._use_hash_prefilter:
+                hash_skipped = matched_count - len(compare_rows)
+                self.stats['rows_skipped_no_changes'] += hash_skipped
+                self.stats['rows_skipped_by_hash'] += hash_skipped
+                logger.info(f"  Content hash: {hash_skipped} unchanged, {len(compare_rows)} compared")
             
-            # --- INSERTS: Insert new conflict rows ---
+            # --- INSERTS: Collect new rows (those not matched in PG) ---
+            new_rows = []
             if self.enable_insert and new_count > 0:
-                # Collect new rows (those not matched in PG)
-                new_rows = []
-                for conflict_row in batch:
-                    visit_id = str(conflict_row.get('VisitID'))
-                    con_visit_id = str(conflict_row.get('ConVisitID')) if conflict_row.get('ConVisitID') else None
-                    key = (visit_id, con_visit_id)
-                    if key not in existing_records:
-                        new_rows.append(conflict_row)
-                
-                if new_rows:
-                    # Get or create persistent connection
-                    if self.pg_connection is None:
-                        self.pg_connection = self.pg_manager.get_connection(
-                            database=self.db_names['pg_database']
-                        )
-                    
-                    rows_inserted = self._execute_inserts_with_commit(new_rows)
-                    self.stats['rows_inserted'] += rows_inserted
-                    self.stats['insert_batches'] += 1
-                    logger.info(f"  ✓ Batch {batch_number}: {rows_inserted} rows inserted (COMMITTED)")
+                new_rows = [row for row, found in zip(batch, matched) if not found]
+            
+            self._write_batch(updates, new_rows, matched_count, batch_number)
+            
+            if self._use_hash_prefilter:
+                updated = {id(row) for row in updates}
+                self._sync_content_hashes([
+                    (row['VisitID'], row.get('ConVisitID'), row.get(CONTENT_HASH_COLUMN))
+                    for row in compare_rows if id(row) not in updated
+                ])
             
             self.stats['rows_processed'] += len(batch)
             self.stats['batches_processed'] += 1
@@ -464,164 +1001,521 @@ class ConflictProcessor:
             self.stats['errors'] += 1
             raise
     
-    def _fetch_existing_records(self, visit_ids: List[str]) -> Dict[Tuple[str, str], Dict]:
+    def _process_arrow_batch(self, table, batch_number: int):
         """
-        Fetch existing CONFLICTVISITMAPS records for given visit IDs
+        Process a single batch of conflicts delivered as an Arrow table
+        
+        The batch is joined to the existing CONFLICTVISITMAPS rows on
+        (VisitID, ConVisitID) and compared column-by-column in one pass
+        (see lib/columnar.py). Only changed rows and new rows are turned into
+        Python dicts for the UPDATE/INSERT paths.
         
         Args:
-            visit_ids: List of VisitID values
+            table: pyarrow.Table with the Step 3 result columns
+            batch_number: Batch sequence number for logging
+        """
+        logger.info(f"Processing batch {batch_number}: {table.num_rows} conflicts")
         
-        Returns:
-            Dict mapping (VisitID, ConVisitID) tuple to existing record dict with relevant fields
+        try:
+            compare_table = table
+            if self._use_hash_prefilter:
+                # Hashes first; full columns only for rows whose hash differs
+                matched, needs_compare = self._hash_prefilter(
+                    columnar.conflict_keys(table), table.column(CONTENT_HASH_COLUMN).to_pylist()
+                )
+                compare_table = columnar.filter_rows(table, needs_compare)
+            
+            # Fetch existing CONFLICTVISITMAPS records for these visits
+            visit_ids = compare_table.column('VisitID').to_pylist()
+            existing_records = self._fetch_existing_records(visit_ids)
+            existing_frame = columnar.columns_to_frame(existing_records)
+            
+            changes = columnar.detect_changes(
+                columnar.to_frame(compare_table, COMPARED_COLUMNS),
+                existing_frame,
+                CONDITIONAL_FLAG_COLUMNS,
+                BUSINESS_COLUMNS,
+                skip_unchanged_records=self.skip_unchanged_records,
+            )
+            
+            if self._use_hash_prefilter:
+                # Back to batch positions: unchanged-by-hash rows are matched, not changed
+                changed_compared = changes['changed']
+                changes['matched'] = columnar.as_mask(matched)
+                changes['changed'] = columnar.scatter(needs_compare, changed_compared)
+                hash_skipped = int(changes['matched'].sum()) - compare_table.num_rows
+                self.stats['rows_skipped_by_hash'] += hash_skipped
+                logger.info(f"  Content hash: {hash_skipped} unchanged, {compare_table.num_rows} compared")
+            
+            matched_count = int(changes['matched'].sum())
+            new_count = table.num_rows - matched_count
+            self.stats['matched_in_postgres'] += matched_count
+            self.stats['new_conflicts'] += new_count
+            
+            logger.info(f"  Matched: {matched_count}, New: {new_count}")
+            
+            # --- UPDATES: Materialize only the changed rows ---
+            changed_count = int(changes['changed'].sum())
+            if self.skip_unchanged_records:
+                self.stats['rows_skipped_no_changes'] += matched_count - changed_count
+                self.stats['changes_by_flag'] += changes['changed_by_flag']
+                self.stats['changes_by_business_data'] += changes['changed_by_business_data']
+            
+            updates = columnar.take_rows(table, changes['changed'])
+            
+            # --- INSERTS: Materialize only the new rows ---
+            new_rows = []
+            if self.enable_insert and new_count > 0:
+                new_rows = columnar.take_rows(table, ~changes['matched'])
+            
+            self._write_batch(updates, new_rows, matched_count, batch_number)
+            
+            if self._use_hash_prefilter:
+                unchanged = columnar.take_rows(
+                    compare_table.select(['VisitID', 'ConVisitID', CONTENT_HASH_COLUMN]),
+                    ~changed_compared,
+                )
+                self._sync_content_hashes([
+                    (row['VisitID'], row['ConVisitID'], row[CONTENT_HASH_COLUMN]) for row in unchanged
+                ])
+            
+            self.stats['rows_processed'] += table.num_rows
+            self.stats['batches_processed'] += 1
+            
+        except Exception as e:
+            # Rollback this batch on error
+            if self.pg_connection:
+                try:
+                    self.pg_connection.rollback()
+                    logger.warning(f"  ✗ Batch {batch_number}: Rolled back due to error")
+                except Exception as rollback_error:
+                    logger.error(f"Error during rollback: {rollback_error}")
+            
+            logger.error(f"Error processing batch {batch_number}: {e}", exc_info=True)
+            self.stats['errors'] += 1
+            raise
+    
+    def _process_batch_server_side(self, batch, batch_number: int):
         """
-        if not visit_ids:
-            return {}
+        Process a single batch of conflicts by diffing it inside Postgres
         
-        schema = self.db_names['pg_schema']
+        The batch (row dicts, or an Arrow table written as CSV) is COPYed into
+        a session temp table, then one statement updates the changed pairs
+        and inserts the new ones (see QueryBuilder.build_server_diff). No
+        existing rows are fetched; only the counts come back.
         
-        # Build query to fetch existing records with all fields needed for conditional updates
-        visit_ids_str = ','.join([f"'{vid}'" for vid in visit_ids])
-        query = f"""
-            SELECT 
-                "VisitID",
-                "ConVisitID",
-                "CONFLICTID",
-                "StatusFlag",
-                "SameSchTimeFlag",
-                "SameVisitTimeFlag",
-                "SchAndVisitTimeSameFlag",
-                "SchOverAnotherSchTimeFlag",
-                "VisitTimeOverAnotherVisitTimeFlag",
-                "SchTimeOverVisitTimeFlag",
-                "DistanceFlag",
-                -- Key business columns for change detection
-                "ProviderID",
-                "ConProviderID",
-                "VisitDate",
-                "SchStartTime",
-                "SchEndTime",
-                "ConSchStartTime",
-                "ConSchEndTime",
-                "EVVStartTime",
-                "EVVEndTime",
-                "ConEVVStartTime",
-                "ConEVVEndTime",
-                "CaregiverID",
-                "ConCaregiverID",
-                "OfficeID",
-                "ConOfficeID",
-                "PatientID",
-                "ConPatientID",
-                "PayerID",
-                "ConPayerID",
-                "ServiceCodeID",
-                "ConServiceCodeID",
-                "IsMissed",
-                "EVVType",
-                "ConIsMissed",
-                "ConEVVType",
-                "P_PatientID",
-                "ConP_PatientID",
-                "PA_PatientID",
-                "ConPA_PatientID",
-                "ContractType",
-                "ConContractType",
-                "FederalTaxNumber",
-                "ConFederalTaxNumber"
-            FROM {schema}.conflictvisitmaps
-            WHERE "VisitID" IN ({visit_ids_str})
-              AND "InserviceStartDate" IS NULL
-              AND "InserviceEndDate" IS NULL
-              AND "PTOStartDate" IS NULL
-              AND "PTOEndDate" IS NULL
-              AND "ConInserviceStartDate" IS NULL
-              AND "ConInserviceEndDate" IS NULL
-              AND "ConPTOStartDate" IS NULL
-              AND "ConPTOEndDate" IS NULL
+        Args:
+            batch: List of conflict row dicts or a pyarrow.Table
+            batch_number: Batch sequence number for logging
         """
+        import io
+        
+        is_table = not isinstance(batch, list)
+        num_rows = batch.num_rows if is_table else len(batch)
+        logger.info(f"Processing batch {batch_number}: {num_rows} conflicts (server-side diff)")
         
         try:
-            results = self.pg_manager.execute_query(query, database=self.db_names['pg_database'])
+            if self._server_diff is None:
+                sf_columns = batch.column_names if is_table else list(batch[0].keys())
+                self._server_diff = self.query_builder.build_server_diff(
+                    self.db_names, sf_columns,
+                    skip_unchanged_records=self.skip_unchanged_records,
+                    enable_insert=self.enable_insert,
+                )
+            diff = self._server_diff
+            
+            # Get or create persistent connection
+            if self.pg_connection is None:
+                self.pg_connection = self.pg_manager.get_connection(
+                    database=self.db_names['pg_database']
+                )
             
-            # Map results by (VisitID, ConVisitID) tuple
-            existing = {}
-            for row in results:
-                visit_id = str(row[0]) if row[0] else None
-                con_visit_id = str(row[1]) if row[1] else None
+            cursor = self.pg_connection.cursor()
+            try:
+                if not self._server_diff_table_created:
+                    cursor.execute(f"DROP TABLE IF EXISTS {SERVER_DIFF_TABLE}")
+                    cursor.execute(diff['create_sql'])
+                    self.pg_connection.commit()
+                    self._server_diff_table_created = True
                 
-                # Create key tuple
-                key = (visit_id, con_visit_id)
+                # Step 3 yields each (VisitID, ConVisitID) pair once, so the
+                # batch is staged as-is
+                if is_table:
+                    cursor.copy_expert(
+                        diff['copy_csv_sql'],
+                        io.BytesIO(columnar.to_csv(batch.select(diff['sf_columns']))),
+                    )
+                else:
+                    buffer = io.StringIO()
+                    for row in batch:
+                        buffer.write('\t'.join(format_copy_value(row.get(col)) for col in diff['sf_columns']))
+                        buffer.write('\n')
+                    buffer.seek(0)
+                    cursor.copy_expert(diff['copy_sql'], buffer)
+                cursor.execute(f"ANALYZE {SERVER_DIFF_TABLE}")
+                
+                cursor.execute(diff['diff_sql'])
+                matched_count, rows_updated, rows_inserted = cursor.fetchone()
                 
-                # Store as dict for easier access
-                existing[key] = {
-                    'VisitID': visit_id,
-                    'ConVisitID': con_visit_id,
-                    'CONFLICTID': row[2],
-                    'StatusFlag': row[3],
-                    'SameSchTimeFlag': row[4],
-                    'SameVisitTimeFlag': row[5],
-                    'SchAndVisitTimeSameFlag': row[6],
-                    'SchOverAnotherSchTimeFlag': row[7],
-                    'VisitTimeOverAnotherVisitTimeFlag': row[8],
-                    'SchTimeOverVisitTimeFlag': row[9],
-                    'DistanceFlag': row[10],
-                    # Business columns
-                    'ProviderID': row[11],
-                    'ConProviderID': row[12],
-                    'VisitDate': row[13],
-                    'SchStartTime': row[14],
-                    'SchEndTime': row[15],
-                    'ConSchStartTime': row[16],
-                    'ConSchEndTime': row[17],
-                    'EVVStartTime': row[18],
-                    'EVVEndTime': row[19],
-                    'ConEVVStartTime': row[20],
-                    'ConEVVEndTime': row[21],
-                    'CaregiverID': row[22],
-                    'ConCaregiverID': row[23],
-                    'OfficeID': row[24],
-                    'ConOfficeID': row[25],
-                    'PatientID': row[26],
-                    'ConPatientID': row[27],
-                    'PayerID': row[28],
-                    'ConPayerID': row[29],
-                    'ServiceCodeID': row[30],
-                    'ConServiceCodeID': row[31],
-                    'IsMissed': row[32],
-                    'EVVType': row[33],
-                    'ConIsMissed': row[34],
-                    'ConEVVType': row[35],
-                    'P_PatientID': row[36],
-                    'ConP_PatientID': row[37],
-                    'PA_PatientID': row[38],
-                    'ConPA_PatientID': row[39],
-                    'ContractType': row[40],
-                    'ConContractType': row[41],
-                    'FederalTaxNumber': row[42],
-                    'ConFederalTaxNumber': row[43]
-                }
-            
-            logger.debug(f"Fetched {len(existing)} existing conflict records")
-            return existing
+                # CRITICAL: Explicit commit to save progress (also empties the staging table)
+                self.pg_connection.commit()
+            finally:
+                cursor.close()
+            
+            new_count = num_rows - matched_count
+            self.stats['matched_in_postgres'] += matched_count
+            self.stats['new_conflicts'] += new_count
+            self.stats['rows_updated'] += rows_updated
+            self.stats['rows_inserted'] += rows_inserted
+            if rows_inserted:
+                self.stats['insert_batches'] += 1
+            if self.skip_unchanged_records:
+                self.stats['rows_skipped_no_changes'] += matched_count - rows_updated
+            self.stats['rows_processed'] += num_rows
+            self.stats['batches_processed'] += 1
+            
+            logger.info(f"  Matched: {matched_count}, New: {new_count}")
+            logger.info(f"  ✓ Batch {batch_number}: {rows_updated} rows updated, "
+                        f"{rows_inserted} rows inserted (COMMITTED)")
             
         except Exception as e:
+            # Rollback this batch on error
+            if self.pg_connection:
+                try:
+                    self.pg_connection.rollback()
+                    logger.warning(f"  ✗ Batch {batch_number}: Rolled back due to error")
+                except Exception as rollback_error:
+                    logger.error(f"Error during rollback: {rollback_error}")
+            
+            logger.error(f"Error processing batch {batch_number}: {e}", exc_info=True)
+            self.stats['errors'] += 1
+            raise
+    
+    def _write_batch(
+        self,
+        updates: List[Dict[str, Any]],
+        new_rows: List[Dict[str, Any]],
+        matched_count: int,
+        batch_number: int
+    ):
+        """
+        Apply a batch's UPDATEs and INSERTs, committing after each
+        
+        Args:
+            updates: Conflict row dicts for changed existing conflicts
+            new_rows: Conflict row dicts not yet in CONFLICTVISITMAPS
+            matched_count: Number of batch rows matched in Postgres (for logging)
+            batch_number: Batch sequence number for logging
+        """
+        if updates:
+            # Log change detection impact if enabled
+            if self.skip_unchanged_records:
+                records_skipped = matched_count - len(updates)
+                logger.info(f"  Change detection: {len(updates)} dirty, {records_skipped} clean")
+            else:
+                logger.info(f"  Change detection: DISABLED (processing all {len(updates)} matched)")
+            
+            # Get or create persistent connection
+            if self.pg_connection is None:
+                self.pg_connection = self.pg_manager.get_connection(
+                    database=self.db_names['pg_database']
+                )
+            
+            # Execute batch update using persistent connection
+            rows_updated = self._execute_updates_with_commit(updates)
+            
+            self.stats['rows_updated'] += rows_updated
+            logger.info(f"  ✓ Batch {batch_number}: {rows_updated} rows updated (COMMITTED)")
+        else:
+            logger.info(f"  ✓ Batch {batch_number}: No updates needed")
+        
+        if new_rows:
+            # Get or create persistent connection
+            if self.pg_connection is None:
+                self.pg_connection = self.pg_manager.get_connection(
+                    database=self.db_names['pg_database']
+                )
+            
+            rows_inserted = self._execute_inserts_with_commit(new_rows)
+            self.stats['rows_inserted'] += rows_inserted
+            self.stats['insert_batches'] += 1
+            logger.info(f"  ✓ Batch {batch_number}: {rows_inserted} rows inserted (COMMITTED)")
+    
+    def _existing_record_columns(self) -> List[str]:
+        """Columns the change detection compares (keys only when it is disabled)"""
+        if not self.skip_unchanged_records:
+            return ['VisitID', 'ConVisitID']
+        return COMPARED_COLUMNS
+    
+    def _existing_records_sql(
+        self,
+        key_filter: str,
+        key_join: str = '',
+        columns: Optional[List[str]] = None
+    ) -> str:
+        """
+        SELECT of the compared columns for non-InService/PTO conflicts
+        
+        Args:
+            key_filter: Predicate on cvm."VisitID" ('TRUE' when key_join restricts the keys)
+            key_join: Optional JOIN to the COPYed key table
+            columns: Columns to select (default: _existing_record_columns())
+        """
+        schema = self.db_names['pg_schema']
+        columns = ', '.join(f'cvm."{col}"' for col in columns or self._existing_record_columns())
+        return f"""
+            SELECT {columns}
+            FROM {schema}.conflictvisitmaps cvm {key_join}
+            WHERE {key_filter}
+              AND cvm."InserviceStartDate" IS NULL
+              AND cvm."InserviceEndDate" IS NULL
+              AND cvm."PTOStartDate" IS NULL
+              AND cvm."PTOEndDate" IS NULL
+              AND cvm."ConInserviceStartDate" IS NULL
+              AND cvm."ConInserviceEndDate" IS NULL
+              AND cvm."ConPTOStartDate" IS NULL
+              AND cvm."ConPTOEndDate" IS NULL
+        """
+    
+    def _fetch_existing_records(
+        self,
+        visit_ids: List[str],
+        columns: Optional[List[str]] = None,
+        statement: str = EXISTING_LOOKUP_STATEMENT
+    ) -> Dict[str, List[Any]]:
+        """
+        Fetch existing CONFLICTVISITMAPS records for given visit IDs
+        
+        Runs on the persistent connection. Up to existing_lookup_copy_threshold
+        distinct VisitIDs go through one session-level prepared statement
+        (``"VisitID" = ANY($1::uuid[])``, the array passed as a single
+        literal), so the SQL text and plan are reused for every batch. Larger
+        batches COPY the keys into a temp table and join to it. Only the
+        compared columns are selected.
+        
+        Args:
+            visit_ids: List of VisitID values
+            columns: Columns to select (default: _existing_record_columns());
+                must start with VisitID, ConVisitID
+            statement: Prepared statement name for this column set
+        
+        Returns:
+            Columnar dict: column name -> list of values (one entry per row).
+            VisitID/ConVisitID are normalized to str (None when missing).
+        """
+        import io
+        
+        columns = columns or self._existing_record_columns()
+        empty = {col: [] for col in columns}
+        
+        visit_ids = list(dict.fromkeys(str(vid) for vid in visit_ids if vid))
+        if not visit_ids:
+            return empty
+        
+        # Get or create persistent connection
+        if self.pg_connection is None:
+            self.pg_connection = self.pg_manager.get_connection(
+                database=self.db_names['pg_database']
+            )
+        
+        cursor = self.pg_connection.cursor()
+        try:
+            if len(visit_ids) > self.existing_lookup_copy_threshold:
+                # Large batch: COPY keys into a temp table (emptied on commit) and join
+                cursor.execute(f"""
+                    CREATE TEMP TABLE IF NOT EXISTS {EXISTING_LOOKUP_KEYS_TABLE} (
+                        visit_id UUID
+                    ) ON COMMIT DELETE ROWS
+                """)
+                buffer = io.StringIO('\n'.join(visit_ids) + '\n')
+                cursor.copy_from(buffer, EXISTING_LOOKUP_KEYS_TABLE, columns=('visit_id',))
+                cursor.execute(f"ANALYZE {EXISTING_LOOKUP_KEYS_TABLE}")
+                cursor.execute(self._existing_records_sql(
+                    'TRUE',
+                    key_join=f'JOIN {EXISTING_LOOKUP_KEYS_TABLE} k ON k.visit_id = cvm."VisitID"',
+                    columns=columns,
+                ))
+            else:
+                if statement not in self._existing_lookup_prepared:
+                    cursor.execute(
+                        "SELECT 1 FROM pg_prepared_statements WHERE name = %s",
+                        (statement,),
+                    )
+                    if cursor.fetchone() is None:
+                        cursor.execute(
+                            f"PREPARE {statement} (uuid[]) AS "
+                            + self._existing_records_sql('cvm."VisitID" = ANY($1)', columns=columns)
+                        )
+                    self._existing_lookup_prepared.add(statement)
+                cursor.execute(
+                    f"EXECUTE {statement} (%s)",
+                    ('{' + ','.join(visit_ids) + '}',),
+                )
+            results = cursor.fetchall()
+            
+            # End the read transaction (also empties the key table)
+            self.pg_connection.commit()
+            
+        except Exception as e:
+            self.pg_connection.rollback()
+            self._existing_lookup_prepared.clear()
             logger.warning(f"Could not fetch existing records: {e}")
-            return {}
+            return empty
+        finally:
+            cursor.close()
+        
+        if not results:
+            return empty
+        
+        # Transpose rows -> columns
+        existing = {col: list(values) for col, values in zip(columns, zip(*results))}
+        existing['VisitID'] = [str(v) if v else None for v in existing['VisitID']]
+        existing['ConVisitID'] = [str(v) if v else None for v in existing['ConVisitID']]
+        
+        logger.debug(f"Fetched {len(results)} existing conflict records")
+        return existing
+    
+    @staticmethod
+    def _index_existing_records(existing: Dict[str, List[Any]]) -> Dict[Tuple[str, str], int]:
+        """Map (VisitID, ConVisitID) to its row position (last row wins)"""
+        return {
+            key: position
+            for position, key in enumerate(zip(existing['VisitID'], existing['ConVisitID']))
+        }
+    
+    @property
+    def _use_hash_prefilter(self) -> bool:
+        """Whether unchanged rows are recognised by ContentHash before the full compare"""
+        return self.enable_content_hash and self.skip_unchanged_records
+    
+    def _hash_prefilter(
+        self,
+        keys: List[Tuple[str, Optional[str]]],
+        hashes: List[Any]
+    ) -> Tuple[List[bool], List[bool]]:
+        """
+        Match a batch against stored content hashes
+        
+        Fetches only (VisitID, ConVisitID, ContentHash) for the batch. Rows
+        whose stored hash equals the Step 3 hash are unchanged; rows with a
+        different or missing hash need the full column compare.
+        
+        Args:
+            keys: (VisitID, ConVisitID) per batch row
+            hashes: Step 3 ContentHash per batch row
+        
+        Returns:
+            Tuple of per-row lists (matched in Postgres, needs full compare)
+        """
+        stored = self._fetch_existing_records(
+            [visit_id for visit_id, _ in keys],
+            columns=['VisitID', 'ConVisitID', CONTENT_HASH_COLUMN],
+            statement=CONTENT_HASH_LOOKUP_STATEMENT,
+        )
+        stored_hashes = dict(zip(
+            zip(stored['VisitID'], stored['ConVisitID']), stored[CONTENT_HASH_COLUMN]
+        ))
+        
+        matched = []
+        needs_compare = []
+        for key, content_hash in zip(keys, hashes):
+            found = key in stored_hashes
+            matched.append(found)
+            needs_compare.append(
+                found and (content_hash is None or stored_hashes[key] != content_hash)
+            )
+        return matched, needs_compare
+    
+    def _sync_content_hashes(self, rows: List[Tuple[Any, Any, Any]]):
+        """
+        Store the Step 3 hash on rows that were compared and found unchanged
+        
+        Without this a row whose hash differs only because of a change the
+        compare ignores (e.g. a rule flag that is no longer 'N', or a row
+        written before the column existed) would be fully compared every run.
+        Only ContentHash is written; UpdatedDate is left alone.
+        
+        Args:
+            rows: (VisitID, ConVisitID, ContentHash) tuples
+        """
+        rows = [row for row in rows if row[2] is not None]
+        if not rows:
+            return
+        
+        if self.pg_connection is None:
+            self.pg_connection = self.pg_manager.get_connection(
+                database=self.db_names['pg_database']
+            )
+        
+        schema = self.db_names['pg_schema']
+        cursor = self.pg_connection.cursor()
+        try:
+            cursor.execute(
+                f"""
+                UPDATE {schema}.conflictvisitmaps AS cvm
+                SET "{CONTENT_HASH_COLUMN}" = h.content_hash
+                FROM unnest(%s::uuid[], %s::uuid[], %s::bigint[])
+                    AS h(visit_id, con_visit_id, content_hash)
+                WHERE cvm."VisitID" = h.visit_id
+                  AND cvm."ConVisitID" IS NOT DISTINCT FROM h.con_visit_id
+                """,
+                (
+                    [str(visit_id) for visit_id, _, _ in rows],
+                    [str(con_visit_id) if con_visit_id else None for _, con_visit_id, _ in rows],
+                    [int(content_hash) for _, _, content_hash in rows],
+                ),
+            )
+            synced = cursor.rowcount
+            self.pg_connection.commit()
+        finally:
+            cursor.close()
+        
+        self.stats['content_hashes_synced'] += synced
+        logger.info(f"  ✓ Content hash refreshed on {synced} unchanged rows")
+    
+    def check_content_hash_column(self) -> bool:
+        """
+        Disable the content hash when conflictvisitmaps has no ContentHash column
+        
+        Returns:
+            Whether the content hash is (still) enabled
+        """
+        if not self.enable_content_hash:
+            return False
+        
+        rows = self.pg_manager.execute_query(
+            """
+            SELECT 1 FROM information_schema.columns
+            WHERE table_schema = %s AND table_name = 'conflictvisitmaps' AND column_name = %s
+            """,
+            (self.db_names['pg_schema'], CONTENT_HASH_COLUMN),
+            database=self.db_names['pg_database'],
+        )
+        if not rows:
+            logger.warning(
+                f"  ⚠ {self.db_names['pg_schema']}.conflictvisitmaps has no \"{CONTENT_HASH_COLUMN}\" "
+                f"column -- content hash disabled (see postgres/add_conflictvisitmaps_content_hash.sql)"
+            )
+            self.enable_content_hash = False
+            self.stats['content_hash_enabled'] = False
+        return self.enable_content_hash
     
     def _prepare_updates(
         self,
         batch: List[Dict[str, Any]],
-        existing_records: Dict[Tuple[str, str], Dict]
-    ) -> List[Tuple[str, tuple]]:
+        existing_records: Dict[str, List[Any]],
+        existing_index: Dict[Tuple[str, str], int]
+    ) -> List[Dict[str, Any]]:
         """
-        Prepare UPDATE statements for batch with conditional logic and change detection
+        Select the matched conflict rows that need an UPDATE (change detection)
         
         Args:
             batch: List of conflict records from Snowflake
-            existing_records: Dict mapping (VisitID, ConVisitID) to existing record
+            existing_records: Columnar existing records (see _fetch_existing_records)
+            existing_index: (VisitID, ConVisitID) -> row position in existing_records
         
         Returns:
-            List of (sql, params) tuples ready for execute_batch
+            List of conflict row dicts to stage for the set-based UPDATE
         """
         updates = []
         
@@ -633,26 +1527,18 @@ class ConflictProcessor:
             key = (visit_id, con_visit_id)
             
             # Check if record exists in Postgres
-            if key not in existing_records:
+            if key not in existing_index:
                 continue  # Skip new conflicts (can't update what doesn't exist)
             
-            existing_row = existing_records[key]
+            position = existing_index[key]
+            existing_row = {col: values[position] for col, values in existing_records.items()}
             
             # Check if data actually changed (PERFORMANCE OPTIMIZATION)
             if not self._has_changes(conflict_row, existing_row):
                 self.stats['rows_skipped_no_changes'] += 1
                 continue  # Skip if no changes detected
             
-            # Preserve CONFLICTID from existing record
-            conflict_row['CONFLICTID'] = existing_row['CONFLICTID']
-            
-            # Build UPDATE statement with conditional logic
-            update_stmt = self.query_builder.build_update_statement(
-                conflict_row,
-                self.db_names,
-                existing_row
-            )
-            updates.append(update_stmt)
+            updates.append(conflict_row)
         
         return updates
     
@@ -675,19 +1561,8 @@ class ConflictProcessor:
         if not self.skip_unchanged_records:
             return True
         
-        # Define conditional flag columns (only update if existing = 'N')
-        conditional_flags = [
-            'SameSchTimeFlag',
-            'SameVisitTimeFlag',
-            'SchAndVisitTimeSameFlag',
-            'SchOverAnotherSchTimeFlag',
-            'VisitTimeOverAnotherVisitTimeFlag',
-            'SchTimeOverVisitTimeFlag',
-            'DistanceFlag'
-        ]
-        
         # Check conditional flags first (most common reason for updates)
-        for col in conditional_flags:
+        for col in CONDITIONAL_FLAG_COLUMNS:
             existing_val = existing_row.get(col)
             new_val = new_row.get(col)
             
@@ -700,24 +1575,8 @@ class ConflictProcessor:
                                 f"(was: {existing_val}, now: {new_val})")
                 return True
         
-        # Define key business columns to check
-        business_columns = [
-            'ProviderID', 'ConProviderID', 'VisitDate',
-            'SchStartTime', 'SchEndTime', 'ConSchStartTime', 'ConSchEndTime',
-            'EVVStartTime', 'EVVEndTime', 'ConEVVStartTime', 'ConEVVEndTime',
-            'CaregiverID', 'ConCaregiverID',
-            'OfficeID', 'ConOfficeID',
-            'PatientID', 'ConPatientID',
-            'PayerID', 'ConPayerID',
-            'ServiceCodeID', 'ConServiceCodeID',
-            'IsMissed', 'EVVType', 'ConIsMissed', 'ConEVVType',
-            'P_PatientID', 'ConP_PatientID', 'PA_PatientID', 'ConPA_PatientID',
-            'ContractType', 'ConContractType',
-            'FederalTaxNumber', 'ConFederalTaxNumber'
-        ]
-        
         # Check business columns for differences
-        for col in business_columns:
+        for col in BUSINESS_COLUMNS:
             # Skip if column not in new data
             if col not in new_row:
                 continue
@@ -740,41 +1599,61 @@ class ConflictProcessor:
         
         return False  # No changes detected
     
-    def _execute_updates_with_commit(self, update_statements: List[Tuple[str, tuple]]) -> int:
+    def _execute_updates_with_commit(self, update_rows: List[Dict[str, Any]]) -> int:
         """
-        Execute UPDATE statements using persistent connection with explicit commit
+        Apply changed rows with one set-based UPDATE and an explicit commit
         
-        This method uses the persistent connection to execute updates and commits
-        immediately after, ensuring progress is saved even if the container is stopped.
+        Rows are COPYed into a session temp table (ON COMMIT DELETE ROWS, so
+        it is empty again after every batch) and applied with a single
+        ``UPDATE ... FROM`` whose CASE expressions carry the conditional
+        StatusFlag / rule-flag logic (see QueryBuilder.build_staged_update).
+        Commits immediately after, ensuring progress is saved even if the
+        container is stopped.
         
         Args:
-            update_statements: List of (sql, params) tuples
+            update_rows: Conflict row dicts from Snowflake
         
         Returns:
             Number of rows updated
         """
-        if not update_statements:
+        if not update_rows:
             return 0
         
-        from psycopg2.extras import execute_batch
+        import io
+        
+        staged_rows, repeats = self._fold_update_rows(update_rows)
+        
+        if self._staged_update is None:
+            self._staged_update = self.query_builder.build_staged_update(
+                self.db_names, list(update_rows[0].keys())
+            )
+        staged = self._staged_update
         
         cursor = self.pg_connection.cursor()
-        total_updated = 0
         
         try:
-            # Group by SQL statement for efficient batching
-            grouped = {}
-            for sql, params in update_statements:
-                if sql not in grouped:
-                    grouped[sql] = []
-                grouped[sql].append(params)
-            
-            # Execute each group in batches
-            for sql, params_list in grouped.items():
-                execute_batch(cursor, sql, params_list, page_size=1000)
-                total_updated += cursor.rowcount
-            
-            # CRITICAL: Explicit commit to save progress
+            if not self._staged_update_table_created:
+                cursor.execute(f"DROP TABLE IF EXISTS {STAGED_UPDATE_TABLE}")
+                cursor.execute(staged['create_sql'])
+                self.pg_connection.commit()
+                self._staged_update_table_created = True
+            
+            buffer = io.StringIO()
+            for row in staged_rows:
+                buffer.write('\t'.join(format_copy_value(row.get(col)) for col in staged['sf_columns']))
+                buffer.write('\n')
+            buffer.seek(0)
+            cursor.copy_expert(staged['copy_sql'], buffer)
+            cursor.execute(f"ANALYZE {STAGED_UPDATE_TABLE}")
+            
+            cursor.execute(staged['update_sql'])
+            # Count each matched row once per input row, as the per-row UPDATEs did
+            total_updated = sum(
+                repeats.get(self._update_key(visit_id, con_visit_id), 1)
+                for visit_id, con_visit_id in cursor.fetchall()
+            )
+            
+            # CRITICAL: Explicit commit to save progress (also empties the staging table)
             self.pg_connection.commit()
             
             return total_updated
@@ -785,6 +1664,50 @@ class ConflictProcessor:
         finally:
             cursor.close()
     
+    @staticmethod
+    def _update_key(visit_id: Any, con_visit_id: Any) -> Tuple[str, Optional[str]]:
+        """(VisitID, ConVisitID) key as the staged UPDATE matches it"""
+        return str(visit_id), str(con_visit_id) if con_visit_id else None
+    
+    def _fold_update_rows(
+        self,
+        update_rows: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], Dict[Tuple[str, Optional[str]], int]]:
+        """
+        Fold duplicate (VisitID, ConVisitID) rows into the one row that, staged
+        once, leaves CONFLICTVISITMAPS as the per-row UPDATEs run in order did
+        
+        Unconditional columns take the last row's value. A rule flag only
+        changes while the stored value is 'N', so in order it ends up as the
+        first row's value that is not 'N' (the stored value if that is not
+        'N' already, which the UPDATE's CASE keeps). StatusFlag is the same
+        for every row.
+        
+        Args:
+            update_rows: Conflict row dicts in batch order
+        
+        Returns:
+            Tuple of (one row per key, input rows per key)
+        """
+        folded: Dict[Tuple[str, Optional[str]], Dict[str, Any]] = {}
+        repeats: Dict[Tuple[str, Optional[str]], int] = {}
+        
+        for row in update_rows:
+            key = self._update_key(row.get('VisitID'), row.get('ConVisitID'))
+            kept = folded.get(key)
+            repeats[key] = repeats.get(key, 0) + 1
+            if kept is None:
+                folded[key] = row
+                continue
+            
+            merged = dict(row)
+            for col in CONDITIONAL_FLAG_COLUMNS:
+                if col in kept and kept[col] != 'N':
+                    merged[col] = kept[col]
+            folded[key] = merged
+        
+        return list(folded.values()), repeats
+    
     def _execute_inserts_with_commit(self, new_rows: List[Dict[str, Any]]) -> int:
         """
         INSERT new conflict rows using persistent connection with explicit commit.
@@ -873,7 +1796,7 @@ class ConflictProcessor:
                 self.logger.error(f"Batch insert failed: {e}")
                 raise
     
-    def _resolve_stale_conflicts_seen_based(self, seen_conflict_keys: set):
+    def _resolve_stale_conflicts_seen_based(self):
         """
         Resolve stale conflicts using precise pair-based anti-join approach.
         
@@ -881,17 +1804,15 @@ class ConflictProcessor:
         1. Pair-precise scope: Uses _tmp_delta_pairs (visit_date, ssn) loaded in Step 2d
            with actual pairs from delta_keys, eliminating the cross-product problem
            that caused 3.9M false stale records with separate SSN + date filters.
-        2. UUID type match: _tmp_seen_conflicts uses UUID columns (enables index usage)
+        2. UUID type match: _tmp_seen_conflicts uses UUID columns (enables index usage);
+           it is filled by binary COPY during Step 3 (see _copy_seen_keys)
         3. Minimal UPDATE: Only sets StatusFlag='R' and UpdatedDate
         4. Two-phase resolve: SELECT stale IDs first, then UPDATE by PK
         5. Batched Phase 2: UPDATEs in chunks of 100K to avoid giant transactions
         
-        Prerequisite: _tmp_delta_pairs must already exist in the PG session (created in Step 2d).
-        
-        Args:
-            seen_conflict_keys: Set of (VisitID, ConVisitID) tuples seen during streaming
+        Prerequisite: _tmp_delta_pairs (Step 2d) and _tmp_seen_conflicts (Step 3)
+        must already exist in the PG session.
         """
-        import io
         import time as _time
         
         BATCH_SIZE = 100000  # Phase 2 UPDATE batch size (reduced from 500K for faster commits)
@@ -910,29 +1831,9 @@ class ConflictProcessor:
             
             logger.info(f"STEP 4: Resolving stale conflicts (pair-precise seen-based approach)...")
             logger.info(f"  Delta pairs scope: _tmp_delta_pairs (loaded in Step 2d)")
-            logger.info(f"  Seen conflict pairs: {len(seen_conflict_keys):,}")
-            
-            # 1. Create and load _tmp_seen_conflicts temp table (UUID columns for index match)
-            cursor.execute("DROP TABLE IF EXISTS _tmp_seen_conflicts")
-            cursor.execute("""
-                CREATE TEMP TABLE _tmp_seen_conflicts (
-                    visit_id UUID,
-                    con_visit_id UUID
-                )
-            """)
-            
-            copy_start = _time.time()
-            buffer = io.StringIO()
-            for visit_id, con_visit_id in seen_conflict_keys:
-                vid = visit_id if visit_id else '\\N'
-                cvid = con_visit_id if con_visit_id else '\\N'
-                buffer.write(f"{vid}\t{cvid}\n")
-            buffer.seek(0)
-            cursor.copy_from(buffer, '_tmp_seen_conflicts', columns=('visit_id', 'con_visit_id'))
-            copy_duration = _time.time() - copy_start
-            logger.info(f"  ✓ Loaded {len(seen_conflict_keys):,} seen pairs into _tmp_seen_conflicts ({copy_duration:.1f}s)")
+            logger.info(f"  Seen conflict pairs: {self.stats['seen_conflict_keys']:,} (_tmp_seen_conflicts, streamed in Step 3)")
             
-            # 2. Index and analyze temp tables
+            # 1. Index and analyze temp tables (bulk index build after the load)
             idx_start = _time.time()
             cursor.execute("CREATE INDEX ON _tmp_seen_conflicts (visit_id, con_visit_id)")
             cursor.execute("ANALYZE _tmp_seen_conflicts")
@@ -940,7 +1841,7 @@ class ConflictProcessor:
             idx_duration = _time.time() - idx_start
             logger.info(f"  ✓ _tmp_seen_conflicts indexed and analyzed ({idx_duration:.1f}s)")
             
-            # 3. Phase 1: Identify stale records into temp table (read-only scan)
+            # 2. Phase 1: Identify stale records into temp table (read-only scan)
             # JOIN on _tmp_delta_pairs gives precise (visit_date, ssn) scope -- no cross-product.
             # Records that: (a) match an actual delta (visit_date, ssn) pair,
             # (b) are NOT in seen pairs (stale),
@@ -976,7 +1877,7 @@ class ConflictProcessor:
             phase1_duration = _time.time() - phase1_start
             logger.info(f"  Phase 1: Identified {stale_count:,} stale records ({phase1_duration:.1f}s)")
             
-            # 4. Phase 2: Update stale records by PK with minimal SET, in batches
+            # 3. Phase 2: Update stale records by PK with minimal SET, in batches
             phase2_start = _time.time()
             total_rows_updated = 0
             
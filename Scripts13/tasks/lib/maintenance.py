@@ -0,0 +1,222 @@
+"""
+Table maintenance planner for preflight/postflight
+
+Reads pg_stat_user_tables and only VACUUMs / ANALYZEs tables whose
+modification counters crossed a threshold, instead of every table in the
+schema. Selected tables are processed in parallel, each on its own autocommit
+connection, under a concurrency cap. Skipped tables are logged with the reason.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Any, Optional
+
+from .utils import get_logger, format_duration
+
+logger = get_logger(__name__)
+
+# Same shape as autovacuum's "threshold + scale_factor * reltuples" rule
+DEFAULT_MAINTENANCE_CONFIG = {
+    'max_workers': 4,
+    'analyze_min_changes': 1000,
+    'analyze_change_fraction': 0.05,
+    'vacuum_min_dead_tuples': 10000,
+    'vacuum_dead_fraction': 0.10,
+}
+
+
+def fetch_table_stats(pg_conn, schema: str) -> List[Dict[str, Any]]:
+    """Modification counters for every table in the schema."""
+    cursor = pg_conn.cursor()
+    try:
+        cursor.execute(
+            """
+            SELECT relname,
+                   n_live_tup,
+                   n_dead_tup,
+                   n_mod_since_analyze,
+                   COALESCE(last_analyze, last_autoanalyze) IS NOT NULL AS analyzed
+            FROM pg_stat_user_tables
+            WHERE schemaname = %s
+            ORDER BY relname
+            """,
+            (schema,),
+        )
+        return [
+            {
+                'table': row[0],
+                'n_live_tup': row[1] or 0,
+                'n_dead_tup': row[2] or 0,
+                'n_mod_since_analyze': row[3] or 0,
+                'analyzed': bool(row[4]),
+            }
+            for row in cursor.fetchall()
+        ]
+    finally:
+        cursor.close()
+
+
+def plan_maintenance(
+    table_stats: List[Dict[str, Any]],
+    config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Decide VACUUM / ANALYZE per table.
+
+    Returns:
+        {table: {'vacuum': bool, 'analyze': bool, 'reason': str}}
+        (reason explains the decision, including why a table is skipped)
+    """
+    cfg = {**DEFAULT_MAINTENANCE_CONFIG, **(config or {})}
+    plan: Dict[str, Dict[str, Any]] = {}
+
+    for stats in table_stats:
+        live = stats['n_live_tup']
+        dead = stats['n_dead_tup']
+        mods = stats['n_mod_since_analyze']
+
+        analyze_threshold = cfg['analyze_min_changes'] + cfg['analyze_change_fraction'] * live
+        vacuum_threshold = cfg['vacuum_min_dead_tuples'] + cfg['vacuum_dead_fraction'] * live
+
+        reasons = []
+        vacuum = dead > vacuum_threshold
+        if vacuum:
+            reasons.append(f"{dead:,} dead tuples > {vacuum_threshold:,.0f}")
+
+        analyze = mods > analyze_threshold
+        if analyze:
+            reasons.append(f"{mods:,} changes since analyze > {analyze_threshold:,.0f}")
+        elif not stats['analyzed'] and live > 0:
+            analyze = True
+            reasons.append("never analyzed")
+
+        if not reasons:
+            reasons.append(
+                f"below thresholds ({dead:,} dead, {mods:,} changes, {live:,} live)"
+            )
+
+        plan[stats['table']] = {
+            'vacuum': vacuum,
+            'analyze': analyze,
+            'reason': '; '.join(reasons),
+        }
+
+    return plan
+
+
+def _maintain_table(pg_manager, db_name: str, schema: str, table: str,
+                    vacuum: bool, analyze: bool) -> float:
+    """Run VACUUM and/or ANALYZE on one table over its own connection."""
+    if vacuum and analyze:
+        sql = f'VACUUM (ANALYZE) {schema}."{table}"'
+    elif vacuum:
+        sql = f'VACUUM {schema}."{table}"'
+    else:
+        sql = f'ANALYZE {schema}."{table}"'
+
+    start = time.time()
+    # VACUUM cannot run inside a transaction block
+    pg_conn = pg_manager.get_connection(db_name, autocommit=True)
+    try:
+        cursor = pg_conn.cursor()
+        cursor.execute(sql)
+        cursor.close()
+    finally:
+        pg_conn.close()
+    return time.time() - start
+
+
+def run_maintenance(
+    conn_factory,
+    db_name: str,
+    schema: str,
+    config: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """
+    Plan and run VACUUM / ANALYZE for the schema.
+
+    Args:
+        conn_factory: ConnectionFactory
+        db_name: PostgreSQL database
+        schema: Schema whose tables are considered
+        config: Overrides for DEFAULT_MAINTENANCE_CONFIG (pipeline.maintenance)
+
+    Returns:
+        Dict with 'vacuum' and 'analyze' summaries (tables processed, errors,
+        duration) plus 'skipped' {table: reason}
+    """
+    cfg = {**DEFAULT_MAINTENANCE_CONFIG, **(config or {})}
+    pg_manager = conn_factory.get_postgres_manager()
+    result: Dict[str, Any] = {
+        'vacuum': {'tables_vacuumed': 0, 'errors': [], 'duration_seconds': 0},
+        'analyze': {'tables_analyzed': 0, 'errors': [], 'duration_seconds': 0},
+        'skipped': {},
+        'duration_seconds': 0,
+    }
+
+    try:
+        pg_conn = pg_manager.get_connection(db_name)
+        try:
+            table_stats = fetch_table_stats(pg_conn, schema)
+        finally:
+            pg_conn.close()
+    except Exception as e:
+        logger.error(f"  Could not read table statistics: {e}")
+        result['vacuum']['errors'].append(str(e))
+        return result
+
+    plan = plan_maintenance(table_stats, cfg)
+    selected = {t: p for t, p in plan.items() if p['vacuum'] or p['analyze']}
+
+    for table, decision in plan.items():
+        if table in selected:
+            operations = '+'.join(
+                op for op, wanted in (('VACUUM', decision['vacuum']), ('ANALYZE', decision['analyze']))
+                if wanted
+            )
+            logger.info(f"    {table}: {operations} ({decision['reason']})")
+        else:
+            result['skipped'][table] = decision['reason']
+            logger.info(f"    {table}: skipped -- {decision['reason']}")
+
+    if not selected:
+        logger.info(f"  No tables in {schema} need maintenance ({len(plan)} checked)")
+        return result
+
+    start = time.time()
+    max_workers = max(1, min(cfg['max_workers'], len(selected)))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(
+                _maintain_table, pg_manager, db_name, schema, table,
+                decision['vacuum'], decision['analyze'],
+            ): table
+            for table, decision in selected.items()
+        }
+        for future in as_completed(futures):
+            table = futures[future]
+            decision = selected[table]
+            try:
+                elapsed = future.result()
+                logger.info(f"    {table}: done in {format_duration(elapsed)}")
+                if decision['vacuum']:
+                    result['vacuum']['tables_vacuumed'] += 1
+                if decision['analyze']:
+                    result['analyze']['tables_analyzed'] += 1
+            except Exception as e:
+                key = 'vacuum' if decision['vacuum'] else 'analyze'
+                result[key]['errors'].append(f"{table}: {e}")
+                logger.warning(f"    Maintenance on {schema}.{table} failed: {e}")
+
+    duration = time.time() - start
+    result['duration_seconds'] = round(duration, 2)
+    result['vacuum']['duration_seconds'] = result['duration_seconds']
+    result['analyze']['duration_seconds'] = result['duration_seconds']
+
+    logger.info(
+        f"  Maintenance completed in {format_duration(duration)}: "
+        f"{result['vacuum']['tables_vacuumed']} vacuumed, "
+        f"{result['analyze']['tables_analyzed']} analyzed, "
+        f"{len(result['skipped'])} skipped ({max_workers} parallel)"
+    )
+    return result
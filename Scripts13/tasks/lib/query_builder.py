@@ -251,6 +251,64 @@ INSERT_COLUMN_MAP: List[Tuple[str, str]] = [
     ('ConPA_PCounty', 'ConPA_PCounty'),
 ]
 
+# ---------------------------------------------------------------------------
+# UPDATE column handling
+#
+# Step 3 names that differ from the conflictvisitmaps column they update, and
+# the conflict rule flags that are only overwritten while currently 'N'.
+# ---------------------------------------------------------------------------
+UPDATE_COLUMN_NAME_MAP: Dict[str, str] = {
+    'ETATravleMinutes': 'ETATravelMinutes',  # Fix Snowflake typo
+    'SchVisitTimeSame': 'SchAndVisitTimeSameFlag',  # Fix shortened name
+}
+
+CONDITIONAL_FLAG_COLUMNS: List[str] = [
+    'SameSchTimeFlag',
+    'SameVisitTimeFlag',
+    'SchAndVisitTimeSameFlag',
+    'SchOverAnotherSchTimeFlag',
+    'VisitTimeOverAnotherVisitTimeFlag',
+    'SchTimeOverVisitTimeFlag',
+    'DistanceFlag',
+]
+
+# Session temp table the changed rows of a batch are COPYed into
+STAGED_UPDATE_TABLE = '_tmp_cvm_updates'
+
+# Session temp table a whole batch is COPYed into for the server-side diff
+SERVER_DIFF_TABLE = '_tmp_cvm_batch'
+
+# Business columns compared for change detection (besides the rule flags)
+BUSINESS_COLUMNS: List[str] = [
+    'ProviderID', 'ConProviderID', 'VisitDate',
+    'SchStartTime', 'SchEndTime', 'ConSchStartTime', 'ConSchEndTime',
+    'EVVStartTime', 'EVVEndTime', 'ConEVVStartTime', 'ConEVVEndTime',
+    'CaregiverID', 'ConCaregiverID',
+    'OfficeID', 'ConOfficeID',
+    'PatientID', 'ConPatientID',
+    'PayerID', 'ConPayerID',
+    'ServiceCodeID', 'ConServiceCodeID',
+    'IsMissed', 'EVVType', 'ConIsMissed', 'ConEVVType',
+    'P_PatientID', 'ConP_PatientID', 'PA_PatientID', 'ConPA_PatientID',
+    'ContractType', 'ConContractType',
+    'FederalTaxNumber', 'ConFederalTaxNumber'
+]
+
+# Snowflake session temp table the step1/step2 queries anti-join SSNs against
+EXCLUDED_SSNS_TEMP_DDL = 'CREATE TEMPORARY TABLE IF NOT EXISTS excluded_ssns_temp (ssn VARCHAR)'
+
+# ---------------------------------------------------------------------------
+# Content hash
+#
+# Step 3 can return HASH() over the compared columns as "ContentHash" (64-bit).
+# The value is stored on conflictvisitmaps whenever a row is inserted, updated
+# or found unchanged, so the next run can skip a row whose hash is unchanged
+# without fetching its columns. The hash is only ever computed in Snowflake;
+# Postgres just stores it.
+# ---------------------------------------------------------------------------
+CONTENT_HASH_COLUMN = 'ContentHash'
+CONTENT_HASH_COLUMNS: List[str] = CONDITIONAL_FLAG_COLUMNS + BUSINESS_COLUMNS
+
 # ---------------------------------------------------------------------------
 # InService INSERT column mapping: extends INSERT_COLUMN_MAP with 4 InService
 # date columns that are NULL for regular conflicts but populated for InService.
@@ -311,7 +369,8 @@ class QueryBuilder:
         lookback_years: int = 2,
         lookforward_days: int = 45,
         lookback_hours: int = 36,
-        enable_asymmetric_join: bool = False
+        enable_asymmetric_join: bool = False,
+        enable_content_hash: bool = False
     ) -> Dict[str, str]:
         """
         Build the v3 conflict detection query using temp tables (multi-step execution)
@@ -331,6 +390,8 @@ class QueryBuilder:
             lookforward_days: Days in future for visit date filter
             lookback_hours: Hours for updated timestamp filter
             enable_asymmetric_join: If True, uses asymmetric join for comprehensive detection
+            enable_content_hash: If True, Step 3 also returns "ContentHash"
+                (see build_content_hash_select)
         
         Returns:
             Dict with keys 'step1', 'step2', 'step3' containing SQL statements
@@ -375,8 +436,8 @@ class QueryBuilder:
         # STEP 0: Build excluded_ssns temp table (populated via batch INSERT)
         # With 7000+ SSNs, a temp table is far more efficient than an IN clause
         logger.info(f"  Step 0: Building excluded_ssns temp table ({len(excluded_ssns)} SSNs)")
-        queries['step0_create'] = 'CREATE TEMPORARY TABLE IF NOT EXISTS excluded_ssns_temp (ssn VARCHAR)'
-        queries['step0_inserts'] = self._build_ssn_insert_batches(excluded_ssns)
+        queries['step0_create'], queries['step0_inserts'] = \
+            self.build_excluded_ssns_statements(excluded_ssns)
         
         # STEP 1: Delta keys temp table
         # Always create delta_keys now - needed for both asymmetric join AND stale cleanup scoping
@@ -454,15 +515,50 @@ class QueryBuilder:
         else:
             asymmetric_join_condition = ""  # Symmetric mode: all rows are delta
         
+        content_hash_select = ''
+        if enable_content_hash:
+            logger.info(f"    Content hash: HASH() over {len(CONTENT_HASH_COLUMNS)} compared columns")
+            content_hash_select = ',\n  ' + self.build_content_hash_select()
+        
         queries['step3'] = step3_template.format(
             mph_lookup=mph_lookup_sql,
             extra_distance_per=settings_data.get('ExtraDistancePer', 100),
-            ASYMMETRIC_JOIN_CONDITION=asymmetric_join_condition
+            ASYMMETRIC_JOIN_CONDITION=asymmetric_join_condition,
+            CONTENT_HASH_SELECT=content_hash_select
         )
         
         logger.info("✓ V3 conflict detection queries built successfully")
         return queries
     
+    @staticmethod
+    def build_content_hash_select() -> str:
+        """
+        Step 3 select-list item computing the row content hash
+        
+        Snowflake HASH() is NULL-safe and type-aware, and returns one signed
+        64-bit value. Columns are referenced by their pre-alias names in the
+        final SELECT (SchVisitTimeSame is only renamed there).
+        
+        Returns:
+            SQL fragment ``HASH(...) AS "ContentHash"``
+        """
+        source_names = {pg: sf for sf, pg in UPDATE_COLUMN_NAME_MAP.items()}
+        columns = ', '.join(f'"{source_names.get(col, col)}"' for col in CONTENT_HASH_COLUMNS)
+        return f'HASH({columns}) AS "{CONTENT_HASH_COLUMN}"'
+    
+    @classmethod
+    def build_excluded_ssns_statements(cls, excluded_ssns: List[str]) -> Tuple[str, List[str]]:
+        """
+        Statements that create and load the excluded_ssns_temp table
+        
+        Args:
+            excluded_ssns: List of SSN strings to exclude
+        
+        Returns:
+            Tuple of (CREATE TEMPORARY TABLE statement, batch INSERT statements)
+        """
+        return EXCLUDED_SSNS_TEMP_DDL, cls._build_ssn_insert_batches(excluded_ssns)
+    
     @staticmethod
     def _build_ssn_insert_batches(excluded_ssns: List[str], batch_size: int = 1000) -> List[str]:
         """
@@ -510,112 +606,244 @@ class QueryBuilder:
         
         return query
     
-    def build_update_statement(
+    def build_staged_update(
         self,
-        conflict_row: Dict[str, Any],
         db_names: Dict[str, str],
-        existing_row: Dict[str, Any],
-        update_columns: List[str] = None
-    ) -> tuple:
+        sf_columns: List[str],
+        staging_table: str = STAGED_UPDATE_TABLE
+    ) -> Dict[str, Any]:
         """
-        Build UPDATE statement for a single conflict record with conditional logic
+        Build the set-based UPDATE for a batch of changed conflict records
+        
+        Changed rows are COPYed into a session temp table and applied with one
+        ``UPDATE ... FROM`` per batch. The conditional logic that used to be
+        decided per row in Python is expressed as CASE expressions on the
+        current CONFLICTVISITMAPS values:
+          - StatusFlag: 'U' unless currently 'W' (Whitelist) or 'I' (Ignore)
+          - Conflict rule flags: new value only while currently 'N'
+          - All other columns: unconditional
+        CONFLICTID is never overwritten. UpdateFlag/ResolveDate are reset and
+        UpdatedDate is stamped on every matched row.
         
         Args:
-            conflict_row: Dictionary of column values from Snowflake result
             db_names: Dict with pg_database, pg_schema keys
-            existing_row: Dictionary of existing column values from Postgres
-            update_columns: List of columns to update (if None, updates all)
+            sf_columns: Snowflake Step 3 column names present on the rows
+            staging_table: Temp table name for the staged rows
         
         Returns:
-            Tuple of (sql_statement, params_tuple)
+            Dict with:
+              - create_sql: CREATE TEMP TABLE (ON COMMIT DELETE ROWS, column
+                types copied from conflictvisitmaps)
+              - copy_sql: COPY ... FROM STDIN for the staged columns
+              - update_sql: the UPDATE ... FROM statement (returns the
+                updated rows' VisitID, ConVisitID)
+              - sf_columns: Snowflake keys to extract (in COPY column order)
         """
         schema = db_names['pg_schema']
+        staged_sf, staged_pg, set_clauses = self._update_set_clauses(sf_columns)
         
-        # Column name mapping: Snowflake typo -> Postgres corrected name
-        column_name_map = {
-            'ETATravleMinutes': 'ETATravelMinutes',  # Fix Snowflake typo
-            'SchVisitTimeSame': 'SchAndVisitTimeSameFlag'  # Fix shortened name
-        }
+        col_list = ', '.join(f'"{c}"' for c in staged_pg)
         
-        # Define columns that require conditional updates
-        conditional_flag_columns = [
-            'SameSchTimeFlag',
-            'SameVisitTimeFlag',
-            'SchAndVisitTimeSameFlag',
-            'SchOverAnotherSchTimeFlag',
-            'VisitTimeOverAnotherVisitTimeFlag',
-            'SchTimeOverVisitTimeFlag',
-            'DistanceFlag'
-        ]
+        # CTAS ... WITH NO DATA copies the column types but not the NOT NULL /
+        # identity constraints of conflictvisitmaps
+        create_sql = (
+            f"CREATE TEMP TABLE {staging_table} ON COMMIT DELETE ROWS AS "
+            f"SELECT {col_list} FROM {schema}.conflictvisitmaps WITH NO DATA"
+        )
+        copy_sql = f"COPY {staging_table} ({col_list}) FROM STDIN"
         
-        # If no specific columns provided, generate from conflict_row
-        if update_columns is None:
-            # Exclude keys used for WHERE clause
-            update_columns = [col for col in conflict_row.keys() 
-                            if col not in ('VisitID', 'ConVisitID')]
+        # WHERE matches the per-row original:
+        # (VisitID = ? AND ConVisitID = ?) OR (VisitID = ? AND ConVisitID IS NULL AND ? IS NULL)
+        update_sql = f"""
+            UPDATE {schema}.conflictvisitmaps AS CVM
+            SET {', '.join(set_clauses)}
+            FROM {staging_table} AS S
+            WHERE CVM."VisitID" = S."VisitID"
+              AND CVM."ConVisitID" IS NOT DISTINCT FROM S."ConVisitID"
+            RETURNING CVM."VisitID", CVM."ConVisitID"
+        """
+        
+        return {
+            'create_sql': create_sql,
+            'copy_sql': copy_sql,
+            'update_sql': update_sql,
+            'sf_columns': staged_sf,
+        }
+    
+    @staticmethod
+    def _update_set_clauses(sf_columns: List[str]) -> Tuple[List[str], List[str], List[str]]:
+        """
+        SET clauses of the conflict UPDATE for the given Step 3 columns
         
-        # Build SET clause
+        Returns:
+            Tuple of (staged Snowflake columns, matching PG columns, SET clauses
+            reading the staged row as ``S``)
+        """
+        staged_sf = ['VisitID', 'ConVisitID']
+        staged_pg = ['VisitID', 'ConVisitID']
         set_clauses = []
-        params = []
         
-        for col in update_columns:
-            if col not in conflict_row:
+        for col in sf_columns:
+            if col in ('VisitID', 'ConVisitID', 'CONFLICTID'):
                 continue
             
             # Translate column name if needed (Snowflake typo -> Postgres corrected)
-            postgres_col = column_name_map.get(col, col)
-                
-            # Handle StatusFlag with conditional logic
+            postgres_col = UPDATE_COLUMN_NAME_MAP.get(col, col)
+            
             # Original: CASE WHEN CVM."StatusFlag" NOT IN ('W', 'I') THEN 'U' ELSE CVM."StatusFlag" END
+            # (written as IN ... THEN keep so a NULL status also becomes 'U')
             if col == 'StatusFlag':
-                existing_status = existing_row.get('StatusFlag', '')
-                if existing_status not in ('W', 'I'):
-                    set_clauses.append('"StatusFlag" = %s')
-                    params.append('U')  # Set to 'U' (Updated)
-                # else: preserve existing 'W' (Whitelist) or 'I' (Ignore)
+                set_clauses.append(
+                    '"StatusFlag" = CASE WHEN CVM."StatusFlag" IN (\'W\', \'I\') '
+                    'THEN CVM."StatusFlag" ELSE \'U\' END'
+                )
                 continue
             
-            # Handle conflict rule flags with conditional logic
+            staged_sf.append(col)
+            staged_pg.append(postgres_col)
+            
             # Original: CASE WHEN CVM."FlagName" = 'N' THEN ALLDATA."FlagName" ELSE CVM."FlagName" END
-            if col in conditional_flag_columns:
-                existing_flag = existing_row.get(postgres_col, 'N')  # Use postgres_col for lookup
-                if existing_flag == 'N':
-                    # Only update if currently 'N' (not confirmed)
-                    set_clauses.append(f'"{postgres_col}" = %s')  # Use postgres_col in SQL
-                    params.append(conflict_row[col])
-                # else: preserve existing value (manually confirmed 'Y' or other)
+            if col in CONDITIONAL_FLAG_COLUMNS:
+                set_clauses.append(
+                    f'"{postgres_col}" = CASE WHEN CVM."{postgres_col}" = \'N\' '
+                    f'THEN S."{postgres_col}" ELSE CVM."{postgres_col}" END'
+                )
                 continue
             
             # All other columns: unconditional update
-            set_clauses.append(f'"{postgres_col}" = %s')  # Use postgres_col in SQL
-            params.append(conflict_row[col])
+            set_clauses.append(f'"{postgres_col}" = S."{postgres_col}"')
         
         # Add special columns with fixed values
         set_clauses.append('"UpdateFlag" = NULL')
         set_clauses.append('"UpdatedDate" = CURRENT_TIMESTAMP')
         set_clauses.append('"ResolveDate" = NULL')
         
-        # Build SQL with WHERE clause matching original logic:
-        # (VisitID = ? AND ConVisitID = ?) OR (VisitID = ? AND ConVisitID IS NULL AND ? IS NULL)
-        sql = f"""
-            UPDATE {schema}.conflictvisitmaps
-            SET {', '.join(set_clauses)}
-            WHERE (
-                ("VisitID" = %s AND "ConVisitID" = %s)
-                OR ("VisitID" = %s AND "ConVisitID" IS NULL AND %s IS NULL)
-            )
+        return staged_sf, staged_pg, set_clauses
+    
+    def build_server_diff(
+        self,
+        db_names: Dict[str, str],
+        sf_columns: List[str],
+        skip_unchanged_records: bool = True,
+        enable_insert: bool = True,
+        staging_table: str = SERVER_DIFF_TABLE
+    ) -> Dict[str, Any]:
+        """
+        Build the server-side diff for one COPYed batch of Step 3 rows
+        
+        The whole batch is staged and Postgres decides what to write, in one
+        statement of data-modifying CTEs (all reading the same snapshot):
+          - matched: staged pairs that exist as non-InService/PTO conflicts
+          - updated: the UPDATE of build_staged_update, restricted (when
+            skip_unchanged_records) to rows where a rule flag that is still
+            'N' differs or the business columns are DISTINCT FROM the staged
+            values -- the same rules as ConflictProcessor._has_changes
+          - inserted: INSERT ... SELECT of the staged pairs WHERE NOT EXISTS
+        
+        Args:
+            db_names: Dict with pg_database, pg_schema keys
+            sf_columns: Snowflake Step 3 column names present on the batch
+            skip_unchanged_records: Only update rows with changes
+            enable_insert: Insert new pairs
+            staging_table: Temp table name for the staged batch
+        
+        Returns:
+            Dict with:
+              - create_sql: CREATE TEMP TABLE (ON COMMIT DELETE ROWS)
+              - copy_sql: COPY ... FROM STDIN (text format)
+              - copy_csv_sql: COPY ... FROM STDIN (CSV with header, for Arrow)
+              - diff_sql: returns one row (matched, updated, inserted)
+              - sf_columns: Snowflake keys to stage (in COPY column order)
         """
+        schema = db_names['pg_schema']
+        
+        # Stage every INSERT column present on the batch (the UPDATE uses a subset)
+        insert_map = INSERT_COLUMN_MAP + [(CONTENT_HASH_COLUMN, CONTENT_HASH_COLUMN)]
+        staged = [(sf, pg) for sf, pg in insert_map if sf in sf_columns]
+        staged_sf = [sf for sf, _pg in staged]
+        staged_pg = [pg for _sf, pg in staged]
+        col_list = ', '.join(f'"{c}"' for c in staged_pg)
+        
+        _sf, _pg, set_clauses = self._update_set_clauses(staged_sf)
         
-        # Add WHERE clause params
-        visit_id = conflict_row['VisitID']
-        con_visit_id = conflict_row.get('ConVisitID')
+        key_match = (
+            'CVM."VisitID" = S."VisitID" '
+            'AND CVM."ConVisitID" IS NOT DISTINCT FROM S."ConVisitID"'
+        )
+        conflict_scope = ' AND '.join(
+            f'CVM."{col}" IS NULL' for col in (
+                'InserviceStartDate', 'InserviceEndDate', 'PTOStartDate', 'PTOEndDate',
+                'ConInserviceStartDate', 'ConInserviceEndDate', 'ConPTOStartDate', 'ConPTOEndDate',
+            )
+        )
+        existing = (
+            f'SELECT 1 FROM {schema}.conflictvisitmaps AS CVM '
+            f'WHERE {key_match} AND {conflict_scope}'
+        )
         
-        # For the OR clause: VisitID twice, ConVisitID twice
-        params.extend([visit_id, con_visit_id, visit_id, con_visit_id])
+        change_filter = ''
+        if skip_unchanged_records:
+            changes = [
+                f'(CVM."{col}" = \'N\' AND S."{col}" IS DISTINCT FROM CVM."{col}")'
+                for col in CONDITIONAL_FLAG_COLUMNS if col in staged_pg
+            ]
+            business = [col for col in BUSINESS_COLUMNS if col in staged_pg]
+            if business:
+                changes.append(
+                    '(' + ', '.join(f'CVM."{col}"' for col in business) + ') IS DISTINCT FROM ('
+                    + ', '.join(f'S."{col}"' for col in business) + ')'
+                )
+            change_filter = '\n                  AND (' + '\n                       OR '.join(changes or ['FALSE']) + ')'
+        
+        if enable_insert:
+            inserted_cte = f"""inserted AS (
+                INSERT INTO {schema}.conflictvisitmaps
+                    ({col_list}, "StatusFlag", "InServiceFlag", "PTOFlag", "CreatedDate")
+                SELECT {', '.join(f'S."{c}"' for c in staged_pg)}, 'N', 'N', 'N', CURRENT_TIMESTAMP
+                FROM {staging_table} AS S
+                WHERE NOT EXISTS ({existing})
+                RETURNING 1
+            )"""
+        else:
+            inserted_cte = "inserted AS (SELECT 1 WHERE FALSE)"
+        
+        diff_sql = f"""
+            WITH matched AS (
+                SELECT count(*) AS n
+                FROM {staging_table} AS S
+                WHERE EXISTS ({existing})
+            ),
+            updated AS (
+                UPDATE {schema}.conflictvisitmaps AS CVM
+                SET {', '.join(set_clauses)}
+                FROM {staging_table} AS S
+                WHERE {key_match}
+                  AND {conflict_scope}{change_filter}
+                RETURNING 1
+            ),
+            {inserted_cte}
+            SELECT
+                (SELECT n FROM matched),
+                (SELECT count(*) FROM updated),
+                (SELECT count(*) FROM inserted)
+        """
         
-        return (sql, tuple(params))
+        return {
+            'create_sql': (
+                f"CREATE TEMP TABLE {staging_table} ON COMMIT DELETE ROWS AS "
+                f"SELECT {col_list} FROM {schema}.conflictvisitmaps WITH NO DATA"
+            ),
+            'copy_sql': f"COPY {staging_table} ({col_list}) FROM STDIN",
+            'copy_csv_sql': f"COPY {staging_table} ({col_list}) FROM STDIN WITH (FORMAT csv, HEADER true)",
+            'diff_sql': diff_sql,
+            'sf_columns': staged_sf,
+        }
     
-    def build_insert_template(self, db_names: Dict[str, str]) -> Tuple[str, List[str]]:
+    def build_insert_template(
+        self,
+        db_names: Dict[str, str],
+        include_content_hash: bool = False
+    ) -> Tuple[str, List[str]]:
         """
         Build a parameterised INSERT template for new conflict records.
         
@@ -624,6 +852,10 @@ class QueryBuilder:
         PTOFlag, CreatedDate) are embedded as SQL literals so they don't need to
         appear in the param tuple.
         
+        Args:
+            db_names: Dict with pg_database, pg_schema keys
+            include_content_hash: Also insert the Step 3 "ContentHash" value
+        
         Returns:
             Tuple of:
               - sql: INSERT statement with %s placeholders for data columns
@@ -632,9 +864,13 @@ class QueryBuilder:
         """
         schema = db_names['pg_schema']
         
+        column_map = INSERT_COLUMN_MAP
+        if include_content_hash:
+            column_map = column_map + [(CONTENT_HASH_COLUMN, CONTENT_HASH_COLUMN)]
+        
         # Snowflake column keys (for param extraction) and PG column names
-        sf_columns = [sf for sf, _pg in INSERT_COLUMN_MAP]
-        pg_columns = [pg for _sf, pg in INSERT_COLUMN_MAP]
+        sf_columns = [sf for sf, _pg in column_map]
+        pg_columns = [pg for _sf, pg in column_map]
         
         # Build the column list: data columns + fixed-value columns
         all_pg_cols = pg_columns + [
@@ -690,10 +926,8 @@ class QueryBuilder:
         queries: Dict[str, Any] = {}
 
         # STEP 0: excluded_ssns temp table (reuse existing helper)
-        queries['step0_create'] = (
-            'CREATE TEMPORARY TABLE IF NOT EXISTS excluded_ssns_temp (ssn VARCHAR)'
-        )
-        queries['step0_inserts'] = self._build_ssn_insert_batches(excluded_ssns)
+        queries['step0_create'], queries['step0_inserts'] = \
+            self.build_excluded_ssns_statements(excluded_ssns)
 
         common_args = dict(
             sf_database=db_names['sf_database'],
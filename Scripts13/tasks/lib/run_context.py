@@ -0,0 +1,102 @@
+"""
+Run-scoped context shared by the pipeline actions of one container run
+
+task02_00 and task02_01 both need the Postgres reference data and a
+Snowflake session with the excluded_ssns_temp table loaded. The context
+builds each of these once, on first use, and hands the same objects to every
+action, so the tasks see one reference snapshot and the SSN temp table is
+loaded once per run instead of once per task.
+
+scripts/main.py creates one context per run and closes it at the end; an
+action called without one creates (and closes) its own.
+"""
+
+import threading
+from typing import Any, Dict, Optional
+
+from .connections import ConnectionFactory, SnowflakeConnectionManager
+from .conflict_processor import load_reference_data
+from .query_builder import QueryBuilder
+from .utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class RunContext:
+    """Reference data and connections shared across the actions of a run"""
+    
+    def __init__(
+        self,
+        snowflake_config: Dict[str, Any],
+        postgres_config: Dict[str, Any],
+        db_names: Dict[str, str]
+    ):
+        self.db_names = db_names
+        self.connections = ConnectionFactory(snowflake_config, postgres_config)
+        self.query_builder = QueryBuilder()
+        self._lock = threading.RLock()
+        self._reference_data: Optional[Dict[str, Any]] = None
+        # Creating the Snowflake manager logs in; it has its own lock so the
+        # login can overlap reference_data(), which holds self._lock
+        self._snowflake_lock = threading.Lock()
+        self._sf_manager: Optional[SnowflakeConnectionManager] = None
+        # Snowflake connection excluded_ssns_temp was loaded on (temp tables
+        # are lost if the manager reconnects)
+        self._excluded_ssns_session = None
+    
+    @classmethod
+    def from_settings(cls, settings) -> 'RunContext':
+        """Context for the connections and database names in config.settings.Settings"""
+        return cls(
+            settings.get_snowflake_config(),
+            settings.get_postgres_config(),
+            settings.get_database_names(),
+        )
+    
+    def reference_data(self) -> Dict[str, Any]:
+        """
+        Postgres reference data, fetched on first use
+        
+        Returns:
+            Dict with keys: excluded_agencies, excluded_ssns, settings, mph
+        """
+        with self._lock:
+            if self._reference_data is None:
+                self._reference_data = load_reference_data(
+                    self.connections.get_postgres_manager(), self.query_builder, self.db_names
+                )
+            else:
+                logger.info("  ✓ Reference data: reusing this run's snapshot")
+            return self._reference_data
+    
+    def snowflake_manager(self) -> SnowflakeConnectionManager:
+        """
+        The run's Snowflake session, with excluded_ssns_temp loaded
+        
+        The manager is created once (double-checked under its own lock), so
+        concurrent callers share one session, and a caller can log in on
+        another thread while reference_data() runs.
+        """
+        sf_manager = self._sf_manager
+        if sf_manager is None:
+            with self._snowflake_lock:
+                if self._sf_manager is None:
+                    self._sf_manager = self.connections.get_snowflake_manager()
+                sf_manager = self._sf_manager
+        with self._lock:
+            connection = sf_manager.get_connection()
+            if self._excluded_ssns_session is not connection:
+                excluded_ssns = self.reference_data()['excluded_ssns']
+                create_sql, insert_stmts = self.query_builder.build_excluded_ssns_statements(excluded_ssns)
+                logger.info("Loading excluded_ssns temp table into the run's Snowflake session...")
+                with sf_manager.streaming_cursor() as cursor:
+                    cursor.execute(create_sql)
+                    for stmt in insert_stmts:
+                        cursor.execute(stmt)
+                logger.info(f"  ✓ Loaded {len(excluded_ssns)} excluded SSNs ({len(insert_stmts)} batch(es))")
+                self._excluded_ssns_session = connection
+        return sf_manager
+    
+    def close(self):
+        """Close the shared connections"""
+        self.connections.close_all()
@@ -0,0 +1,227 @@
+"""
+Dependency-graph scheduling for pipeline actions
+
+Work items declare the tables they read and write. An item depends on every
+earlier item (in the requested order) it conflicts with -- one writes
+something the other reads or writes -- so any order the graph allows gives
+the same result as running the list sequentially. Items whose dependencies
+have finished run concurrently on threads, as long as their declared
+connection counts fit within a budget.
+
+Resource names are table names, optionally narrowed to a row partition with
+brackets ("conflictvisitmaps[inservice]"): a partition conflicts with the
+whole table and with itself, but not with other partitions of the table. An
+item marked ``barrier`` conflicts with every other item.
+
+After a failure or when ``should_stop`` returns True no further items are
+started; running items are waited for.
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .utils import get_logger
+
+logger = get_logger(__name__)
+
+# How often the scheduler re-checks should_stop while items run
+POLL_SECONDS = 1.0
+
+
+def _split_resource(resource: str) -> Tuple[str, Optional[str]]:
+    """'table[partition]' -> ('table', 'partition'); 'table' -> ('table', None)"""
+    if resource.endswith(']') and '[' in resource:
+        table, partition = resource[:-1].split('[', 1)
+        return table, partition
+    return resource, None
+
+
+def resources_overlap(a: str, b: str) -> bool:
+    """Whether two declared resources can refer to the same rows."""
+    table_a, partition_a = _split_resource(a)
+    table_b, partition_b = _split_resource(b)
+    if table_a != table_b:
+        return False
+    return partition_a is None or partition_b is None or partition_a == partition_b
+
+
+def items_conflict(a: Dict[str, Any], b: Dict[str, Any]) -> bool:
+    """
+    Whether two items must keep their relative order
+
+    True when either is a barrier, or one writes a resource the other reads
+    or writes.
+    """
+    if a.get('barrier') or b.get('barrier'):
+        return True
+    a_reads, a_writes = a.get('reads', ()), a.get('writes', ())
+    b_reads, b_writes = b.get('reads', ()), b.get('writes', ())
+    return (
+        any(resources_overlap(w, r) for w in a_writes for r in list(b_reads) + list(b_writes))
+        or any(resources_overlap(w, r) for w in b_writes for r in a_reads)
+    )
+
+
+def build_dependencies(items: List[Dict[str, Any]]) -> List[List[int]]:
+    """
+    Earlier conflicting items for each item
+
+    Args:
+        items: Item specs (reads, writes, barrier) in the requested order
+
+    Returns:
+        Per item, the positions of the earlier items it must wait for
+    """
+    return [
+        [j for j in range(i) if items_conflict(items[j], items[i])]
+        for i in range(len(items))
+    ]
+
+
+def run_graph(
+    names: List[str],
+    items: List[Dict[str, Any]],
+    run_item: Callable[[int], Any],
+    connection_budget: int = 1,
+    is_success: Callable[[Any], bool] = lambda result: True,
+    on_finish: Optional[Callable[[int, Any], None]] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Run items concurrently in dependency order under a connection budget
+
+    Ready items start in list order. An item's cost is its declared
+    'connections' (default 1), capped at the budget so a single large item
+    can still run alone; a budget of 1 therefore runs the list sequentially.
+    on_finish is called on the calling thread, in completion order.
+
+    Args:
+        names: Item names for logging and the report
+        items: Item specs (reads, writes, barrier, connections)
+        run_item: Runs the item at a position and returns its result
+        connection_budget: Total connections running items may hold
+        is_success: Whether a result counts as success (else stop starting items)
+        on_finish: Callback with (position, result) as each item finishes
+        should_stop: Returns True to stop starting items (e.g. SIGTERM)
+
+    Returns:
+        Per item: name, deps (names), status ('success', 'failed', 'error',
+        'skipped'), start/end offsets in seconds (None if never started),
+        seconds, and result. The first exception raised by an item is
+        re-raised after the running items have finished.
+    """
+    deps = build_dependencies(items)
+    budget = max(connection_budget, 1)
+    graph_start = time.time()
+    records = [
+        {'name': name, 'deps': [names[d] for d in deps[i]], 'status': 'skipped',
+         'start': None, 'end': None, 'seconds': 0.0, 'result': None}
+        for i, name in enumerate(names)
+    ]
+    pending = list(range(len(items)))
+    running: Dict[Any, int] = {}
+    in_use = 0
+    stopping = False
+    first_error: Optional[BaseException] = None
+
+    def cost(i: int) -> int:
+        return min(max(int(items[i].get('connections', 1)), 0), budget)
+
+    with ThreadPoolExecutor(max_workers=max(len(items), 1)) as executor:
+        while pending or running:
+            if not stopping and should_stop and should_stop():
+                stopping = True
+                if pending:
+                    logger.warning(
+                        f"Shutdown requested -- not starting: {', '.join(names[i] for i in pending)}"
+                    )
+
+            if not stopping:
+                for i in list(pending):
+                    if any(records[d]['status'] != 'success' for d in deps[i]):
+                        continue
+                    if in_use + cost(i) > budget:
+                        continue
+                    pending.remove(i)
+                    in_use += cost(i)
+                    records[i]['start'] = time.time() - graph_start
+                    records[i]['status'] = 'running'
+                    if running:
+                        logger.info(f"Starting {names[i]} alongside {', '.join(names[j] for j in running.values())}")
+                    running[executor.submit(run_item, i)] = i
+
+            if not running:
+                break
+
+            done, _ = wait(list(running), timeout=POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                i = running.pop(future)
+                in_use -= cost(i)
+                record = records[i]
+                record['end'] = time.time() - graph_start
+                record['seconds'] = round(record['end'] - record['start'], 2)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    record['status'] = 'error'
+                    first_error = first_error or e
+                    stopping = True
+                    continue
+                record['result'] = result
+                record['status'] = 'success' if is_success(result) else 'failed'
+                if record['status'] != 'success':
+                    stopping = True
+                if on_finish:
+                    on_finish(i, result)
+
+    if first_error is not None:
+        raise first_error
+    return records
+
+
+def critical_path(records: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Chain of items that determined the run's wall time
+
+    Starts at the item that finished last and walks back through the
+    dependency that finished last before it. An item that started later than
+    that dependency's end waited for connection budget ('waited' seconds).
+
+    Returns:
+        Records on the path, first to last, each with an added 'waited' key
+    """
+    by_name = {record['name']: record for record in records}
+    finished = [record for record in records if record['end'] is not None]
+    if not finished:
+        return []
+
+    path = []
+    current = max(finished, key=lambda record: record['end'])
+    while current is not None:
+        gates = [by_name[d] for d in current['deps'] if by_name[d]['end'] is not None]
+        gate = max(gates, key=lambda record: record['end']) if gates else None
+        ready_at = gate['end'] if gate else 0.0
+        path.append(dict(current, waited=round(max(current['start'] - ready_at, 0.0), 2)))
+        current = gate
+    return list(reversed(path))
+
+
+def format_critical_path(records: List[Dict[str, Any]]) -> List[str]:
+    """Report lines: the critical path, wall time and serial (summed) time."""
+    path = critical_path(records)
+    if not path:
+        return ["Critical path: nothing ran"]
+
+    wall = max(record['end'] for record in records if record['end'] is not None)
+    serial = sum(record['seconds'] for record in records)
+    lines = [f"Critical path ({sum(r['seconds'] for r in path):.1f}s of {wall:.1f}s wall, "
+             f"{serial:.1f}s if run one after another):"]
+    width = max(len(record['name']) for record in path)
+    for record in path:
+        line = (f"  {record['name']:<{width}} {record['start']:8.1f}s -> {record['end']:8.1f}s "
+                f"({record['seconds']:.1f}s)")
+        if record['waited']:
+            line += f"  waited {record['waited']:.1f}s for connection budget"
+        lines.append(line)
+    return lines
@@ -3,7 +3,10 @@ Utility functions and helpers for Task 02 Conflict Updater
 """
 
 import logging
+import struct
 import sys
+import uuid
+import zlib
 from typing import Optional
 
 
@@ -84,6 +87,82 @@ def format_sql_identifier(identifier: str, quote_char: str = '"') -> str:
     return f"{quote_char}{escaped}{quote_char}"
 
 
+def format_copy_value(value) -> str:
+    """
+    Format a value for PostgreSQL COPY text format
+    
+    Args:
+        value: Python value (None becomes NULL)
+    
+    Returns:
+        Escaped field: backslash, tab, newline and carriage return are
+        backslash-escaped; None is written as \\N
+    """
+    if value is None:
+        return '\\N'
+    text = str(value)
+    if '\\' in text or '\t' in text or '\n' in text or '\r' in text:
+        text = (
+            text.replace('\\', '\\\\')
+            .replace('\t', '\\t')
+            .replace('\n', '\\n')
+            .replace('\r', '\\r')
+        )
+    return text
+
+
+# PostgreSQL binary COPY framing: signature, flags, header extension length
+_COPY_BINARY_HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+_COPY_BINARY_TRAILER = struct.pack('!h', -1)
+_COPY_BINARY_NULL = struct.pack('!i', -1)
+_COPY_BINARY_UUID = struct.pack('!i', 16)
+_COPY_BINARY_PAIR = struct.pack('!h', 2)
+
+
+def format_copy_binary_uuid_pairs(pairs) -> bytes:
+    """
+    Encode (uuid, uuid) pairs as a PostgreSQL binary COPY stream
+    
+    Each row is a field count plus two length-prefixed 16-byte UUIDs, so a
+    pair costs 42 bytes on the wire and needs no text parsing on the server.
+    
+    Args:
+        pairs: Iterable of (VisitID, ConVisitID); values may be str or
+            uuid.UUID, None/empty becomes NULL
+    
+    Returns:
+        Complete COPY payload (header, tuples, trailer) for
+        ``COPY ... FROM STDIN WITH (FORMAT binary)``
+    """
+    def field(value) -> bytes:
+        if not value:
+            return _COPY_BINARY_NULL
+        if not isinstance(value, uuid.UUID):
+            value = uuid.UUID(str(value))
+        return _COPY_BINARY_UUID + value.bytes
+    
+    parts = [_COPY_BINARY_HEADER]
+    for first, second in pairs:
+        parts.append(_COPY_BINARY_PAIR + field(first) + field(second))
+    parts.append(_COPY_BINARY_TRAILER)
+    return b''.join(parts)
+
+
+def visit_partition(visit_id, partitions: int) -> int:
+    """
+    Stable hash partition of a VisitID
+    
+    Args:
+        visit_id: VisitID (UUID or string)
+        partitions: Number of partitions
+    
+    Returns:
+        Partition number in [0, partitions); the same VisitID always maps to
+        the same partition (unlike hash(), which is salted per process)
+    """
+    return zlib.crc32(str(visit_id).encode()) % partitions
+
+
 def chunk_list(items: list, chunk_size: int):
     """
     Split list into chunks of specified size
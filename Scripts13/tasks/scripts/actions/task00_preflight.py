@@ -8,9 +8,9 @@ Pre-run validation and setup before the heavy pipeline tasks execute:
   4. Disable the pg_cron job that refreshes the materialized view
   5. Set InProgressFlag = 1 in the settings table
   6. Sync identity sequences (advance to MAX(ID) if behind -- prevents PK collisions)
-  7. VACUUM all tables (reclaim dead-tuple space so subsequent tasks start clean)
-  8. ANALYZE all tables (refresh planner statistics for optimal query plans)
-  9. Capture pre-run row counts for key tables (stored in result for postflight)
+  7. VACUUM / ANALYZE tables whose pg_stat_user_tables counters crossed the
+     pipeline.maintenance thresholds (in parallel; other tables are skipped)
+  8. Capture pre-run row counts for key tables (stored in result for postflight)
 """
 
 import time
@@ -18,7 +18,8 @@ from typing import Dict, Any
 
 from config.settings import Settings
 from lib.connections import ConnectionFactory
-from lib.utils import get_logger, format_duration
+from lib.maintenance import run_maintenance
+from lib.utils import get_logger
 
 logger = get_logger(__name__)
 
@@ -315,130 +316,6 @@ def _sync_identity_sequences(
     return results
 
 
-def _vacuum_schema_tables(
-    conn_factory: ConnectionFactory,
-    db_name: str,
-    schema: str,
-) -> Dict[str, Any]:
-    """
-    Run VACUUM on all tables in the schema.
-
-    VACUUM cannot run inside a transaction, so we use autocommit mode.
-    """
-    pg_manager = conn_factory.get_postgres_manager()
-    result: Dict[str, Any] = {'tables_vacuumed': 0, 'errors': [], 'duration_seconds': 0}
-
-    try:
-        pg_conn = pg_manager.get_connection(db_name)
-        cursor = pg_conn.cursor()
-        cursor.execute(
-            """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = %s AND table_type = 'BASE TABLE'
-            ORDER BY table_name
-            """,
-            (schema,),
-        )
-        tables = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        pg_conn.close()
-
-        if not tables:
-            logger.info(f"  No tables found in {schema} -- skipping VACUUM")
-            return result
-
-        start = time.time()
-        pg_conn = pg_manager.get_connection(db_name, autocommit=True)
-        cursor = pg_conn.cursor()
-
-        for table in tables:
-            try:
-                cursor.execute(f'VACUUM {schema}."{table}"')
-                result['tables_vacuumed'] += 1
-            except Exception as e:
-                result['errors'].append(f"{table}: {e}")
-                logger.warning(f"    VACUUM {schema}.{table} failed: {e}")
-
-        cursor.close()
-        pg_conn.close()
-
-        duration = time.time() - start
-        result['duration_seconds'] = round(duration, 2)
-        logger.info(
-            f"  VACUUM completed: {result['tables_vacuumed']}/{len(tables)} tables "
-            f"in {format_duration(duration)}"
-        )
-
-    except Exception as e:
-        logger.error(f"  VACUUM failed: {e}")
-        result['errors'].append(str(e))
-
-    return result
-
-
-def _analyze_schema_tables(
-    conn_factory: ConnectionFactory,
-    db_name: str,
-    schema: str,
-) -> Dict[str, Any]:
-    """
-    Run ANALYZE on all tables in the schema to update query planner statistics.
-
-    ANALYZE can run inside a transaction but we use autocommit for consistency.
-    """
-    pg_manager = conn_factory.get_postgres_manager()
-    result: Dict[str, Any] = {'tables_analyzed': 0, 'errors': [], 'duration_seconds': 0}
-
-    try:
-        pg_conn = pg_manager.get_connection(db_name)
-        cursor = pg_conn.cursor()
-        cursor.execute(
-            """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = %s AND table_type = 'BASE TABLE'
-            ORDER BY table_name
-            """,
-            (schema,),
-        )
-        tables = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        pg_conn.close()
-
-        if not tables:
-            logger.info(f"  No tables found in {schema} -- skipping ANALYZE")
-            return result
-
-        start = time.time()
-        pg_conn = pg_manager.get_connection(db_name, autocommit=True)
-        cursor = pg_conn.cursor()
-
-        for table in tables:
-            try:
-                cursor.execute(f'ANALYZE {schema}."{table}"')
-                result['tables_analyzed'] += 1
-            except Exception as e:
-                result['errors'].append(f"{table}: {e}")
-                logger.warning(f"    ANALYZE {schema}.{table} failed: {e}")
-
-        cursor.close()
-        pg_conn.close()
-
-        duration = time.time() - start
-        result['duration_seconds'] = round(duration, 2)
-        logger.info(
-            f"  ANALYZE completed: {result['tables_analyzed']}/{len(tables)} tables "
-            f"in {format_duration(duration)}"
-        )
-
-    except Exception as e:
-        logger.error(f"  ANALYZE failed: {e}")
-        result['errors'].append(str(e))
-
-    return result
-
-
 def _capture_row_counts(
     conn_factory: ConnectionFactory,
     db_name: str,
@@ -553,23 +430,18 @@ def run_task00_preflight(settings: Settings) -> dict:
         conn_factory, db_names['pg_database'], db_names['pg_schema'], identity_tables
     )
 
-    # --- 7. VACUUM ---
-    logger.info("Preflight: Running VACUUM on all tables...")
-    vacuum_result = _vacuum_schema_tables(
-        conn_factory, db_names['pg_database'], db_names['pg_schema']
-    )
-    if vacuum_result['errors']:
-        errors.extend(vacuum_result['errors'])
-
-    # --- 8. ANALYZE ---
-    logger.info("Preflight: Running ANALYZE on all tables...")
-    analyze_result = _analyze_schema_tables(
-        conn_factory, db_names['pg_database'], db_names['pg_schema']
+    # --- 7. VACUUM / ANALYZE (only tables past the thresholds) ---
+    logger.info("Preflight: Running VACUUM/ANALYZE on tables that need it...")
+    maintenance = run_maintenance(
+        conn_factory, db_names['pg_database'], db_names['pg_schema'],
+        pipeline_config.get('maintenance'),
     )
-    if analyze_result['errors']:
-        errors.extend(analyze_result['errors'])
+    vacuum_result = maintenance['vacuum']
+    analyze_result = maintenance['analyze']
+    errors.extend(vacuum_result['errors'])
+    errors.extend(analyze_result['errors'])
 
-    # --- 9. Capture pre-run row counts ---
+    # --- 8. Capture pre-run row counts ---
     count_tables = ['conflicts', 'conflictvisitmaps', 'conflictlog_staging', 'settings']
     logger.info("Preflight: Capturing pre-run row counts...")
     pre_counts = _capture_row_counts(
@@ -606,6 +478,7 @@ def run_task00_preflight(settings: Settings) -> dict:
         'sequence_sync': seq_sync,
         'vacuum': vacuum_result,
         'analyze': analyze_result,
+        'maintenance_skipped': maintenance['skipped'],
         'pre_run_counts': pre_counts,
         'preflight_data': preflight_data,
     }
@@ -4,17 +4,19 @@ Task 02.00 - Conflict Update Action
 Executes the v3 conflict detection and update pipeline:
   1. Fetch reference data from PostgreSQL (excluded agencies/SSNs, settings, mph)
   2. Build Snowflake SQL using v3 multi-step templates
-  3. Stream and process conflicts (batch updates with change detection)
+  3. Stream and process conflicts (batch updates with change detection);
+     Snowflake setup statements run asynchronously in dependency order
   4. Pair-precise stale cleanup
 """
 
 import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Callable
 
 from config.settings import Settings
-from lib.connections import ConnectionFactory
 from lib.query_builder import QueryBuilder
 from lib.conflict_processor import ConflictProcessor
+from lib.run_context import RunContext
 from lib.utils import get_logger
 
 logger = get_logger(__name__)
@@ -43,6 +45,7 @@ def _get_env_bool(name: str, default: Optional[bool] = None) -> Optional[bool]:
 def run_task02_00_conflict_update(
     settings: Settings,
     shutdown_check: Optional[Callable[[], bool]] = None,
+    run_context: Optional[RunContext] = None,
 ) -> dict:
     """
     Execute the full v3 conflict detection and update pipeline.
@@ -50,9 +53,9 @@ def run_task02_00_conflict_update(
     Args:
         settings: Configuration settings
         shutdown_check: Optional callback that returns True if shutdown requested
+        run_context: Reference data and Snowflake session shared with the
+            other actions of the run (a private one is used when omitted)
     """
-    sf_config = settings.get_snowflake_config()
-    pg_config = settings.get_postgres_config()
     task_params = settings.get_task02_parameters()
     db_names = settings.get_database_names()
 
@@ -73,6 +76,20 @@ def run_task02_00_conflict_update(
     enable_insert = _get_env_bool(
         'ENABLE_INSERT', task_params.get('enable_insert', True)
     )
+    enable_arrow_batches = _get_env_bool(
+        'ENABLE_ARROW_BATCHES', task_params.get('enable_arrow_batches', True)
+    )
+    existing_lookup_copy_threshold = _get_env_int(
+        'EXISTING_LOOKUP_COPY_THRESHOLD', task_params.get('existing_lookup_copy_threshold', 10000)
+    )
+    enable_content_hash = _get_env_bool(
+        'ENABLE_CONTENT_HASH', task_params.get('enable_content_hash', True)
+    )
+    pg_writer_workers = _get_env_int('PG_WRITER_WORKERS', task_params.get('pg_writer_workers', 1))
+    pipeline_queue_depth = _get_env_int(
+        'PIPELINE_QUEUE_DEPTH', task_params.get('pipeline_queue_depth', 2)
+    )
+    diff_mode = os.environ.get('DIFF_MODE', task_params.get('diff_mode', 'client'))
 
     logger.info("Configuration settings:")
     logger.info(f"  Lookback: {lookback_years} years, +{lookforward_days} days")
@@ -82,13 +99,25 @@ def run_task02_00_conflict_update(
     logger.info(f"  Asymmetric join: {'ENABLED' if enable_asymmetric_join else 'DISABLED'}")
     logger.info(f"  Stale cleanup: {'ENABLED' if enable_stale_cleanup else 'DISABLED'}")
     logger.info(f"  Insert new conflicts: {'ENABLED' if enable_insert else 'DISABLED'}")
+    logger.info(f"  Arrow batches: {'ENABLED' if enable_arrow_batches else 'DISABLED'}")
+    logger.info(f"  Existing lookup via key table above: {existing_lookup_copy_threshold} VisitIDs")
+    logger.info(f"  Content hash: {'ENABLED' if enable_content_hash else 'DISABLED'}")
+    logger.info(f"  Postgres writers: {pg_writer_workers} (queue depth {pipeline_queue_depth})")
+    logger.info(f"  Diff mode: {diff_mode}")
 
-    # Initialize connections
-    conn_factory = ConnectionFactory(sf_config, pg_config)
+    # Initialize connections (shared with the other actions of the run)
+    context = run_context or RunContext.from_settings(settings)
 
     try:
-        sf_manager = conn_factory.get_snowflake_manager()
-        pg_manager = conn_factory.get_postgres_manager()
+        pg_manager = context.connections.get_postgres_manager()
+
+        # Step 1: Fetch reference data from Postgres while the Snowflake
+        # session logs in and loads excluded_ssns_temp (every Snowflake
+        # statement needs the exclusions)
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            sf_session = executor.submit(context.snowflake_manager)
+            ref_data = context.reference_data()
+            sf_manager = sf_session.result()
 
         # Initialize query builder and processor
         query_builder = QueryBuilder()
@@ -98,10 +127,16 @@ def run_task02_00_conflict_update(
             enable_asymmetric_join=enable_asymmetric_join,
             enable_stale_cleanup=enable_stale_cleanup,
             enable_insert=enable_insert,
+            enable_arrow_batches=enable_arrow_batches,
+            existing_lookup_copy_threshold=existing_lookup_copy_threshold,
+            pg_writer_workers=pg_writer_workers,
+            pipeline_queue_depth=pipeline_queue_depth,
+            enable_content_hash=enable_content_hash,
+            diff_mode=diff_mode,
         )
 
-        # Step 1: Fetch reference data from Postgres
-        ref_data = processor.fetch_reference_data()
+        # Content hash needs the conflictvisitmaps."ContentHash" column
+        enable_content_hash = processor.check_content_hash_column()
 
         # Step 2: Build conflict detection query (v3 with temp tables)
         queries = query_builder.build_conflict_detection_query_v3(
@@ -114,7 +149,11 @@ def run_task02_00_conflict_update(
             lookforward_days=lookforward_days,
             lookback_hours=lookback_hours,
             enable_asymmetric_join=enable_asymmetric_join,
+            enable_content_hash=enable_content_hash,
         )
+        # excluded_ssns_temp is already loaded on the run's Snowflake session
+        queries.pop('step0_create', None)
+        queries.pop('step0_inserts', None)
 
         # Step 3: Stream and process conflicts
         # No timeout callback -- ECS has no 15-minute limit.
@@ -138,9 +177,16 @@ def run_task02_00_conflict_update(
                 'enable_asymmetric_join': enable_asymmetric_join,
                 'enable_stale_cleanup': enable_stale_cleanup,
                 'enable_insert': enable_insert,
+                'enable_arrow_batches': enable_arrow_batches,
+                'existing_lookup_copy_threshold': existing_lookup_copy_threshold,
+                'pg_writer_workers': pg_writer_workers,
+                'pipeline_queue_depth': pipeline_queue_depth,
+                'enable_content_hash': enable_content_hash,
+                'diff_mode': diff_mode,
             },
         }
 
     finally:
-        # Close connections
-        conn_factory.close_all()
+        # Close connections (a shared context is closed by the caller)
+        if run_context is None:
+            context.close()
@@ -15,7 +15,8 @@ ConflictProcessor because InService conflicts:
   - Do not require stale cleanup or asymmetric join optimisation
 
 Pipeline:
-  1. Fetch reference data from PostgreSQL (excluded agencies / SSNs)
+  1. Reference data from PostgreSQL (excluded agencies / SSNs), shared with
+     task02_00 through the run context
   2. Build Snowflake SQL (3 steps: visits temp, events temp, UNION ALL pairs)
   3. Stream and process results in batches (update existing, insert new)
 """
@@ -29,8 +30,8 @@ import psycopg2.extras
 import psycopg2.errors
 
 from config.settings import Settings
-from lib.connections import ConnectionFactory
 from lib.query_builder import QueryBuilder, INSERVICE_INSERT_COLUMN_MAP
+from lib.run_context import RunContext
 from lib.utils import get_logger, format_duration
 
 logger = get_logger(__name__)
@@ -161,12 +162,15 @@ def _build_update_params(
 def run_task02_01_inservice_conflict(
     settings: Settings,
     shutdown_check: Optional[Callable[[], bool]] = None,
+    run_context: Optional[RunContext] = None,
 ) -> dict:
     """
     Execute the InService conflict detection and update+insert pipeline.
+
+    run_context shares task02_00's reference data snapshot and Snowflake
+    session (excluded_ssns_temp already loaded); a private one is used when
+    omitted.
     """
-    sf_config = settings.get_snowflake_config()
-    pg_config = settings.get_postgres_config()
     task_params = settings.get_task02_parameters()
     db_names = settings.get_database_names()
 
@@ -188,7 +192,7 @@ def run_task02_01_inservice_conflict(
     logger.info(f"  Date range: -{lookback_years}Y to +{lookforward_days}D")
     logger.info(f"  Batch size: {batch_size}")
 
-    conn_factory = ConnectionFactory(sf_config, pg_config)
+    context = run_context or RunContext.from_settings(settings)
 
     stats = {
         'rows_fetched': 0,
@@ -201,26 +205,16 @@ def run_task02_01_inservice_conflict(
     }
 
     try:
-        sf_manager = conn_factory.get_snowflake_manager()
-        pg_manager = conn_factory.get_postgres_manager()
+        pg_manager = context.connections.get_postgres_manager()
         query_builder = QueryBuilder()
 
-        # ── Step A: Fetch reference data from Postgres ──────────────────
-        logger.info("Fetching reference data from PostgreSQL...")
-
-        query = query_builder.build_reference_query(
-            'pg_fetch_excluded_agencies.sql', db_names
-        )
-        agencies = pg_manager.execute_query(query, database=db_names['pg_database'])
-        excluded_agencies = [r[0] for r in agencies if r[0]]
+        # ── Step A: Reference data (the run's snapshot) ─────────────────
+        ref_data = context.reference_data()
+        excluded_agencies = ref_data['excluded_agencies']
+        excluded_ssns = ref_data['excluded_ssns']
         logger.info(f"  Excluded agencies: {len(excluded_agencies)}")
-
-        query = query_builder.build_reference_query(
-            'pg_fetch_excluded_ssns.sql', db_names
-        )
-        ssns = pg_manager.execute_query(query, database=db_names['pg_database'])
-        excluded_ssns = [r[0] for r in ssns if r[0]]
         logger.info(f"  Excluded SSNs: {len(excluded_ssns)}")
+        sf_manager = context.snowflake_manager()
 
         # ── Step B: Build Snowflake queries ─────────────────────────────
         queries = query_builder.build_inservice_queries(
@@ -230,6 +224,9 @@ def run_task02_01_inservice_conflict(
             lookback_years=lookback_years,
             lookforward_days=lookforward_days,
         )
+        # excluded_ssns_temp is already loaded on the run's Snowflake session
+        queries.pop('step0_create', None)
+        queries.pop('step0_inserts', None)
 
         # ── Step C: Build INSERT template (once) ────────────────────────
         insert_sql, insert_sf_columns = query_builder.build_inservice_insert_template(
@@ -241,14 +238,6 @@ def run_task02_01_inservice_conflict(
         schema = db_names['pg_schema']
 
         with sf_manager.streaming_cursor() as cursor:
-            # Step 0: excluded SSNs
-            if queries.get('step0_create'):
-                logger.info("STEP 0: Creating excluded_ssns temp table...")
-                cursor.execute(queries['step0_create'])
-                for stmt in queries.get('step0_inserts', []):
-                    cursor.execute(stmt)
-                logger.info(f"  Loaded {len(queries.get('step0_inserts', []))} batch(es)")
-
             # Step 1: inservice_visits temp table
             step1_start = time.time()
             logger.info("STEP 1: Creating inservice_visits temp table...")
@@ -324,7 +313,8 @@ def run_task02_01_inservice_conflict(
         }
 
     finally:
-        conn_factory.close_all()
+        if run_context is None:
+            context.close()
 
 
 # ---------------------------------------------------------------------------
@@ -6,7 +6,11 @@ stored procedures:
   - TASK_02_UPDATE_DATA_CONFLICTVISITMAPS_3.sql  (status cascade, aggregation)
   - TASK_03_INSERT_DATA_FROM_MAIN_TO_CONFLICTVISITMAPS_2.sql  (computed columns)
 
-Three groups of operations, all run sequentially (14 SQL steps + 1 fetch = 15 total):
+Three groups of operations (14 SQL steps + 1 fetch = 15 total). Each step
+declares the columns it reads and updates; steps run in this order unless
+they don't conflict, in which case up to max_parallel_steps overlap on
+separate connections. With chunk_by set, the row-by-row CVM UPDATEs run in
+VisitDate or "ID" slices that commit (and can resume) separately:
 
   Group B (Snowflake-dependent, delta via "Visit Updated Timestamp"):
     Step 0:  Fetch recently-deleted Visit IDs from Snowflake (delta=lookback_hours)
@@ -38,14 +42,19 @@ Reference SPs:
 """
 
 import os
+import re
+import threading
 import time
-from typing import Optional, Callable, Dict, Any, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import timedelta
+from typing import Optional, Callable, Dict, Any, List, Set, Tuple
 
 import psycopg2
 import psycopg2.extras
 
 from config.settings import Settings
 from lib.connections import ConnectionFactory
+from lib.scheduler import run_graph, format_critical_path
 from lib.utils import get_logger, format_duration
 
 logger = get_logger(__name__)
@@ -131,6 +140,132 @@ _CBRM_CASE = """(CASE
 END)::real"""
 
 
+# ---------------------------------------------------------------------------
+# Step read/write sets
+# Columns are declared as "table[column]" resources (lib/scheduler.py), so
+# steps touching different columns of a table do not conflict. Every UPDATE
+# also writes "table[row locks]": two UPDATEs of the same table would block
+# on each other's row locks (or deadlock) until one commits, so they keep
+# their order. Plain reads take no row locks.
+# ---------------------------------------------------------------------------
+
+CVM = 'conflictvisitmaps'
+CF = 'conflicts'
+
+_ROW_LOCKS = 'row locks'
+
+# Resource held by steps that use the _tmp_deleted_visits temp table, which
+# only exists on the session that loaded it
+_SESSION_RESOURCE = '_tmp_deleted_visits'
+
+_CONTACTS = ('AgencyContact', 'ProviderName', 'ConAgencyContact', 'ConProviderName')
+_TIME_COLUMNS = ('ShVTSTTime', 'ShVTENTime', 'CShVTSTTime', 'CShVTENTime')
+
+
+def _cols(table: str, *columns: str) -> List[str]:
+    """Column resources: _cols('conflicts', 'StatusFlag') -> ['conflicts[StatusFlag]']"""
+    return [f"{table}[{column}]" for column in columns]
+
+
+def _updates(table: str, *columns: str) -> List[str]:
+    """Write set of an UPDATE: the columns it sets plus the table's row locks."""
+    return _cols(table, *columns) + _cols(table, _ROW_LOCKS)
+
+
+def _step_item(step: Dict[str, Any], connections: int = 1) -> Dict[str, Any]:
+    """Scheduler item for a step (session steps hold the session exclusively)."""
+    writes = list(step['writes'])
+    if step.get('session'):
+        writes.append(_SESSION_RESOURCE)
+    return {'reads': step['reads'], 'writes': writes, 'connections': connections}
+
+
+# ---------------------------------------------------------------------------
+# Slices
+# Steps whose UPDATE decides each row on its own columns carry a slice
+# marker in their WHERE clause. Run whole, the marker is TRUE; chunked, it
+# is replaced by a VisitDate or "ID" range so each slice commits separately.
+# cascade_resolve_cvm counts sibling rows across dates and is never sliced.
+# ---------------------------------------------------------------------------
+
+CHUNK_MODES = ('visit_date', 'id')
+
+_SLICE_RE = re.compile(r"/\* slice (\w*) \*/ TRUE")
+
+# Seconds to wait before retrying a failed slice (times the attempt number)
+CHUNK_RETRY_DELAY_SECONDS = 5
+
+
+def _slice_marker(alias: str = '') -> str:
+    """Placeholder for a slice predicate on the UPDATE target (alias or bare columns)."""
+    return f"/* slice {alias} */ TRUE"
+
+
+def _is_sliceable(step: Dict[str, Any]) -> bool:
+    """Whether the step's SQL carries a slice marker."""
+    return bool(step.get('sql')) and _SLICE_RE.search(step['sql']) is not None
+
+
+def _apply_slice(sql: str, predicate: str) -> str:
+    """Replace the slice marker with a predicate ('{t}' stands for the column prefix)."""
+    return _SLICE_RE.sub(
+        lambda m: predicate.format(t=f"{m.group(1)}." if m.group(1) else ''), sql,
+    )
+
+
+def _plan_slices(
+    pg_conn,
+    schema: str,
+    chunk_by: str,
+    chunk_size: int,
+    lookback_years: int,
+    lookforward_days: int,
+) -> List[Tuple[str, str]]:
+    """
+    Split the date window (visit_date) or the "ID" range (id) into slices.
+
+    Args:
+        chunk_size: Days per slice (visit_date) or IDs per slice (id)
+
+    Returns:
+        (key, predicate) per slice; the key identifies the slice in the
+        progress table
+    """
+    cursor = pg_conn.cursor()
+    try:
+        if chunk_by == 'visit_date':
+            # Bounds from the database clock, same as the window in the SQL
+            cursor.execute(
+                f"SELECT (CURRENT_DATE - INTERVAL '{lookback_years} years')::date, "
+                f"(CURRENT_DATE + INTERVAL '{lookforward_days} days' + INTERVAL '1 day')::date"
+            )
+            start, end = cursor.fetchone()
+            slices = []
+            while start < end:
+                stop = min(start + timedelta(days=chunk_size), end)
+                slices.append((
+                    f"{start.isoformat()}..{stop.isoformat()}",
+                    f"{{t}}\"VisitDate\" >= DATE '{start.isoformat()}' "
+                    f"AND {{t}}\"VisitDate\" < DATE '{stop.isoformat()}'",
+                ))
+                start = stop
+        else:
+            cursor.execute(f'SELECT MIN("ID"), MAX("ID") FROM {schema}.conflictvisitmaps')
+            low, high = cursor.fetchone()
+            slices = []
+            if low is not None:
+                for start in range(int(low), int(high) + 1, chunk_size):
+                    stop = start + chunk_size
+                    slices.append((
+                        f"id:{start}..{stop}",
+                        f'{{t}}"ID" >= {start} AND {{t}}"ID" < {stop}',
+                    ))
+        pg_conn.commit()
+        return slices
+    finally:
+        cursor.close()
+
+
 # ---------------------------------------------------------------------------
 # Step definitions
 # ---------------------------------------------------------------------------
@@ -144,6 +279,10 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
       - description: human-readable description
       - group: 'A', 'B', or 'C'
       - sql: the SQL to execute (or None for custom-handler steps)
+      - reads / writes: column resources the SQL reads and updates; a step
+        waits only for earlier steps it conflicts with
+      - session: True if the step must run on the session holding
+        _tmp_deleted_visits
     """
     dw_cvm = _dw(lookback_years, lookforward_days)
     # For JOINs involving CVM, we need the date window on CVM."VisitDate"
@@ -158,6 +297,10 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'deleted_visits_cvm',
             'description': 'Mark CVM StatusFlag=D when VisitID or ConVisitID is a deleted visit',
             'group': 'B',
+            'reads': _cols(CVM, 'ID', 'VisitID', 'ConVisitID', 'StatusFlag', 'VisitDate', 'ResolveDate',
+                           'ConAgencyContact', 'ConProviderName'),
+            'writes': _updates(CVM, 'UpdateFlag', 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
+            'session': True,
             # UNION CTE splits the OR into two equi-joins so PostgreSQL can
             # use hash joins instead of a catastrophic nested-loop cross-join.
             # Cast DEL."VisitID"::uuid (94K rows) rather than CVM columns::text
@@ -192,6 +335,10 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'deleted_visits_cf',
             'description': 'Cascade StatusFlag=D to conflicts when VisitID is deleted',
             'group': 'B',
+            'reads': _cols(CVM, 'VisitID', 'CONFLICTID', 'VisitDate', 'AgencyContact', 'ProviderName')
+                     + _cols(CF, 'CONFLICTID', 'StatusFlag', 'ResolveDate'),
+            'writes': _updates(CF, 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
+            'session': True,
             'sql': f"""
                 UPDATE {schema}.conflicts AS CF
                 SET "StatusFlag" = 'D',
@@ -217,6 +364,9 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'ismissed_cascade_cf',
             'description': 'IsMissed cascade: set CF StatusFlag=R when CVM.IsMissed/ConIsMissed',
             'group': 'A',
+            'reads': _cols(CVM, 'CONFLICTID', 'IsMissed', 'ConIsMissed', 'VisitDate', *_CONTACTS)
+                     + _cols(CF, 'CONFLICTID', 'StatusFlag', 'ResolveDate'),
+            'writes': _updates(CF, 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
             'sql': f"""
                 UPDATE {schema}.conflicts AS CF
                 SET "StatusFlag" = 'R',
@@ -241,6 +391,8 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'ismissed_cascade_cvm',
             'description': 'IsMissed cascade: set CVM StatusFlag=R when IsMissed/ConIsMissed',
             'group': 'A',
+            'reads': _cols(CVM, 'IsMissed', 'ConIsMissed', 'StatusFlag', 'ResolveDate', 'VisitDate', *_CONTACTS),
+            'writes': _updates(CVM, 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
             'sql': f"""
                 UPDATE {schema}.conflictvisitmaps AS CVM
                 SET "StatusFlag" = 'R',
@@ -253,6 +405,7 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
                 WHERE (CVM."IsMissed" = TRUE OR CVM."ConIsMissed" = TRUE)
                   AND CVM."StatusFlag" NOT IN ('R', 'D')
                   AND {dw_cvm}
+                  AND {_slice_marker('CVM')}
             """,
         },
 
@@ -261,6 +414,9 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'updateflag_orphan_cleanup',
             'description': 'Resolve CVM with UpdateFlag=1 (orphaned re-detection markers)',
             'group': 'A',
+            'reads': _cols(CVM, 'UpdateFlag', 'StatusFlag', 'IsMissed', 'ConIsMissed', 'ResolveDate',
+                           'ResolvedBy', 'VisitDate', *_CONTACTS),
+            'writes': _updates(CVM, 'UpdateFlag', 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
             'sql': f"""
                 UPDATE {schema}.conflictvisitmaps AS CVM
                 SET "UpdateFlag" = NULL,
@@ -280,6 +436,7 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
                         END
                 WHERE CVM."UpdateFlag" = 1
                   AND {dw_cvm}
+                  AND {_slice_marker('CVM')}
             """,
         },
 
@@ -289,6 +446,8 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'aggregation_mark_updatedrflag',
             'description': 'Set UpdatedRFlag=1 on conflicts with CVM in date window',
             'group': 'A',
+            'reads': _cols(CVM, 'CONFLICTID', 'VisitDate') + _cols(CF, 'CONFLICTID', 'UpdatedRFlag'),
+            'writes': _updates(CF, 'UpdatedRFlag'),
             'sql': f"""
                 UPDATE {schema}.conflicts AS CF
                 SET "UpdatedRFlag" = '1'
@@ -308,6 +467,8 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'aggregation_status_u_propagation',
             'description': 'Propagate StatusFlag=U from CVM to parent conflicts',
             'group': 'A',
+            'reads': _cols(CVM, 'CONFLICTID', 'StatusFlag', 'VisitDate') + _cols(CF, 'CONFLICTID', 'StatusFlag'),
+            'writes': _updates(CF, 'StatusFlag', 'UpdatedRFlag'),
             'sql': f"""
                 WITH cf_with_u_cvm AS (
                     SELECT DISTINCT CVM."CONFLICTID"
@@ -333,6 +494,10 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'cascade_resolve_cvm',
             'description': 'Cascade-resolve CVM under R/D conflicts (singleton + near-all-resolved)',
             'group': 'A',
+            'reads': _cols(CVM, 'ID', 'CONFLICTID', 'StatusFlag', 'IsMissed', 'ConIsMissed', 'ResolveDate',
+                           'ResolvedBy', 'VisitDate', *_CONTACTS)
+                     + _cols(CF, 'CONFLICTID', 'StatusFlag'),
+            'writes': _updates(CVM, 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
             'sql': f"""
                 WITH active_cvm AS (
                     SELECT DISTINCT CVM."CONFLICTID"
@@ -377,6 +542,9 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'cascade_resolve_cf',
             'description': 'Cascade-resolve conflicts where all CVM are R/D',
             'group': 'A',
+            'reads': _cols(CVM, 'ID', 'CONFLICTID', 'StatusFlag', 'IsMissed', 'ConIsMissed', 'VisitDate', *_CONTACTS)
+                     + _cols(CF, 'CONFLICTID', 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
+            'writes': _updates(CF, 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
             'sql': f"""
                 WITH active_cf AS (
                     SELECT CF."CONFLICTID"
@@ -419,6 +587,8 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'noresponse_flag_cf',
             'description': 'Reset CF to N when NoResponseFlag=Yes (active statuses only)',
             'group': 'A',
+            'reads': _cols(CVM, 'CONFLICTID', 'VisitDate') + _cols(CF, 'CONFLICTID', 'NoResponseFlag', 'StatusFlag'),
+            'writes': _updates(CF, 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
             'sql': f"""
                 UPDATE {schema}.conflicts AS CF
                 SET "StatusFlag" = 'N',
@@ -443,6 +613,8 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'noresponse_flag_cvm',
             'description': 'Reset CVM to N when ConNoResponseFlag=Yes (active statuses only)',
             'group': 'A',
+            'reads': _cols(CVM, 'ConNoResponseFlag', 'StatusFlag', 'ResolveDate', 'ResolvedBy', 'VisitDate'),
+            'writes': _updates(CVM, 'StatusFlag', 'ResolveDate', 'ResolvedBy'),
             'sql': f"""
                 SET LOCAL enable_indexscan = OFF;
                 SET LOCAL enable_bitmapscan = OFF;
@@ -456,6 +628,7 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
                        OR CVM."ResolveDate" IS NOT NULL
                        OR CVM."ResolvedBy" IS NOT NULL)
                   AND {dw_cvm}
+                  AND {_slice_marker('CVM')}
             """,
         },
 
@@ -469,6 +642,11 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'computed_time_columns',
             'description': 'Compute ShVTSTTime/ShVTENTime/CShVTSTTime/CShVTENTime (COALESCE)',
             'group': 'C',
+            'reads': _cols(CVM, 'VisitDate', 'VisitStartTime', 'VisitEndTime', 'SchStartTime', 'SchEndTime',
+                           'InserviceStartDate', 'InserviceEndDate', 'ConVisitStartTime',
+                           'ConVisitEndTime', 'ConSchStartTime', 'ConSchEndTime',
+                           'ConInserviceStartDate', 'ConInserviceEndDate', *_TIME_COLUMNS),
+            'writes': _updates(CVM, *_TIME_COLUMNS),
             'sql': f"""
                 UPDATE {schema}.conflictvisitmaps
                 SET "ShVTSTTime"  = COALESCE("VisitStartTime", "SchStartTime", "InserviceStartDate"),
@@ -476,6 +654,7 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
                     "CShVTSTTime" = COALESCE("ConVisitStartTime", "ConSchStartTime", "ConInserviceStartDate"),
                     "CShVTENTime" = COALESCE("ConVisitEndTime", "ConSchEndTime", "ConInserviceEndDate")
                 WHERE {dw_cvm}
+                  AND {_slice_marker()}
                   AND (
                     "ShVTSTTime"  IS DISTINCT FROM COALESCE("VisitStartTime", "SchStartTime", "InserviceStartDate")
                     OR "ShVTENTime"  IS DISTINCT FROM COALESCE("VisitEndTime", "SchEndTime", "InserviceEndDate")
@@ -495,6 +674,11 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'computed_billed_rate',
             'description': 'Compute BilledRateMinute and ConBilledRateMinute',
             'group': 'C',
+            'reads': _cols(CVM, 'VisitDate', 'Billed', 'RateType', 'BillRateBoth', 'BilledHours',
+                           'SchStartTime', 'SchEndTime', 'ConBilled', 'ConRateType',
+                           'ConBillRateBoth', 'ConBilledHours', 'ConSchStartTime', 'ConSchEndTime',
+                           'BilledRateMinute', 'ConBilledRateMinute'),
+            'writes': _updates(CVM, 'BilledRateMinute', 'ConBilledRateMinute'),
             'sql': f"""
                 SET LOCAL enable_indexscan = OFF;
                 SET LOCAL enable_bitmapscan = OFF;
@@ -502,6 +686,7 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
                 SET "BilledRateMinute" = {_BRM_CASE},
                     "ConBilledRateMinute" = {_CBRM_CASE}
                 WHERE {dw_cvm}
+                  AND {_slice_marker()}
                   AND (COALESCE(ABS("BilledRateMinute" - {_BRM_CASE}), 1) > 0.0001
                        OR COALESCE(ABS("ConBilledRateMinute" - {_CBRM_CASE}), 1) > 0.0001)
             """,
@@ -512,6 +697,9 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
             'name': 'computed_reverse_uuid',
             'description': 'Compute ReverseUUID for new rows (WHERE IS NULL)',
             'group': 'C',
+            'reads': _cols(CVM, 'VisitDate', 'VisitID', 'AppVisitID', 'ConVisitID', 'ConAppVisitID',
+                           'ReverseUUID'),
+            'writes': _updates(CVM, 'ReverseUUID'),
             'sql': f"""
                 UPDATE {schema}.conflictvisitmaps
                 SET "ReverseUUID" = LEAST(
@@ -527,6 +715,7 @@ def _build_steps(schema: str, lookback_years: int, lookforward_days: int) -> Lis
                   AND "ConVisitID" IS NOT NULL
                   AND "ConAppVisitID" IS NOT NULL
                   AND {dw_cvm}
+                  AND {_slice_marker()}
             """,
         },
     ]
@@ -662,6 +851,338 @@ def _execute_step(
         cursor.close()
 
 
+# ---------------------------------------------------------------------------
+# Chunked execution
+# A sliced step runs its UPDATE once per slice on a small worker pool. Each
+# slice commits on its own (with its progress row, when the progress table
+# exists) and is retried on failure with a fresh connection. Slices already
+# recorded within chunk_resume_hours are skipped, so a rerun after a timeout
+# or SIGTERM resumes; the progress is cleared when a run completes cleanly,
+# and by scripts/main.py (reset_slice_progress) before any action that
+# rewrites Task 03's input tables, so a later pipeline never skips slices
+# over rows Task 02 has changed since. The steps only touch rows that would
+# change, so re-running a slice is harmless.
+# ---------------------------------------------------------------------------
+
+_PROGRESS_TABLE = 'task03_slice_progress'
+
+
+class _ConnectionPool:
+    """Worker connections: opened on demand, reused, closed by close_all()."""
+
+    def __init__(self, pg_manager, database: str, idle: Optional[List[Any]] = None):
+        self.pg_manager = pg_manager
+        self.database = database
+        self._idle = list(idle or [])
+        self._opened: List[Any] = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        conn = self.pg_manager.get_connection(database=self.database)
+        with self._lock:
+            self._opened.append(conn)
+        return conn
+
+    def release(self, conn) -> None:
+        with self._lock:
+            self._idle.append(conn)
+
+    def discard(self, conn) -> None:
+        """Drop a connection that failed; close it if the pool opened it."""
+        with self._lock:
+            if conn not in self._opened:
+                return
+            self._opened.remove(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def close_all(self) -> None:
+        with self._lock:
+            opened, self._opened, self._idle = self._opened, [], []
+        for conn in opened:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def _progress_table_exists(pg_conn, schema: str) -> bool:
+    cursor = pg_conn.cursor()
+    try:
+        cursor.execute(
+            """
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = %s AND table_name = %s
+            """,
+            (schema, _PROGRESS_TABLE),
+        )
+        exists = cursor.fetchone() is not None
+        pg_conn.commit()
+        return exists
+    finally:
+        cursor.close()
+
+
+def _load_slice_progress(pg_conn, schema: str, resume_hours: int) -> Optional[Dict[str, Set[str]]]:
+    """
+    Slices completed within resume_hours, per step.
+
+    Returns:
+        step name -> slice keys, or None when the progress table is missing
+        (chunks still commit separately, but a rerun starts over)
+    """
+    if not _progress_table_exists(pg_conn, schema):
+        logger.warning(
+            f"  ⚠ {schema}.{_PROGRESS_TABLE} does not exist -- slices will not resume "
+            f"(see postgres/create_task03_slice_progress.sql)"
+        )
+        return None
+
+    cursor = pg_conn.cursor()
+    try:
+        cursor.execute(
+            f"""
+            SELECT step_name, slice_key FROM {schema}.{_PROGRESS_TABLE}
+            WHERE completed_at >= now() - make_interval(hours => %s)
+            """,
+            (resume_hours,),
+        )
+        completed: Dict[str, Set[str]] = {}
+        for step_name, slice_key in cursor.fetchall():
+            completed.setdefault(step_name, set()).add(slice_key)
+        pg_conn.commit()
+        return completed
+    finally:
+        cursor.close()
+
+
+def _clear_slice_progress(pg_conn, schema: str) -> None:
+    """Forget recorded slices (after a clean run the next run starts fresh)."""
+    cursor = pg_conn.cursor()
+    try:
+        cursor.execute(f"DELETE FROM {schema}.{_PROGRESS_TABLE}")
+        pg_conn.commit()
+    finally:
+        cursor.close()
+
+
+def reset_slice_progress(settings: Settings) -> None:
+    """
+    Forget recorded slices before an upstream action rewrites the rows Task 03
+    reads; a slice completed before that rewrite must run again.
+    """
+    db_names = settings.get_database_names()
+    schema = db_names['pg_schema']
+    conn_factory = ConnectionFactory(settings.get_snowflake_config(), settings.get_postgres_config())
+    try:
+        pg_conn = conn_factory.get_postgres_manager().get_connection(database=db_names['pg_database'])
+        try:
+            if _progress_table_exists(pg_conn, schema):
+                _clear_slice_progress(pg_conn, schema)
+                logger.info(f"  ✓ Cleared {schema}.{_PROGRESS_TABLE} (upstream data is about to change)")
+        finally:
+            pg_conn.close()
+    finally:
+        conn_factory.close_all()
+
+
+def _execute_slice(
+    pg_conn,
+    sql: str,
+    statement_timeout_s: int,
+    progress_table: Optional[str] = None,
+    step_name: Optional[str] = None,
+    slice_key: Optional[str] = None,
+) -> int:
+    """Run one slice and record it as done in the same transaction; returns the rowcount."""
+    cursor = pg_conn.cursor()
+    try:
+        cursor.execute(f"SET LOCAL statement_timeout = '{statement_timeout_s}s'")
+        cursor.execute(sql)
+        rowcount = cursor.rowcount
+        if progress_table:
+            cursor.execute(
+                f"""
+                INSERT INTO {progress_table} (step_name, slice_key, rows_affected, completed_at)
+                VALUES (%s, %s, %s, now())
+                ON CONFLICT (step_name, slice_key)
+                DO UPDATE SET rows_affected = EXCLUDED.rows_affected, completed_at = now()
+                """,
+                (step_name, slice_key, rowcount),
+            )
+        pg_conn.commit()
+        return rowcount
+    except Exception:
+        pg_conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def _execute_chunked_step(
+    pool: _ConnectionPool,
+    step: Dict[str, Any],
+    step_num: int,
+    total_steps: int,
+    chunking: Dict[str, Any],
+    statement_timeout_s: int = 1800,
+    shutdown_check: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    """Execute a sliced step and return the same result dict as _execute_step.
+
+    Args:
+        chunking: 'slices' ((key, predicate) list from _plan_slices),
+            'workers', 'retries', 'progress_table' (qualified name or None)
+            and 'completed' (step name -> slice keys already done)
+        statement_timeout_s: Timeout per slice transaction
+    """
+    start = time.time()
+    label = f"[{step_num}/{total_steps}]"
+    name = step['name']
+    done = chunking['completed'].get(name, set())
+    pending = [(key, predicate) for key, predicate in chunking['slices'] if key not in done]
+    resumed = len(chunking['slices']) - len(pending)
+    retries = chunking['retries']
+
+    logger.info(
+        f"  {label} {name}: EXECUTING in {len(pending)} slices"
+        f"{f' ({resumed} already done)' if resumed else ''} -- {step['description']}"
+    )
+
+    def run_slice(key: str, predicate: str):
+        sql = _apply_slice(step['sql'], predicate)
+        error = None
+        for attempt in range(1, retries + 2):
+            if shutdown_check and shutdown_check():
+                return key, None, 'shutdown requested'
+            conn = None
+            try:
+                conn = pool.acquire()
+                rows = _execute_slice(
+                    conn, sql, statement_timeout_s, chunking['progress_table'], name, key,
+                )
+            except Exception as e:
+                error = e
+                if conn is not None:
+                    pool.discard(conn)
+                logger.warning(f"    ⚠ {name} [{key}]: attempt {attempt}/{retries + 1} failed -- {e}")
+                if attempt <= retries:
+                    time.sleep(CHUNK_RETRY_DELAY_SECONDS * attempt)
+                continue
+            pool.release(conn)
+            logger.info(f"    {name} [{key}]: {rows:,} rows")
+            return key, rows, None
+        return key, None, str(error)
+
+    rows_affected = 0
+    failed: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(chunking['workers'], 1)) as executor:
+        futures = [executor.submit(run_slice, key, predicate) for key, predicate in pending]
+        for future in as_completed(futures):
+            key, rows, error = future.result()
+            if error is None:
+                rows_affected += rows
+            else:
+                failed[key] = error
+
+    duration = time.time() - start
+    result = {
+        'name': name,
+        'group': step['group'],
+        'rows_affected': rows_affected,
+        'duration_seconds': round(duration, 2),
+        'status': 'ok' if not failed else 'error',
+        'slices': len(chunking['slices']),
+        'slices_resumed': resumed,
+        'slices_failed': len(failed),
+    }
+    if failed:
+        key = sorted(failed)[0]
+        result['error'] = f"{len(failed)} slice(s) failed, first {key}: {failed[key]}"
+        logger.error(f"  {label} {name}: FAILED ({duration:.1f}s) -- {result['error']}")
+    else:
+        logger.info(
+            f"  {label} {name}: {rows_affected:,} rows ({duration:.1f}s, "
+            f"{len(pending)} slices) -- {step['description']}"
+        )
+    return result
+
+
+def _run_steps(
+    pg_manager,
+    database: str,
+    session_conn,
+    steps: List[Dict[str, Any]],
+    first_step_num: int,
+    total_steps: int,
+    max_parallel: int = 1,
+    shutdown_check: Optional[Callable[[], bool]] = None,
+    share_session: bool = False,
+    chunking: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """Run steps in dependency order, up to max_parallel connections at a time.
+
+    Session steps run on session_conn; the others on worker connections,
+    opened as needed, reused, and closed at the end. With chunking, sliced
+    steps run through _execute_chunked_step and count their slice workers
+    against max_parallel. A step that fails does not stop the steps after
+    it (same as running them in a loop).
+
+    Args:
+        share_session: Also hand session_conn to non-session steps (only
+            safe when no step in the list is a session step)
+        chunking: See _execute_chunked_step (None = run every step whole)
+
+    Returns:
+        lib.scheduler.run_graph records; each result is the step's
+        _execute_step dict
+    """
+    pool = _ConnectionPool(pg_manager, database, idle=[session_conn] if share_session else [])
+
+    def chunked(step: Dict[str, Any]) -> bool:
+        return chunking is not None and _is_sliceable(step)
+
+    def run_step(i: int) -> Dict[str, Any]:
+        step = steps[i]
+        if step.get('session'):
+            return _execute_step(session_conn, step, first_step_num + i, total_steps)
+        if chunked(step):
+            return _execute_chunked_step(
+                pool, step, first_step_num + i, total_steps, chunking,
+                shutdown_check=shutdown_check,
+            )
+
+        conn = pool.acquire()
+        try:
+            return _execute_step(conn, step, first_step_num + i, total_steps)
+        finally:
+            pool.release(conn)
+
+    try:
+        return run_graph(
+            [step['name'] for step in steps],
+            [_step_item(step, chunking['workers'] if chunked(step) else 1) for step in steps],
+            run_step,
+            connection_budget=max_parallel,
+            should_stop=shutdown_check,
+        )
+    finally:
+        pool.close_all()
+
+
+def _group_span(steps: List[Dict[str, Any]], records: List[Dict[str, Any]], group: str) -> float:
+    """Seconds from the first start to the last end of a group's steps (0 if none ran)."""
+    ran = [r for s, r in zip(steps, records) if s['group'] == group and r['start'] is not None]
+    if not ran:
+        return 0.0
+    return max(r['end'] for r in ran) - min(r['start'] for r in ran)
+
+
 # ---------------------------------------------------------------------------
 # Main action
 # ---------------------------------------------------------------------------
@@ -673,7 +1194,8 @@ def run_task03_status_management(
     """
     Execute post-conflict-creation status management and computed columns.
 
-    Runs steps sequentially:
+    Runs the steps in dependency order (see _build_steps reads/writes);
+    with max_parallel_steps > 1 steps that don't conflict overlap:
       - Group B: Deleted visit handling (Snowflake delta + PG) -- uses
                  "Visit Updated Timestamp" delta filter (lookback_hours) to
                  scan only recently-changed rows from 25.5M-row deleted table.
@@ -703,6 +1225,29 @@ def run_task03_status_management(
     else:
         enable_phase_b = task_params.get('enable_phase_b', False)
 
+    # Steps whose read/write sets don't conflict run at the same time, each
+    # on its own connection. 1 = one step at a time, in step order.
+    # Config: task03_parameters.max_parallel_steps   Env override: MAX_PARALLEL_STEPS
+    max_parallel_steps = max(
+        _get_env_int('MAX_PARALLEL_STEPS', task_params.get('max_parallel_steps', 1)), 1,
+    )
+
+    # Large CVM UPDATEs can run in VisitDate or "ID" slices that commit
+    # separately ('' = whole statements): chunk_days per visit_date slice,
+    # chunk_id_range IDs per id slice. Config: task03_parameters.chunk_*
+    # Env override: CHUNK_BY, CHUNK_DAYS, CHUNK_ID_RANGE, ...
+    chunk_by = (os.environ.get('CHUNK_BY') or task_params.get('chunk_by') or '').strip().lower()
+    if chunk_by and chunk_by not in CHUNK_MODES:
+        raise ValueError(f"Unknown chunk_by {chunk_by!r} (expected one of {', '.join(CHUNK_MODES)})")
+    if chunk_by == 'id':
+        chunk_size = _get_env_int('CHUNK_ID_RANGE', task_params.get('chunk_id_range', 500000))
+    else:
+        chunk_size = _get_env_int('CHUNK_DAYS', task_params.get('chunk_days', 31))
+    chunk_size = max(chunk_size, 1)
+    chunk_workers = max(_get_env_int('CHUNK_WORKERS', task_params.get('chunk_workers', 2)), 1)
+    chunk_retries = max(_get_env_int('CHUNK_RETRIES', task_params.get('chunk_retries', 2)), 0)
+    chunk_resume_hours = _get_env_int('CHUNK_RESUME_HOURS', task_params.get('chunk_resume_hours', 12))
+
     logger.info("=" * 60)
     logger.info("TASK 03 - Status Management & Computed Columns")
     logger.info("=" * 60)
@@ -711,6 +1256,12 @@ def run_task03_status_management(
     logger.info(f"  Delta lookback: {lookback_hours}h")
     logger.info(f"  Schema: {schema}")
     logger.info(f"  Phase B (deleted visits): {'ENABLED' if enable_phase_b else 'DISABLED'}")
+    logger.info(f"  Parallel steps: {max_parallel_steps}")
+    if chunk_by:
+        logger.info(f"  Chunking: by {chunk_by}, size {chunk_size}, {chunk_workers} workers, "
+                    f"{chunk_retries} retries, resume window {chunk_resume_hours}h")
+    else:
+        logger.info("  Chunking: DISABLED")
 
     conn_factory = ConnectionFactory(sf_config, pg_config)
     step_results: List[Dict[str, Any]] = []
@@ -746,7 +1297,7 @@ def run_task03_status_management(
         logger.info("PHASE B: Deleted visit handling")
         logger.info("-" * 60)
 
-        phase_b_start = time.time()
+        fetch_dur = 0.0
 
         if not enable_phase_b:
             logger.info("  SKIPPED -- Phase B disabled (set enable_phase_b=true in config or ENABLE_PHASE_B=1 env var)")
@@ -759,6 +1310,7 @@ def run_task03_status_management(
             })
         else:
             step_num += 1
+            fetch_phase_start = time.time()
             try:
                 sf_manager = conn_factory.get_snowflake_manager()
 
@@ -805,70 +1357,71 @@ def run_task03_status_management(
                     'error': str(e),
                 })
                 total_errors += 1
-
-            # Execute steps 1-2 (deleted visit UPDATEs)
-            for step in steps:
-                if step['group'] != 'B':
-                    continue
-                step_num += 1
-                if shutdown_check and shutdown_check():
-                    logger.warning("Shutdown requested -- stopping status management")
-                    break
-                result = _execute_step(pg_conn, step, step_num, total_steps)
-                step_results.append(result)
-                if result['status'] == 'error':
-                    total_errors += 1
-
-        phase_b_dur = time.time() - phase_b_start
-        logger.info(f"  Phase B complete ({phase_b_dur:.1f}s)")
+            fetch_dur = time.time() - fetch_phase_start
 
         # ==================================================================
-        # PHASE A: Status cascade (pure PostgreSQL)
+        # SQL steps (Phase B UPDATEs, Phase A cascade, Phase C columns)
         # ==================================================================
         logger.info("")
         logger.info("-" * 60)
-        logger.info("PHASE A: Status cascade")
+        logger.info(f"SQL steps: {len(active_steps)} (up to {max_parallel_steps} in parallel)")
         logger.info("-" * 60)
 
-        phase_a_start = time.time()
-        for step in steps:
-            if step['group'] != 'A':
+        chunking = None
+        if chunk_by and any(_is_sliceable(step) for step in active_steps):
+            slices = _plan_slices(pg_conn, schema, chunk_by, chunk_size, lookback_years, lookforward_days)
+            completed = _load_slice_progress(pg_conn, schema, chunk_resume_hours)
+            chunking = {
+                'slices': slices,
+                'workers': chunk_workers,
+                'retries': chunk_retries,
+                'progress_table': f"{schema}.{_PROGRESS_TABLE}" if completed is not None else None,
+                'completed': completed or {},
+            }
+            resumable = sum(len(keys) for keys in chunking['completed'].values())
+            logger.info(f"  {len(slices)} slices per chunked step"
+                        f"{f', {resumable} slice(s) done by an earlier run' if resumable else ''}")
+
+        graph_start = time.time()
+        records = _run_steps(
+            pg_manager, db_names['pg_database'], pg_conn, active_steps,
+            first_step_num=step_num + 1,
+            total_steps=total_steps,
+            max_parallel=max_parallel_steps,
+            shutdown_check=shutdown_check,
+            share_session=not enable_phase_b,
+            chunking=chunking,
+        )
+        graph_dur = time.time() - graph_start
+
+        for step, record in zip(active_steps, records):
+            if record['status'] == 'skipped':
+                step_results.append({
+                    'name': step['name'],
+                    'group': step['group'],
+                    'rows_affected': 0,
+                    'duration_seconds': 0,
+                    'status': 'skipped',
+                })
                 continue
-            step_num += 1
-            if shutdown_check and shutdown_check():
-                logger.warning("Shutdown requested -- stopping status management")
-                break
-            result = _execute_step(pg_conn, step, step_num, total_steps)
+            result = dict(record['result'], depends_on=record['deps'])
             step_results.append(result)
             if result['status'] == 'error':
                 total_errors += 1
 
-        phase_a_dur = time.time() - phase_a_start
-        logger.info(f"  Phase A complete ({phase_a_dur:.1f}s)")
-
-        # ==================================================================
-        # PHASE C: Computed columns
-        # ==================================================================
-        logger.info("")
-        logger.info("-" * 60)
-        logger.info("PHASE C: Computed columns")
-        logger.info("-" * 60)
+        if any(record['status'] == 'skipped' for record in records):
+            logger.warning("Shutdown requested -- stopped status management before all steps ran")
 
-        phase_c_start = time.time()
-        for step in steps:
-            if step['group'] != 'C':
-                continue
-            step_num += 1
-            if shutdown_check and shutdown_check():
-                logger.warning("Shutdown requested -- stopping status management")
-                break
-            result = _execute_step(pg_conn, step, step_num, total_steps)
-            step_results.append(result)
-            if result['status'] == 'error':
-                total_errors += 1
+        # A clean run needs no resume point; the next run starts fresh
+        if chunking and chunking['progress_table'] and total_errors == 0 and all(
+            record['status'] == 'success' for record in records
+        ):
+            _clear_slice_progress(pg_conn, schema)
 
-        phase_c_dur = time.time() - phase_c_start
-        logger.info(f"  Phase C complete ({phase_c_dur:.1f}s)")
+        # Phases overlap, so each is reported as the span its steps covered
+        phase_b_dur = fetch_dur + _group_span(active_steps, records, 'B')
+        phase_a_dur = _group_span(active_steps, records, 'A')
+        phase_c_dur = _group_span(active_steps, records, 'C')
 
         # ==================================================================
         # Clean up temp table
@@ -884,7 +1437,8 @@ def run_task03_status_management(
         # ==================================================================
         # Summary
         # ==================================================================
-        _log_summary(step_results, phase_b_dur, phase_a_dur, phase_c_dur, total_errors)
+        _log_summary(step_results, phase_b_dur, phase_a_dur, phase_c_dur, total_errors,
+                     wall_dur=fetch_dur + graph_dur, path_lines=format_critical_path(records))
 
         status = 'completed' if total_errors == 0 else 'partial'
         return {
@@ -898,6 +1452,7 @@ def run_task03_status_management(
                 'phase_b_duration': round(phase_b_dur, 2),
                 'phase_a_duration': round(phase_a_dur, 2),
                 'phase_c_duration': round(phase_c_dur, 2),
+                'steps_duration': round(graph_dur, 2),
             },
             'step_results': step_results,
             'parameters': {
@@ -905,6 +1460,9 @@ def run_task03_status_management(
                 'lookforward_days': lookforward_days,
                 'lookback_hours': lookback_hours,
                 'enable_phase_b': enable_phase_b,
+                'max_parallel_steps': max_parallel_steps,
+                'chunk_by': chunk_by or None,
+                'chunk_size': chunk_size if chunk_by else None,
             },
         }
 
@@ -922,9 +1480,11 @@ def _log_summary(
     phase_a_dur: float,
     phase_c_dur: float,
     total_errors: int,
+    wall_dur: Optional[float] = None,
+    path_lines: Optional[List[str]] = None,
 ) -> None:
     """Log a human-readable summary of the status management run."""
-    total_dur = phase_b_dur + phase_a_dur + phase_c_dur
+    total_dur = wall_dur if wall_dur is not None else phase_b_dur + phase_a_dur + phase_c_dur
 
     logger.info("")
     logger.info("=" * 60)
@@ -952,4 +1512,6 @@ def _log_summary(
     total_rows = sum(r.get('rows_affected', 0) for r in step_results)
     logger.info(f"  Total rows affected: {total_rows:,}")
     logger.info(f"  Errors: {total_errors}")
+    for line in path_lines or []:
+        logger.info(f"  {line}")
     logger.info("=" * 60)
@@ -2,8 +2,9 @@
 Task 99 - Postflight Cleanup
 
 Post-run cleanup and reporting after the pipeline tasks complete:
-  1. VACUUM all tables in the conflict_dev schema
-  2. ANALYZE all tables in the conflict_dev schema
+  1-2. VACUUM / ANALYZE tables in the conflict_dev schema whose
+     pg_stat_user_tables counters crossed the pipeline.maintenance thresholds
+     (in parallel; other tables are skipped)
   3. Set InProgressFlag = 0 in the settings table
   4. Refresh the materialized view (CONCURRENTLY)
   5. Re-enable the pg_cron job with the schedule saved during preflight
@@ -19,6 +20,7 @@ from typing import Dict, Any, List, Optional
 from config.settings import Settings
 from lib.connections import ConnectionFactory
 from lib.email_sender import send_pipeline_email
+from lib.maintenance import run_maintenance
 from lib.utils import get_logger, format_duration
 
 logger = get_logger(__name__)
@@ -122,132 +124,6 @@ def _enable_pg_cron_job(
         return False
 
 
-def _vacuum_schema_tables(
-    conn_factory: ConnectionFactory,
-    db_name: str,
-    schema: str,
-) -> Dict[str, Any]:
-    """
-    Run VACUUM on all tables in the schema.
-
-    VACUUM cannot run inside a transaction, so we use autocommit mode.
-    """
-    pg_manager = conn_factory.get_postgres_manager()
-    result = {'tables_vacuumed': 0, 'errors': [], 'duration_seconds': 0}
-
-    try:
-        # First, get the list of tables in normal mode
-        pg_conn = pg_manager.get_connection(db_name)
-        cursor = pg_conn.cursor()
-        cursor.execute(
-            """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = %s AND table_type = 'BASE TABLE'
-            ORDER BY table_name
-            """,
-            (schema,),
-        )
-        tables = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        pg_conn.close()
-
-        if not tables:
-            logger.info(f"  No tables found in {schema} -- skipping VACUUM")
-            return result
-
-        # Now run VACUUM in autocommit mode
-        start = time.time()
-        pg_conn = pg_manager.get_connection(db_name, autocommit=True)
-        cursor = pg_conn.cursor()
-
-        for table in tables:
-            try:
-                cursor.execute(f'VACUUM {schema}."{table}"')
-                result['tables_vacuumed'] += 1
-            except Exception as e:
-                result['errors'].append(f"{table}: {e}")
-                logger.warning(f"    VACUUM {schema}.{table} failed: {e}")
-
-        cursor.close()
-        pg_conn.close()
-
-        duration = time.time() - start
-        result['duration_seconds'] = round(duration, 2)
-        logger.info(
-            f"  VACUUM completed: {result['tables_vacuumed']}/{len(tables)} tables "
-            f"in {format_duration(duration)}"
-        )
-
-    except Exception as e:
-        logger.error(f"  VACUUM failed: {e}")
-        result['errors'].append(str(e))
-
-    return result
-
-
-def _analyze_schema_tables(
-    conn_factory: ConnectionFactory,
-    db_name: str,
-    schema: str,
-) -> Dict[str, Any]:
-    """
-    Run ANALYZE on all tables in the schema to update query planner statistics.
-
-    ANALYZE can run inside a transaction but we use autocommit for consistency.
-    """
-    pg_manager = conn_factory.get_postgres_manager()
-    result = {'tables_analyzed': 0, 'errors': [], 'duration_seconds': 0}
-
-    try:
-        pg_conn = pg_manager.get_connection(db_name)
-        cursor = pg_conn.cursor()
-        cursor.execute(
-            """
-            SELECT table_name
-            FROM information_schema.tables
-            WHERE table_schema = %s AND table_type = 'BASE TABLE'
-            ORDER BY table_name
-            """,
-            (schema,),
-        )
-        tables = [row[0] for row in cursor.fetchall()]
-        cursor.close()
-        pg_conn.close()
-
-        if not tables:
-            logger.info(f"  No tables found in {schema} -- skipping ANALYZE")
-            return result
-
-        start = time.time()
-        pg_conn = pg_manager.get_connection(db_name, autocommit=True)
-        cursor = pg_conn.cursor()
-
-        for table in tables:
-            try:
-                cursor.execute(f'ANALYZE {schema}."{table}"')
-                result['tables_analyzed'] += 1
-            except Exception as e:
-                result['errors'].append(f"{table}: {e}")
-                logger.warning(f"    ANALYZE {schema}.{table} failed: {e}")
-
-        cursor.close()
-        pg_conn.close()
-
-        duration = time.time() - start
-        result['duration_seconds'] = round(duration, 2)
-        logger.info(
-            f"  ANALYZE completed: {result['tables_analyzed']}/{len(tables)} tables "
-            f"in {format_duration(duration)}"
-        )
-
-    except Exception as e:
-        logger.error(f"  ANALYZE failed: {e}")
-        result['errors'].append(str(e))
-
-    return result
-
-
 def _set_in_progress_flag(
     conn_factory: ConnectionFactory,
     db_name: str,
@@ -417,21 +293,16 @@ def run_task99_postflight(settings: Settings, pipeline_results: Optional[List[di
     conn_factory = ConnectionFactory(sf_config, pg_config)
     warnings = []
 
-    # --- 1. VACUUM ---
-    logger.info("Postflight: Running VACUUM on all tables...")
-    vacuum_result = _vacuum_schema_tables(
-        conn_factory, db_names['pg_database'], db_names['pg_schema']
-    )
-    if vacuum_result['errors']:
-        warnings.extend(vacuum_result['errors'])
-
-    # --- 2. ANALYZE ---
-    logger.info("Postflight: Running ANALYZE on all tables...")
-    analyze_result = _analyze_schema_tables(
-        conn_factory, db_names['pg_database'], db_names['pg_schema']
+    # --- 1-2. VACUUM / ANALYZE (only tables past the thresholds) ---
+    logger.info("Postflight: Running VACUUM/ANALYZE on tables that need it...")
+    maintenance = run_maintenance(
+        conn_factory, db_names['pg_database'], db_names['pg_schema'],
+        pipeline_config.get('maintenance'),
     )
-    if analyze_result['errors']:
-        warnings.extend(analyze_result['errors'])
+    vacuum_result = maintenance['vacuum']
+    analyze_result = maintenance['analyze']
+    warnings.extend(vacuum_result['errors'])
+    warnings.extend(analyze_result['errors'])
 
     # --- 3. Set InProgressFlag = 0 ---
     logger.info("Postflight: Setting InProgressFlag = 0...")
@@ -526,6 +397,7 @@ def run_task99_postflight(settings: Settings, pipeline_results: Optional[List[di
         'pg_cron_reenabled': cron_enabled,
         'vacuum': vacuum_result,
         'analyze': analyze_result,
+        'maintenance_skipped': maintenance['skipped'],
         'in_progress_flag_cleared': flag_set,
         'post_run_counts': post_counts,
         'pre_run_counts': pre_counts,
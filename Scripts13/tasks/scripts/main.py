@@ -10,8 +10,11 @@ ACTION environment variable supports:
   - Comma-separated: ACTION=validate_config,test_connections,task02_00_conflict_update
   - Default:         ACTION not set  →  runs full DEFAULT_ACTIONS pipeline
 
-Actions are executed sequentially. If any action fails, execution stops
-and the container exits with code 1.
+Actions run in dependency order: each waits for the earlier actions whose
+tables it conflicts with (see ACTION_REGISTRY), independent actions run
+concurrently within pipeline.action_connection_budget (1 = sequential).
+If any action fails, no further actions start and the container exits with
+code 1. A critical-path report is printed with the execution summary.
 
 Special actions:
   - task00_preflight:  Pre-run validation, disables pg_cron, sets InProgressFlag=1
@@ -25,12 +28,14 @@ import os
 import time
 import signal
 from pathlib import Path
-from typing import Dict, Callable, List
+from typing import Any, Dict, List, Optional
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from config.settings import Settings
+from lib.run_context import RunContext
+from lib.scheduler import run_graph, format_critical_path, resources_overlap
 from lib.utils import get_logger, format_duration
 
 # Action implementations -- pattern: from scripts.actions.<key> import run_<key>
@@ -38,7 +43,7 @@ from scripts.actions.task00_preflight import run_task00_preflight
 from scripts.actions.task01_copy_to_staging import run_task01_copy_to_staging
 from scripts.actions.task02_00_conflict_update import run_task02_00_conflict_update
 from scripts.actions.task02_01_inservice_conflict import run_task02_01_inservice_conflict
-from scripts.actions.task03_status_management import run_task03_status_management
+from scripts.actions.task03_status_management import run_task03_status_management, reset_slice_progress
 from scripts.actions.task99_postflight import run_task99_postflight
 from scripts.actions.validate_config import run_validate_config
 from scripts.actions.test_connections import run_test_connections
@@ -70,6 +75,11 @@ signal.signal(signal.SIGTERM, _handle_sigterm)
 # Postflight reads this to generate the status email and row-count deltas.
 _pipeline_results: List[dict] = []
 
+# Run-scoped reference data and Snowflake session (excluded_ssns_temp loaded
+# once), shared by task02_00 and task02_01 so both see the same snapshot.
+# Built lazily on first use; closed at the end of main().
+_run_context: Optional[RunContext] = None
+
 
 def _run_task99_postflight_wrapper(settings: Settings) -> dict:
     """Wrapper that passes accumulated pipeline results to postflight."""
@@ -78,12 +88,16 @@ def _run_task99_postflight_wrapper(settings: Settings) -> dict:
 
 def _run_task02_00_conflict_update_wrapper(settings: Settings) -> dict:
     """Wrapper that passes shutdown check to conflict update."""
-    return run_task02_00_conflict_update(settings, shutdown_check=lambda: _shutdown_requested)
+    return run_task02_00_conflict_update(
+        settings, shutdown_check=lambda: _shutdown_requested, run_context=_run_context
+    )
 
 
 def _run_task02_01_inservice_conflict_wrapper(settings: Settings) -> dict:
     """Wrapper that passes shutdown check to InService conflict processing."""
-    return run_task02_01_inservice_conflict(settings, shutdown_check=lambda: _shutdown_requested)
+    return run_task02_01_inservice_conflict(
+        settings, shutdown_check=lambda: _shutdown_requested, run_context=_run_context
+    )
 
 
 def _run_task03_status_management_wrapper(settings: Settings) -> dict:
@@ -105,21 +119,104 @@ DEFAULT_ACTIONS = [
     'task99_postflight',
 ]
 
-# Maps action names to handler functions.
+# Maps action names to handlers and the PostgreSQL tables they touch.
 # Pattern: key = file stem, handler = run_<key> (or wrapper around it).
 # Add new actions here as they are implemented.
-ACTION_REGISTRY: Dict[str, Callable[[Settings], dict]] = {
-    'task00_preflight': run_task00_preflight,
-    'task01_copy_to_staging': run_task01_copy_to_staging,
-    'task02_00_conflict_update': _run_task02_00_conflict_update_wrapper,
-    'task02_01_inservice_conflict': _run_task02_01_inservice_conflict_wrapper,
-    'task03_status_management': _run_task03_status_management_wrapper,
-    'task99_postflight': _run_task99_postflight_wrapper,
-    'validate_config': run_validate_config,
-    'test_connections': run_test_connections,
+#
+#   reads / writes: tables (or "table[partition]" row subsets, see
+#                   lib/scheduler.py). An action waits for every earlier
+#                   action in the list it conflicts with; others overlap.
+#   barrier:        conflicts with every other action (gates, and the
+#                   pre/postflight steps that toggle pg_cron/InProgressFlag
+#                   and VACUUM any table)
+#   connections:    PostgreSQL connections held at peak, counted against
+#                   pipeline.action_connection_budget
+#
+# task02_00 and task02_01 both declare the whole conflictvisitmaps: task02_01
+# matches existing rows on (VisitID, ConVisitID) whatever their InServiceFlag,
+# task02_00 inserts into the same table, and both reset its "ID" sequence, so
+# their row sets are not disjoint and they run one after the other.
+ACTION_REGISTRY: Dict[str, Dict[str, Any]] = {
+    'task00_preflight': {
+        'handler': run_task00_preflight,
+        'barrier': True,
+        'connections': 5,
+    },
+    'task01_copy_to_staging': {
+        'handler': run_task01_copy_to_staging,
+        'reads': ['conflicts', 'conflictvisitmaps'],
+        'writes': ['payer_provider_reminders', 'conflictlog_staging'],
+        'connections': 1,
+    },
+    'task02_00_conflict_update': {
+        'handler': _run_task02_00_conflict_update_wrapper,
+        'reads': ['excluded_agency', 'excluded_ssn', 'settings', 'mph', 'conflictvisitmaps'],
+        'writes': ['conflictvisitmaps'],
+        'connections': 6,
+    },
+    'task02_01_inservice_conflict': {
+        'handler': _run_task02_01_inservice_conflict_wrapper,
+        'reads': ['excluded_agency', 'excluded_ssn', 'conflictvisitmaps'],
+        'writes': ['conflictvisitmaps'],
+        'connections': 2,
+    },
+    'task03_status_management': {
+        'handler': _run_task03_status_management_wrapper,
+        'reads': ['conflicts', 'conflictvisitmaps'],
+        'writes': ['conflicts', 'conflictvisitmaps'],
+        # Session connection + task03_parameters.max_parallel_steps workers
+        'connections': 4,
+    },
+    'task99_postflight': {
+        'handler': _run_task99_postflight_wrapper,
+        'barrier': True,
+        'connections': 5,
+    },
+    'validate_config': {
+        'handler': run_validate_config,
+        'barrier': True,
+        'connections': 0,
+    },
+    'test_connections': {
+        'handler': run_test_connections,
+        'barrier': True,
+        'connections': 1,
+    },
 }
 
 
+def _rewrites_task03_inputs(action: str) -> bool:
+    """
+    Whether an action writes a table Task 03 reads. Task 03's recorded slice
+    progress is cleared before such an action runs, so a later Task 03 run
+    does not skip slices over rows that have since changed.
+    """
+    if action == 'task03_status_management':
+        return False
+    task03_reads = ACTION_REGISTRY['task03_status_management']['reads']
+    return any(
+        resources_overlap(written, read)
+        for written in ACTION_REGISTRY[action].get('writes', ())
+        for read in task03_reads
+    )
+
+
+def _get_connection_budget(settings: Settings) -> int:
+    """
+    PostgreSQL connections concurrently running actions may hold.
+
+    ACTION_CONNECTION_BUDGET env var > pipeline.action_connection_budget >
+    1 (one action at a time).
+    """
+    value = os.environ.get('ACTION_CONNECTION_BUDGET')
+    if value is not None:
+        try:
+            return int(value)
+        except ValueError:
+            logger.warning(f"Invalid integer for env var ACTION_CONNECTION_BUDGET={value!r}")
+    return int(settings.get_pipeline_config().get('action_connection_budget', 1))
+
+
 def _parse_actions(action_str: str) -> List[str]:
     """
     Parse the ACTION env var into a list of action names.
@@ -145,6 +242,7 @@ def main():
     action sequentially, and exits with code 0 if all succeed or 1 if
     any action fails.
     """
+    global _run_context
     start_time = time.time()
     action_str = os.environ.get('ACTION', '').strip()
     actions = _parse_actions(action_str)
@@ -174,60 +272,78 @@ def main():
         logger.info(f"  Snowflake: {sf_config['account']} / {db_names['sf_database']}.{db_names['sf_schema']}")
         logger.info(f"  Postgres: {pg_config['host']} / {db_names['pg_database']}.{db_names['pg_schema']}")
 
-        # Execute actions sequentially
+        # Shared by the actions that take a run context
+        _run_context = RunContext.from_settings(settings)
+
+        # Execute actions in dependency order (independent ones concurrently)
         results = []
         _pipeline_results.clear()  # Reset for this run
+        budget = _get_connection_budget(settings)
+        specs = [ACTION_REGISTRY[action] for action in actions]
+        logger.info(f"Action connection budget: {budget}")
 
-        for i, action in enumerate(actions, 1):
-            action_start = time.time()
-            label = f"[{i}/{len(actions)}] " if len(actions) > 1 else ""
+        def run_action(index: int) -> dict:
+            action = actions[index]
+            label = f"[{index + 1}/{len(actions)}] " if len(actions) > 1 else ""
 
             logger.info("")
             logger.info("-" * 70)
             logger.info(f"{label}RUNNING: {action}")
             logger.info("-" * 70)
 
-            # Check for SIGTERM between actions
-            if _shutdown_requested:
-                logger.warning(f"Shutdown requested -- skipping {action} and remaining actions")
-                break
-
-            result = ACTION_REGISTRY[action](settings)
+            action_start = time.time()
+            if _rewrites_task03_inputs(action):
+                reset_slice_progress(settings)
+            result = specs[index]['handler'](settings)
             action_duration = time.time() - action_start
             result['action'] = action
             result['duration_seconds'] = round(action_duration, 2)
-            results.append(result)
-            _pipeline_results.append(result)  # Accumulate for postflight
 
             status = result.get('status', 'unknown')
             logger.info(f"{label}FINISHED: {action} -- {status} ({format_duration(action_duration)})")
+            return result
+
+        def finish_action(index: int, result: dict):
+            results.append(result)
+            _pipeline_results.append(result)  # Accumulate for postflight
 
-            # Stop on failure -- but still run postflight if it's in the pipeline
+            status = result.get('status', 'unknown')
             if status not in ('success', 'completed'):
-                logger.error(f"Action '{action}' failed with status '{status}' -- stopping pipeline")
-
-                # Run postflight for cleanup even on failure (re-enable pg_cron,
-                # clear InProgressFlag) if it's in the remaining actions
-                remaining = actions[i:]  # actions after the failed one (i is 1-based, already incremented)
-                if 'task99_postflight' in remaining:
-                    logger.info("")
-                    logger.info("-" * 70)
-                    logger.info("RUNNING: task99_postflight (cleanup after failure)")
-                    logger.info("-" * 70)
-                    try:
-                        pf_start = time.time()
-                        pf_result = ACTION_REGISTRY['task99_postflight'](settings)
-                        pf_duration = time.time() - pf_start
-                        pf_result['action'] = 'task99_postflight'
-                        pf_result['duration_seconds'] = round(pf_duration, 2)
-                        results.append(pf_result)
-                        _pipeline_results.append(pf_result)
-                        logger.info(f"FINISHED: task99_postflight -- {pf_result.get('status')} "
-                                    f"({format_duration(pf_duration)})")
-                    except Exception as pf_err:
-                        logger.error(f"Postflight cleanup failed: {pf_err}")
-
-                break
+                logger.error(f"Action '{actions[index]}' failed with status '{status}' -- stopping pipeline")
+
+        # SIGTERM stops new actions from starting; running ones get the
+        # shutdown check and wind down on their own
+        records = run_graph(
+            actions, specs, run_action,
+            connection_budget=budget,
+            is_success=lambda result: result.get('status') in ('success', 'completed'),
+            on_finish=finish_action,
+            should_stop=lambda: _shutdown_requested,
+        )
+
+        # Run postflight for cleanup even on failure (re-enable pg_cron,
+        # clear InProgressFlag) if it was requested but never started
+        failed = any(record['status'] == 'failed' for record in records)
+        postflight_skipped = any(
+            record['name'] == 'task99_postflight' and record['start'] is None for record in records
+        )
+        if failed and postflight_skipped:
+            logger.info("")
+            logger.info("-" * 70)
+            logger.info("RUNNING: task99_postflight (cleanup after failure)")
+            logger.info("-" * 70)
+            try:
+                pf_start = time.time()
+                pf_result = ACTION_REGISTRY['task99_postflight']['handler'](settings)
+                pf_duration = time.time() - pf_start
+                pf_result['action'] = 'task99_postflight'
+                pf_result['duration_seconds'] = round(pf_duration, 2)
+                results.append(pf_result)
+                _pipeline_results.append(pf_result)
+                logger.info(f"FINISHED: task99_postflight -- {pf_result.get('status')} "
+                            f"({format_duration(pf_duration)})")
+            except Exception as pf_err:
+                logger.error(f"Postflight cleanup failed: {pf_err}")
 
         # Final summary
         total_duration = time.time() - start_time
@@ -242,6 +358,7 @@ def main():
         summary_lines.append("=" * 70)
         for r in results:
             summary_lines.append(f"  {r['action']}: {r['status']} ({r['duration_seconds']}s)")
+        summary_lines.extend(format_critical_path(records))
         summary_lines.append(f"Overall: {overall_status}")
         summary_lines.append(f"Total duration: {format_duration(total_duration)}")
         summary_lines.append("=" * 70)
@@ -254,6 +371,11 @@ def main():
         logger.error(f"Container execution failed after {format_duration(duration)}: {e}", exc_info=True)
         sys.exit(1)
 
+    finally:
+        if _run_context is not None:
+            _run_context.close()
+            _run_context = None
+
 
 if __name__ == '__main__':
     main()
@@ -325,5 +325,5 @@ SELECT
   "ContractType", "ConContractType",
   "P_PStatus", "ConP_PStatus", "PA_PStatus", "ConPA_PStatus",
   "BillRateNonBilled", "ConBillRateNonBilled", "BillRateBoth", "ConBillRateBoth",
-  "FederalTaxNumber", "ConFederalTaxNumber"
+  "FederalTaxNumber", "ConFederalTaxNumber"{CONTENT_HASH_SELECT}
 FROM same_state_conflicts;
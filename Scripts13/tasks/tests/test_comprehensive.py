@@ -270,47 +270,37 @@ class TestConditionalFlags:
 
 
 # ============================================================================
-# 3. StatusFlag Logic (using actual build_update_statement)
+# 3. StatusFlag Logic (using actual build_staged_update)
 # ============================================================================
 
 class TestStatusFlagLogic:
-    """Tests StatusFlag preservation via actual build_update_statement."""
+    """Tests StatusFlag preservation in the set-based UPDATE's CASE expression."""
 
-    def _build(self, processor, existing_status):
+    def _build(self, processor, columns=('VisitID', 'ConVisitID', 'CONFLICTID', 'SSN', 'StatusFlag')):
         db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        conflict_row = {
-            'VisitID': 'V123', 'ConVisitID': 'V456', 'CONFLICTID': 'C-001',
-            'SSN': '111-22-3333', 'StatusFlag': 'N',
-        }
-        existing_row = {'StatusFlag': existing_status, 'SameSchTimeFlag': 'N'}
-        sql, params = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        return sql, params
-
-    def test_status_n_becomes_u(self, processor):
-        sql, params = self._build(processor, 'N')
-        assert '"StatusFlag" = %s' in sql
-        assert 'U' in params
+        return processor.query_builder.build_staged_update(db, list(columns))
 
-    def test_status_w_preserved(self, processor):
-        sql, params = self._build(processor, 'W')
-        assert '"StatusFlag" = %s' not in sql
+    def test_status_preserves_w_and_i(self, processor):
+        sql = self._build(processor)['update_sql']
+        assert (
+            '"StatusFlag" = CASE WHEN CVM."StatusFlag" IN (\'W\', \'I\') '
+            'THEN CVM."StatusFlag" ELSE \'U\' END'
+        ) in sql
 
-    def test_status_i_preserved(self, processor):
-        sql, params = self._build(processor, 'I')
-        assert '"StatusFlag" = %s' not in sql
+    def test_status_not_staged(self, processor):
+        """StatusFlag comes from the CASE, never from the Snowflake value."""
+        staged = self._build(processor)
+        assert 'StatusFlag' not in staged['sf_columns']
+        assert 'S."StatusFlag"' not in staged['update_sql']
 
-    def test_status_u_stays_u(self, processor):
-        sql, params = self._build(processor, 'U')
-        assert '"StatusFlag" = %s' in sql
-        assert 'U' in params
+    def test_status_untouched_when_not_in_result(self, processor):
+        sql = self._build(processor, ('VisitID', 'ConVisitID', 'SSN'))['update_sql']
+        assert '"StatusFlag" =' not in sql
 
-    def test_status_r_becomes_u(self, processor):
-        """Resolved ('R') records should be re-activated to 'U'."""
-        sql, params = self._build(processor, 'R')
-        assert '"StatusFlag" = %s' in sql
-        assert 'U' in params
+    def test_conflictid_never_overwritten(self, processor):
+        staged = self._build(processor)
+        assert 'CONFLICTID' not in staged['sf_columns']
+        assert '"CONFLICTID"' not in staged['update_sql']
 
 
 # ============================================================================
@@ -318,45 +308,28 @@ class TestStatusFlagLogic:
 # ============================================================================
 
 class TestColumnNameMapping:
+    def _build(self, processor, *columns):
+        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
+        return processor.query_builder.build_staged_update(db, ['VisitID', 'ConVisitID', *columns])
+
     def test_etaravleminutes_mapped(self, processor):
         """ETATravleMinutes (Snowflake typo) should map to ETATravelMinutes in Postgres."""
-        conflict_row = {
-            'VisitID': 'V1', 'ConVisitID': 'V2', 'CONFLICTID': 'C-1',
-            'ETATravleMinutes': 42.5,
-        }
-        existing_row = {'StatusFlag': 'N'}
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, params = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        assert '"ETATravelMinutes"' in sql
-        assert '"ETATravleMinutes"' not in sql
+        staged = self._build(processor, 'ETATravleMinutes')
+        assert '"ETATravelMinutes" = S."ETATravelMinutes"' in staged['update_sql']
+        assert '"ETATravleMinutes"' not in staged['update_sql']
+        assert '"ETATravelMinutes"' in staged['copy_sql']
+        # Values are still read from the Snowflake key
+        assert 'ETATravleMinutes' in staged['sf_columns']
 
     def test_schvisittimesame_mapped(self, processor):
         """SchVisitTimeSame should map to SchAndVisitTimeSameFlag."""
-        conflict_row = {
-            'VisitID': 'V1', 'ConVisitID': 'V2', 'CONFLICTID': 'C-1',
-            'SchVisitTimeSame': 'Y',
-        }
-        existing_row = {'StatusFlag': 'N', 'SchAndVisitTimeSameFlag': 'N'}
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, params = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        assert '"SchAndVisitTimeSameFlag"' in sql
+        staged = self._build(processor, 'SchVisitTimeSame')
+        assert '"SchAndVisitTimeSameFlag" = S."SchAndVisitTimeSameFlag"' in staged['update_sql']
 
     def test_unmapped_column_passes_through(self, processor):
         """Columns not in the map should appear as-is."""
-        conflict_row = {
-            'VisitID': 'V1', 'ConVisitID': 'V2',
-            'CaregiverID': 'CG-100',
-        }
-        existing_row = {'StatusFlag': 'N'}
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, params = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        assert '"CaregiverID"' in sql
+        staged = self._build(processor, 'CaregiverID')
+        assert '"CaregiverID" = S."CaregiverID"' in staged['update_sql']
 
 
 # ============================================================================
@@ -657,103 +630,114 @@ class TestSSNBatchInserts:
 # ============================================================================
 
 class TestUpdateStatementStructure:
-    def test_where_clause_has_visitid_and_convisitid(self, processor):
-        conflict_row = {
-            'VisitID': 'V1', 'ConVisitID': 'V2', 'CONFLICTID': 'C-1', 'SSN': '123',
-        }
-        existing_row = {'StatusFlag': 'N'}
+    def _build(self, processor, *columns):
         db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, params = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
+        return processor.query_builder.build_staged_update(
+            db, ['VisitID', 'ConVisitID', 'CONFLICTID', *columns]
         )
-        assert '"VisitID" = %s' in sql
-        assert '"ConVisitID" = %s' in sql
-        assert 'cd.conflictvisitmaps' in sql
+
+    def test_where_clause_has_visitid_and_convisitid(self, processor):
+        sql = self._build(processor, 'SSN')['update_sql']
+        assert 'CVM."VisitID" = S."VisitID"' in sql
+        assert 'cd.conflictvisitmaps AS CVM' in sql
+        assert 'FROM _tmp_cvm_updates AS S' in sql
 
     def test_where_clause_handles_null_convisitid(self, processor):
-        """WHERE clause includes IS NULL fallback for ConVisitID."""
-        conflict_row = {'VisitID': 'V1', 'ConVisitID': None, 'CONFLICTID': 'C-1'}
-        existing_row = {'StatusFlag': 'N'}
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, params = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        assert '"ConVisitID" IS NULL' in sql
+        """NULL ConVisitID matches NULL, like the old IS NULL fallback."""
+        sql = self._build(processor)['update_sql']
+        assert 'CVM."ConVisitID" IS NOT DISTINCT FROM S."ConVisitID"' in sql
+        assert ' OR ' not in sql
 
     def test_always_sets_updateflag_null(self, processor):
-        conflict_row = {'VisitID': 'V1', 'ConVisitID': 'V2', 'CONFLICTID': 'C-1'}
-        existing_row = {'StatusFlag': 'N'}
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, _ = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        assert '"UpdateFlag" = NULL' in sql
+        assert '"UpdateFlag" = NULL' in self._build(processor)['update_sql']
 
     def test_always_sets_updateddate(self, processor):
-        conflict_row = {'VisitID': 'V1', 'ConVisitID': 'V2', 'CONFLICTID': 'C-1'}
-        existing_row = {'StatusFlag': 'N'}
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, _ = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        assert '"UpdatedDate" = CURRENT_TIMESTAMP' in sql
+        assert '"UpdatedDate" = CURRENT_TIMESTAMP' in self._build(processor)['update_sql']
 
     def test_always_sets_resolvedate_null(self, processor):
-        conflict_row = {'VisitID': 'V1', 'ConVisitID': 'V2', 'CONFLICTID': 'C-1'}
-        existing_row = {'StatusFlag': 'N'}
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, _ = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        assert '"ResolveDate" = NULL' in sql
+        assert '"ResolveDate" = NULL' in self._build(processor)['update_sql']
 
-    def test_conditional_flag_preserved_when_y(self, processor):
-        """Flag with existing='Y' should NOT appear in SET clause."""
-        conflict_row = {
-            'VisitID': 'V1', 'ConVisitID': 'V2', 'CONFLICTID': 'C-1',
-            'SameSchTimeFlag': 'Y',
-        }
-        existing_row = {'StatusFlag': 'N', 'SameSchTimeFlag': 'Y'}
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, params = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        assert '"SameSchTimeFlag" = %s' not in sql
+    def test_conditional_flag_only_while_n(self, processor):
+        """Flags take the new value only while the current value is 'N'."""
+        sql = self._build(processor, 'SameSchTimeFlag')['update_sql']
+        assert (
+            '"SameSchTimeFlag" = CASE WHEN CVM."SameSchTimeFlag" = \'N\' '
+            'THEN S."SameSchTimeFlag" ELSE CVM."SameSchTimeFlag" END'
+        ) in sql
 
-    def test_conditional_flag_updated_when_n(self, processor):
-        """Flag with existing='N' should appear in SET clause."""
-        conflict_row = {
-            'VisitID': 'V1', 'ConVisitID': 'V2', 'CONFLICTID': 'C-1',
-            'SameSchTimeFlag': 'Y',
-        }
-        existing_row = {'StatusFlag': 'N', 'SameSchTimeFlag': 'N'}
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, params = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
+    def test_multiple_conditional_flags(self, processor):
+        """Every rule flag gets its own CASE; business columns stay unconditional."""
+        sql = self._build(processor, 'SameSchTimeFlag', 'DistanceFlag', 'ProviderID')['update_sql']
+        assert 'CASE WHEN CVM."SameSchTimeFlag" = \'N\'' in sql
+        assert 'CASE WHEN CVM."DistanceFlag" = \'N\'' in sql
+        assert '"ProviderID" = S."ProviderID"' in sql
+
+    def test_staging_table_copies_column_types(self, processor):
+        staged = self._build(processor, 'ProviderID')
+        assert staged['create_sql'] == (
+            'CREATE TEMP TABLE _tmp_cvm_updates ON COMMIT DELETE ROWS AS '
+            'SELECT "VisitID", "ConVisitID", "ProviderID" FROM cd.conflictvisitmaps WITH NO DATA'
         )
-        assert '"SameSchTimeFlag" = %s' in sql
+        assert staged['sf_columns'] == ['VisitID', 'ConVisitID', 'ProviderID']
+
+    def test_execute_updates_copies_rows_and_runs_one_update(self, processor):
+        """Changed rows are COPYed (one per key) and applied in one statement."""
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.fetchall.return_value = [('V1', 'C1'), ('V2', None)]
+        processor.pg_connection = conn
+        rows = [
+            {'VisitID': 'V1', 'ConVisitID': 'C1', 'ProviderID': 'old'},
+            {'VisitID': 'V2', 'ConVisitID': None, 'ProviderID': 'a\tb'},
+            {'VisitID': 'V1', 'ConVisitID': 'C1', 'ProviderID': 'new'},
+        ]
+        copied = {}
+        cursor.copy_expert.side_effect = lambda sql, buf: copied.update(sql=sql, data=buf.read())
+
+        # V1/C1 was updated twice by the per-row UPDATEs
+        assert processor._execute_updates_with_commit(rows) == 3
+
+        assert copied['data'] == 'V1\tC1\tnew\nV2\t\\N\ta\\tb\n'
+        statements = [c.args[0] for c in cursor.execute.call_args_list]
+        assert sum('UPDATE conflict_dev.conflictvisitmaps AS CVM' in sql for sql in statements) == 1
+        assert conn.commit.call_count == 2  # staging table creation + batch
+
+        # Second batch reuses the staging table
+        processor._execute_updates_with_commit(rows[:1])
+        creates = [sql for sql in (c.args[0] for c in cursor.execute.call_args_list) if 'CREATE TEMP' in sql]
+        assert len(creates) == 1
+
+    def test_duplicate_keys_fold_like_sequential_updates(self, processor):
+        """A rule flag set by an earlier duplicate is not reset by a later one."""
+        rows = [
+            {'VisitID': 'V1', 'ConVisitID': 'C1', 'SameSchTimeFlag': 'Y', 'DistanceFlag': 'N', 'ProviderID': 'a'},
+            {'VisitID': 'V1', 'ConVisitID': 'C1', 'SameSchTimeFlag': 'N', 'DistanceFlag': 'Y', 'ProviderID': 'b'},
+            {'VisitID': 'V1', 'ConVisitID': 'C1', 'SameSchTimeFlag': 'N', 'DistanceFlag': 'N', 'ProviderID': 'c'},
+            {'VisitID': 'V2', 'ConVisitID': None, 'SameSchTimeFlag': 'N', 'DistanceFlag': 'N', 'ProviderID': 'd'},
+        ]
 
-    def test_multiple_conditional_flags(self, processor):
-        """Multiple flags should be independently conditional."""
-        conflict_row = {
-            'VisitID': 'V1', 'ConVisitID': 'V2', 'CONFLICTID': 'C-1',
-            'SameSchTimeFlag': 'Y', 'DistanceFlag': 'Y', 'SameVisitTimeFlag': 'N',
-        }
-        existing_row = {
-            'StatusFlag': 'N',
-            'SameSchTimeFlag': 'N',      # will update -> Y
-            'DistanceFlag': 'Y',          # won't update (already Y)
-            'SameVisitTimeFlag': 'N',     # new is N, existing is N -> no change
+        folded, repeats = processor._fold_update_rows(rows)
+
+        # Stored 'N' -> first non-'N' value sticks; business columns: last wins
+        assert folded[0] == {
+            'VisitID': 'V1', 'ConVisitID': 'C1', 'SameSchTimeFlag': 'Y', 'DistanceFlag': 'Y', 'ProviderID': 'c',
         }
-        db = {'pg_database': 'cm', 'pg_schema': 'cd'}
-        sql, params = processor.query_builder.build_update_statement(
-            conflict_row, db, existing_row
-        )
-        assert '"SameSchTimeFlag" = %s' in sql
-        assert '"DistanceFlag" = %s' not in sql
-        # SameVisitTimeFlag: existing='N', new='N' -> same value, but code checks if existing_flag == 'N'
-        # and then adds the column unconditionally -> it WILL appear in SET
-        assert '"SameVisitTimeFlag" = %s' in sql
+        assert folded[1] is rows[3]
+        assert repeats == {('V1', 'C1'): 3, ('V2', None): 1}
+
+    def test_update_count_only_counts_matched_keys(self, processor):
+        """Duplicates of a key with no CONFLICTVISITMAPS row add nothing."""
+        conn = MagicMock()
+        cursor = conn.cursor.return_value
+        cursor.fetchall.return_value = [('V2', None)]
+        processor.pg_connection = conn
+        rows = [
+            {'VisitID': 'V1', 'ConVisitID': 'C1', 'ProviderID': 'a'},
+            {'VisitID': 'V1', 'ConVisitID': 'C1', 'ProviderID': 'b'},
+            {'VisitID': 'V2', 'ConVisitID': None, 'ProviderID': 'c'},
+        ]
+
+        assert processor._execute_updates_with_commit(rows) == 1
 
 
 # ============================================================================
@@ -1989,3 +1973,1109 @@ class TestTask03OnlyStepsFilter:
         assert len(filtered) == 2
         groups = {s['group'] for s in filtered}
         assert groups == {'B', 'C'}
+
+
+class TestMaintenancePlanner:
+    """Tests for the pg_stat_user_tables-driven VACUUM/ANALYZE planner."""
+
+    def _stats(self, table, live=100_000, dead=0, mods=0, analyzed=True):
+        return {
+            'table': table, 'n_live_tup': live, 'n_dead_tup': dead,
+            'n_mod_since_analyze': mods, 'analyzed': analyzed,
+        }
+
+    def test_quiet_table_is_skipped_with_reason(self):
+        from lib.maintenance import plan_maintenance
+        plan = plan_maintenance([self._stats('settings', live=1, mods=1)])
+        assert plan['settings']['vacuum'] is False
+        assert plan['settings']['analyze'] is False
+        assert 'below thresholds' in plan['settings']['reason']
+
+    def test_changes_past_threshold_trigger_analyze_only(self):
+        """100k live rows: analyze threshold is 1,000 + 5% = 6,000 changes."""
+        from lib.maintenance import plan_maintenance
+        plan = plan_maintenance([
+            self._stats('conflictvisitmaps', mods=6_001),
+            self._stats('conflicts', mods=6_000),
+        ])
+        assert plan['conflictvisitmaps']['analyze'] is True
+        assert plan['conflictvisitmaps']['vacuum'] is False
+        assert plan['conflicts']['analyze'] is False
+
+    def test_dead_tuples_past_threshold_trigger_vacuum(self):
+        """100k live rows: vacuum threshold is 10,000 + 10% = 20,000 dead tuples."""
+        from lib.maintenance import plan_maintenance
+        plan = plan_maintenance([self._stats('conflictlog_staging', dead=20_001, mods=50_000)])
+        assert plan['conflictlog_staging']['vacuum'] is True
+        assert plan['conflictlog_staging']['analyze'] is True
+
+    def test_never_analyzed_table_with_rows_is_analyzed(self):
+        from lib.maintenance import plan_maintenance
+        plan = plan_maintenance([
+            self._stats('mph', live=10, analyzed=False),
+            self._stats('empty', live=0, analyzed=False),
+        ])
+        assert plan['mph']['analyze'] is True
+        assert plan['mph']['reason'] == 'never analyzed'
+        assert plan['empty']['analyze'] is False
+
+    def test_config_overrides_thresholds(self):
+        from lib.maintenance import plan_maintenance
+        plan = plan_maintenance(
+            [self._stats('conflicts', mods=10)],
+            {'analyze_min_changes': 0, 'analyze_change_fraction': 0},
+        )
+        assert plan['conflicts']['analyze'] is True
+
+    def test_run_only_touches_selected_tables(self):
+        """Skipped tables get no statement; selected ones use their own autocommit connection."""
+        from lib.maintenance import run_maintenance
+        stats_rows = [
+            ('conflicts', 100_000, 30_000, 10_000, True),
+            ('settings', 1, 0, 0, True),
+        ]
+        stats_conn = MagicMock()
+        stats_conn.cursor.return_value.fetchall.return_value = stats_rows
+        work_conn = MagicMock()
+
+        pg_manager = MagicMock()
+        pg_manager.get_connection.side_effect = (
+            lambda db, autocommit=False: work_conn if autocommit else stats_conn
+        )
+        conn_factory = MagicMock()
+        conn_factory.get_postgres_manager.return_value = pg_manager
+
+        result = run_maintenance(conn_factory, 'conflict_management', 'conflict_dev')
+
+        statements = [c.args[0] for c in work_conn.cursor.return_value.execute.call_args_list]
+        assert statements == ['VACUUM (ANALYZE) conflict_dev."conflicts"']
+        assert result['vacuum']['tables_vacuumed'] == 1
+        assert result['analyze']['tables_analyzed'] == 1
+        assert 'settings' in result['skipped']
+
+
+class TestColumnarChangeDetection:
+    """Arrow batch path must make the same decisions as _has_changes."""
+
+    FLAGS = {
+        'SameSchTimeFlag': 'N', 'SameVisitTimeFlag': 'N',
+        'SchAndVisitTimeSameFlag': 'N', 'SchOverAnotherSchTimeFlag': 'N',
+        'VisitTimeOverAnotherVisitTimeFlag': 'N',
+        'SchTimeOverVisitTimeFlag': 'N', 'DistanceFlag': 'N',
+    }
+
+    def _existing(self, visit_id, con_visit_id, **overrides):
+        from datetime import datetime
+        row = {
+            'VisitID': visit_id, 'ConVisitID': con_visit_id, 'CONFLICTID': 7,
+            'StatusFlag': 'N', **self.FLAGS,
+            'ProviderID': 'P1', 'ConProviderID': 'P2',
+            'SchStartTime': datetime(2026, 1, 1, 9, 0), 'PayerID': None,
+        }
+        row.update(overrides)
+        return row
+
+    @staticmethod
+    def _columns(rows):
+        """Columnar form returned by _fetch_existing_records."""
+        return {col: [row.get(col) for row in rows] for col in rows[0]}
+
+    def _pairs(self):
+        """(new_row, existing_row) pairs covering every rule in _has_changes."""
+        from datetime import datetime
+        return [
+            (self._existing('V1', 'C1'), self._existing('V1', 'C1')),
+            (self._existing('V2', 'C2', SameSchTimeFlag='Y'), self._existing('V2', 'C2')),
+            (self._existing('V3', 'C3', SameSchTimeFlag='N'), self._existing('V3', 'C3', SameSchTimeFlag='Y')),
+            (self._existing('V4', 'C4', ProviderID='P9'), self._existing('V4', 'C4')),
+            (self._existing('V5', None), self._existing('V5', None)),
+            (self._existing('V6', 'C6', SchStartTime=datetime(2026, 1, 1, 9, 30)), self._existing('V6', 'C6')),
+            (self._existing('V7', 'C7', PayerID='PAY'), self._existing('V7', 'C7')),
+            (self._existing('V8', 'C8', DistanceFlag=None), self._existing('V8', 'C8')),
+        ]
+
+    def test_matches_has_changes_row_by_row(self, processor):
+        import pyarrow as pa
+        from lib import columnar
+        from lib.conflict_processor import (
+            COMPARED_COLUMNS, CONDITIONAL_FLAG_COLUMNS, BUSINESS_COLUMNS,
+        )
+
+        pairs = self._pairs()
+        new_rows = [new for new, _ in pairs] + [self._existing('V99', 'C99')]
+        existing_rows = [old for _, old in pairs]
+        expected = [processor._has_changes(dict(new), old) for new, old in pairs] + [False]
+
+        table = pa.Table.from_pylist(new_rows)
+        changes = columnar.detect_changes(
+            columnar.to_frame(table, COMPARED_COLUMNS),
+            columnar.columns_to_frame(self._columns(existing_rows)),
+            CONDITIONAL_FLAG_COLUMNS, BUSINESS_COLUMNS,
+        )
+
+        assert changes['changed'].tolist() == expected
+        assert changes['matched'].tolist() == [True] * len(pairs) + [False]
+        assert changes['changed_by_flag'] == processor.stats['changes_by_flag']
+        assert changes['changed_by_business_data'] == processor.stats['changes_by_business_data']
+
+    def test_typed_nulls_and_timestamps_are_not_changes(self):
+        """Arrow NULL ints (NaN) and datetime64 equal psycopg2 None / datetime."""
+        import pyarrow as pa
+        from datetime import datetime
+        from lib import columnar
+
+        table = pa.table({
+            'VisitID': ['V1'], 'ConVisitID': ['C1'],
+            'PayerID': pa.array([None], type=pa.int64()),
+            'SchStartTime': pa.array([datetime(2026, 1, 1, 9)], type=pa.timestamp('ns')),
+        })
+        existing = columnar.columns_to_frame({
+            'VisitID': ['V1'], 'ConVisitID': ['C1'], 'PayerID': [None],
+            'SchStartTime': [datetime(2026, 1, 1, 9)],
+        })
+
+        changes = columnar.detect_changes(
+            columnar.to_frame(table, ['VisitID', 'ConVisitID', 'PayerID', 'SchStartTime']),
+            existing, [], ['PayerID', 'SchStartTime'],
+        )
+
+        assert changes['matched'].tolist() == [True]
+        assert changes['changed'].tolist() == [False]
+
+    def test_rebatch_slices_to_batch_size(self):
+        import pyarrow as pa
+        from lib import columnar
+
+        tables = [
+            pa.table({'x': pa.array(range(7), type=pa.int8())}),
+            pa.table({'x': pa.array(range(7, 10), type=pa.int64())}),
+            pa.table({'x': pa.array([], type=pa.int64())}),
+            pa.table({'x': pa.array(range(10, 12), type=pa.int16())}),
+        ]
+
+        batches = list(columnar.rebatch(tables, 5))
+
+        assert [b.num_rows for b in batches] == [5, 5, 2]
+        assert [v for b in batches for v in b.column('x').to_pylist()] == list(range(12))
+
+    def test_arrow_batch_materializes_changed_and_new_rows_only(self, processor):
+        import pyarrow as pa
+
+        pairs = self._pairs()
+        new_rows = [new for new, _ in pairs] + [self._existing('V99', 'C99')]
+        existing = self._columns([old for _, old in pairs])
+        processor.pg_connection = MagicMock()
+
+        with patch.object(processor, '_fetch_existing_records', return_value=existing), \
+             patch.object(processor, '_execute_updates_with_commit', side_effect=len) as upd, \
+             patch.object(processor, '_execute_inserts_with_commit', side_effect=len) as ins:
+            processor._process_arrow_batch(pa.Table.from_pylist(new_rows), 1)
+
+        updates = upd.call_args[0][0]
+        inserted = ins.call_args[0][0]
+        assert len(updates) == 5
+        assert [row['VisitID'] for row in inserted] == ['V99']
+        assert processor.stats['matched_in_postgres'] == 8
+        assert processor.stats['new_conflicts'] == 1
+        assert processor.stats['rows_skipped_no_changes'] == 3
+        assert processor.stats['rows_updated'] == 5
+
+
+class TestExistingRecordLookup:
+    """_fetch_existing_records: prepared uuid[] lookup vs COPYed key table."""
+
+    def _cursor(self, processor, rows, prepared=None):
+        cursor = MagicMock()
+        cursor.fetchone.return_value = prepared
+        cursor.fetchall.return_value = rows
+        processor.pg_connection = MagicMock()
+        processor.pg_connection.cursor.return_value = cursor
+        return cursor
+
+    def test_small_batch_uses_prepared_any_statement(self, processor):
+        from lib.conflict_processor import COMPARED_COLUMNS
+
+        cursor = self._cursor(processor, [])
+        processor._fetch_existing_records(['a', 'b', 'a'])
+        processor._fetch_existing_records(['c'])
+
+        sql = [c[0][0] for c in cursor.execute.call_args_list]
+        prepares = [s for s in sql if s.startswith('PREPARE')]
+        assert len(prepares) == 1
+        assert 'cvm."VisitID" = ANY($1)' in prepares[0]
+        assert ' IN (' not in prepares[0]
+        assert '"CONFLICTID"' not in prepares[0]
+        assert all(f'cvm."{col}"' in prepares[0] for col in COMPARED_COLUMNS)
+        executes = [c[0][1] for c in cursor.execute.call_args_list if c[0][0].startswith('EXECUTE')]
+        assert executes == [('{a,b}',), ('{c}',)]
+        assert processor.pg_connection.commit.call_count == 2
+
+    def test_large_batch_copies_keys_into_temp_table(self, processor):
+        cursor = self._cursor(processor, [])
+        processor.existing_lookup_copy_threshold = 2
+
+        processor._fetch_existing_records(['a', 'b', 'c'])
+
+        assert cursor.copy_from.call_args[0][0].getvalue() == 'a\nb\nc\n'
+        sql = ' '.join(c[0][0] for c in cursor.execute.call_args_list)
+        assert 'JOIN _tmp_lookup_visit_ids k ON k.visit_id = cvm."VisitID"' in sql
+        assert 'PREPARE' not in sql
+
+    def test_returns_columns_with_string_keys(self, processor):
+        import uuid
+        from lib.conflict_processor import COMPARED_COLUMNS
+
+        visit_id = uuid.uuid4()
+        row = (visit_id, None) + ('N',) * (len(COMPARED_COLUMNS) - 2)
+        self._cursor(processor, [row, row], prepared=(1,))
+
+        existing = processor._fetch_existing_records([str(visit_id)])
+
+        assert list(existing) == COMPARED_COLUMNS
+        assert existing['VisitID'] == [str(visit_id)] * 2
+        assert existing['ConVisitID'] == [None, None]
+        assert processor._index_existing_records(existing) == {(str(visit_id), None): 1}
+
+    def test_lookup_error_falls_back_to_empty(self, processor):
+        cursor = self._cursor(processor, [])
+        cursor.execute.side_effect = Exception('boom')
+
+        existing = processor._fetch_existing_records(['a'])
+
+        assert all(values == [] for values in existing.values())
+        processor.pg_connection.rollback.assert_called_once()
+        assert processor._existing_lookup_prepared == set()
+
+
+class TestWriterPipeline:
+    """_run_writer_pipeline: hash-partitioned writers fed by one reader."""
+
+    def _rows(self, count):
+        return [{'VisitID': f'V{i % 7}', 'ConVisitID': f'C{i}'} for i in range(count)]
+
+    def test_writers_own_visit_partitions(self, processor):
+        from lib.utils import visit_partition
+
+        processor.enable_arrow_batches = False
+        processor.pg_writer_workers = 3
+        empty = {'VisitID': [], 'ConVisitID': []}
+        with patch.object(processor, '_fetch_existing_records', return_value=empty), \
+             patch.object(processor, '_execute_inserts_with_commit', side_effect=len) as ins:
+            batches = iter([self._rows(20), self._rows(9)])
+            reader_batches = processor._run_writer_pipeline(batches, processor._process_batch)
+
+        assert reader_batches == 2
+        for call in ins.call_args_list:
+            partitions = {visit_partition(row['VisitID'], 3) for row in call[0][0]}
+            assert len(partitions) == 1
+        assert processor.stats['rows_inserted'] == 29
+        assert processor.stats['new_conflicts'] == 29
+        assert processor.stats['rows_processed'] == 29
+        assert processor.pg_manager.get_connection.call_count == len(
+            {visit_partition(f'V{i}', 3) for i in range(7)}
+        )
+        report = processor.stats['pipeline']
+        assert report['writers'] == 3
+        assert len(report['writer_busy_seconds']) == 3
+        assert report['bound_by'] in ('postgres', 'snowflake')
+
+    def test_writer_failure_stops_reader_and_raises(self, processor):
+        processor.enable_arrow_batches = False
+        processor.pg_writer_workers = 2
+        processor.pipeline_queue_depth = 1
+        with patch.object(processor, '_fetch_existing_records', side_effect=RuntimeError('pg down')):
+            batches = iter([self._rows(10)] * 50)
+            with pytest.raises(RuntimeError, match='pg down'):
+                processor._run_writer_pipeline(batches, processor._process_batch)
+
+        assert processor.stats['errors'] >= 1
+
+    def test_partition_table_matches_row_partitioning(self):
+        import pyarrow as pa
+        from lib import columnar
+        from lib.utils import visit_partition
+
+        table = pa.Table.from_pylist(self._rows(30))
+        parts = columnar.partition_table(table, 4)
+
+        assert sum(part.num_rows for part in parts) == 30
+        for partition, part in enumerate(parts):
+            assert all(visit_partition(v, 4) == partition for v in part.column('VisitID').to_pylist())
+
+
+class TestSeenKeyStreaming:
+    """Step 3 seen keys: binary COPY per batch instead of a run-wide set."""
+
+    def test_binary_copy_payload(self):
+        import struct
+        import uuid
+        from lib.utils import format_copy_binary_uuid_pairs
+
+        first, second = uuid.uuid4(), uuid.uuid4()
+        payload = format_copy_binary_uuid_pairs([(str(first), second), (first, None)])
+
+        assert payload.startswith(b'PGCOPY\n\xff\r\n\x00' + b'\x00' * 8)
+        assert payload.endswith(struct.pack('!h', -1))
+        body = payload[19:-2]
+        assert body[:2] == struct.pack('!h', 2)
+        assert body[2:22] == struct.pack('!i', 16) + first.bytes
+        assert body[22:42] == struct.pack('!i', 16) + second.bytes
+        assert body[42:] == struct.pack('!h', 2) + struct.pack('!i', 16) + first.bytes + struct.pack('!i', -1)
+
+    def test_row_reader_copies_keys_per_batch(self, processor):
+        import uuid
+
+        ids = [str(uuid.uuid4()) for _ in range(5)]
+        cursor = iter([(vid, None) for vid in ids])
+        processor.pg_connection = MagicMock()
+        pg_cursor = processor.pg_connection.cursor.return_value
+
+        batches = list(processor._read_row_batches(
+            cursor, ['VisitID', 'ConVisitID'], 2, None, True
+        ))
+
+        assert [len(b) for b in batches] == [2, 2, 1]
+        copies = pg_cursor.copy_expert.call_args_list
+        assert len(copies) == 3
+        assert 'FORMAT binary' in copies[0][0][0]
+        assert processor.stats['seen_conflict_keys'] == 5
+        assert processor.pg_connection.commit.call_count == 3
+
+    def test_reader_skips_keys_without_stale_cleanup(self, processor):
+        processor.pg_connection = MagicMock()
+
+        list(processor._read_row_batches(iter([('V1', None)]), ['VisitID', 'ConVisitID'], 2, None, False))
+
+        processor.pg_connection.cursor.assert_not_called()
+
+
+class TestContentHash:
+    """ContentHash: computed in Step 3, stored on conflictvisitmaps, used to skip full compares."""
+
+    def test_step3_selects_hash_only_when_enabled(self, query_builder, db_names,
+                                                  sample_settings, sample_mph_data):
+        from lib.query_builder import CONTENT_HASH_COLUMNS
+
+        def build(enabled):
+            return query_builder.build_conflict_detection_query_v3(
+                db_names=db_names, excluded_agencies=[], excluded_ssns=[],
+                settings_data=sample_settings, mph_data=sample_mph_data,
+                enable_content_hash=enabled,
+            )['step3']
+
+        sql = build(True)
+        assert 'AS "ContentHash"' in sql
+        assert '"SchVisitTimeSame"' in sql.split('HASH(')[1]
+        assert sql.split('HASH(')[1].split(')')[0].count('"') == 2 * len(CONTENT_HASH_COLUMNS)
+        assert 'ContentHash' not in build(False)
+
+    def test_insert_template_includes_hash_when_enabled(self, query_builder, db_names):
+        sql, sf_columns = query_builder.build_insert_template(db_names, include_content_hash=True)
+        plain_sql, plain_columns = query_builder.build_insert_template(db_names)
+
+        assert sf_columns[-1] == 'ContentHash'
+        assert '"ContentHash"' in sql
+        assert 'ContentHash' not in plain_columns
+        assert '"ContentHash"' not in plain_sql
+
+    def test_row_batch_compares_only_rows_with_changed_hash(self, processor):
+        processor.enable_content_hash = True
+        batch = [
+            {'VisitID': 'V1', 'ConVisitID': 'C1', 'ContentHash': 11, 'ProviderID': 'P1'},
+            {'VisitID': 'V2', 'ConVisitID': 'C2', 'ContentHash': 22, 'ProviderID': 'P2'},
+            {'VisitID': 'V3', 'ConVisitID': 'C3', 'ContentHash': 33, 'ProviderID': 'P3'},
+            {'VisitID': 'V4', 'ConVisitID': None, 'ContentHash': 44, 'ProviderID': 'P4'},
+        ]
+        hashes = {'VisitID': ['V1', 'V2', 'V3'], 'ConVisitID': ['C1', 'C2', 'C3'],
+                  'ContentHash': [11, 0, None]}
+        full = {'VisitID': ['V2', 'V3'], 'ConVisitID': ['C2', 'C3'], 'ProviderID': ['OLD', 'P3']}
+
+        def fetch(visit_ids, columns=None, statement=None):
+            if columns and 'ContentHash' in columns:
+                return hashes
+            assert visit_ids == ['V2', 'V3']
+            return full
+
+        with patch.object(processor, '_fetch_existing_records', side_effect=fetch), \
+             patch.object(processor, '_execute_updates_with_commit', side_effect=len) as upd, \
+             patch.object(processor, '_execute_inserts_with_commit', side_effect=len) as ins, \
+             patch.object(processor, '_sync_content_hashes') as sync:
+            processor._process_batch(batch, 1)
+
+        assert [row['VisitID'] for row in upd.call_args[0][0]] == ['V2']
+        assert [row['VisitID'] for row in ins.call_args[0][0]] == ['V4']
+        assert sync.call_args[0][0] == [('V3', 'C3', 33)]
+        assert processor.stats['rows_skipped_by_hash'] == 1
+        assert processor.stats['rows_skipped_no_changes'] == 2
+        assert processor.stats['matched_in_postgres'] == 3
+
+    def test_arrow_batch_matches_row_batch(self, processor):
+        import pyarrow as pa
+
+        processor.enable_content_hash = True
+        rows = [
+            {'VisitID': 'V1', 'ConVisitID': 'C1', 'ContentHash': 11, 'ProviderID': 'P1'},
+            {'VisitID': 'V2', 'ConVisitID': 'C2', 'ContentHash': 22, 'ProviderID': 'P2'},
+            {'VisitID': 'V3', 'ConVisitID': 'C3', 'ContentHash': 33, 'ProviderID': 'P3'},
+        ]
+        hashes = {'VisitID': ['V1', 'V2', 'V3'], 'ConVisitID': ['C1', 'C2', 'C3'],
+                  'ContentHash': [11, 0, None]}
+        full = {'VisitID': ['V2', 'V3'], 'ConVisitID': ['C2', 'C3'], 'ProviderID': ['OLD', 'P3']}
+
+        def fetch(visit_ids, columns=None, statement=None):
+            return hashes if columns and 'ContentHash' in columns else full
+
+        with patch.object(processor, '_fetch_existing_records', side_effect=fetch), \
+             patch.object(processor, '_execute_updates_with_commit', side_effect=len) as upd, \
+             patch.object(processor, '_sync_content_hashes') as sync:
+            processor._process_arrow_batch(pa.Table.from_pylist(rows), 1)
+
+        assert [row['VisitID'] for row in upd.call_args[0][0]] == ['V2']
+        assert sync.call_args[0][0] == [('V3', 'C3', 33)]
+        assert processor.stats['rows_skipped_by_hash'] == 1
+        assert processor.stats['rows_skipped_no_changes'] == 2
+
+    def test_missing_column_disables_hash(self, processor):
+        processor.enable_content_hash = True
+        processor.pg_manager.execute_query.return_value = []
+
+        assert processor.check_content_hash_column() is False
+        assert processor.enable_content_hash is False
+
+
+class TestServerSideDiff:
+    """diff_mode='server': batches are COPYed to a temp table and diffed in Postgres."""
+
+    SF_COLUMNS = ['VisitID', 'ConVisitID', 'SameSchTimeFlag', 'ProviderID', 'VisitDate']
+
+    def test_diff_sql_inserts_new_and_updates_distinct(self, query_builder, db_names):
+        diff = query_builder.build_server_diff(db_names, self.SF_COLUMNS)
+
+        sql = diff['diff_sql']
+        assert 'INSERT INTO conflict_dev.conflictvisitmaps' in sql
+        assert 'WHERE NOT EXISTS (' in sql
+        assert 'UPDATE conflict_dev.conflictvisitmaps AS CVM' in sql
+        assert '(CVM."SameSchTimeFlag" = \'N\' AND S."SameSchTimeFlag" IS DISTINCT FROM CVM."SameSchTimeFlag")' in sql
+        assert ') IS DISTINCT FROM (' in sql
+        assert 'CVM."ConVisitID" IS NOT DISTINCT FROM S."ConVisitID"' in sql
+        assert diff['sf_columns'] == [c for c in diff['sf_columns'] if c in self.SF_COLUMNS]
+        assert 'FORMAT csv, HEADER true' in diff['copy_csv_sql']
+        assert 'ON COMMIT DELETE ROWS' in diff['create_sql']
+
+    def test_diff_sql_respects_flags(self, query_builder, db_names):
+        diff = query_builder.build_server_diff(
+            db_names, self.SF_COLUMNS, skip_unchanged_records=False, enable_insert=False
+        )
+
+        assert 'IS DISTINCT FROM CVM.' not in diff['diff_sql']
+        assert 'INSERT INTO' not in diff['diff_sql']
+        assert 'inserted AS (SELECT 1 WHERE FALSE)' in diff['diff_sql']
+
+    def test_server_side_batch_counts(self, processor):
+        import pyarrow as pa
+
+        processor.diff_mode = 'server'
+        cursor = processor.pg_manager.get_connection.return_value.cursor.return_value
+        cursor.fetchone.return_value = (3, 1, 2)
+        rows = [{'VisitID': f'V{i}', 'ConVisitID': f'C{i}', 'ProviderID': 'P'} for i in range(5)]
+
+        processor._process_batch_server_side(pa.Table.from_pylist(rows), 1)
+
+        copy_sql, buffer = cursor.copy_expert.call_args[0]
+        assert 'FORMAT csv' in copy_sql
+        assert buffer.getvalue().count(b'\n') == 6
+        assert processor.stats['matched_in_postgres'] == 3
+        assert processor.stats['new_conflicts'] == 2
+        assert processor.stats['rows_updated'] == 1
+        assert processor.stats['rows_inserted'] == 2
+        assert processor.stats['rows_skipped_no_changes'] == 2
+        assert processor._server_diff_table_created is True
+
+    def test_row_batch_uses_text_copy(self, processor):
+        cursor = processor.pg_manager.get_connection.return_value.cursor.return_value
+        cursor.fetchone.return_value = (0, 0, 1)
+
+        processor._process_batch_server_side([{'VisitID': 'V1', 'ConVisitID': None, 'ProviderID': 'P'}], 1)
+
+        copy_sql, buffer = cursor.copy_expert.call_args[0]
+        assert 'FORMAT csv' not in copy_sql
+        assert buffer.getvalue() == 'P\tV1\t\\N\n'
+        assert processor.stats['rows_inserted'] == 1
+
+    def test_unknown_diff_mode_rejected(self, processor):
+        from lib.conflict_processor import ConflictProcessor
+
+        with pytest.raises(ValueError):
+            ConflictProcessor(processor.sf_manager, processor.pg_manager, processor.query_builder,
+                              processor.db_names, 10, diff_mode='remote')
+
+
+class TestSetupGraph:
+    """Steps 0-3 submitted asynchronously with only data dependencies as edges."""
+
+    QUERIES = {
+        'step0_create': 'CREATE excluded_ssns_temp',
+        'step0_inserts': ['INSERT 1', 'INSERT 2'],
+        'step1': 'CREATE delta_keys',
+        'step2': 'CREATE base_visits',
+        'step2_asym_insert': 'INSERT base_visits',
+        'step2d': 'SELECT visit_date, ssn FROM delta_keys',
+        'step3': 'SELECT conflicts',
+    }
+
+    @staticmethod
+    def _cursor(polls_running=None):
+        """Fake cursor whose queries finish after the given number of polls (by SQL)."""
+        cursor = MagicMock()
+        polls_running = dict(polls_running or {})
+        submitted = []
+        by_id = {}
+
+        def execute_async(sql):
+            cursor.sfqid = f'q{len(submitted)}'
+            by_id[cursor.sfqid] = sql
+            submitted.append(sql)
+
+        def status(query_id):
+            return query_id
+
+        def still_running(query_id):
+            sql = by_id[query_id]
+            if polls_running.get(sql, 0) > 0:
+                polls_running[sql] -= 1
+                return True
+            return False
+
+        cursor.execute_async.side_effect = execute_async
+        cursor.connection.get_query_status_throw_if_error.side_effect = status
+        cursor.connection.is_still_running.side_effect = still_running
+        return cursor, submitted
+
+    def test_edges_follow_temp_table_dependencies(self, processor):
+        nodes = {n['name']: n['deps'] for n in processor._build_setup_graph(self.QUERIES, MagicMock())}
+
+        ssn_nodes = ['step0_create', 'step0_insert_1', 'step0_insert_2']
+        assert nodes['step0_insert_2'] == ['step0_create']
+        assert nodes['step1'] == ssn_nodes
+        assert nodes['step2a'] == ssn_nodes
+        assert nodes['step2b'] == ['step1', 'step2a']
+        assert nodes['step2d'] == ['step1', 'pg_prepare']
+        assert nodes['step3'] == ['step2a', 'step2b']
+
+    def test_symmetric_graph_skips_part_b(self, processor):
+        queries = {k: v for k, v in self.QUERIES.items() if k != 'step2_asym_insert'}
+        processor.enable_stale_cleanup = False
+
+        nodes = {n['name']: n['deps'] for n in processor._build_setup_graph(queries, MagicMock())}
+
+        assert 'step2b' not in nodes and 'step2d' not in nodes
+        assert nodes['step3'] == ['step2a']
+
+    def test_independent_statements_overlap(self, processor):
+        cursor, submitted = self._cursor({'CREATE delta_keys': 3})
+        nodes = processor._build_setup_graph(self.QUERIES, MagicMock())
+        for node in nodes:
+            if node['run']:
+                node['run'] = lambda: None
+
+        with patch('lib.conflict_processor.ASYNC_POLL_SECONDS', 0):
+            query_ids = processor._run_setup_graph(cursor, nodes)
+
+        # step2a is submitted while step1 is still running; step2b waits for both
+        assert submitted.index('CREATE base_visits') < submitted.index('INSERT base_visits')
+        assert submitted[3:5] == ['CREATE delta_keys', 'CREATE base_visits']
+        assert submitted[-1] == 'SELECT conflicts'
+        assert query_ids['step3'] == 'q6'
+        report = {n['node']: n for n in processor.stats['setup_graph']['nodes']}
+        assert report['step2b']['start_seconds'] >= report['step1']['end_seconds']
+        assert len(report) == len(nodes)
+
+    def test_failure_cancels_running_queries(self, processor):
+        cursor, _submitted = self._cursor({'CREATE base_visits': 100})
+        nodes = processor._build_setup_graph(
+            {'step1': 'CREATE delta_keys', 'step2': 'CREATE base_visits', 'step3': 'SELECT conflicts'},
+            MagicMock(),
+        )
+        nodes[0]['sql'] = None
+        nodes[0]['run'] = MagicMock(side_effect=RuntimeError('boom'))
+
+        with patch('lib.conflict_processor.ASYNC_POLL_SECONDS', 0), pytest.raises(RuntimeError):
+            processor._run_setup_graph(cursor, nodes)
+
+        cursor.execute.assert_called_once_with("SELECT SYSTEM$CANCEL_QUERY('q0')")
+
+    def test_shutdown_returns_none(self, processor):
+        cursor, _submitted = self._cursor({'CREATE base_visits': 100})
+        nodes = processor._build_setup_graph({'step2': 'CREATE base_visits', 'step3': 'SELECT'}, MagicMock())
+        polls = iter([False, True])
+
+        with patch('lib.conflict_processor.ASYNC_POLL_SECONDS', 0):
+            assert processor._run_setup_graph(cursor, nodes, lambda: next(polls)) is None
+        assert cursor.execute.called
+
+    def test_reference_data_fetched_concurrently(self, processor):
+        results = {
+            'agenc': [('A1',), (None,)],
+            'ssn': [('111',)],
+            'setting': [(120,)],
+            'mph': [(0, 10, 25)],
+        }
+
+        def execute_query(query, params=None, database=None):
+            key = next(k for k in results if k in query.lower())
+            return results[key]
+
+        with patch.object(processor.query_builder, 'build_reference_query', side_effect=lambda f, db: f):
+            processor.pg_manager.execute_query.side_effect = execute_query
+            ref = processor.fetch_reference_data()
+
+        assert ref['excluded_agencies'] == ['A1']
+        assert ref['excluded_ssns'] == ['111']
+        assert ref['settings'] == {'ExtraDistancePer': 120}
+        assert ref['mph'] == [{'From': 0, 'To': 10, 'AverageMilesPerHour': 25}]
+        assert processor.pg_manager.execute_query.call_count == 4
+
+
+class TestRunContext:
+    """Reference data and the excluded-SSN Snowflake session built once per run."""
+
+    @staticmethod
+    def _context(db_names):
+        from lib.run_context import RunContext
+
+        context = RunContext({}, {}, db_names)
+        context.connections = MagicMock()
+        pg_manager = context.connections.get_postgres_manager.return_value
+        pg_manager.execute_query.side_effect = lambda query, params=None, database=None: (
+            [('111',), ('222',)] if 'ssn' in query.lower() else []
+        )
+        return context
+
+    def test_reference_data_fetched_once(self, db_names):
+        context = self._context(db_names)
+
+        first = context.reference_data()
+        second = context.reference_data()
+
+        assert first is second
+        assert first['excluded_ssns'] == ['111', '222']
+        assert context.connections.get_postgres_manager.return_value.execute_query.call_count == 4
+
+    def test_excluded_ssns_loaded_once_per_session(self, db_names):
+        context = self._context(db_names)
+        sf_manager = context.connections.get_snowflake_manager.return_value
+        cursor = sf_manager.streaming_cursor.return_value.__enter__.return_value
+
+        assert context.snowflake_manager() is sf_manager
+        context.snowflake_manager()
+
+        statements = [c[0][0] for c in cursor.execute.call_args_list]
+        assert len(statements) == 2
+        assert statements[0].startswith('CREATE TEMPORARY TABLE IF NOT EXISTS excluded_ssns_temp')
+        assert "('111'),('222')" in statements[1]
+
+        # A reconnect loses the temp table, so it is loaded again
+        sf_manager.get_connection.return_value = MagicMock()
+        context.snowflake_manager()
+        assert cursor.execute.call_count == 4
+
+    def test_concurrent_callers_share_one_snowflake_session(self, db_names):
+        import threading
+        import time
+
+        context = self._context(db_names)
+        sf_manager = MagicMock()
+
+        def slow_login():
+            time.sleep(0.05)
+            return sf_manager
+
+        context.connections.get_snowflake_manager.side_effect = slow_login
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(context.snowflake_manager()))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert results == [sf_manager] * 4
+        assert context.connections.get_snowflake_manager.call_count == 1
+
+    def test_builders_share_excluded_ssns_statements(self, query_builder, db_names,
+                                                      sample_settings, sample_mph_data):
+        from lib.query_builder import EXCLUDED_SSNS_TEMP_DDL
+
+        v3 = query_builder.build_conflict_detection_query_v3(
+            db_names=db_names, excluded_agencies=[], excluded_ssns=['1'],
+            settings_data=sample_settings, mph_data=sample_mph_data,
+        )
+        inservice = query_builder.build_inservice_queries(
+            db_names=db_names, excluded_agencies=[], excluded_ssns=['1'],
+            lookback_years=2, lookforward_days=45,
+        )
+
+        assert v3['step0_create'] == inservice['step0_create'] == EXCLUDED_SSNS_TEMP_DDL
+        assert v3['step0_inserts'] == inservice['step0_inserts']
+
+    def test_actions_accept_run_context(self):
+        import inspect
+        from scripts.actions.task02_00_conflict_update import run_task02_00_conflict_update
+        from scripts.actions.task02_01_inservice_conflict import run_task02_01_inservice_conflict
+
+        for action in (run_task02_00_conflict_update, run_task02_01_inservice_conflict):
+            assert 'run_context' in inspect.signature(action).parameters
+
+
+class TestActionScheduler:
+    """Actions declare tables; independent ones run concurrently under a connection budget."""
+
+    def test_default_pipeline_dependencies(self):
+        from scripts.main import ACTION_REGISTRY, DEFAULT_ACTIONS
+        from lib.scheduler import build_dependencies
+
+        deps = build_dependencies([ACTION_REGISTRY[a] for a in DEFAULT_ACTIONS])
+        named = {DEFAULT_ACTIONS[i]: {DEFAULT_ACTIONS[d] for d in ds} for i, ds in enumerate(deps)}
+
+        # Both task02 actions write conflictvisitmaps, so they never overlap
+        assert named['task02_01_inservice_conflict'] == {
+            'task00_preflight', 'task01_copy_to_staging', 'task02_00_conflict_update'
+        }
+        assert {'task02_00_conflict_update', 'task02_01_inservice_conflict'} <= named['task03_status_management']
+        assert named['task99_postflight'] == set(DEFAULT_ACTIONS[:-1])
+        assert all(callable(ACTION_REGISTRY[a]['handler']) for a in ACTION_REGISTRY)
+
+    def test_resource_partitions(self):
+        from lib.scheduler import resources_overlap, items_conflict
+
+        assert resources_overlap('conflictvisitmaps', 'conflictvisitmaps[inservice]')
+        assert resources_overlap('conflictvisitmaps[regular]', 'conflictvisitmaps[regular]')
+        assert not resources_overlap('conflictvisitmaps[regular]', 'conflictvisitmaps[inservice]')
+        assert not items_conflict({'reads': ['a']}, {'reads': ['a']})
+        assert items_conflict({'reads': ['a']}, {'writes': ['a']})
+        assert items_conflict({}, {'barrier': True})
+
+    def test_independent_items_overlap(self):
+        import threading
+        from lib.scheduler import run_graph
+
+        both_running = threading.Barrier(2, timeout=5)
+
+        def run(i):
+            both_running.wait()
+            return {'status': 'success'}
+
+        records = run_graph(['a', 'b'], [{'writes': ['x']}, {'writes': ['y']}], run, connection_budget=2)
+
+        assert [r['status'] for r in records] == ['success', 'success']
+
+    def test_budget_and_conflicts_serialize(self):
+        import threading
+        import time
+        from lib.scheduler import run_graph
+
+        active, peak = [0], [0]
+        lock = threading.Lock()
+
+        def run(i):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return {}
+
+        items = [{'writes': ['x'], 'connections': 2}, {'writes': ['y'], 'connections': 2}]
+        run_graph(['a', 'b'], items, run, connection_budget=3)
+        assert peak[0] == 1
+
+        peak[0] = 0
+        records = run_graph(['a', 'b'], [{'writes': ['x']}, {'reads': ['x']}], run, connection_budget=8)
+        assert peak[0] == 1
+        assert records[1]['deps'] == ['a']
+        assert records[1]['start'] >= records[0]['end']
+
+    def test_failure_and_shutdown_stop_new_items(self):
+        from lib.scheduler import run_graph
+
+        finished = []
+        records = run_graph(
+            ['a', 'b'], [{}, {}], lambda i: {'status': 'failed' if i == 0 else 'success'},
+            is_success=lambda r: r['status'] == 'success',
+            on_finish=lambda i, r: finished.append(i),
+        )
+        assert [r['status'] for r in records] == ['failed', 'skipped']
+        assert finished == [0]
+
+        records = run_graph(['a'], [{}], lambda i: {}, should_stop=lambda: True)
+        assert records[0]['start'] is None
+
+    def test_exception_reraised_after_running_items(self):
+        from lib.scheduler import run_graph
+
+        def run(i):
+            raise RuntimeError('boom')
+
+        with pytest.raises(RuntimeError):
+            run_graph(['a'], [{}], run)
+
+    def test_critical_path_report(self):
+        from lib.scheduler import critical_path, format_critical_path
+
+        records = [
+            {'name': 'pre', 'deps': [], 'start': 0.0, 'end': 1.0, 'seconds': 1.0},
+            {'name': 'big', 'deps': ['pre'], 'start': 1.0, 'end': 10.0, 'seconds': 9.0},
+            {'name': 'small', 'deps': ['pre'], 'start': 1.0, 'end': 3.0, 'seconds': 2.0},
+            {'name': 'post', 'deps': ['pre', 'big', 'small'], 'start': 11.0, 'end': 12.0, 'seconds': 1.0},
+        ]
+
+        path = critical_path(records)
+
+        assert [r['name'] for r in path] == ['pre', 'big', 'post']
+        assert path[-1]['waited'] == 1.0
+        lines = format_critical_path(records)
+        assert lines[0].startswith('Critical path (11.0s of 12.0s wall, 13.0s')
+        assert 'waited 1.0s' in lines[-1]
+
+
+class TestTask03ParallelSteps:
+    """Tests the task03 step read/write sets and parallel runner."""
+
+    def _get_steps(self):
+        from scripts.actions.task03_status_management import _build_steps
+        return _build_steps(
+            schema='conflict_dev',
+            lookback_years=2,
+            lookforward_days=45,
+        )
+
+    def _dependencies(self, steps):
+        from scripts.actions.task03_status_management import _step_item
+        from lib.scheduler import build_dependencies
+        deps = build_dependencies([_step_item(s) for s in steps])
+        return {
+            step['name']: {steps[j]['name'] for j in deps[i]}
+            for i, step in enumerate(steps)
+        }
+
+    def test_every_step_declares_reads_and_writes(self):
+        for step in self._get_steps():
+            assert step['reads'], step['name']
+            assert step['writes'], step['name']
+            assert any(w.endswith('[row locks]') for w in step['writes']), step['name']
+
+    def test_cf_and_cvm_cascades_are_independent(self):
+        deps = self._dependencies(self._get_steps())
+        assert 'ismissed_cascade_cvm' not in deps['ismissed_cascade_cf']
+        assert 'ismissed_cascade_cvm' not in deps['aggregation_mark_updatedrflag']
+        assert 'noresponse_flag_cf' not in deps['noresponse_flag_cvm']
+
+    def test_true_dependencies_kept(self):
+        deps = self._dependencies(self._get_steps())
+        # Reads CVM StatusFlag written by the CVM cascades
+        assert 'updateflag_orphan_cleanup' in deps['aggregation_status_u_propagation']
+        # Reads CF StatusFlag written by the CF cascades
+        assert 'aggregation_status_u_propagation' in deps['cascade_resolve_cvm']
+        assert 'cascade_resolve_cvm' in deps['cascade_resolve_cf']
+        # Same-table UPDATEs keep their order
+        assert 'computed_time_columns' in deps['computed_billed_rate']
+        assert 'deleted_visits_cvm' in deps['deleted_visits_cf']
+
+    def test_run_steps_uses_session_and_worker_connections(self):
+        from scripts.actions.task03_status_management import _run_steps
+
+        steps = [s for s in self._get_steps()
+                 if s['name'] in ('deleted_visits_cvm', 'ismissed_cascade_cf', 'noresponse_flag_cf')]
+        session_conn = MagicMock()
+        session_conn.cursor.return_value.rowcount = 1
+        worker_conn = MagicMock()
+        worker_conn.cursor.return_value.rowcount = 2
+        pg_manager = MagicMock()
+        pg_manager.get_connection.return_value = worker_conn
+
+        records = _run_steps(pg_manager, 'conflict', session_conn, steps,
+                             first_step_num=2, total_steps=4, max_parallel=2)
+
+        assert [r['result']['rows_affected'] for r in records] == [1, 2, 2]
+        assert all(r['result']['status'] == 'ok' for r in records)
+        assert records[2]['deps'] == ['ismissed_cascade_cf']
+        # One worker connection, reused and closed at the end
+        pg_manager.get_connection.assert_called_once_with(database='conflict')
+        worker_conn.close.assert_called_once()
+        session_conn.close.assert_not_called()
+
+    def test_failed_step_does_not_stop_later_steps(self):
+        from scripts.actions.task03_status_management import _run_steps
+
+        steps = [s for s in self._get_steps()
+                 if s['name'] in ('computed_time_columns', 'computed_billed_rate')]
+        conn = MagicMock()
+        conn.cursor.return_value.rowcount = 0
+        conn.cursor.return_value.execute.side_effect = [None, Exception('timeout'), None, None]
+
+        records = _run_steps(MagicMock(), 'conflict', conn, steps,
+                             first_step_num=1, total_steps=2, share_session=True)
+
+        assert [r['result']['status'] for r in records] == ['error', 'ok']
+
+
+class TestTask03ChunkedSteps:
+    """Tests the task03 slice planning and chunked step execution."""
+
+    def _get_step(self, name):
+        from scripts.actions.task03_status_management import _build_steps
+        steps = _build_steps(schema='conflict_dev', lookback_years=2, lookforward_days=45)
+        return [s for s in steps if s['name'] == name][0]
+
+    def _chunking(self, slices, **overrides):
+        chunking = {'slices': slices, 'workers': 2, 'retries': 1,
+                    'progress_table': 'conflict_dev.task03_slice_progress', 'completed': {}}
+        chunking.update(overrides)
+        return chunking
+
+    def _pool(self, conn):
+        from scripts.actions.task03_status_management import _ConnectionPool
+        pg_manager = MagicMock()
+        pg_manager.get_connection.return_value = conn
+        return _ConnectionPool(pg_manager, 'conflict')
+
+    def test_sliceable_steps(self):
+        from scripts.actions.task03_status_management import _is_sliceable
+        assert _is_sliceable(self._get_step('ismissed_cascade_cvm'))
+        assert _is_sliceable(self._get_step('computed_billed_rate'))
+        # Counts sibling rows across dates, so it must run whole
+        assert not _is_sliceable(self._get_step('cascade_resolve_cvm'))
+        assert not _is_sliceable(self._get_step('deleted_visits_cvm'))
+
+    def test_apply_slice_uses_target_alias(self):
+        from scripts.actions.task03_status_management import _apply_slice
+        predicate = "{t}\"VisitDate\" >= DATE '2024-01-01' AND {t}\"VisitDate\" < DATE '2024-02-01'"
+
+        aliased = _apply_slice(self._get_step('noresponse_flag_cvm')['sql'], predicate)
+        bare = _apply_slice(self._get_step('computed_reverse_uuid')['sql'], predicate)
+
+        assert 'CVM."VisitDate" >= DATE \'2024-01-01\'' in aliased
+        assert 'AND "VisitDate" < DATE \'2024-02-01\'' in bare
+        assert '/* slice' not in aliased and '/* slice' not in bare
+
+    def test_plan_visit_date_slices(self):
+        from datetime import date
+        from scripts.actions.task03_status_management import _plan_slices
+        conn = MagicMock()
+        conn.cursor.return_value.fetchone.return_value = (date(2024, 1, 1), date(2024, 3, 5))
+
+        slices = _plan_slices(conn, 'conflict_dev', 'visit_date', 31, 2, 45)
+
+        assert [key for key, _ in slices] == [
+            '2024-01-01..2024-02-01', '2024-02-01..2024-03-03', '2024-03-03..2024-03-05',
+        ]
+        assert "\"VisitDate\" < DATE '2024-03-05'" in slices[-1][1]
+
+    def test_plan_id_slices(self):
+        from scripts.actions.task03_status_management import _plan_slices
+        conn = MagicMock()
+        conn.cursor.return_value.fetchone.return_value = (1, 250)
+
+        slices = _plan_slices(conn, 'conflict_dev', 'id', 100, 2, 45)
+
+        assert [key for key, _ in slices] == ['id:1..101', 'id:101..201', 'id:201..301']
+        conn.cursor.return_value.fetchone.return_value = (None, None)
+        assert _plan_slices(conn, 'conflict_dev', 'id', 100, 2, 45) == []
+
+    def test_completed_slices_are_skipped(self):
+        from scripts.actions.task03_status_management import _execute_chunked_step
+        conn = MagicMock()
+        conn.cursor.return_value.rowcount = 3
+        slices = [('a', '{t}"ID" < 1'), ('b', '{t}"ID" < 2'), ('c', '{t}"ID" < 3')]
+        step = self._get_step('computed_time_columns')
+
+        result = _execute_chunked_step(self._pool(conn), step, 1, 1,
+                                       self._chunking(slices, completed={step['name']: {'b'}}))
+
+        assert result['status'] == 'ok'
+        assert result['rows_affected'] == 6
+        assert result['slices_resumed'] == 1
+        executed = [c[0][0] for c in conn.cursor.return_value.execute.call_args_list]
+        assert sum('task03_slice_progress' in sql for sql in executed) == 2
+        assert not any('"ID" < 2' in sql for sql in executed)
+
+    def test_upstream_actions_reset_slice_progress(self):
+        from scripts.main import _rewrites_task03_inputs
+
+        assert _rewrites_task03_inputs('task02_00_conflict_update')
+        assert _rewrites_task03_inputs('task02_01_inservice_conflict')
+        assert not _rewrites_task03_inputs('task01_copy_to_staging')
+        assert not _rewrites_task03_inputs('task03_status_management')
+        assert not _rewrites_task03_inputs('task99_postflight')
+
+    def test_reset_slice_progress(self):
+        from scripts.actions import task03_status_management as task03
+        settings = MagicMock()
+        settings.get_database_names.return_value = {'pg_schema': 'conflict_dev', 'pg_database': 'conflict'}
+
+        with patch.object(task03, 'ConnectionFactory') as factory:
+            conn = factory.return_value.get_postgres_manager.return_value.get_connection.return_value
+            cursor = conn.cursor.return_value
+            cursor.fetchone.return_value = (1,)
+            task03.reset_slice_progress(settings)
+            assert 'DELETE FROM conflict_dev.task03_slice_progress' in cursor.execute.call_args[0][0]
+
+            # No progress table: nothing to clear
+            cursor.reset_mock()
+            cursor.fetchone.return_value = None
+            task03.reset_slice_progress(settings)
+            assert cursor.execute.call_count == 1
+            conn.close.assert_called()
+
+    def test_failed_slice_is_retried_on_fresh_connection(self):
+        from scripts.actions import task03_status_management as task03
+        conn = MagicMock()
+        conn.cursor.return_value.rowcount = 1
+        # SET LOCAL ok, UPDATE fails; then SET LOCAL, UPDATE, progress insert
+        conn.cursor.return_value.execute.side_effect = [None, Exception('timeout'), None, None, None]
+
+        with patch.object(task03, 'CHUNK_RETRY_DELAY_SECONDS', 0):
+            result = task03._execute_chunked_step(
+                self._pool(conn), self._get_step('computed_billed_rate'), 1, 1,
+                self._chunking([('a', '{t}"ID" < 1')]),
+            )
+
+        assert result['status'] == 'ok'
+        assert result['rows_affected'] == 1
+        conn.rollback.assert_called_once()
+        conn.close.assert_called_once()
+
+    def test_failed_connect_is_retried(self):
+        from scripts.actions import task03_status_management as task03
+        conn = MagicMock()
+        conn.cursor.return_value.rowcount = 1
+        pool = self._pool(conn)
+        pool.pg_manager.get_connection.side_effect = [Exception('too many clients'), conn]
+
+        with patch.object(task03, 'CHUNK_RETRY_DELAY_SECONDS', 0):
+            result = task03._execute_chunked_step(
+                pool, self._get_step('computed_billed_rate'), 1, 1,
+                self._chunking([('a', '{t}"ID" < 1')]),
+            )
+
+        assert result['status'] == 'ok'
+        assert result['rows_affected'] == 1
+        assert pool.pg_manager.get_connection.call_count == 2
+        conn.close.assert_not_called()
+
+    def test_slice_failing_every_attempt_reports_error(self):
+        from scripts.actions import task03_status_management as task03
+        conn = MagicMock()
+        conn.cursor.return_value.rowcount = 1
+        conn.cursor.return_value.execute.side_effect = Exception('boom')
+
+        with patch.object(task03, 'CHUNK_RETRY_DELAY_SECONDS', 0):
+            result = task03._execute_chunked_step(
+                self._pool(conn), self._get_step('computed_billed_rate'), 1, 1,
+                self._chunking([('a', '{t}"ID" < 1')], progress_table=None),
+            )
+
+        assert result['status'] == 'error'
+        assert result['slices_failed'] == 1
+        assert 'boom' in result['error']